@@ -0,0 +1,281 @@
+"""Derive the addresses of many mnemonics, to check backups against wallets
+
+For every mnemonic (and passphrase), the first --count receive and change
+addresses of each of the first --accounts accounts are derived in any of
+these formats:
+
+p2pkh: legacy Base58Check addresses (1...), BIP 44
+p2sh-p2wpkh: segwit nested in P2SH (3...), BIP 49
+p2wpkh: native segwit Bech32 addresses (bc1q...), BIP 84
+
+The account key is at the path template (default: DEFAULT_TEMPLATE, where
+{purpose} is the format's BIP number), and addresses are at
+<account>/<change>/<index> as in BIP 44, change 0 for receive addresses and
+1 for change addresses.
+
+Each mnemonic costs a 2048 iteration PBKDF2-HMAC-SHA512 for its seed, then
+per address a child key derivation, a public key and one or two hash160s.
+Mnemonics are handled in chunks on a process pool, with a bounded number of
+chunks in flight, and the public keys of a mnemonic are computed together
+with a single modular inverse (bip32.public_keys). Output is one JSON object
+per address, in input order, streamed as chunks complete.
+
+Records carry the input line number and the master key fingerprint, never
+the mnemonic or passphrase. A line that isn't a valid mnemonic, or whose
+passphrase isn't valid UTF-8, gets a single record with an error instead of
+addresses.
+
+Input has one mnemonic per line, optionally followed by a tab and its
+passphrase (otherwise --passphrase is used).
+
+$ python addresses.py backups.txt --count 20 --accounts 2 > addresses.jsonl
+$ python addresses.py - --formats p2wpkh --template "m/{purpose}'/1'/{account}'"
+"""
+#Python Standard Library 2.7
+import sys
+import json
+import time
+import argparse
+import binascii
+import collections
+import multiprocessing
+
+#bip39_gym modules
+import bip32 #bip32.py
+import bip39 #bip39.py
+
+#format: (BIP 44 purpose, address of a compressed public key)
+FORMATS = collections.OrderedDict([
+    ('p2pkh', (44, bip32.p2pkh_address)),
+    ('p2sh-p2wpkh', (49, bip32.p2sh_p2wpkh_address)),
+    ('p2wpkh', (84, bip32.p2wpkh_address))])
+
+#BIP 44: m / purpose' / coin_type' / account', Bitcoin mainnet
+DEFAULT_TEMPLATE = "m/{purpose}'/0'/{account}'"
+
+#BIP 44: "Address gap limit is currently set to 20"
+DEFAULT_COUNT = 20
+
+#receive and change chains
+CHAINS = (0, 1)
+
+CHUNK_MNEMONICS = 8
+CHUNKS_IN_FLIGHT_PER_PROCESS = 2
+
+def account_path(template, purpose, account):
+    """Path of an account key from a template
+
+    Raises: ValueError if the result isn't a derivation path
+    """
+    try:
+        path = template.format(purpose=purpose, account=account)
+    except (KeyError, IndexError):
+        raise ValueError("Template fields are {{purpose}} and {{account}}: "
+                         "{0}".format(template))
+    bip32.parse_path(path)
+    return path
+
+def derive_addresses(seed, formats=tuple(FORMATS), accounts=1,
+                     count=DEFAULT_COUNT, template=DEFAULT_TEMPLATE):
+    """Addresses of a raw seed
+
+    Returns: List of (format, account, change, index, path, address), by
+        format, account, change and index
+
+    Raises: ValueError for an unknown format or a bad template
+    """
+    master_private, master_chain = bip32.master_key(seed)
+    leaves = []
+    private_keys = []
+    for address_format in formats:
+        if address_format not in FORMATS:
+            raise ValueError("Unknown address format: {0}".format(
+                address_format))
+        purpose = FORMATS[address_format][0]
+        for account in range(accounts):
+            path = account_path(template, purpose, account)
+            account_key, account_chain = bip32.derive_private(
+                master_private, master_chain, bip32.parse_path(path))
+            account_public = bip32.public_key(account_key)
+            for change in CHAINS:
+                chain_key, chain_code = bip32.ckd_priv(
+                    account_key, account_chain, change, account_public)
+                chain_public = bip32.public_key(chain_key)
+                for index in range(count):
+                    private_key, _ = bip32.ckd_priv(chain_key, chain_code,
+                                                    index, chain_public)
+                    leaves.append((address_format, account, change, index,
+                                   '{0}/{1}/{2}'.format(path, change, index)))
+                    private_keys.append(private_key)
+    addresses = []
+    for leaf, public_key in zip(leaves, bip32.public_keys(private_keys)):
+        addresses.append(leaf + (FORMATS[leaf[0]][1](public_key),))
+    return addresses
+
+def _error_record(line_number, error):
+    return json.dumps(collections.OrderedDict([
+        ('line', line_number),
+        ('error', error)])) + '\n'
+
+def _records(line_number, mnemonic, passphrase, options):
+    """JSON lines of one mnemonic"""
+    codec = bip39.get_default_codec(print_warning=False)
+    try:
+        codec.mnemonic2binstring(mnemonic)
+    except (ValueError, bip39.InvalidWordError, bip39.FailedCheckSumError):
+        return _error_record(line_number, 'not a valid mnemonic')
+    try:
+        seed = binascii.unhexlify(bip39.mnemonic2seed(mnemonic, passphrase))
+    except UnicodeDecodeError:
+        return _error_record(line_number, 'passphrase is not valid UTF-8')
+    master_fingerprint = binascii.hexlify(
+        bip32.fingerprint(bip32.public_key(bip32.master_key(seed)[0])))
+    lines = []
+    for address_format, account, change, index, path, address in \
+            derive_addresses(seed, **options):
+        lines.append(json.dumps(collections.OrderedDict([
+            ('line', line_number),
+            ('fingerprint', master_fingerprint),
+            ('format', address_format),
+            ('account', account),
+            ('change', change),
+            ('index', index),
+            ('path', path),
+            ('address', address)])) + '\n')
+    return ''.join(lines)
+
+def derive_chunk(args):
+    """Process pool worker: JSON lines of a chunk of mnemonics"""
+    entries, options = args
+    return ''.join([_records(line_number, mnemonic, passphrase, options)
+                    for line_number, mnemonic, passphrase in entries])
+
+def _chunks(entries, chunk_size):
+    chunk = []
+    for entry in entries:
+        chunk.append(entry)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def generate(out_file, entries, processes=None, chunk_size=CHUNK_MNEMONICS,
+             **options):
+    """Write the address records of every mnemonic to out_file as JSON lines
+
+    Args:
+        entries (iterable): (line number, mnemonic, passphrase) tuples
+        processes (int): Worker processes. 0 derives on the calling process.
+            Default: number of CPUs
+        options: formats, accounts, count and template, as for
+            derive_addresses
+
+    Returns: Number of mnemonics written
+
+    Raises: ValueError for an unknown format or a bad template
+    """
+    #fail before starting any work
+    for address_format in options.get('formats', ()):
+        if address_format not in FORMATS:
+            raise ValueError("Unknown address format: {0}".format(
+                address_format))
+    account_path(options.get('template', DEFAULT_TEMPLATE), 0, 0)
+
+    written = 0
+    if processes == 0:
+        for chunk in _chunks(entries, chunk_size):
+            out_file.write(derive_chunk((chunk, options)))
+            written += len(chunk)
+        return written
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(processes)
+    try:
+        in_flight = collections.deque()
+        for chunk in _chunks(entries, chunk_size):
+            in_flight.append((len(chunk), pool.apply_async(
+                derive_chunk, ((chunk, options),))))
+            if len(in_flight) >= processes * CHUNKS_IN_FLIGHT_PER_PROCESS:
+                n_mnemonics, result = in_flight.popleft()
+                out_file.write(result.get())
+                written += n_mnemonics
+        while in_flight:
+            n_mnemonics, result = in_flight.popleft()
+            out_file.write(result.get())
+            written += n_mnemonics
+    finally:
+        pool.terminate()
+        pool.join()
+    return written
+
+def read_entries(in_file, passphrase=''):
+    """Yield (line number, mnemonic, passphrase) of the non-empty lines
+
+    A tab separates a mnemonic from its own passphrase.
+    """
+    for line_number, line in enumerate(in_file, 1):
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            continue
+        mnemonic, tab, own_passphrase = line.partition('\t')
+        yield (line_number, ' '.join(mnemonic.split()),
+               own_passphrase if tab else passphrase)
+
+def _parse_formats(text):
+    formats = tuple(text.split(','))
+    for address_format in formats:
+        if address_format not in FORMATS:
+            raise argparse.ArgumentTypeError(
+                "expected comma separated formats from {0}".format(
+                    ', '.join(FORMATS)))
+    return formats
+
+def _main():
+    parser = argparse.ArgumentParser(
+        description='Derive receive and change addresses of mnemonics')
+    parser.add_argument('input', help='mnemonics, one per line (- for stdin)')
+    parser.add_argument('--output', help='JSON lines file (default: stdout)')
+    parser.add_argument('--formats', type=_parse_formats,
+                        default=tuple(FORMATS),
+                        help='comma separated (default: {0})'.format(
+                            ','.join(FORMATS)))
+    parser.add_argument('--accounts', type=int, default=1)
+    parser.add_argument('--count', type=int, default=DEFAULT_COUNT,
+                        help='addresses per chain (default: %(default)s)')
+    parser.add_argument('--template', default=DEFAULT_TEMPLATE,
+                        help='account path (default: %(default)s)')
+    parser.add_argument('--passphrase', default='',
+                        help='passphrase of lines without their own')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes (default: #CPUs)')
+    args = parser.parse_args()
+    try:
+        account_path(args.template, 0, 0)
+    except ValueError as err:
+        parser.error(str(err))
+
+    in_file = sys.stdin if args.input == '-' else open(args.input)
+    out_file = sys.stdout if args.output is None else open(args.output, 'w')
+    began = time.time()
+    try:
+        n_mnemonics = generate(
+            out_file, read_entries(in_file, args.passphrase), args.processes,
+            formats=args.formats, accounts=args.accounts, count=args.count,
+            template=args.template)
+    finally:
+        if in_file is not sys.stdin:
+            in_file.close()
+        if out_file is not sys.stdout:
+            out_file.close()
+    elapsed = time.time() - began
+    n_addresses = n_mnemonics * len(args.formats) * args.accounts * \
+        len(CHAINS) * args.count
+    sys.stderr.write("Derived {0} addresses of {1} mnemonics in {2:.2f}s "
+                     "({3:.0f} addresses/s)\n".format(
+                         n_addresses, n_mnemonics, elapsed,
+                         n_addresses / max(elapsed, 1e-9)))
+
+if __name__ == '__main__':
+    _main()
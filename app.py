@@ -28,14 +28,19 @@ MS = (ENT + CS) / 11
 
 #Python Standard Library 2.7
 import sys
+import argparse
 from itertools import repeat
 import math
 
 #bi39_gym modules
 import bip39 #bip39.py
 import entropy #entropy.py
+import entropy_index #entropy_index.py
+import mnemonic_entry #mnemonic_entry.py
+import physical_entropy #physical_entropy.py
+import shamir #shamir.py
 
-NORMAL_MNEMONIC_LEN = set([12, 15, 18, 21, 24])
+SUGGESTIONS = 8
 
 def num_entropy_warnings(entropy_binstring, print_warning=True):
     """Returns how many non-fatal warnings are generated for the given entropy"""
@@ -47,82 +52,171 @@ def num_entropy_warnings(entropy_binstring, print_warning=True):
         if print_warning:
             print "WARNING: Entropy is equal to zero! Bad entropy."
     else:
-        if entropy_int & (entropy_int + 1) == 0:
+        #compare the string, since leading zeros are lost in entropy_int
+        if '0' not in entropy_binstring:
             warnings += 1
             if print_warning:
                 print "WARNING: Entropy is all ones in binary! Bad entropy."
 
     return warnings
 
-def is_valid_entropy(entropy_binstring, print_error=True):
+def is_seen_entropy(entropy_binstring, index, print_warning=True):
+    """Whether the entropy is already in an entropy_index.EntropyIndex
+
+    A mnemonic that was seen before, e.g. in an archive of generated
+    mnemonics, must not be trusted as fresh.
+    """
+    seen = bip39.decode_binary_string(entropy_binstring) in index
+    if seen and print_warning:
+        print "WARNING: This entropy is already in the index! Do not reuse it."
+    return seen
+
+def is_valid_entropy(entropy_binstring, print_error=True, codec=None):
     """Determines whether entropy is properly formatted for BIP39
 
     Args:
         entropy_binstring (str): The entropy as binary string
         print_error (bool): Whether to print about fatal errors. Default: True
+        codec (bip39.Bip39Codec): Codec whose entropy limits apply. Default:
+            the module-level default codec
     """
     num_entropy_warnings(entropy_binstring)
 
-    bit_len = len(entropy_binstring)
-
-    if bit_len % bip39.ENT_MOD != 0:
+    if codec is None:
+        codec = bip39.get_default_codec()
+    error = codec.entropy_length_error(len(entropy_binstring))
+    if error is not None:
         if print_error:
-            print "ERROR: Entropy is not a multiple of 32 bits: {0} bits".format(
-                bit_len)
+            print "ERROR: {0}".format(error)
         return False
+    return True
 
-    if bit_len < bip39.ENT_MIN:
-        if print_error:
-            print "ERROR: Entropy cannot be less than 128 bits: {0} bits".format(
-                bit_len)
-        return False
+def read_mnemonic(codec=None, read=raw_input):
+    """Read a mnemonic a line at a time, checking each word as it arrives
 
-    if bit_len > bip39.ENT_MAX:
-        if print_error:
-            print "ERROR: Entropy cannot be more than 256 bits: {0} bits".format(
-                bit_len)
-        return False
-    return True
+    A word that isn't in the wordlist is reported with suggestions, and it
+    and the rest of its line must be entered again. Reading stops at an empty
+    line, or right away when a whole mnemonic of a normal length with a valid
+    checksum is entered on one line.
 
-def _is_canonical_mnemonic(words, wordset, print_error=True):
-    for index, word in enumerate(words):
-        if word not in wordset:
-            if print_error:
+    Returns: mnemonic_entry.MnemonicEntry
+    """
+    entry = mnemonic_entry.MnemonicEntry(codec)
+    prompt = ('Enter your BIP39 mnemonic in using the canonical English '
+              'dictionary: ')
+    n_lines = 0
+    while True:
+        line = str(read(prompt))
+        if not line.strip():
+            break
+        n_lines += 1
+        for word in line.split():
+            try:
+                entry.add_word(word)
+            except bip39.InvalidWordError:
                 print "ERROR: word #{0} '{1}' not in canonical wordset!".format(
-                    index + 1, word)
-            return False
-    return True
+                    len(entry.indices) + 1, word)
+                suggestions = entry.suggestions(word, SUGGESTIONS)
+                if suggestions:
+                    print "Did you mean: {0}?".format(', '.join(suggestions))
+                break
+        if (n_lines == 1 and entry.codec.is_normal_length(len(entry.indices))
+                and entry.state == mnemonic_entry.VALID):
+            break
+        prompt = ("{0} words so far. Enter the next words, or an empty line "
+                  "to finish: ").format(len(entry.indices))
+    return entry
 
-def _main():
-    wordlist = bip39.get_wordlist()
-    wordset = set(wordlist)
+def mix(old, new):
+    """XOR the entropy of two bip39.Mnemonic objects into a new one
 
-    assert len(wordlist) == 2048
-    mnemonic = str(raw_input('Enter your BIP39 mnemonic in using the '
-                             'canonical English dictionary: '))
-    print "You entered: '{0}'".format(mnemonic)
-    words = [str(word) for word in mnemonic.split(' ')]
+    Raises: ValueError if the entropy lengths differ
+    """
+    return bip39.Mnemonic.from_binstring(
+        entropy.xor(old.binstring, new.binstring), codec=old.codec)
 
-    if not _is_canonical_mnemonic(words, wordset):
-        sys.exit(1)
+def _print_mix(old, new, combined):
+    print "===="
+    print "old: {0} {1}".format(old.entropy_hex, old.mnemonic)
+    print "new: {0} {1}".format(new.entropy_hex, new.mnemonic)
+    print "xor: {0} {1}".format(combined.entropy_hex, combined.mnemonic)
+
+def _print_shares(combined, threshold, n_shares, source=None):
+    print "===="
+    print "Splitting the xor'd mnemonic into {0}-of-{1} shares:".format(
+        threshold, n_shares)
+    shares = shamir.split_mnemonic(combined.mnemonic, threshold, n_shares,
+                                   source=source, codec=combined.codec)
+    for number, share in enumerate(shares, 1):
+        print "share {0}: {1}".format(number, share)
+    print("Manually validate: any {0} shares recombine to the xor'd mnemonic "
+          "with `python shamir.py combine`.".format(threshold))
+
+def _shares_arg(value):
+    try:
+        threshold, n_shares = [int(part) for part in value.split('/')]
+    except ValueError:
+        raise argparse.ArgumentTypeError("expected K/N, e.g. 2/3")
+    if not 1 <= threshold <= n_shares <= shamir.MAX_SHARES:
+        raise argparse.ArgumentTypeError("need 1 <= K <= N <= {0}".format(
+            shamir.MAX_SHARES))
+    return threshold, n_shares
+
+def _read_die_rolls(n_bits):
+    """Ask for d6 rolls until entropy.die_rolls_to_bitstring makes n_bits"""
+    min_estimated_rolls = int(math.ceil(
+        entropy.die_rolls_per_bits(n_bits=n_bits) * (4.0/3)))
 
-    if len(words) not in NORMAL_MNEMONIC_LEN:
+    entropy_gathered = False
+    rolls_str = ''
+    rolls = []
+    while True:
+        rolls_str = str(raw_input(
+            ('Roll a die at least {minimum} times to provide entropy to mix '
+             'in, with each roll represented by 1 to 6 and a space separating '
+             'each roll: ').format(minimum=min_estimated_rolls)))
+        rolls = [int(roll) for roll in rolls_str.split()]
+        if len(rolls) >= min_estimated_rolls:
+            break
+    dice_bitstring = None
+    while True:
+        try:
+            dice_bitstring = entropy.die_rolls_to_bitstring(
+                dice_vals=rolls, bitstring_len=n_bits)
+            print "Dice rolls as bitstring: {0}".format(dice_bitstring)
+            break
+        except entropy.InsufficientEntropyError:
+            more_rolls_str = str(raw_input(
+                ("More entropy needed. {num} rolls saved so far. Please enter "
+                 "another roll: ").format(num=len(rolls))))
+            rolls.extend([int(roll) for roll in more_rolls_str.split()])
+    return dice_bitstring
+
+def _main(source=None, seen_index=None, shares=None, physical=None):
+    if source is not None:
+        print("WARNING: Using a test entropy source instead of /dev/urandom. "
+              "Never use the resulting mnemonics!")
+    codec = bip39.get_default_codec()
+    assert len(codec.wordlist) == 2048
+    entry = read_mnemonic(codec)
+    mnemonic = entry.mnemonic
+    print "You entered: '{0}'".format(mnemonic)
+
+    if not codec.is_normal_length(len(entry.indices)):
         print "WARNING: Length of menonic you provided ({0}) is atypical.".format(
-            len(words))
+            len(entry.indices))
 
-    binstring = None
-    try:
-        binstring = bip39.mnemonic2binstring(mnemonic)
-    except bip39.FailedCheckSumError:
+    if not entry.checksum_valid:
         print("ERROR: Mnemonic failed checksum. It may be an invalid BIP39 "
               "mnemonic -- be careful!!! Stopping.")
         sys.exit(1)
+    binstring = entry.binstring
 
     print "Mnemonic as binary string: {0}".format(binstring)
     print "Note: The mnemonic passes a checksum test!"
     buf = "Re-deriving mnemonic from binary string for sanity check... {result}"
-    mnemonic_calc = bip39.binstring2mnemonic(binstring)
-    if mnemonic == mnemonic_calc:
+    latest = bip39.Mnemonic.from_binstring(binstring)
+    if mnemonic == latest.mnemonic:
         print buf.format(result="PASSED!")
     else:
         print buf.format(result="FAILED! Stopping. Please report issue on GitHub.")
@@ -135,28 +229,22 @@ def _main():
               "format -- be careful!!! Stopping.")
         sys.exit(1)
 
+    if seen_index is not None:
+        is_seen_entropy(binstring, seen_index)
+
     urandom_rounds = int(raw_input(
         ('Enter the number of times entropy should be mixed in from '
          '/dev/urandom (0 to skip): ')))
 
-    latest_entropy_binstring = binstring
-    latest_mnemonic = mnemonic
     n_bits = len(binstring)
 
     for _ in repeat(None, urandom_rounds):
-        new_entropy = entropy.get_entropy(n_bits)
-        combined_entropy = entropy.xor(latest_entropy_binstring, new_entropy)
-        combined_mnemonic = bip39.binstring2mnemonic(combined_entropy)
-        print "===="
-        print "old: {old_hex} {old_mnemonic}".format(
-            old_hex=bip39.bin2hex(latest_entropy_binstring),
-            old_mnemonic=latest_mnemonic)
-        print "new: {new_hex} {new_mnemonic}".format(
-            new_hex=bip39.bin2hex(new_entropy),
-            new_mnemonic=bip39.binstring2mnemonic(new_entropy))
-        print "xor: {xor_hex} {xor_mnemonic}".format(
-            xor_hex=bip39.bin2hex(combined_entropy),
-            xor_mnemonic=combined_mnemonic)
+        new = bip39.Mnemonic.from_binstring(
+            entropy.get_entropy(n_bits, source=source))
+        combined = mix(latest, new)
+        _print_mix(latest, new, combined)
+        if seen_index is not None:
+            is_seen_entropy(combined.binstring, seen_index)
 
         print("Manually validate:\n"
               "\t1. Old hex and mnemonic match previous versions.\n"
@@ -164,48 +252,37 @@ def _main():
               "Ian Coleman bip39 tool derives to correct mnemonics.\n"
               "\t3. Confirm old XOR new = xor'd version hex char at a time.")
 
-        latest_entropy_binstring = combined_entropy
-        latest_mnemonic = combined_mnemonic
+        latest = combined
 
-    min_estimated_rolls = int(math.ceil(
-        entropy.die_rolls_per_bits(n_bits=n_bits) * (4.0/3)))
-
-    entropy_gathered = False
-    rolls_str = ''
-    rolls = []
-    while True:
-        rolls_str = str(raw_input(
-            ('Roll a die at least {minimum} times to provide entropy to mix '
-             'in, with each roll represented by 1 to 6 and a space separating '
-             'each roll: ').format(minimum=min_estimated_rolls)))
-        rolls = [int(roll) for roll in rolls_str.split()]
-        if len(rolls) >= min_estimated_rolls:
-            break
-    dice_bitstring = None
-    while True:
-        try:
-            dice_bitstring = entropy.die_rolls_to_bitstring(
-                dice_vals=rolls, bitstring_len=n_bits)
-            print "Dice rolls as bitstring: {0}".format(dice_bitstring)
-            break
-        except entropy.InsufficientEntropyError:
-            more_rolls_str = str(raw_input(
-                ("More entropy needed. {num} rolls saved so far. Please enter "
-                 "another roll: ").format(num=len(rolls))))
-            rolls.extend([int(roll) for roll in more_rolls_str.split()])
+    if physical is not None:
+        dice_bitstring = physical_entropy.collect(physical, n_bits).bitstring
+        print "{0} as bitstring: {1}".format(physical, dice_bitstring)
+    else:
+        dice_bitstring = _read_die_rolls(n_bits)
 
-    combined_entropy = entropy.xor(latest_entropy_binstring, dice_bitstring)
-    combined_mnemonic = bip39.binstring2mnemonic(combined_entropy)
-    print "===="
-    print "old: {old_hex} {old_mnemonic}".format(
-        old_hex=bip39.bin2hex(latest_entropy_binstring),
-        old_mnemonic=latest_mnemonic)
-    print "new: {new_hex} {new_mnemonic}".format(
-        new_hex=bip39.bin2hex(dice_bitstring),
-        new_mnemonic=bip39.binstring2mnemonic(dice_bitstring))
-    print "xor: {xor_hex} {xor_mnemonic}".format(
-        xor_hex=bip39.bin2hex(combined_entropy),
-        xor_mnemonic=combined_mnemonic)
+    dice = bip39.Mnemonic.from_binstring(dice_bitstring)
+    combined = mix(latest, dice)
+    _print_mix(latest, dice, combined)
+    if seen_index is not None:
+        is_seen_entropy(combined.binstring, seen_index)
+    if shares is not None:
+        _print_shares(combined, shares[0], shares[1], source)
 
 if __name__ == '__main__':
-    _main()
+    _PARSER = argparse.ArgumentParser(
+        description='Mix entropy into an existing BIP39 mnemonic')
+    entropy.add_source_args(_PARSER)
+    _PARSER.add_argument('--seen-index', metavar='FILE',
+                         help='warn about entropy already in this '
+                         'entropy_index.py index')
+    _PARSER.add_argument('--shares', metavar='K/N', type=_shares_arg,
+                         help='also split the result into N Shamir shares, '
+                         'any K of which recover it')
+    _PARSER.add_argument('--physical', choices=list(physical_entropy.KINDS),
+                         help='mix in coin flips, rolls of this die or cards '
+                         'of a shuffled deck (see physical_entropy.py) '
+                         'instead of d6 rolls')
+    _ARGS = _PARSER.parse_args()
+    _main(entropy.source_from_args(_ARGS),
+          entropy_index.EntropyIndex(_ARGS.seen_index)
+          if _ARGS.seen_index else None, _ARGS.shares, _ARGS.physical)
@@ -0,0 +1,119 @@
+"""Measure latency and throughput of server.py under concurrent load
+
+Each client thread holds its own connection and issues requests back to back,
+so the number of requests in flight equals the number of clients. Without an
+address, a server is started in-process on a temporary Unix socket.
+
+$ python bench_server.py --clients 32 --requests 500 --method encode
+"""
+#Python Standard Library 2.7
+import os
+import time
+import argparse
+import tempfile
+import threading
+import binascii
+
+#bip39_gym modules
+import bip39 #bip39.py
+import server #server.py
+
+DEFAULT_CLIENTS = 16
+DEFAULT_REQUESTS = 200
+
+def _make_params(method, entropy_hex):
+    entropy_bin = bip39.hex2bin(entropy_hex)
+    mnemonic = bip39.binstring2mnemonic(entropy_bin)
+    if method == 'encode':
+        return {'entropy_hex': entropy_hex}
+    if method in ('decode', 'validate'):
+        return {'mnemonic': mnemonic}
+    if method == 'complete':
+        return {'partial_mnemonic': ' '.join(mnemonic.split()[:-1])}
+    if method == 'seed':
+        return {'mnemonic': mnemonic, 'passphrase': ''}
+    raise server.UnknownMethodError(method)
+
+def run_benchmark(address, method, n_clients, n_requests):
+    """Run n_clients threads each issuing n_requests; return stats dict"""
+    params = [_make_params(method, binascii.hexlify(os.urandom(16)))
+              for _ in range(n_clients)]
+    latencies = [[] for _ in range(n_clients)]
+    errors = [0] * n_clients
+    start_barrier = threading.Event()
+
+    def client_thread(client_num):
+        client = server.Bip39Client(address)
+        start_barrier.wait()
+        try:
+            for _ in range(n_requests):
+                begin = time.time()
+                try:
+                    client.call(method, **params[client_num])
+                except server.RemoteError:
+                    errors[client_num] += 1
+                latencies[client_num].append(time.time() - begin)
+        finally:
+            client.close()
+
+    threads = [threading.Thread(target=client_thread, args=(num,))
+               for num in range(n_clients)]
+    for thread in threads:
+        thread.start()
+    began = time.time()
+    start_barrier.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.time() - began
+
+    all_latencies = sorted(sum(latencies, []))
+    def percentile(pct):
+        return all_latencies[min(len(all_latencies) - 1,
+                                 int(len(all_latencies) * pct / 100.0))]
+    return {'requests': len(all_latencies),
+            'errors': sum(errors),
+            'elapsed': elapsed,
+            'throughput': len(all_latencies) / elapsed,
+            'p50': percentile(50),
+            'p95': percentile(95),
+            'p99': percentile(99),
+            'max': all_latencies[-1]}
+
+def _main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--unix', help='Unix socket of a running server')
+    parser.add_argument('--port', type=int,
+                        help='localhost TCP port of a running server')
+    parser.add_argument('--method', default='encode',
+                        choices=sorted(server.METHODS))
+    parser.add_argument('--clients', type=int, default=DEFAULT_CLIENTS)
+    parser.add_argument('--requests', type=int, default=DEFAULT_REQUESTS,
+                        help='requests per client')
+    args = parser.parse_args()
+
+    local_server = None
+    if args.unix:
+        address = args.unix
+    elif args.port:
+        address = (server.DEFAULT_HOST, args.port)
+    else:
+        address = os.path.join(tempfile.mkdtemp(), 'bip39.sock')
+        local_server = server.Bip39Server(address)
+        local_server.start()
+
+    try:
+        stats = run_benchmark(address, args.method, args.clients, args.requests)
+    finally:
+        if local_server is not None:
+            local_server.close()
+
+    print ("{method}: {requests} requests ({errors} errors) from {clients} "
+           "clients in {elapsed:.2f}s").format(
+               method=args.method, clients=args.clients, **stats)
+    print "Throughput: {throughput:.0f} requests/s".format(**stats)
+    print ("Latency: p50 {0:.2f}ms p95 {1:.2f}ms p99 {2:.2f}ms "
+           "max {3:.2f}ms").format(stats['p50'] * 1000, stats['p95'] * 1000,
+                                   stats['p99'] * 1000, stats['max'] * 1000)
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,446 @@
+"""BIP32 functions
+
+https://github.com/bitcoin/bips/blob/master/bip-0032.mediawiki
+
+Only what is needed to check a BIP39 seed against a wallet: private child
+key derivation, public keys on secp256k1, Base58Check serialization of
+extended keys, P2PKH and P2SH-P2WPKH addresses and Bech32 P2WPKH addresses.
+
+k*G uses a table of the multiples of G for every 8-bit window of k, built on
+first use, so a public key costs 32 point additions and no doublings.
+Converting a point back to affine coordinates costs a modular inverse, as
+much as a dozen additions; public_keys shares one inverse between a whole
+batch of keys (Montgomery's trick), and the table is built the same way.
+"""
+#Python Standard Library 2.7
+import hmac
+import struct
+import hashlib
+import binascii
+
+#BIP 32: "Generate a seed byte sequence S ... Calculate I = HMAC-SHA512(Key =
+#"Bitcoin seed", Data = S)"
+MASTER_KEY_HMAC_KEY = 'Bitcoin seed'
+
+#BIP 32: mainnet version bytes
+XPRV_VERSION = 0x0488ADE4
+XPUB_VERSION = 0x0488B21E
+
+#Bitcoin mainnet P2PKH and P2SH address version bytes
+P2PKH_VERSION = 0x00
+P2SH_VERSION = 0x05
+
+#BIP 173: human-readable part of mainnet segwit addresses, and the data
+#character set
+BECH32_HRP = 'bc'
+BECH32_CHARSET = 'qpzry9x8gf2tvdw0s3jn54khce6mua7l'
+
+HARDENED = 0x80000000
+
+BASE58_ALPHABET = '123456789ABCDEFGHJKLMNPQRSTUVWXYZabcdefghijkmnopqrstuvwxyz'
+
+#secp256k1 (SEC 2, 2.4.1): y^2 = x^3 + 7 over GF(P), base point G of order N
+CURVE_P = 2 ** 256 - 2 ** 32 - 977
+CURVE_N = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+CURVE_G = (0x79BE667EF9DCBBAC55A06295CE870B07029BFCDB2DCE28D959F2815B16F81798,
+           0x483ADA7726A3C4655DA4FBFC0E1108A8FD17B448A68554199C47D08FFB10D4B8)
+
+WINDOW_BITS = 8
+
+class InvalidBase58Error(Exception):
+    """A Base58Check string is malformed or its checksum failed"""
+    pass
+
+class InvalidKeyError(Exception):
+    """A derived key is out of range; BIP32 says to use the next index"""
+    pass
+
+def hash256(data):
+    """Double SHA256"""
+    return hashlib.sha256(hashlib.sha256(data).digest()).digest()
+
+def base58_encode(data):
+    """Encode raw string as Base58, keeping leading zero bytes as '1'"""
+    value = long(binascii.hexlify(data), 16) if data else 0
+    chars = []
+    while value > 0:
+        value, remainder = divmod(value, 58)
+        chars.append(BASE58_ALPHABET[remainder])
+    n_zeros = len(data) - len(data.lstrip('\x00'))
+    return '1' * n_zeros + ''.join(reversed(chars))
+
+def base58_decode(text):
+    """Decode Base58 to raw string
+
+    Raises: InvalidBase58Error
+    """
+    value = 0
+    for char in text:
+        digit = BASE58_ALPHABET.find(char)
+        if digit < 0:
+            raise InvalidBase58Error(char)
+        value = value * 58 + digit
+    hex_str = '{0:x}'.format(value) if value > 0 else ''
+    if len(hex_str) % 2 != 0:
+        hex_str = '0' + hex_str
+    n_zeros = len(text) - len(text.lstrip('1'))
+    return '\x00' * n_zeros + binascii.unhexlify(hex_str)
+
+def base58check_encode(payload):
+    """Encode raw string as Base58 with a 4 byte double SHA256 checksum"""
+    return base58_encode(payload + hash256(payload)[0:4])
+
+def base58check_decode(text):
+    """Decode Base58Check and verify its checksum
+
+    Raises: InvalidBase58Error
+    """
+    data = base58_decode(text)
+    if len(data) < 4 or hash256(data[:-4])[0:4] != data[-4:]:
+        raise InvalidBase58Error("Checksum failed")
+    return data[:-4]
+
+def master_key(seed):
+    """Derive master private key and chain code from a raw seed string
+
+    Returns: (private key, chain code), 32 bytes each
+    """
+    digest = hmac.new(MASTER_KEY_HMAC_KEY, seed, hashlib.sha512).digest()
+    return digest[0:32], digest[32:64]
+
+def serialize_xprv(private_key, chain_code, depth=0, parent_fingerprint='\x00' * 4,
+                   child_number=0, version=XPRV_VERSION):
+    """Serialize an extended private key to Base58Check"""
+    payload = ''.join([struct.pack('>I', version), chr(depth), parent_fingerprint,
+                       struct.pack('>I', child_number), chain_code,
+                       '\x00', private_key])
+    return base58check_encode(payload)
+
+def serialize_xpub(public_key_bytes, chain_code, depth=0,
+                   parent_fingerprint='\x00' * 4, child_number=0,
+                   version=XPUB_VERSION):
+    """Serialize an extended public key to Base58Check"""
+    payload = ''.join([struct.pack('>I', version), chr(depth), parent_fingerprint,
+                       struct.pack('>I', child_number), chain_code,
+                       public_key_bytes])
+    return base58check_encode(payload)
+
+def _bytes2int(data):
+    return long(binascii.hexlify(data), 16)
+
+def _int2bytes(value):
+    return binascii.unhexlify('{0:064x}'.format(value))
+
+def _jacobian_double(point):
+    x_1, y_1, z_1 = point
+    if y_1 == 0:
+        return (0, 0, 0)
+    y_sq = y_1 * y_1 % CURVE_P
+    s_val = 4 * x_1 * y_sq % CURVE_P
+    m_val = 3 * x_1 * x_1 % CURVE_P
+    x_3 = (m_val * m_val - 2 * s_val) % CURVE_P
+    y_3 = (m_val * (s_val - x_3) - 8 * y_sq * y_sq) % CURVE_P
+    return (x_3, y_3, 2 * y_1 * z_1 % CURVE_P)
+
+def _jacobian_add_affine(point, affine):
+    """Add an affine point to a Jacobian one; z == 0 is the point at infinity"""
+    x_1, y_1, z_1 = point
+    x_2, y_2 = affine
+    if z_1 == 0:
+        return (x_2, y_2, 1)
+    z1_sq = z_1 * z_1 % CURVE_P
+    h_val = (x_2 * z1_sq - x_1) % CURVE_P
+    r_val = (y_2 * z_1 * z1_sq - y_1) % CURVE_P
+    if h_val == 0:
+        return _jacobian_double(point) if r_val == 0 else (0, 0, 0)
+    h_sq = h_val * h_val % CURVE_P
+    h_cu = h_val * h_sq % CURVE_P
+    v_val = x_1 * h_sq % CURVE_P
+    x_3 = (r_val * r_val - h_cu - 2 * v_val) % CURVE_P
+    y_3 = (r_val * (v_val - x_3) - y_1 * h_cu) % CURVE_P
+    return (x_3, y_3, z_1 * h_val % CURVE_P)
+
+def _to_affine(point):
+    x_1, y_1, z_1 = point
+    z_inv = pow(z_1, CURVE_P - 2, CURVE_P)
+    z_inv_sq = z_inv * z_inv % CURVE_P
+    return (x_1 * z_inv_sq % CURVE_P, y_1 * z_inv_sq * z_inv % CURVE_P)
+
+def _batch_to_affine(points):
+    """Affine coordinates of Jacobian points (none at infinity) with a single
+    modular inverse: the inverse of the product of every z gives each z's
+    inverse by multiplying out the others"""
+    products = []
+    product = 1
+    for _, _, z_1 in points:
+        products.append(product)
+        product = product * z_1 % CURVE_P
+    inverse = pow(product, CURVE_P - 2, CURVE_P)
+    affine = [None] * len(points)
+    for num in range(len(points) - 1, -1, -1):
+        x_1, y_1, z_1 = points[num]
+        #inverse is 1 / (z_0 * ... * z_num); products[num] cancels the others
+        z_inv = inverse * products[num] % CURVE_P
+        inverse = inverse * z_1 % CURVE_P
+        z_inv_sq = z_inv * z_inv % CURVE_P
+        affine[num] = (x_1 * z_inv_sq % CURVE_P,
+                       y_1 * z_inv_sq * z_inv % CURVE_P)
+    return affine
+
+_G_TABLE = None
+
+def _g_table():
+    """table[window][digit] = digit * 2**(WINDOW_BITS * window) * G, affine"""
+    global _G_TABLE #pylint: disable=global-statement
+    if _G_TABLE is None:
+        table = []
+        base = CURVE_G
+        for _ in range(256 // WINDOW_BITS):
+            points = [(base[0], base[1], 1)]
+            for _ in range(2, 2 ** WINDOW_BITS + 1):
+                points.append(_jacobian_add_affine(points[-1], base))
+            row = _batch_to_affine(points)
+            #the last point is the base of the next window
+            base = row.pop()
+            table.append([None] + row)
+        _G_TABLE = table
+    return _G_TABLE
+
+def _multiply_g_jacobian(scalar):
+    table = _g_table()
+    point = (0, 0, 0)
+    mask = 2 ** WINDOW_BITS - 1
+    for window in range(256 // WINDOW_BITS):
+        digit = (scalar >> (WINDOW_BITS * window)) & mask
+        if digit:
+            point = _jacobian_add_affine(point, table[window][digit])
+    return point
+
+def point_multiply_g(scalar):
+    """Affine point scalar * G for 0 < scalar < CURVE_N"""
+    return _to_affine(_multiply_g_jacobian(scalar))
+
+def _compress(point):
+    x_val, y_val = point
+    return chr(2 + (y_val & 1)) + _int2bytes(x_val)
+
+def public_key(private_key):
+    """Compressed SEC public key (33 bytes) of a 32 byte private key"""
+    return _compress(point_multiply_g(_bytes2int(private_key)))
+
+def public_keys(private_keys):
+    """Batch version of public_key, with one modular inverse for the batch"""
+    if not private_keys:
+        return []
+    return [_compress(point) for point in _batch_to_affine([
+        _multiply_g_jacobian(_bytes2int(private_key))
+        for private_key in private_keys])]
+
+def _ripemd160(data):
+    """Pure Python RIPEMD-160, for OpenSSL builds without it"""
+    mask = 0xFFFFFFFF
+    state = [0x67452301, 0xEFCDAB89, 0x98BADCFE, 0x10325476, 0xC3D2E1F0]
+    padded = data + '\x80' + '\x00' * ((55 - len(data)) % 64) + \
+        struct.pack('<Q', 8 * len(data))
+    for offset in range(0, len(padded), 64):
+        words = struct.unpack('<16I', padded[offset:offset + 64])
+        a_l, b_l, c_l, d_l, e_l = state
+        a_r, b_r, c_r, d_r, e_r = state
+        #the boolean function of round j of the left line is that of round
+        #79 - j of the right one; rotations are inlined for speed
+        for (round_l, round_r, word_l, word_r, shift_l, shift_r, const_l,
+             const_r) in _RMD_STEPS:
+            if round_l == 0:
+                f_l = b_l ^ c_l ^ d_l
+            elif round_l == 1:
+                f_l = (b_l & c_l) | (~b_l & d_l)
+            elif round_l == 2:
+                f_l = (b_l | ~c_l) ^ d_l
+            elif round_l == 3:
+                f_l = (b_l & d_l) | (c_l & ~d_l)
+            else:
+                f_l = b_l ^ (c_l | ~d_l)
+            if round_r == 0:
+                f_r = b_r ^ c_r ^ d_r
+            elif round_r == 1:
+                f_r = (b_r & c_r) | (~b_r & d_r)
+            elif round_r == 2:
+                f_r = (b_r | ~c_r) ^ d_r
+            elif round_r == 3:
+                f_r = (b_r & d_r) | (c_r & ~d_r)
+            else:
+                f_r = b_r ^ (c_r | ~d_r)
+            total = (a_l + f_l + words[word_l] + const_l) & mask
+            a_l, e_l, d_l, c_l, b_l = (
+                e_l, d_l, ((c_l << 10) | (c_l >> 22)) & mask, b_l,
+                ((((total << shift_l) | (total >> (32 - shift_l))) & mask) +
+                 e_l) & mask)
+            total = (a_r + f_r + words[word_r] + const_r) & mask
+            a_r, e_r, d_r, c_r, b_r = (
+                e_r, d_r, ((c_r << 10) | (c_r >> 22)) & mask, b_r,
+                ((((total << shift_r) | (total >> (32 - shift_r))) & mask) +
+                 e_r) & mask)
+        state = [(state[1] + c_l + d_r) & mask, (state[2] + d_l + e_r) & mask,
+                 (state[3] + e_l + a_r) & mask, (state[4] + a_l + b_r) & mask,
+                 (state[0] + b_l + c_r) & mask]
+    return struct.pack('<5I', *state)
+
+_RMD_R1 = range(16) + [7, 4, 13, 1, 10, 6, 15, 3, 12, 0, 9, 5, 2, 14, 11, 8,
+                       3, 10, 14, 4, 9, 15, 8, 1, 2, 7, 0, 6, 13, 11, 5, 12,
+                       1, 9, 11, 10, 0, 8, 12, 4, 13, 3, 7, 15, 14, 5, 6, 2,
+                       4, 0, 5, 9, 7, 12, 2, 10, 14, 1, 3, 8, 11, 6, 15, 13]
+_RMD_R2 = [5, 14, 7, 0, 9, 2, 11, 4, 13, 6, 15, 8, 1, 10, 3, 12,
+           6, 11, 3, 7, 0, 13, 5, 10, 14, 15, 8, 12, 4, 9, 1, 2,
+           15, 5, 1, 3, 7, 14, 6, 9, 11, 8, 12, 2, 10, 0, 4, 13,
+           8, 6, 4, 1, 3, 11, 15, 0, 5, 12, 2, 13, 9, 7, 10, 14,
+           12, 15, 10, 4, 1, 5, 8, 7, 6, 2, 13, 14, 0, 3, 9, 11]
+_RMD_S1 = [11, 14, 15, 12, 5, 8, 7, 9, 11, 13, 14, 15, 6, 7, 9, 8,
+           7, 6, 8, 13, 11, 9, 7, 15, 7, 12, 15, 9, 11, 7, 13, 12,
+           11, 13, 6, 7, 14, 9, 13, 15, 14, 8, 13, 6, 5, 12, 7, 5,
+           11, 12, 14, 15, 14, 15, 9, 8, 9, 14, 5, 6, 8, 6, 5, 12,
+           9, 15, 5, 11, 6, 8, 13, 12, 5, 12, 13, 14, 11, 8, 5, 6]
+_RMD_S2 = [8, 9, 9, 11, 13, 15, 15, 5, 7, 7, 8, 11, 14, 14, 12, 6,
+           9, 13, 15, 7, 12, 8, 9, 11, 7, 7, 12, 7, 6, 15, 13, 11,
+           9, 7, 15, 11, 8, 6, 6, 14, 12, 13, 5, 14, 13, 13, 7, 5,
+           15, 5, 8, 11, 14, 14, 6, 14, 6, 9, 12, 9, 12, 5, 15, 8,
+           8, 5, 12, 9, 12, 5, 14, 6, 8, 13, 6, 5, 15, 13, 11, 11]
+_RMD_K1 = [0x00000000, 0x5A827999, 0x6ED9EBA1, 0x8F1BBCDC, 0xA953FD4E]
+_RMD_K2 = [0x50A28BE6, 0x5C4DD124, 0x6D703EF3, 0x7A6D76E9, 0x00000000]
+_RMD_STEPS = [(j // 16, (79 - j) // 16, _RMD_R1[j], _RMD_R2[j], _RMD_S1[j],
+               _RMD_S2[j], _RMD_K1[j // 16], _RMD_K2[j // 16])
+              for j in range(80)]
+
+def hash160(data):
+    """RIPEMD-160 of SHA256"""
+    digest = hashlib.sha256(data).digest()
+    try:
+        return hashlib.new('ripemd160', digest).digest()
+    except ValueError: #not provided by this OpenSSL
+        return _ripemd160(digest)
+
+def fingerprint(public_key_bytes):
+    """Key fingerprint: first 4 bytes of the hash160 of the public key"""
+    return hash160(public_key_bytes)[0:4]
+
+def p2pkh_address(public_key_bytes, version=P2PKH_VERSION):
+    """Base58Check P2PKH address of a public key"""
+    return base58check_encode(chr(version) + hash160(public_key_bytes))
+
+def p2sh_p2wpkh_address(public_key_bytes, version=P2SH_VERSION):
+    """Base58Check address of a P2WPKH script nested in P2SH (BIP 49)"""
+    #BIP 141: the redeem script is the witness program, OP_0 <20-byte hash>
+    redeem_script = '\x00\x14' + hash160(public_key_bytes)
+    return base58check_encode(chr(version) + hash160(redeem_script))
+
+def p2wpkh_address(public_key_bytes, hrp=BECH32_HRP):
+    """Bech32 address of a version 0 witness program of a public key (BIP 84)"""
+    return bech32_encode(hrp, 0, hash160(public_key_bytes))
+
+def _bech32_polymod(values):
+    generator = [0x3b6a57b2, 0x26508e6d, 0x1ea119fa, 0x3d4233dd, 0x2a1462b3]
+    checksum = 1
+    for value in values:
+        top = checksum >> 25
+        checksum = (checksum & 0x1ffffff) << 5 ^ value
+        for bit in range(5):
+            if (top >> bit) & 1:
+                checksum ^= generator[bit]
+    return checksum
+
+def bech32_encode(hrp, witness_version, program):
+    """Bech32 segwit address of a witness program (BIP 173)
+
+    Raises: ValueError for version 1 and up, which use Bech32m (BIP 350)
+    """
+    if witness_version != 0:
+        raise ValueError("Only version 0 witness programs use Bech32")
+    #regroup the program's 8-bit bytes into 5-bit values
+    value = _bytes2int(program) if program else 0
+    n_values = (len(program) * 8 + 4) // 5
+    value <<= n_values * 5 - len(program) * 8
+    data = [witness_version] + [(value >> (5 * (n_values - 1 - num))) & 31
+                                for num in range(n_values)]
+    expanded = [ord(char) >> 5 for char in hrp] + [0] + \
+        [ord(char) & 31 for char in hrp]
+    polymod = _bech32_polymod(expanded + data + [0] * 6) ^ 1
+    checksum = [(polymod >> (5 * (5 - num))) & 31 for num in range(6)]
+    return hrp + '1' + ''.join(BECH32_CHARSET[digit]
+                               for digit in data + checksum)
+
+def parse_path(path):
+    """Child indices of a derivation path like "m/44'/0'/0'/0/0"
+
+    Hardened steps are marked with ', h or H.
+
+    Raises: ValueError
+    """
+    steps = path.split('/')
+    if steps[0] != 'm':
+        raise ValueError("Path must start with m: {0}".format(path))
+    indices = []
+    for step in steps[1:]:
+        hardened = step[-1:] in ("'", 'h', 'H')
+        number = int(step[:-1] if hardened else step)
+        if number < 0 or number >= HARDENED:
+            raise ValueError("Child number out of range: {0}".format(step))
+        indices.append(number + HARDENED if hardened else number)
+    return indices
+
+def ckd_priv(private_key, chain_code, index, parent_public_key=None):
+    """Private parent key to private child key
+
+    Args:
+        parent_public_key (str): public_key(private_key), if already known.
+            Saves computing it for every non-hardened child of a parent.
+
+    Raises: InvalidKeyError
+    """
+    if index >= HARDENED:
+        data = '\x00' + private_key + struct.pack('>I', index)
+    else:
+        if parent_public_key is None:
+            parent_public_key = public_key(private_key)
+        data = parent_public_key + struct.pack('>I', index)
+    digest = hmac.new(chain_code, data, hashlib.sha512).digest()
+    tweak = _bytes2int(digest[0:32])
+    child = (tweak + _bytes2int(private_key)) % CURVE_N
+    if tweak >= CURVE_N or child == 0:
+        raise InvalidKeyError(index)
+    return _int2bytes(child), digest[32:64]
+
+def derive_private(private_key, chain_code, indices):
+    """Derive along child indices; returns (private key, chain code)"""
+    for index in indices:
+        private_key, chain_code = ckd_priv(private_key, chain_code, index)
+    return private_key, chain_code
+
+def derive_extended(seed, path='m'):
+    """Extended private key of a path from a raw seed string
+
+    Returns: (private key, chain code, depth, parent fingerprint, child number)
+    """
+    indices = parse_path(path)
+    private_key, chain_code = master_key(seed)
+    if not indices:
+        return private_key, chain_code, 0, '\x00' * 4, 0
+    parent_key, parent_chain = derive_private(private_key, chain_code, indices[:-1])
+    private_key, chain_code = ckd_priv(parent_key, parent_chain, indices[-1])
+    return (private_key, chain_code, len(indices),
+            fingerprint(public_key(parent_key)), indices[-1])
+
+def seed2xprv(seed_hex, path='m'):
+    """Get the serialized extended private key of a hex seed"""
+    return serialize_xprv(*derive_extended(binascii.unhexlify(seed_hex), path))
+
+def seed2xpub(seed_hex, path='m'):
+    """Get the serialized extended public key of a hex seed"""
+    private_key, chain_code, depth, parent_fingerprint, child_number = \
+        derive_extended(binascii.unhexlify(seed_hex), path)
+    return serialize_xpub(public_key(private_key), chain_code, depth,
+                          parent_fingerprint, child_number)
+
+def seed2address(seed_hex, path):
+    """Get the P2PKH address of a path from a hex seed"""
+    private_key, chain_code = master_key(binascii.unhexlify(seed_hex))
+    private_key, _ = derive_private(private_key, chain_code, parse_path(path))
+    return p2pkh_address(public_key(private_key))
@@ -2,6 +2,11 @@
 
 #Python Standard Library 2.7
 import hashlib
+import binascii
+import threading
+
+#bip39_gym modules
+import wordlists #wordlists.py
 
 #BIP 39: "The mnemonic must encode entropy in a multiple of 32 bits"
 ENT_MOD = 32
@@ -14,6 +19,22 @@ WORDLIST_PIECE_BITS = 11
 
 WORDLIST_FILE = 'data/english.txt'
 
+#BIP 39: "To create a binary seed from the mnemonic, we use the PBKDF2 function
+#with a mnemonic sentence (in UTF-8 NFKD) used as the password and the string
+#"mnemonic" + passphrase (again in UTF-8 NFKD) used as the salt. The iteration
+#count is set to 2048 and HMAC-SHA512 is used as the pseudo-random function."
+SEED_SALT_PREFIX = 'mnemonic'
+SEED_ITERATIONS = 2048
+
+#Conversion tables for the binary string API
+_BYTE_BINSTRINGS = tuple(format(byte, '08b') for byte in range(256))
+_BINSTRING_BYTES = dict((binstring, chr(byte))
+                        for byte, binstring in enumerate(_BYTE_BINSTRINGS))
+_WORD_MASK = (1 << WORDLIST_PIECE_BITS) - 1
+_INDEX_BINSTRINGS = tuple(format(index, '011b') for index in range(2048))
+_BINSTRING_INDICES = dict((binstring, index)
+                          for index, binstring in enumerate(_INDEX_BINSTRINGS))
+
 class WordNotDefinedAtIndexError(Exception):
     """There is no English word defined at specified index"""
     pass
@@ -30,11 +51,21 @@ class FailedCheckSumError(Exception):
     """While decoding a mnemonic, the checksum failed"""
     pass
 
+def read_wordlist(path):
+    """Read a wordlist file with one word per line"""
+    with open(path) as wordlist_file:
+        wordlist = wordlist_file.readlines()
+        return [word.strip() for word in wordlist]
+
 def get_wordlist():
     """Get BIP39 English wordlist"""
-    with open(WORDLIST_FILE) as english:
-        wordlist = english.readlines()
-        return [word.strip() for word in wordlist]
+    return list(get_default_codec().wordlist)
+
+def get_word_index_map(wordlist=None):
+    """Map each word of the wordlist to its 0-based index for O(1) lookups"""
+    if wordlist is None:
+        return dict(get_default_codec().word_index_map)
+    return dict((word, index) for index, word in enumerate(wordlist))
 
 def dec2bin(dec, zero_padding=0):
     """Convert zero or positive integer to binary string
@@ -70,26 +101,57 @@ def bin2hex(binstring):
     #return n_bits / 8 if n_bits % 8 == 0 else (n_bits / 8) + 1
     n_bits = len(binstring)
     hexlen = n_bits / 4 if n_bits % 4 == 0 else (n_bits / 4) + 1
-    hex_str = hex(int(binstring, 2))[2:].zfill(hexlen) #remove leading 0x
-    return hex_str[:-1] if hex_str.endswith('L') else hex_str #trailing "L"
+    hex_str = hex(int(binstring, 2))[2:] #remove leading 0x
+    hex_str = hex_str[:-1] if hex_str.endswith('L') else hex_str #trailing "L"
+    return hex_str.zfill(hexlen)
 
 def decode_binary_string(binstring):
     """Convert binary string to raw data string
 
-    Reference: https://stackoverflow.com/a/40559005
+    Trailing bits that don't make up a whole byte are ignored.
+
+    Raises: ValueError if binstring has characters other than 0 and 1
+    """
+    try:
+        return ''.join([_BINSTRING_BYTES[binstring[i:i+8]]
+                        for i in xrange(0, len(binstring) // 8 * 8, 8)])
+    except KeyError:
+        raise ValueError("Not a binary string")
+
+def encode_binary_string(raw_str):
+    """Convert raw data string to binary string, 8 bits per byte"""
+    return ''.join([_BYTE_BINSTRINGS[byte] for byte in bytearray(raw_str)])
+
+def binstring2int(binstring):
+    """Integer of a binary string
+
+    Raises: ValueError if binstring has characters other than 0 and 1
+    """
+    #int() alone would also take whitespace, signs and a 0b prefix
+    if not binstring or binstring.strip('01'):
+        raise ValueError("Not a binary string")
+    return int(binstring, 2)
+
+def entropy_layout(entropy_binstring):
+    """Layout of the mnemonic of entropy expressed as binary string
+
+    Raises: ValueError if no mnemonic holds that many bits
     """
-    return ''.join(chr(int(binstring[i*8:i*8+8], 2)) for i in range(len(binstring)//8))
+    layout = get_ent_layout(len(entropy_binstring))
+    if layout is None:
+        raise ValueError("No mnemonic holds {0} bits of entropy".format(
+            len(entropy_binstring)))
+    return layout
 
 def checksum(entropy_binstring):
-    """Compute BIP39 checksum from entropy expressed as binary string"""
-    hasher = hashlib.sha256()
-    data = decode_binary_string(entropy_binstring)
-    hasher.update(data)
-    checksum_hex = hasher.hexdigest()
-    checksum_bin = hex2bin(checksum_hex)
+    """Compute BIP39 checksum from entropy expressed as binary string
 
-    ent = len(entropy_binstring) / ENT_MOD
-    return checksum_bin[0:ent]
+    Raises: ValueError if no mnemonic holds that many bits, or entropy_binstring
+        isn't a binary string
+    """
+    layout = entropy_layout(entropy_binstring)
+    return dec2bin(layout.checksum(binstring2int(entropy_binstring)),
+                   zero_padding=layout.cs)
 
 def binstring2word_index(binstring):
     """Obtain indices in wordlist from binary string
@@ -97,11 +159,12 @@ def binstring2word_index(binstring):
     BIP39: Next, these concatenated bits are split into groups of 11 bits, each
     encoding a number from 0-2047, serving as an index into a wordlist
     """
-    indices = [int( #interpret chunk as binary string and covert to int
-        binstring[i*WORDLIST_PIECE_BITS: #take chunk of 11 bits
-                  (i+1)*WORDLIST_PIECE_BITS],
-        2) for i in range(len(binstring)//WORDLIST_PIECE_BITS)]
-    return indices
+    n_bits = len(binstring) // WORDLIST_PIECE_BITS * WORDLIST_PIECE_BITS
+    try:
+        return [_BINSTRING_INDICES[binstring[i:i+WORDLIST_PIECE_BITS]]
+                for i in xrange(0, n_bits, WORDLIST_PIECE_BITS)]
+    except KeyError:
+        raise ValueError("Not a binary string")
 
 def word_index2binstring(index):
     """Obtain 11-bit string from word index in [0, 2047]
@@ -110,16 +173,653 @@ def word_index2binstring(index):
     """
     if index < 0 or index > 2047:
         raise WordNotDefinedAtIndexError()
-    return dec2bin(index, zero_padding=11)
+    try:
+        return _INDEX_BINSTRINGS[index]
+    except TypeError:
+        raise InvalidIntValueError()
+
+class Layout(object):
+    """Bit layout of a mnemonic of a given number of words
+
+    n_words * 11 bits hold ENT bits of entropy followed by CS = ENT / 32 bits
+    of checksum, so the mnemonic read as one integer is
+    (entropy << cs) | checksum.
+
+    Attributes:
+        n_words, n_bits: Words and bits, checksum included
+        ent, cs: Entropy and checksum bits
+        n_bytes: Entropy bytes
+        cs_mask: Mask of the checksum bits of the integer
+    """
+    __slots__ = ('n_words', 'n_bits', 'ent', 'cs', 'n_bytes', 'cs_mask',
+                 '_hex_format', '_bin_format', '_digest_hex', '_digest_shift',
+                 '_shifts')
+
+    def __init__(self, n_words):
+        if n_words <= 0 or n_words % 3 != 0:
+            raise ValueError("Mnemonics have a multiple of 3 words")
+        self.n_words = n_words
+        self.n_bits = n_words * WORDLIST_PIECE_BITS
+        self.cs = self.n_bits // (ENT_MOD + 1)
+        self.ent = self.n_bits - self.cs
+        self.n_bytes = self.ent // 8
+        self.cs_mask = (1 << self.cs) - 1
+        self._hex_format = '%0{0}x'.format(self.ent // 4)
+        self._bin_format = '0{0}b'.format(self.ent)
+        #leading hex digits of the digest holding the checksum
+        self._digest_hex = (self.cs + 3) // 4
+        self._digest_shift = self._digest_hex * 4 - self.cs
+        #offset of each word's bits in the integer, first word first
+        self._shifts = range(self.n_bits - WORDLIST_PIECE_BITS, -1,
+                             -WORDLIST_PIECE_BITS)
+
+    def checksum(self, entropy):
+        """Checksum of entropy, both as integers"""
+        digest = hashlib.sha256((self._hex_format % entropy).decode('hex'))
+        return int(digest.hexdigest()[0:self._digest_hex], 16) >> \
+            self._digest_shift
+
+    def indices(self, entropy):
+        """Word indices of the mnemonic of entropy, checksum included"""
+        combined = (entropy << self.cs) | self.checksum(entropy)
+        return [(combined >> shift) & _WORD_MASK for shift in self._shifts]
+
+    def last_indices(self, prefix):
+        """Indices of the last words that give a valid checksum
+
+        Args:
+            prefix (int): The other n_words - 1 words' indices as one integer
+
+        Returns: List of word indices in increasing order of the entropy bits
+            they hold. Past 33 words the last word is all checksum: at most one.
+        """
+        free_bits = WORDLIST_PIECE_BITS - self.cs
+        if free_bits >= 0:
+            prefix <<= free_bits
+            return [(free << self.cs) | self.checksum(prefix | free)
+                    for free in xrange(2 ** free_bits)]
+        #the prefix already holds -free_bits bits of checksum
+        checksum_val = self.checksum(prefix >> -free_bits)
+        if checksum_val >> WORDLIST_PIECE_BITS != \
+                prefix & ((1 << -free_bits) - 1):
+            return []
+        return [checksum_val & _WORD_MASK]
+
+    def binstring(self, entropy):
+        """Entropy integer as binary string"""
+        return format(entropy, self._bin_format)
+
+    def __repr__(self):
+        return "<Layout of {0} words: ENT={1} CS={2}>".format(
+            self.n_words, self.ent, self.cs)
+
+#Largest mnemonic whose layout is precomputed: ENT_MAX bits of entropy
+MAX_LAYOUT_WORDS = ENT_MAX * (ENT_MOD + 1) // ENT_MOD // WORDLIST_PIECE_BITS
+
+#SHA-256 gives at most 256 checksum bits
+MAX_WORDS = 256 * (ENT_MOD + 1) // WORDLIST_PIECE_BITS
+
+LAYOUTS = dict((n_words, Layout(n_words))
+               for n_words in range(3, MAX_LAYOUT_WORDS + 1, 3))
+
+def get_layout(n_words):
+    """Layout of a mnemonic of n_words words, None if no mnemonic has that many
+
+    Lengths past MAX_LAYOUT_WORDS are worked out on each call.
+    """
+    layout = LAYOUTS.get(n_words)
+    if layout is None and MAX_LAYOUT_WORDS < n_words <= MAX_WORDS and \
+            n_words % 3 == 0:
+        layout = Layout(n_words)
+    return layout
+
+def get_ent_layout(ent):
+    """Layout of the mnemonic holding ent bits of entropy, None if none does"""
+    if ent <= 0 or ent % ENT_MOD != 0:
+        return None
+    return get_layout(ent * (ENT_MOD + 1) // ENT_MOD // WORDLIST_PIECE_BITS)
+
+class Bip39Codec(object):
+    """Mnemonic encoder/decoder owning its wordlist, limits and warning sink
+
+    A codec is never mutated after construction and performs no I/O of its own
+    after loading the wordlist, so any number of codecs with different
+    wordlists or warning sinks can be used side by side from threads, or
+    pickled into worker processes.
+
+    Args:
+        wordlist (List[str] or wordlists.Wordlist): Wordlist to use. Default:
+            read wordlist_file
+        wordlist_file (str): Path of wordlist. Default: WORDLIST_FILE
+        language (str): Use the compiled wordlist of one of
+            wordlists.LANGUAGES instead of wordlist or wordlist_file
+        ent_min (int): Smallest allowed entropy in bits. Default: ENT_MIN
+        ent_max (int): Largest allowed entropy in bits. Default: ENT_MAX
+        warning_sink (function): Called with the text of each non-fatal
+            warning. Default: None, warnings are discarded.
+    """
+
+    def __init__(self, wordlist=None, wordlist_file=None, ent_min=ENT_MIN,
+                 ent_max=ENT_MAX, warning_sink=None, language=None):
+        if language is not None:
+            wordlist = wordlists.open_wordlist(language)
+        elif wordlist is None:
+            wordlist = read_wordlist(
+                WORDLIST_FILE if wordlist_file is None else wordlist_file)
+        if isinstance(wordlist, wordlists.Wordlist):
+            #compiled wordlists are shared, and words are compared in NFKD
+            self.wordlist = wordlist
+            self.word_index_map = wordlist.index_map
+            self.separator = wordlist.separator
+            self.normalize = True
+        else:
+            self.wordlist = tuple(wordlist)
+            self.word_index_map = dict(
+                (word, index) for index, word in enumerate(self.wordlist))
+            self.separator = ' '
+            self.normalize = False
+        self.ent_min = ent_min
+        self.ent_max = ent_max
+        self.warning_sink = warning_sink
+
+    def copy(self, **overrides):
+        """Return a codec sharing this codec's tables with some options changed
+
+        Args: Any of ent_min, ent_max, warning_sink
+        """
+        codec = Bip39Codec.__new__(Bip39Codec)
+        codec.__dict__.update(self.__dict__)
+        for name, value in overrides.iteritems():
+            if name not in ('ent_min', 'ent_max', 'warning_sink'):
+                raise TypeError("Cannot override {0}".format(name))
+            setattr(codec, name, value)
+        return codec
+
+    def warn(self, message):
+        """Pass a non-fatal warning to the warning sink, if any"""
+        if self.warning_sink is not None:
+            self.warning_sink(message)
+
+    def entropy_length_error(self, bit_len):
+        """Describe why an entropy length is not allowed, or None if it is"""
+        if bit_len % ENT_MOD != 0:
+            return "Entropy is not a multiple of {0} bits: {1} bits".format(
+                ENT_MOD, bit_len)
+        if bit_len < self.ent_min:
+            return "Entropy cannot be less than {0} bits: {1} bits".format(
+                self.ent_min, bit_len)
+        if bit_len > self.ent_max:
+            return "Entropy cannot be more than {0} bits: {1} bits".format(
+                self.ent_max, bit_len)
+        return None
+
+    def is_normal_length(self, n_words):
+        """Whether n_words is a mnemonic length within the entropy limits"""
+        layout = get_layout(n_words)
+        return layout is not None and \
+            self.entropy_length_error(layout.ent) is None
+
+    def get_word_from_index(self, index):
+        """Get the word at specified 0-based index
+
+        Raises: WordNotDefinedAtIndexError
+        """
+        if index < 0 or index > 2047:
+            raise WordNotDefinedAtIndexError()
+        return self.wordlist[index]
+
+    def get_index_from_word(self, word):
+        """Get the 0-based index of a word
+
+        Raises: InvalidWordError
+        """
+        try:
+            return self.word_index_map[word]
+        except KeyError:
+            raise InvalidWordError()
+
+    def get_mnemonic(self, indices):
+        """Given a list of word indices, get full mnemonic
+
+        Raises:
+            ValueError: if empty list
+            WordNotDefinedAtIndexError: If index in list is out of range
+        """
+        if len(indices) == 0:
+            raise ValueError
+        return self.separator.join(
+            [self.get_word_from_index(index) for index in indices])
+
+    def get_indices(self, mnemonic):
+        """Given a mnemonic sentence, get the word indices
+
+        Raises:
+            ValueError: If empty bin_string
+            InvalidWordError: If a word is not found in the dictionary
+        """
+        if len(mnemonic) == 0:
+            raise ValueError
+        return [self.get_index_from_word(word)
+                for word in self.split_words(mnemonic)]
+
+    def split_words(self, mnemonic):
+        """Split a mnemonic into words, normalized to NFKD if needed"""
+        if self.normalize:
+            return wordlists.split_words(mnemonic)
+        return mnemonic.split()
+
+    def mnemonic2binstring(self, mnemonic):
+        """Convert complete mnemonic setence to binstring and verify checksum.
+
+        The returned value will not include the checksum.
+
+        Raises:
+        ValueError: If empty mnemonic or malformatted word
+        InvalidWordError: If a word is not found in the dictionary
+        FailedCheckSumError
+        """
+        if mnemonic == '':
+            raise ValueError
+        word_index_map = self.word_index_map
+        words = self.split_words(mnemonic)
+        combined = 0
+        try:
+            for word in words:
+                combined = (combined << WORDLIST_PIECE_BITS) | \
+                    word_index_map[word]
+        except KeyError:
+            raise InvalidWordError()
+        return self._split_checksum(combined, len(words))
+
+    def mnemonics2binstrings(self, mnemonics):
+        """Batch version of mnemonic2binstring
+
+        Raises: Same as mnemonic2binstring for the first bad mnemonic
+        """
+        return [self.mnemonic2binstring(mnemonic) for mnemonic in mnemonics]
+
+    def _split_checksum(self, combined, n_words):
+        """Split the integer of a mnemonic's word indices into entropy and
+        checksum and verify the checksum
+
+        Returns: Entropy as binary string
+
+        Raises: FailedCheckSumError
+        """
+        layout = get_layout(n_words)
+        if layout is None:
+            self.warn("WARNING: Length of decoded mnemonic inconsistent with "
+                      "proper length!")
+            raise FailedCheckSumError()
+        entropy = combined >> layout.cs
+        if combined & layout.cs_mask != layout.checksum(entropy):
+            raise FailedCheckSumError()
+        return layout.binstring(entropy)
+
+    def binstring2mnemonic(self, entropy_bin):
+        """Convert raw entropy as binary string (sans checksum) to mnemonic
+
+        Raises: ValueError if no mnemonic holds that many bits (see
+            get_ent_layout), or entropy_bin isn't a binary string
+        """
+        wordlist = self.wordlist
+        return self.separator.join([
+            wordlist[index] for index in entropy_layout(entropy_bin).indices(
+                binstring2int(entropy_bin))])
+
+    def binstrings2mnemonics(self, entropy_bins):
+        """Batch version of binstring2mnemonic
+
+        Raises: ValueError for the first bad entropy
+        """
+        wordlist = self.wordlist
+        separator = self.separator
+        layouts = {} #entropy bits -> Layout
+        mnemonics = []
+        for entropy_bin in entropy_bins:
+            layout = layouts.get(len(entropy_bin))
+            if layout is None:
+                layout = layouts[len(entropy_bin)] = entropy_layout(entropy_bin)
+            mnemonics.append(separator.join([
+                wordlist[index]
+                for index in layout.indices(binstring2int(entropy_bin))]))
+        return mnemonics
+
+    def get_last_word_candidates(self, partial_mnemonic):
+        """Get every word that completes a mnemonic with a valid checksum
+
+        Args:
+            partial_mnemonic (str): All words of the mnemonic except the last.
+                The complete mnemonic must have a multiple of 3 words.
+
+        Raises:
+            ValueError: If the completed mnemonic would have an invalid length
+            InvalidWordError: If a word is not found in the dictionary
+        """
+        words = self.split_words(partial_mnemonic)
+        layout = get_layout(len(words) + 1)
+        if layout is None:
+            raise ValueError
+        prefix = 0
+        for word in words:
+            prefix = (prefix << WORDLIST_PIECE_BITS) | \
+                self.get_index_from_word(word)
+
+        return [self.wordlist[index] for index in layout.last_indices(prefix)]
+
+_UNSET = object()
+
+class Mnemonic(object):
+    """Immutable mnemonic whose other representations are derived on demand
+
+    Build it from any one representation with a from_* constructor. Every
+    other form, the checksum, validity and the seed for each passphrase are
+    computed on first access and cached, so one object can be passed along a
+    pipeline instead of re-deriving strings at every step.
+
+    A Mnemonic built from entropy is valid if some mnemonic length holds
+    exactly that many bits (get_ent_layout); entropy of any other length,
+    e.g. 40 bits, gives an invalid one without words. One built from words
+    or indices may carry a bad checksum; its entropy is still available and
+    `valid` tells whether the checksum matches.
+    """
+    __slots__ = ('_codec', '_words', '_mnemonic', '_indices', '_binstring',
+                 '_stored_checksum', '_checksum', '_entropy_hex',
+                 '_entropy_bytes', '_valid', '_seeds')
+
+    def __init__(self, codec=None, **representation):
+        """Use a from_* constructor instead"""
+        set_slot = super(Mnemonic, self).__setattr__
+        for name in self.__slots__:
+            set_slot(name, _UNSET)
+        set_slot('_codec', get_default_codec(print_warning=False)
+                 if codec is None else codec)
+        set_slot('_seeds', {})
+        for name, value in representation.iteritems():
+            set_slot('_' + name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Mnemonic is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("Mnemonic is immutable")
+
+    def _cache(self, name, value):
+        super(Mnemonic, self).__setattr__(name, value)
+        return value
+
+    @classmethod
+    def from_mnemonic(cls, mnemonic, codec=None):
+        """Build from a mnemonic sentence
+
+        Raises: ValueError if empty
+        """
+        if len(mnemonic) == 0:
+            raise ValueError
+        return cls(codec, mnemonic=mnemonic)
+
+    @classmethod
+    def from_words(cls, words, codec=None):
+        """Build from a sequence of words
+
+        Raises: ValueError if empty
+        """
+        if len(words) == 0:
+            raise ValueError
+        return cls(codec, words=tuple(words))
+
+    @classmethod
+    def from_indices(cls, indices, codec=None):
+        """Build from a sequence of word indices
+
+        Raises: ValueError if empty, WordNotDefinedAtIndexError
+        """
+        if len(indices) == 0:
+            raise ValueError
+        for index in indices:
+            if index < 0 or index > 2047:
+                raise WordNotDefinedAtIndexError()
+        return cls(codec, indices=tuple(indices))
+
+    @classmethod
+    def from_binstring(cls, entropy_bin, codec=None):
+        """Build from entropy as binary string (sans checksum)"""
+        return cls(codec, binstring=entropy_bin,
+                   valid=get_ent_layout(len(entropy_bin)) is not None)
+
+    @classmethod
+    def from_hex(cls, entropy_hex, codec=None):
+        """Build from entropy as hex string"""
+        entropy_bin = hex2bin(entropy_hex)
+        return cls(codec, binstring=entropy_bin,
+                   entropy_hex=entropy_hex.lower(),
+                   valid=get_ent_layout(len(entropy_bin)) is not None)
+
+    @classmethod
+    def from_bytes(cls, entropy_bytes, codec=None):
+        """Build from entropy as raw byte string"""
+        return cls(codec, binstring=encode_binary_string(entropy_bytes),
+                   entropy_bytes=entropy_bytes,
+                   valid=get_ent_layout(len(entropy_bytes) * 8) is not None)
+
+    @property
+    def codec(self):
+        """Codec providing the wordlist"""
+        return self._codec
+
+    @property
+    def words(self):
+        """Tuple of words
+
+        Raises: WordNotDefinedAtIndexError
+        """
+        if self._words is _UNSET:
+            if self._mnemonic is not _UNSET:
+                return self._cache('_words', tuple(
+                    self._codec.split_words(self._mnemonic)))
+            return self._cache('_words', tuple(
+                self._codec.get_word_from_index(index)
+                for index in self.indices))
+        return self._words
+
+    @property
+    def mnemonic(self):
+        """Mnemonic sentence
+
+        Raises: WordNotDefinedAtIndexError
+        """
+        if self._mnemonic is _UNSET:
+            return self._cache('_mnemonic',
+                               self._codec.separator.join(self.words))
+        return self._mnemonic
+
+    @property
+    def indices(self):
+        """Tuple of word indices, including the checksum bits
+
+        Raises: InvalidWordError, ValueError if built from entropy of a length
+            no mnemonic holds
+        """
+        if self._indices is _UNSET:
+            if self._binstring is not _UNSET and self._words is _UNSET and \
+                    self._mnemonic is _UNSET:
+                layout = entropy_layout(self._binstring)
+                return self._cache('_indices', tuple(
+                    layout.indices(binstring2int(self._binstring))))
+            return self._cache('_indices', tuple(
+                self._codec.get_index_from_word(word) for word in self.words))
+        return self._indices
+
+    def _split(self):
+        combined_bin = ''.join([_INDEX_BINSTRINGS[index]
+                                for index in self.indices])
+        layout = get_layout(len(self.indices))
+        if layout is None:
+            #not a mnemonic length: its checksum never matches
+            ent = len(combined_bin) * ENT_MOD // (ENT_MOD + 1)
+        else:
+            ent = layout.ent
+        self._cache('_binstring', combined_bin[0:ent])
+        self._cache('_stored_checksum', combined_bin[ent:])
+
+    @property
+    def binstring(self):
+        """Entropy as binary string (sans checksum)
+
+        Raises: InvalidWordError
+        """
+        if self._binstring is _UNSET:
+            self._split()
+        return self._binstring
+
+    @property
+    def entropy_hex(self):
+        """Entropy as hex string"""
+        if self._entropy_hex is _UNSET:
+            return self._cache('_entropy_hex', bin2hex(self.binstring))
+        return self._entropy_hex
+
+    @property
+    def entropy_bytes(self):
+        """Entropy as raw byte string, if it is a whole number of bytes"""
+        if self._entropy_bytes is _UNSET:
+            return self._cache('_entropy_bytes',
+                               decode_binary_string(self.binstring))
+        return self._entropy_bytes
+
+    @property
+    def checksum(self):
+        """Checksum computed from the entropy, as binary string
+
+        Raises: ValueError if no mnemonic holds that much entropy
+        """
+        if self._checksum is _UNSET:
+            return self._cache('_checksum', checksum(self.binstring))
+        return self._checksum
+
+    @property
+    def valid(self):
+        """Whether all words are known and the checksum matches"""
+        if self._valid is _UNSET:
+            try:
+                if self._stored_checksum is _UNSET:
+                    self._split()
+                valid = self._stored_checksum == self.checksum
+            except (ValueError, InvalidWordError, WordNotDefinedAtIndexError):
+                #ValueError: not a mnemonic length, so no checksum to compare
+                valid = False
+            return self._cache('_valid', valid)
+        return self._valid
+
+    def seed(self, passphrase=''):
+        """BIP39 seed for a passphrase as hex string, cached per passphrase"""
+        seed_hex = self._seeds.get(passphrase)
+        if seed_hex is None:
+            seed_hex = mnemonic2seed(self.mnemonic, passphrase)
+            self._seeds[passphrase] = seed_hex
+        return seed_hex
+
+    def __len__(self):
+        return len(self.indices)
+
+    def __eq__(self, other):
+        if not isinstance(other, Mnemonic):
+            return NotImplemented
+        return (self.indices == other.indices and
+                self._codec.wordlist is other.codec.wordlist)
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        return equal if equal is NotImplemented else not equal
+
+    def __hash__(self):
+        return hash(self.indices)
+
+    def __repr__(self):
+        #never echo the secret itself
+        if self._valid is False and self._indices is _UNSET and \
+                self._words is _UNSET and self._mnemonic is _UNSET:
+            return "<Mnemonic of {0} bits of entropy>".format(
+                len(self._binstring))
+        return "<Mnemonic of {0} words>".format(len(self))
+
+_DEFAULT_CODEC = None
+_SILENT_DEFAULT_CODEC = None
+_DEFAULT_CODEC_LOCK = threading.Lock()
+
+def _print_warning(message):
+    print message
+
+def get_default_codec(print_warning=True):
+    """Get the codec behind the module-level functions
+
+    It is created on first use from WORDLIST_FILE, ENT_MIN and ENT_MAX.
+
+    Args:
+        print_warning (bool): Whether the codec prints warnings. Default: True
+    """
+    global _DEFAULT_CODEC, _SILENT_DEFAULT_CODEC #pylint: disable=global-statement
+    if _DEFAULT_CODEC is None:
+        with _DEFAULT_CODEC_LOCK:
+            if _DEFAULT_CODEC is None:
+                codec = Bip39Codec(warning_sink=_print_warning)
+                _SILENT_DEFAULT_CODEC = codec.copy(warning_sink=None)
+                _DEFAULT_CODEC = codec
+    return _DEFAULT_CODEC if print_warning else _SILENT_DEFAULT_CODEC
+
+def _codec_for(wordlist, print_warning=True):
+    if wordlist is None:
+        return get_default_codec(print_warning)
+    return Bip39Codec(wordlist=wordlist,
+                      warning_sink=_print_warning if print_warning else None)
+
+_LANGUAGE_CODECS = {}
+
+def get_language_codec(language):
+    """Get a shared, silent codec for one of wordlists.LANGUAGES
+
+    Raises: ValueError for an unknown language
+    """
+    codec = _LANGUAGE_CODECS.get(language)
+    if codec is None:
+        with _DEFAULT_CODEC_LOCK:
+            codec = _LANGUAGE_CODECS.get(language)
+            if codec is None:
+                codec = Bip39Codec(language=language)
+                _LANGUAGE_CODECS[language] = codec
+    return codec
+
+def detect_language(mnemonic, languages=wordlists.LANGUAGES):
+    """Detect the wordlist language of a mnemonic
+
+    When the words occur in several wordlists, the checksum decides.
+
+    Raises:
+        InvalidWordError: If no wordlist contains every word
+        wordlists.AmbiguousLanguageError: If the checksum doesn't decide
+    """
+    candidates = wordlists.detect_languages(mnemonic, languages)
+    if len(candidates) == 0:
+        raise InvalidWordError()
+    if len(candidates) > 1:
+        valid = []
+        for language in candidates:
+            try:
+                get_language_codec(language).mnemonic2binstring(mnemonic)
+                valid.append(language)
+            except FailedCheckSumError:
+                pass
+        if len(valid) != 1:
+            raise wordlists.AmbiguousLanguageError(valid or candidates)
+        candidates = valid
+    return candidates[0]
 
 def get_word_from_index(index):
     """Get the BIP39 word from the English wordlist at specified 0-based index
 
     Raises: WordNotDefinedAtIndexError
     """
-    if index < 0 or index > 2047:
-        raise WordNotDefinedAtIndexError()
-    return get_wordlist()[index]
+    return get_default_codec().get_word_from_index(index)
 
 def get_index_from_word(word, wordlist=None):
     """Get the 0-based index of a word in English wordlist
@@ -127,7 +827,7 @@ def get_index_from_word(word, wordlist=None):
     Raises: InvalidWordError
     """
     if wordlist is None:
-        wordlist = get_wordlist()
+        return get_default_codec().get_index_from_word(word)
     for index, word_comp in enumerate(wordlist):
         if word_comp == word:
             return index
@@ -140,9 +840,7 @@ def get_mnemonic(indices):
         ValueError: if empty list
         WordNotDefinedAtIndexError: If index in list is out of range
     """
-    if len(indices) == 0:
-        raise ValueError
-    return " ".join([get_word_from_index(index) for index in indices])
+    return get_default_codec().get_mnemonic(indices)
 
 def get_indices(mnemonic):
     """Given a mnemonic sentence, get the word indices for the English wordlist
@@ -151,9 +849,7 @@ def get_indices(mnemonic):
         ValueError: If empty bin_string
         InvalidWordError: If a word is not found in the dictionary
     """
-    if len(mnemonic) == 0:
-        raise ValueError
-    return [get_index_from_word(word) for word in mnemonic.split()]
+    return get_default_codec().get_indices(mnemonic)
 
 def mnemonic2binstring(mnemonic, print_warning=True):
     """Convert complete mnemonic setence to binstring and verify checksum.
@@ -165,31 +861,46 @@ def mnemonic2binstring(mnemonic, print_warning=True):
     InvalidWordError: If a word is not found in the dictionary
     FailedCheckSumError
     """
-    if mnemonic == '':
-        raise ValueError
-    binstring = ''
-    wordlist = get_wordlist()
-    for word in mnemonic.split():
-        index = get_index_from_word(word, wordlist=wordlist)
-        binstring += word_index2binstring(index)
+    return get_default_codec(print_warning).mnemonic2binstring(mnemonic)
 
-    if len(binstring) % 1.03125 != 0:
-        if print_warning:
-            print "WARNING: Length of decoded mnemonic inconsistent with proper length!"
+def mnemonics2binstrings(mnemonics, print_warning=True, wordlist=None):
+    """Batch version of mnemonic2binstring that reads the wordlist only once
 
-    ent = int(len(binstring) / 1.03125)
-    raw_entropy = binstring[0:ent]
-    checksum_val = binstring[ent:]
-    computed_checksum = checksum(raw_entropy)
-    if checksum_val != computed_checksum:
-        raise FailedCheckSumError()
-
-    return raw_entropy
+    Raises: Same as mnemonic2binstring for the first bad mnemonic in the batch
+    """
+    return _codec_for(wordlist, print_warning).mnemonics2binstrings(mnemonics)
 
 def binstring2mnemonic(entropy_bin):
     """Convert raw entropy as binary string (sans checksum) to bip39 mnemonic"""
-    checksum_bin = checksum(entropy_bin)
-    combined_bin = "{0}{1}".format(entropy_bin, checksum_bin)
-    indices = binstring2word_index(combined_bin)
-    mnemonic = get_mnemonic(indices)
-    return mnemonic
+    return get_default_codec().binstring2mnemonic(entropy_bin)
+
+def binstrings2mnemonics(entropy_bins, wordlist=None):
+    """Batch version of binstring2mnemonic that reads the wordlist only once
+
+    Raises: ValueError, WordNotDefinedAtIndexError
+    """
+    return _codec_for(wordlist).binstrings2mnemonics(entropy_bins)
+
+def get_last_word_candidates(partial_mnemonic, wordlist=None):
+    """Get every word that completes a mnemonic with a valid checksum
+
+    Args:
+        partial_mnemonic (str): All words of the mnemonic except the last. The
+            complete mnemonic must have a multiple of 3 words.
+        wordlist (List[str]): Optional pre-loaded wordlist
+
+    Raises:
+        ValueError: If the completed mnemonic would have an invalid length
+        InvalidWordError: If a word is not found in the dictionary
+    """
+    return _codec_for(wordlist).get_last_word_candidates(partial_mnemonic)
+
+def mnemonic2seed(mnemonic, passphrase=''):
+    """Derive the 512-bit BIP39 seed from a mnemonic, returned as hex string
+
+    The mnemonic is not validated; BIP39 defines the seed for any sentence.
+    """
+    password = wordlists.normalize(mnemonic)
+    salt = wordlists.normalize(SEED_SALT_PREFIX + passphrase)
+    seed = hashlib.pbkdf2_hmac('sha512', password, salt, SEED_ITERATIONS)
+    return binascii.hexlify(seed)
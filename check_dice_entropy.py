@@ -24,28 +24,38 @@ ensure that the frequency of every bit position is equal.
 
 """
 #Python Standard Library 2.7
+import argparse
 from itertools import repeat
 import random
 import math
 
-#PyPI modules
-import progressbar #pip install progressbar2
-
 #bip39_gym modules
+import checkpoint #checkpoint.py
 import entropy #entropy.py
+import entropy_sources #entropy_sources.py
+import telemetry #telemetry.py
 
 TEST2_MAX_BITS = 14
 TEST2_MAX_ROLL_NUM = 7
 
 ENABLE_DEBUG_PRINT = False
 
-def rand_wrapper(n_bits):
-    """Wrapper for randint and die_rolls_to_bitstring"""
+def rand_wrapper(n_bits, source=None):
+    """Wrapper for randint and die_rolls_to_bitstring
+
+    Args:
+        n_bits (int): Bits of entropy to be produced
+        source (entropy_sources.EntropySource): Where the simulated rolls come
+            from. Default: random.SystemRandom
+    """
     #doubled rolls to account for the average number of rolls dropped as 4 or 5
     n_rolls = int(math.ceil(entropy.die_rolls_per_bits(n_bits) * 2))
     enough_rolls = False
     rolls = []
-    rand = random.SystemRandom()
+    if source is None:
+        rand = random.SystemRandom()
+    else:
+        rand = entropy_sources.SourceRandom(source)
     for _ in repeat(None, n_rolls):
         rolls.append(rand.randint(1, 6))
     while not enough_rolls:
@@ -71,77 +81,162 @@ def _get_dice_rolls_of_len(n_dice_rolls):
     assert len(roll_sequences) == 6 ** n_dice_rolls
     return roll_sequences
 
-def test_die_rolls_to_bitstring_entropy_uniformity():
-    """Demonstrate uniformity of bits for all possible die rolls"""
+def uniformity_cases(max_bits=None, max_roll_num=None):
+    """(bit string length, number of rolls) pairs checked by test 2, in order
+
+    Args:
+        max_bits (int): Longest bit string. Default: TEST2_MAX_BITS
+        max_roll_num (int): Most rolls. Default: TEST2_MAX_ROLL_NUM
+    """
+    if max_bits is None:
+        max_bits = TEST2_MAX_BITS
+    if max_roll_num is None:
+        max_roll_num = TEST2_MAX_ROLL_NUM
+    return [(bitstring_len, rolls_num)
+            for bitstring_len in range(2, max_bits + 1, 2)
+            for rolls_num in range(1, max_roll_num + 1)]
+
+def uniformity_failures(bitstring_len, rolls_num, results_0, results_1):
+    """Failure messages of one case of test 2, empty if its bits are uniform
+
+    Args:
+        results_0 (List[int]): Number of 0 bits at each position
+        results_1 (List[int]): Number of 1 bits at each position
+    """
     failures = []
-    with progressbar.ProgressBar(max_value=TEST2_MAX_BITS * TEST2_MAX_ROLL_NUM) as prog_bar:
-        for bitstring_len in range(2, TEST2_MAX_BITS + 1, 2):
-            for rolls_num in range(1, TEST2_MAX_ROLL_NUM + 1):
-                roll_sequences = _get_dice_rolls_of_len(rolls_num)
-                results_0 = [0] * bitstring_len
-                results_1 = [0] * bitstring_len
-                for roll_sequence in roll_sequences:
-                    #count up the results for bistrings generated from each roll combo
-                    _dprint("Testing bit len {0} roll sequence {1}".format(
-                        bitstring_len, roll_sequence))
-
-                    try:
-                        bits = entropy.die_rolls_to_bitstring(roll_sequence, bitstring_len)
-                        _dprint("bitlen = {0} sequence = {1} bits = {2}".format(
-                            bitstring_len, roll_sequence, bits))
-                        for index, bit in enumerate(bits):
-                            assert bit in ("0", "1")
-                            if bit == "0":
-                                results_0[index] += 1
-                            else:
-                                results_1[index] += 1
-                    except entropy.InsufficientEntropyError:
-                        _dprint(("Not enough dice rolls ({0}) for {1} bits of "
-                                 "entropy. Omiting from frequency count.").format(
-                                     rolls_num, bitstring_len))
-
-                #all bits in results arrays should be equally distributed
-                frequency = results_0[0]
-                for index, val in enumerate(results_0):
-                    if frequency != val:
-                        msg = (("Failure for {0} bits and {1} rolls: Bit "
-                                "results not uniform: {2} != {3}").format(
-                                    bitstring_len, rolls_num, results_0, results_1))
-                        print msg
-                        failures.append(msg)
-                for index, val in enumerate(results_1):
-                    if frequency != val:
-                        msg = (("Failure for {0} bits and {1} rolls: Bit results "
-                                "not uniform: {2} != {3}").format(
-                                    bitstring_len, rolls_num, results_0, results_1))
-                        print msg
-                        failures.append(msg)
-
-                prog_bar.update(bitstring_len * rolls_num)
+    #all bits in results arrays should be equally distributed
+    frequency = results_0[0]
+    for val in results_0 + results_1:
+        if frequency != val:
+            failures.append(("Failure for {0} bits and {1} rolls: Bit results "
+                             "not uniform: {2} != {3}").format(
+                                 bitstring_len, rolls_num, results_0, results_1))
+    return failures
+
+def test_die_rolls_to_bitstring_entropy_uniformity(
+        checkpoint=None, metrics=None,
+        report_interval=telemetry.REPORT_INTERVAL):
+    """Demonstrate uniformity of bits for all possible die rolls
+
+    Progress is counted in roll sequences, so that it moves during the long
+    cases of many rolls.
+
+    Args:
+        checkpoint (checkpoint.Checkpoint): If given, the position in the
+            enumeration, counters and failures are saved to it periodically
+            and a run resumes from it
+        metrics (str): If given, a telemetry snapshot is kept in this file
+
+    Returns: List of failure messages
+    """
+    failures = []
+    cases = uniformity_cases()
+    start_case = 0
+    state = checkpoint.load() if checkpoint is not None else None
+    if state is not None:
+        start_case, failures = state['case'], state['failures']
+        print "Resuming at case {0} from {1}".format(start_case, checkpoint.path)
+    #sequences before each case
+    offsets = [0]
+    for _, rolls_num in cases:
+        offsets.append(offsets[-1] + 6 ** rolls_num)
+    start_sequence = 0 if state is None else state['sequence']
+    with telemetry.Progress(offsets[-1], 'dice_uniformity', 'roll sequences',
+                            report_interval, metrics=metrics,
+                            start=offsets[start_case] + start_sequence
+                           ) as progress:
+        for case_num in range(start_case, len(cases)):
+            bitstring_len, rolls_num = cases[case_num]
+            roll_sequences = _get_dice_rolls_of_len(rolls_num)
+            start_sequence = 0
+            results_0 = [0] * bitstring_len
+            results_1 = [0] * bitstring_len
+            if state is not None and case_num == state['case']:
+                start_sequence = state['sequence']
+                results_0, results_1 = state['results_0'], state['results_1']
+            offset = offsets[case_num]
+            for sequence_num in range(start_sequence, len(roll_sequences)):
+                roll_sequence = roll_sequences[sequence_num]
+                #count up the results for bistrings generated from each roll combo
+                _dprint("Testing bit len {0} roll sequence {1}".format(
+                    bitstring_len, roll_sequence))
+
+                try:
+                    bits = entropy.die_rolls_to_bitstring(roll_sequence, bitstring_len)
+                    _dprint("bitlen = {0} sequence = {1} bits = {2}".format(
+                        bitstring_len, roll_sequence, bits))
+                    for index, bit in enumerate(bits):
+                        assert bit in ("0", "1")
+                        if bit == "0":
+                            results_0[index] += 1
+                        else:
+                            results_1[index] += 1
+                except entropy.InsufficientEntropyError:
+                    _dprint(("Not enough dice rolls ({0}) for {1} bits of "
+                             "entropy. Omiting from frequency count.").format(
+                                 rolls_num, bitstring_len))
+
+                progress.update(offset + sequence_num + 1)
+                if checkpoint is not None and checkpoint.due():
+                    checkpoint.save({'case': case_num,
+                                     'sequence': sequence_num + 1,
+                                     'results_0': results_0,
+                                     'results_1': results_1,
+                                     'failures': failures})
+
+            for msg in uniformity_failures(bitstring_len, rolls_num,
+                                           results_0, results_1):
+                print msg
+                failures.append(msg)
     if len(failures) == 0:
         print "Test #2: Passed. No failures."
     else:
         print "Test #2: Failed:"
         for failure in failures:
             print failure
+    if checkpoint is not None:
+        checkpoint.remove()
+    return failures
 
 def _dprint(msg):
     if ENABLE_DEBUG_PRINT:
         print "DEBUG: {0}".format(msg)
 
 def _main():
+    parser = argparse.ArgumentParser(
+        description='Check dice-to-bits conversion for bias')
+    entropy.add_source_args(parser)
+    checkpoint.add_checkpoint_args(parser)
+    telemetry.add_telemetry_args(parser)
+    args = parser.parse_args()
+    source = entropy.source_from_args(args)
+
     if not ENABLE_DEBUG_PRINT:
         entropy.ENABLE_DEBUG_PRINT = False
     n_bits = 256
     print("Test #1: Checking entropic soundness of dice-to-bits conversion by "
           "generating {n} bits {k} times...").format(
               n=n_bits, k=entropy.TEST_ITERATIONS)
-    entropy.entropy_test(n_bits, rand_wrapper)
+    entropy.entropy_test(n_bits, rand_wrapper, source=source,
+                         checkpoint=entropy.entropy_test_checkpoint(
+                             args.checkpoint and args.checkpoint + '.test1',
+                             n_bits, rand_wrapper, source,
+                             interval=args.checkpoint_interval),
+                         metrics=args.metrics and args.metrics + '.test1',
+                         report_interval=args.report_interval)
 
     print(("Test #2: Checking for uniformity of bits for bit lengths of 2 to "
            "{0} and beteween 1 roll and {1} rolls...").format(
                TEST2_MAX_BITS, TEST2_MAX_ROLL_NUM))
-    test_die_rolls_to_bitstring_entropy_uniformity()
+    test2_checkpoint = None
+    if args.checkpoint:
+        test2_checkpoint = checkpoint.Checkpoint(
+            args.checkpoint + '.test2', 'dice_uniformity',
+            {'max_bits': TEST2_MAX_BITS, 'max_roll_num': TEST2_MAX_ROLL_NUM},
+            args.checkpoint_interval)
+    test_die_rolls_to_bitstring_entropy_uniformity(
+        test2_checkpoint, args.metrics and args.metrics + '.test2',
+        args.report_interval)
 
 if __name__ == '__main__':
     _main()
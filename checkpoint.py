@@ -0,0 +1,155 @@
+"""Resumable checkpoints for long-running test and search jobs
+
+A job saves its state (counters, position in its enumeration and the state
+of its entropy source) every interval seconds and resumes from the last save
+when restarted with the same checkpoint file. Saves are atomic: the state is
+written to a temporary file in the same directory, synced, and renamed over
+the previous checkpoint, so an interruption leaves either the old or the new
+checkpoint, never a partial one.
+
+A checkpoint records the job name and its parameters. Resuming a job with
+different parameters, e.g. another bit length, DRBG seed or replay file,
+raises CheckpointMismatchError instead of mixing two runs.
+
+Source state is saved for HmacDrbgSource (key, value and counter) and
+ReplaySource (file offset), so a resumed run draws exactly the bytes the
+uninterrupted run would have. Other sources (os.urandom) have no state to
+save; a resumed run continues with fresh bytes.
+
+######################
+# Checkpoint format  #
+######################
+
+JSON object: {"version": 1, "job": str, "params": {...}, "state": {...}}
+"""
+#Python Standard Library 2.7
+import os
+import json
+import time
+import binascii
+import tempfile
+
+#bip39_gym modules
+import entropy_sources #entropy_sources.py
+
+VERSION = 1
+
+CHECKPOINT_INTERVAL = 60 #seconds
+
+class CorruptCheckpointError(Exception):
+    """A checkpoint file can't be parsed"""
+    pass
+
+class CheckpointMismatchError(Exception):
+    """A checkpoint belongs to another job or other parameters"""
+    pass
+
+def source_state(source):
+    """JSON-serializable state of an entropy source, or None if stateless"""
+    if isinstance(source, entropy_sources.HmacDrbgSource):
+        key, value, counter = source.getstate()
+        return {'type': 'hmac_drbg', 'key': binascii.hexlify(key),
+                'value': binascii.hexlify(value), 'counter': counter}
+    if isinstance(source, entropy_sources.ReplaySource):
+        return {'type': 'replay', 'offset': source.tell()}
+    return None
+
+def restore_source(source, state):
+    """Restore state returned by source_state
+
+    Raises: CheckpointMismatchError if the state is of another source type
+    """
+    if source_state(source) is None and state is None:
+        return
+    if state is None or state['type'] != source_state(source)['type']:
+        raise CheckpointMismatchError("Checkpoint is for another entropy source")
+    if state['type'] == 'hmac_drbg':
+        source.setstate((binascii.unhexlify(state['key']),
+                         binascii.unhexlify(state['value']), state['counter']))
+    else:
+        source.seek(state['offset'])
+
+def source_name(source):
+    """Description of a source for the parameters of a job: its type and,
+    for DRBG and replay sources, its fingerprint, so that resuming with
+    another seed or file is refused"""
+    if source is None:
+        return 'default'
+    if isinstance(source, (entropy_sources.HmacDrbgSource,
+                           entropy_sources.ReplaySource)):
+        return '{0}:{1}'.format(type(source).__name__, source.fingerprint())
+    return type(source).__name__
+
+class Checkpoint(object):
+    """Checkpoint file of one job
+
+    Args:
+        path (str): Checkpoint file
+        job (str): Name of the job, e.g. 'entropy_test'
+        params (dict): Parameters that must match to resume, JSON-serializable
+        interval (float): Seconds between saves made through due()
+    """
+
+    def __init__(self, path, job, params, interval=CHECKPOINT_INTERVAL):
+        self.path = path
+        self.job = job
+        self.params = params
+        self.interval = interval
+        self._last_save = time.time()
+
+    def load(self):
+        """State of the last save, or None if there is no checkpoint yet
+
+        Raises: CorruptCheckpointError, CheckpointMismatchError
+        """
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with open(self.path, 'r') as checkpoint_file:
+                saved = json.load(checkpoint_file)
+            version, job, params, state = (saved['version'], saved['job'],
+                                           saved['params'], saved['state'])
+        except (ValueError, KeyError, TypeError):
+            raise CorruptCheckpointError(self.path)
+        if version != VERSION:
+            raise CorruptCheckpointError(self.path)
+        #round trip so tuples compare equal to the lists JSON gives back
+        if job != self.job or params != json.loads(json.dumps(self.params)):
+            raise CheckpointMismatchError(
+                "{0} is a checkpoint of {1} {2}, not {3} {4}".format(
+                    self.path, job, params, self.job, self.params))
+        return state
+
+    def due(self):
+        """True if interval seconds have passed since the last save"""
+        return time.time() - self._last_save >= self.interval
+
+    def save(self, state):
+        """Atomically replace the checkpoint with state"""
+        handle, tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(self.path) or '.', suffix='.tmp')
+        try:
+            with os.fdopen(handle, 'w') as tmp_file:
+                json.dump({'version': VERSION, 'job': self.job,
+                           'params': self.params, 'state': state},
+                          tmp_file, separators=(',', ':'), sort_keys=True)
+                tmp_file.flush()
+                os.fsync(tmp_file.fileno())
+            os.rename(tmp_path, self.path)
+        except:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        self._last_save = time.time()
+
+    def remove(self):
+        """Delete the checkpoint once the job has finished"""
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+def add_checkpoint_args(parser):
+    """Add --checkpoint and --checkpoint-interval to an argparse parser"""
+    parser.add_argument('--checkpoint', metavar='FILE',
+                        help='save progress to FILE and resume from it')
+    parser.add_argument('--checkpoint-interval', metavar='SECONDS', type=float,
+                        default=CHECKPOINT_INTERVAL)
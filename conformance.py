@@ -0,0 +1,264 @@
+"""Check BIP39 vector corpora column by column on all cores
+
+Every record is checked in stages:
+
+entropy: entropy_binary matches entropy_hex, and the mnemonic decodes to it
+indices: word_indices match the words of the mnemonic
+mnemonic: the entropy encodes to the mnemonic
+seed: PBKDF2 of mnemonic and passphrase gives the seed
+xprv: the seed gives the BIP32 master extended private key
+
+Columns a corpus doesn't have are skipped. Records are streamed in chunks to
+a process pool with a bounded number of chunks in flight, so memory use
+doesn't grow with the size of the corpus.
+
+Supported corpora:
+    data/vectors.json: Trezor format, [hex, mnemonic, seed, xprv] per
+        language, passphrase "TREZOR"
+    data/random_vectors.json: Ian Coleman tool format, {"data": [records]}
+    *.jsonl: one record per line in the Ian Coleman tool format, e.g. from
+        gen_vectors.py
+    *.b39v: binary vector files from gen_vectors.py
+
+$ python conformance.py extra_vectors.jsonl --processes 8
+"""
+#Python Standard Library 2.7
+import sys
+import json
+import time
+import argparse
+import collections
+import multiprocessing
+
+#bip39_gym modules
+import bip32 #bip32.py
+import bip39 #bip39.py
+import gen_vectors #gen_vectors.py
+import wordlists #wordlists.py
+
+DEFAULT_VECTOR_FILES = ('data/vectors.json', 'data/random_vectors.json')
+
+TREZOR_PASSPHRASE = 'TREZOR'
+
+STAGES = ('entropy', 'indices', 'mnemonic', 'seed', 'xprv')
+
+CHUNK_SIZE = 64
+CHUNKS_IN_FLIGHT_PER_PROCESS = 4
+
+def _str(value):
+    return value.encode('utf-8') if isinstance(value, unicode) else value
+
+def iter_trezor_vectors(path):
+    """Yield records from a Trezor format vector file"""
+    with open(path, 'r') as vector_file:
+        data = json.load(vector_file)
+    for language in sorted(data):
+        for num, vector in enumerate(data[language]):
+            yield {'where': '{0}:{1}[{2}]'.format(path, language, num),
+                   'language': _str(language),
+                   'entropy_hex': _str(vector[0]),
+                   'mnemonic': _str(vector[1]),
+                   'passphrase': TREZOR_PASSPHRASE,
+                   'seed': _str(vector[2]),
+                   'xprv': _str(vector[3])}
+
+def _tool_record(where, vector):
+    record = {'where': where,
+              'language': _str(vector.get('language', 'english')),
+              'entropy_hex': _str(vector['entropy_hex']),
+              'mnemonic': _str(vector['mnemonic']),
+              'passphrase': _str(vector.get('passphrase', ''))}
+    for key, column in (('entropy_binary', 'entropy_binary'),
+                        ('word_indices', 'word_indices'),
+                        ('seed', 'seed'), ('root', 'xprv')):
+        if key in vector:
+            record[column] = _str(vector[key])
+    return record
+
+def iter_tool_vectors(path):
+    """Yield records from an Ian Coleman tool format vector file"""
+    with open(path, 'r') as vector_file:
+        data = json.load(vector_file)['data']
+    for num, vector in enumerate(data):
+        yield _tool_record('{0}[{1}]'.format(path, num), vector)
+
+def iter_jsonl_vectors(path):
+    """Yield records from a JSONL file, reading one line at a time"""
+    with open(path, 'r') as vector_file:
+        for num, line in enumerate(vector_file):
+            if line.strip():
+                yield _tool_record('{0}:{1}'.format(path, num + 1),
+                                   json.loads(line))
+
+def iter_binary_vectors(path):
+    """Yield records from a gen_vectors.py binary vector file"""
+    for num, vector in enumerate(gen_vectors.iter_binary_vectors(path)):
+        yield _tool_record('{0}[{1}]'.format(path, num), vector)
+
+def iter_vectors(path):
+    """Yield records from a vector file of any supported format"""
+    if path.endswith('.jsonl'):
+        return iter_jsonl_vectors(path)
+    if path.endswith(gen_vectors.BINARY_SUFFIX):
+        return iter_binary_vectors(path)
+    with open(path, 'r') as vector_file:
+        is_tool_format = 'data' in json.load(vector_file)
+    return iter_tool_vectors(path) if is_tool_format else iter_trezor_vectors(path)
+
+def check_record(record, stage_seconds=None):
+    """Check every column of a record
+
+    Args:
+        record (dict): As yielded by iter_vectors
+        stage_seconds (dict): If given, time spent per stage is added to it
+
+    Returns: List of (stage, where, message) failures
+    """
+    failures = []
+    if stage_seconds is None:
+        stage_seconds = collections.defaultdict(float)
+    codec = bip39.get_language_codec(record['language'])
+    entropy_bin = bip39.hex2bin(record['entropy_hex'])
+    mnemonic = record['mnemonic']
+    computed_seed = [None]
+
+    def entropy_stage():
+        if 'entropy_binary' in record and record['entropy_binary'] != entropy_bin:
+            return "entropy_binary doesn't match entropy_hex"
+        if codec.mnemonic2binstring(mnemonic) != entropy_bin:
+            return "mnemonic doesn't decode to entropy"
+
+    def indices_stage():
+        if 'word_indices' not in record:
+            return None
+        if codec.get_indices(mnemonic) != record['word_indices']:
+            return "word_indices don't match mnemonic"
+
+    def mnemonic_stage():
+        computed = codec.binstring2mnemonic(entropy_bin)
+        if wordlists.normalize(computed) != wordlists.normalize(mnemonic):
+            return "entropy encodes to '{0}'".format(computed)
+
+    def seed_stage():
+        if 'seed' not in record and 'xprv' not in record:
+            return None
+        computed_seed[0] = bip39.mnemonic2seed(mnemonic, record['passphrase'])
+        if 'seed' in record and computed_seed[0] != record['seed'].lower():
+            return "seed mismatch: {0}".format(computed_seed[0])
+
+    def xprv_stage():
+        if 'xprv' not in record:
+            return None
+        computed = bip32.seed2xprv(computed_seed[0])
+        if computed != record['xprv']:
+            return "xprv mismatch: {0}".format(computed)
+
+    stage_funcs = (entropy_stage, indices_stage, mnemonic_stage, seed_stage,
+                   xprv_stage)
+    for stage, func in zip(STAGES, stage_funcs):
+        begin = time.time()
+        try:
+            message = func()
+        except Exception as err: #pylint: disable=broad-except
+            message = "{0}: {1}".format(type(err).__name__, err)
+        stage_seconds[stage] += time.time() - begin
+        if message is not None:
+            failures.append((stage, record['where'], message))
+    return failures
+
+def _check_chunk(records):
+    """Process pool worker: check a chunk of records"""
+    stage_seconds = collections.defaultdict(float)
+    failures = []
+    for record in records:
+        failures.extend(check_record(record, stage_seconds))
+    return len(records), failures, dict(stage_seconds)
+
+def _chunks(records, chunk_size):
+    chunk = []
+    for record in records:
+        chunk.append(record)
+        if len(chunk) == chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def run_conformance(paths, processes=None, chunk_size=CHUNK_SIZE):
+    """Check every record of every vector file
+
+    Args:
+        paths (List[str]): Vector files
+        processes (int): Worker processes. 0 checks on the calling process.
+            Default: number of CPUs
+
+    Returns: dict with records, failures, stage_seconds (CPU seconds summed
+        over workers) and elapsed (wall clock seconds)
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    began = time.time()
+    report = {'records': 0, 'failures': [],
+              'stage_seconds': dict((stage, 0.0) for stage in STAGES)}
+
+    def collect(result):
+        n_records, failures, stage_seconds = result
+        report['records'] += n_records
+        report['failures'].extend(failures)
+        for stage, seconds in stage_seconds.iteritems():
+            report['stage_seconds'][stage] += seconds
+
+    chunks = (chunk for path in paths
+              for chunk in _chunks(iter_vectors(path), chunk_size))
+    if processes == 0:
+        for chunk in chunks:
+            collect(_check_chunk(chunk))
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            in_flight = collections.deque()
+            for chunk in chunks:
+                in_flight.append(pool.apply_async(_check_chunk, (chunk,)))
+                if len(in_flight) >= processes * CHUNKS_IN_FLIGHT_PER_PROCESS:
+                    collect(in_flight.popleft().get())
+            while in_flight:
+                collect(in_flight.popleft().get())
+        finally:
+            pool.terminate()
+            pool.join()
+    report['elapsed'] = time.time() - began
+    return report
+
+def print_report(report):
+    """Print failures and per-stage timing"""
+    for stage, where, message in report['failures']:
+        print "FAILURE: {0}: {1}: {2}".format(stage, where, message)
+    failed = collections.Counter(stage for stage, _, _ in report['failures'])
+    print "{0:<10}{1:>10}{2:>14}".format('stage', 'failures', 'cpu seconds')
+    for stage in STAGES:
+        print "{0:<10}{1:>10}{2:>14.3f}".format(
+            stage, failed[stage], report['stage_seconds'][stage])
+    print "Checked {0} records in {1:.2f}s ({2:.0f} records/s)".format(
+        report['records'], report['elapsed'],
+        report['records'] / max(report['elapsed'], 1e-9))
+
+def _main():
+    parser = argparse.ArgumentParser(
+        description='Check BIP39 vector corpora column by column')
+    parser.add_argument('paths', nargs='*',
+                        help='extra vector files (.json, .jsonl or .b39v)')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes (default: #CPUs)')
+    parser.add_argument('--chunk-size', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--no-defaults', action='store_true',
+                        help="don't check the vector files in data/")
+    args = parser.parse_args()
+
+    paths = ([] if args.no_defaults else list(DEFAULT_VECTOR_FILES)) + args.paths
+    report = run_conformance(paths, processes=args.processes,
+                             chunk_size=args.chunk_size)
+    print_report(report)
+    sys.exit(1 if report['failures'] else 0)
+
+if __name__ == '__main__':
+    _main()
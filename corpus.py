@@ -0,0 +1,302 @@
+"""Compact bit-packed corpus files of mnemonics with random access
+
+A text mnemonic of 24 words takes about 150 bytes; packed as 11-bit word
+indices it takes 33. Records have a fixed size, so record i is found at
+HEADER_SIZE + i * record_size and a reader maps the file with mmap instead
+of parsing it.
+
+Two kinds of corpus:
+
+KIND_INDICES: packed 11-bit word indices, including the checksum bits, of
+    mnemonics that all have n_words words. Mnemonics with a bad checksum can
+    be stored, e.g. for an archive of backups to be checked.
+KIND_ENTROPY: a length byte and the raw entropy, zero-padded to
+    ENT_MAX / 8 bytes, so entropies of different lengths can be mixed.
+
+#################
+# Corpus format #
+#################
+
+All integers are little-endian.
+
+| Offset | Size                      | Contents                               |
++--------+---------------------------+----------------------------------------+
+|      0 | 16                        | Header (see HEADER_FORMAT)             |
+|     16 | n_records * record_size   | Records                                |
+
+Word indices are packed most significant bit first, like the bits of the
+mnemonic itself, and the last byte of a record is padded with zero bits.
+"""
+#Python Standard Library 2.7
+import os
+import mmap
+import struct
+import tempfile
+
+#bip39_gym modules
+import bip39 #bip39.py
+
+MAGIC = 'B39C'
+VERSION = 1
+#magic, version, kind, n_words (0 for KIND_ENTROPY), n_records
+HEADER_FORMAT = '<4sHBBQ'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+KIND_INDICES = 1
+KIND_ENTROPY = 2
+
+MAX_ENTROPY_BYTES = bip39.ENT_MAX / 8
+
+class CorruptCorpusError(Exception):
+    """A corpus file is truncated or its header is invalid"""
+    pass
+
+def record_size(kind, n_words=0):
+    """Size in bytes of one record
+
+    Raises: ValueError for an unknown kind
+    """
+    if kind == KIND_INDICES:
+        return (n_words * bip39.WORDLIST_PIECE_BITS + 7) // 8
+    if kind == KIND_ENTROPY:
+        return 1 + MAX_ENTROPY_BYTES
+    raise ValueError("Unknown corpus kind: {0}".format(kind))
+
+def pack_indices(indices):
+    """Pack word indices into 11 bits each, zero-padded to whole bytes
+
+    Raises: WordNotDefinedAtIndexError
+    """
+    binstring = ''.join([bip39.word_index2binstring(index) for index in indices])
+    return bip39.decode_binary_string(
+        binstring + '0' * (-len(binstring) % 8))
+
+def unpack_indices(data, n_words):
+    """Unpack n_words word indices from packed bytes"""
+    return tuple(bip39.binstring2word_index(
+        bip39.encode_binary_string(data)[0:n_words * bip39.WORDLIST_PIECE_BITS]))
+
+def pack_entropy(entropy_bytes):
+    """Entropy record: length byte and entropy padded to MAX_ENTROPY_BYTES
+
+    Raises: ValueError if entropy is longer than MAX_ENTROPY_BYTES
+    """
+    if len(entropy_bytes) > MAX_ENTROPY_BYTES:
+        raise ValueError("Entropy is longer than {0} bytes".format(
+            MAX_ENTROPY_BYTES))
+    return chr(len(entropy_bytes)) + entropy_bytes.ljust(MAX_ENTROPY_BYTES, '\x00')
+
+class CorpusWriter(object):
+    """Write a corpus file, replacing it atomically on close
+
+    Args:
+        path (str): Corpus file to write
+        kind (int): KIND_INDICES or KIND_ENTROPY
+        n_words (int): Words per mnemonic, for KIND_INDICES
+    """
+
+    def __init__(self, path, kind, n_words=0):
+        self.path = path
+        self.kind = kind
+        self.n_words = n_words if kind == KIND_INDICES else 0
+        self.record_size = record_size(kind, self.n_words)
+        self.n_records = 0
+        handle, self._tmp_path = tempfile.mkstemp(
+            dir=os.path.dirname(path) or '.', suffix='.tmp')
+        self._file = os.fdopen(handle, 'wb')
+        self._file.write(self._header())
+
+    def _header(self):
+        return struct.pack(HEADER_FORMAT, MAGIC, VERSION, self.kind,
+                           self.n_words, self.n_records)
+
+    def write_indices(self, indices):
+        """Append the word indices of one mnemonic
+
+        Raises: ValueError if the number of words differs from n_words
+        """
+        if self.kind != KIND_INDICES or len(indices) != self.n_words:
+            raise ValueError("Expected {0} word indices".format(self.n_words))
+        self._file.write(pack_indices(indices))
+        self.n_records += 1
+
+    def write_entropy(self, entropy_bytes):
+        """Append one raw entropy"""
+        if self.kind != KIND_ENTROPY:
+            raise ValueError("Not an entropy corpus")
+        self._file.write(pack_entropy(entropy_bytes))
+        self.n_records += 1
+
+    def write(self, mnemonic):
+        """Append a bip39.Mnemonic in the form of this corpus"""
+        if self.kind == KIND_INDICES:
+            self.write_indices(mnemonic.indices)
+        else:
+            self.write_entropy(mnemonic.entropy_bytes)
+
+    def close(self):
+        """Write the record count and move the file into place"""
+        if self._file.closed:
+            return
+        self._file.seek(0)
+        self._file.write(self._header())
+        self._file.close()
+        os.rename(self._tmp_path, self.path)
+
+    def abort(self):
+        """Discard everything written"""
+        if not self._file.closed:
+            self._file.close()
+            os.unlink(self._tmp_path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+class CorpusReader(object):
+    """Memory-mapped corpus with O(1) access to any record
+
+    Indexing returns a bip39.Mnemonic built lazily from the record, so other
+    forms are only derived when used.
+
+    Args:
+        path (str): Corpus file
+        codec (bip39.Bip39Codec): Codec of the returned Mnemonics. Default:
+            the module-level default codec
+
+    Raises: CorruptCorpusError
+    """
+
+    def __init__(self, path, codec=None):
+        self.path = path
+        self.codec = codec
+        with open(path, 'rb') as corpus_file:
+            try:
+                self._map = mmap.mmap(corpus_file.fileno(), 0,
+                                      access=mmap.ACCESS_READ)
+            except ValueError: #empty file
+                raise CorruptCorpusError(path)
+        if len(self._map) < HEADER_SIZE:
+            self._map.close()
+            raise CorruptCorpusError(path)
+        magic, version, self.kind, self.n_words, self.n_records = \
+            struct.unpack_from(HEADER_FORMAT, self._map)
+        try:
+            self.record_size = record_size(self.kind, self.n_words)
+        except ValueError:
+            self.record_size = None
+        if (magic != MAGIC or version != VERSION or self.record_size is None or
+                len(self._map) != HEADER_SIZE + self.n_records * self.record_size):
+            self._map.close()
+            raise CorruptCorpusError(path)
+
+    def __len__(self):
+        return self.n_records
+
+    def _offset(self, num):
+        if num < 0:
+            num += self.n_records
+        if num < 0 or num >= self.n_records:
+            raise IndexError(num)
+        return HEADER_SIZE + num * self.record_size
+
+    def record(self, num):
+        """Raw bytes of a record as a read-only buffer over the mapping"""
+        return buffer(self._map, self._offset(num), self.record_size)
+
+    def indices(self, num):
+        """Word indices of a record, including the checksum bits"""
+        if self.kind == KIND_INDICES:
+            offset = self._offset(num)
+            return unpack_indices(self._map[offset:offset + self.record_size],
+                                  self.n_words)
+        return self[num].indices
+
+    def entropy_bytes(self, num):
+        """Raw entropy of a record"""
+        if self.kind == KIND_ENTROPY:
+            offset = self._offset(num)
+            length = ord(self._map[offset])
+            return self._map[offset + 1:offset + 1 + length]
+        return self[num].entropy_bytes
+
+    def __getitem__(self, num):
+        if self.kind == KIND_INDICES:
+            return bip39.Mnemonic.from_indices(self.indices(num), self.codec)
+        return bip39.Mnemonic.from_bytes(self.entropy_bytes(num), self.codec)
+
+    def __iter__(self):
+        for num in xrange(self.n_records):
+            yield self[num]
+
+    def close(self):
+        """Unmap the file"""
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def write_binstrings(path, entropy_bins):
+    """Write entropies given as binary strings to an entropy corpus
+
+    Raises: ValueError if an entropy isn't a whole number of bytes
+    """
+    with CorpusWriter(path, KIND_ENTROPY) as writer:
+        for entropy_bin in entropy_bins:
+            if len(entropy_bin) % 8 != 0:
+                raise ValueError("Entropy is not a whole number of bytes")
+            writer.write_entropy(bip39.decode_binary_string(entropy_bin))
+        return writer.n_records
+
+def read_binstrings(path):
+    """Read the entropies of a corpus of either kind as binary strings"""
+    with CorpusReader(path) as reader:
+        if reader.kind == KIND_ENTROPY:
+            return [bip39.encode_binary_string(reader.entropy_bytes(num))
+                    for num in xrange(len(reader))]
+        return [mnemonic.binstring for mnemonic in reader]
+
+def write_mnemonics(path, mnemonics, codec=None):
+    """Write mnemonic sentences of equal length to an indices corpus
+
+    Raises:
+        ValueError: If the mnemonics differ in length or there are none
+        InvalidWordError: If a word is not found in the dictionary
+    """
+    if codec is None:
+        codec = bip39.get_default_codec(print_warning=False)
+    writer = None
+    try:
+        for mnemonic in mnemonics:
+            indices = codec.get_indices(mnemonic)
+            if writer is None:
+                writer = CorpusWriter(path, KIND_INDICES, len(indices))
+            writer.write_indices(indices)
+    except:
+        if writer is not None:
+            writer.abort()
+        raise
+    if writer is None:
+        raise ValueError("No mnemonics to write")
+    writer.close()
+    return writer.n_records
+
+def read_mnemonics(path, codec=None):
+    """Read the mnemonic sentences of a corpus of either kind"""
+    if codec is None:
+        codec = bip39.get_default_codec(print_warning=False)
+    with CorpusReader(path, codec) as reader:
+        if reader.kind == KIND_ENTROPY:
+            return codec.binstrings2mnemonics(
+                [bip39.encode_binary_string(reader.entropy_bytes(num))
+                 for num in xrange(len(reader))])
+        return [codec.get_mnemonic(reader.indices(num))
+                for num in xrange(len(reader))]
@@ -0,0 +1,839 @@
+"""Distribute recovery searches and exhaustive verifications over machines
+
+A coordinator splits the enumeration of a job into leases of consecutive
+units (roll sequences, word order shards, candidate passphrases) and hands
+them to workers, which may run on other machines. A worker runs its lease,
+sends back compact counters and results, and asks for the next one.
+
+Leases are taken back and handed out again when the worker holding them
+disconnects, or stops renewing them for --lease-timeout seconds (a hung
+process or a lost machine). A late worker that completes a lease already
+completed by another is ignored, so every unit is counted exactly once.
+Counters are summed and results are concatenated in unit order, so the
+merged output doesn't depend on which worker ran what, or when. Jobs that
+look for one match (a target was given) stop handing out leases at the
+first one.
+
+Everything runs offline: a coordinator listens on a Unix socket or a TCP
+port and needs nothing else. Listening on an interface other than
+localhost requires a --token, which every worker must present. Traffic is
+not encrypted: job parameters include the mnemonic of a recovery job, so
+only use networks you trust with it.
+
+With --checkpoint, completed leases and the merged counters are saved
+periodically and a restarted coordinator only hands out the rest.
+
+#########
+# Jobs #
+#########
+
+dice_uniformity: test 2 of check_dice_entropy.py; units are the roll
+    sequences of each case. Params: max_bits, max_roll_num
+word_order: word_order_recovery.py; units are shards. Params: mnemonic,
+    unordered, shards, max_swaps, max_subset, target, passphrase
+passphrase: passphrase_recovery.py; units are candidates. Params:
+    mnemonic, target, and either mask or words (with leet, case, edits)
+
+target is {"seed_prefix": hex}, {"address": ..., "path": ...},
+{"xprv": ..., "path": ...} or {"xpub": ..., "path": ...}, or null.
+
+#############
+# Protocol #
+#############
+
+Newline-delimited JSON requests and responses, as in server.py:
+
+    hello (token, worker) -> job, params, lease_timeout
+    lease -> lease {id, start, stop}, or wait (seconds), or done
+    renew (lease) -> active
+    complete (lease, counters, results) -> accepted
+    fail (lease, error) -> accepted
+
+A worker whose job raised reports it with fail, which ends the job: the
+same params would fail on every other worker too.
+
+Every connection starts with hello. Leases belong to the connection that
+took them and are released when it closes.
+
+$ python distributed.py coordinate --unix /tmp/dice.sock \
+    --job dice_uniformity --params '{"max_bits": 14, "max_roll_num": 7}'
+$ python distributed.py work --unix /tmp/dice.sock --processes 4
+"""
+#Python Standard Library 2.7
+import os
+import sys
+import hmac
+import json
+import time
+import socket
+import argparse
+import itertools
+import threading
+import collections
+import multiprocessing
+import SocketServer
+
+#bip39_gym modules
+import bip32 #bip32.py
+import bip39 #bip39.py
+import check_dice_entropy #check_dice_entropy.py
+import checkpoint as checkpoint_mod #checkpoint.py
+import entropy #entropy.py
+import passphrase_recovery #passphrase_recovery.py
+import word_order_recovery #word_order_recovery.py
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 3940
+
+LOCAL_HOSTS = ('127.0.0.1', 'localhost', '::1')
+
+DEFAULT_LEASES = 256 #leases per job unless --lease-size is given
+LEASE_TIMEOUT = 60.0 #seconds without renewal before a lease is reassigned
+CONNECT_TIMEOUT = 30.0 #seconds a worker keeps retrying to reach the coordinator
+
+class UnknownJobError(Exception):
+    """No job of that name"""
+    pass
+
+class AuthenticationError(Exception):
+    """A worker didn't present the coordinator's token"""
+    pass
+
+class RemoteError(Exception):
+    """The coordinator answered a request with an error"""
+    pass
+
+class CoordinatorGoneError(Exception):
+    """The coordinator closed the connection"""
+    pass
+
+def target_from_spec(spec):
+    """passphrase_recovery target described by a JSON object, or None
+
+    Raises: ValueError, InvalidBase58Error
+    """
+    if spec is None:
+        return None
+    if 'seed_prefix' in spec:
+        return passphrase_recovery.SeedPrefixTarget(str(spec['seed_prefix']))
+    if 'address' in spec:
+        return passphrase_recovery.AddressTarget(
+            str(spec['address']),
+            str(spec.get('path', passphrase_recovery.DEFAULT_ADDRESS_PATH)))
+    for kind in ('xprv', 'xpub'):
+        if kind in spec:
+            return passphrase_recovery.ExtendedKeyTarget(
+                str(spec[kind]), str(spec.get('path', 'm')))
+    raise ValueError("Unknown target: {0}".format(spec))
+
+def merge_counters(total, counters):
+    """Add counters into total: numbers are summed, lists element-wise and
+    dicts key by key. Returns total.
+    """
+    for key, value in counters.iteritems():
+        if key not in total:
+            total[key] = json.loads(json.dumps(value))
+        else:
+            total[key] = _add(total[key], value)
+    return total
+
+def _add(total, value):
+    if isinstance(value, dict):
+        return merge_counters(total, value)
+    if isinstance(value, list):
+        return [_add(left, right) for left, right in zip(total, value)]
+    return total + value
+
+def _roll_sequence(number, n_rolls):
+    """number-th sequence of n_rolls rolls, in _get_dice_rolls_of_len order"""
+    rolls = []
+    for _ in range(n_rolls):
+        number, digit = divmod(number, 6)
+        rolls.append(digit + 1)
+    return rolls[::-1]
+
+class DiceUniformityJob(object):
+    """Test 2 of check_dice_entropy.py, one unit per roll sequence"""
+    name = 'dice_uniformity'
+
+    @staticmethod
+    def _cases(params):
+        return check_dice_entropy.uniformity_cases(params['max_bits'],
+                                                   params['max_roll_num'])
+
+    def validate(self, params):
+        """Raise on params that run() would fail on
+
+        Raises: ValueError, KeyError
+        """
+        if self.size(params) < 1:
+            raise ValueError("No roll sequences to check")
+
+    def size(self, params):
+        """Number of units"""
+        return sum(6 ** rolls_num for _, rolls_num in self._cases(params))
+
+    @staticmethod
+    def stops_early(_params):
+        """Whether the first result ends the job"""
+        return False
+
+    def run(self, params, start, stop):
+        """Count the bits of roll sequences start to stop
+
+        Returns: dict with counters ({"bits,rolls": [results_0, results_1]})
+            and results
+        """
+        counters = {}
+        offset = 0
+        for bitstring_len, rolls_num in self._cases(params):
+            first = max(start, offset) - offset
+            last = min(stop, offset + 6 ** rolls_num) - offset
+            offset += 6 ** rolls_num
+            if first >= last:
+                continue
+            results_0 = [0] * bitstring_len
+            results_1 = [0] * bitstring_len
+            for sequence_num in xrange(first, last):
+                try:
+                    bits = entropy.die_rolls_to_bitstring(
+                        _roll_sequence(sequence_num, rolls_num), bitstring_len)
+                except entropy.InsufficientEntropyError:
+                    continue
+                for index, bit in enumerate(bits):
+                    if bit == '0':
+                        results_0[index] += 1
+                    else:
+                        results_1[index] += 1
+            counters['{0},{1}'.format(bitstring_len, rolls_num)] = [results_0,
+                                                                    results_1]
+        return {'counters': counters, 'results': []}
+
+    def summarize(self, params, counters, _results):
+        """Failures of every case, as check_dice_entropy reports them"""
+        failures = []
+        for bitstring_len, rolls_num in self._cases(params):
+            results_0, results_1 = counters.get(
+                '{0},{1}'.format(bitstring_len, rolls_num),
+                [[0] * bitstring_len, [0] * bitstring_len])
+            failures.extend(check_dice_entropy.uniformity_failures(
+                bitstring_len, rolls_num, results_0, results_1))
+        return {'failures': failures}
+
+class WordOrderJob(object):
+    """word_order_recovery.py, one unit per shard"""
+    name = 'word_order'
+
+    @staticmethod
+    def validate(params):
+        """Decode the mnemonic and build the target, as run() does
+
+        Raises: ValueError, KeyError, InvalidWordError, InvalidBase58Error
+        """
+        codec = bip39.get_default_codec(print_warning=False)
+        codec.get_indices(str(params['mnemonic']))
+        target_from_spec(params.get('target'))
+        str(params.get('passphrase', ''))
+        if params['shards'] < 1:
+            raise ValueError("shards must be at least 1")
+
+    @staticmethod
+    def size(params):
+        """Number of units"""
+        return params['shards']
+
+    @staticmethod
+    def stops_early(params):
+        """Whether the first result ends the job"""
+        return params.get('target') is not None
+
+    @staticmethod
+    def run(params, start, stop):
+        """Search shards start to stop
+
+        Returns: dict with counters ({"candidates": n}) and results (orders
+            with a valid checksum, or the matching mnemonic)
+        """
+        codec = bip39.get_default_codec(print_warning=False)
+        indices = tuple(codec.get_indices(str(params['mnemonic'])))
+        stages = ('all',) if params.get('unordered') else \
+            ('identity', 'adjacent', 'transpositions', 'subsets')
+        target = target_from_spec(params.get('target'))
+        counters = {'candidates': 0}
+        results = []
+        for shard in xrange(start, stop):
+            shard_result = word_order_recovery.search_shard(
+                (indices, stages, shard, params['shards'],
+                 params.get('max_swaps', word_order_recovery.DEFAULT_MAX_SWAPS),
+                 params.get('max_subset', word_order_recovery.DEFAULT_MAX_SUBSET),
+                 target, params.get('passphrase', '')))
+            _, n_candidates, _, survivors, match = shard_result
+            counters['candidates'] += n_candidates
+            if target is None:
+                results.extend(list(survivor) for survivor in survivors)
+            elif match is not None:
+                results.append(match)
+                break
+        return {'counters': counters, 'results': results}
+
+    @staticmethod
+    def summarize(params, counters, results):
+        """The match, or the deduplicated orders with a valid checksum"""
+        if params.get('target') is not None:
+            return {'candidates': counters.get('candidates', 0),
+                    'match': results[0] if results else None}
+        return {'candidates': counters.get('candidates', 0),
+                'survivors': sorted(set(tuple(result) for result in results))}
+
+class PassphraseJob(object):
+    """passphrase_recovery.py, one unit per candidate passphrase"""
+    name = 'passphrase'
+
+    @staticmethod
+    def _candidates(params, start, stop):
+        if 'mask' in params:
+            positions = passphrase_recovery.mask_positions(str(params['mask']))
+            #unrank each candidate so that a lease doesn't enumerate its prefix
+            for number in xrange(start, stop):
+                chars = []
+                for position in reversed(positions):
+                    number, digit = divmod(number, len(position))
+                    chars.append(position[digit])
+                yield ''.join(reversed(chars))
+            return
+        words = passphrase_recovery.expand(
+            [str(word) for word in params['words']], params.get('leet', False),
+            params.get('case', False), params.get('edits', 0))
+        for candidate in itertools.islice(words, start, stop):
+            yield candidate
+
+    def size(self, params):
+        """Number of units"""
+        if 'mask' in params:
+            size = 1
+            for position in passphrase_recovery.mask_positions(
+                    str(params['mask'])):
+                size *= len(position)
+            return size
+        return sum(1 for _ in self._candidates(params, 0, None))
+
+    def validate(self, params):
+        """Decode the mnemonic and build the target, as run() does
+
+        Raises: ValueError, KeyError, InvalidWordError, InvalidBase58Error
+        """
+        codec = bip39.get_default_codec(print_warning=False)
+        codec.get_indices(str(params['mnemonic']))
+        if target_from_spec(params['target']) is None:
+            raise ValueError("A passphrase job needs a target")
+        if 'mask' not in params:
+            for word in params['words']:
+                str(word)
+
+    @staticmethod
+    def stops_early(_params):
+        """Whether the first result ends the job"""
+        return True
+
+    def run(self, params, start, stop):
+        """Check candidates start to stop
+
+        Returns: dict with counters ({"candidates": n}) and results (the
+            matching passphrase)
+        """
+        mnemonic = str(params['mnemonic'])
+        target = target_from_spec(params['target'])
+        checked = 0
+        for candidate in self._candidates(params, start, stop):
+            checked += 1
+            if target.matches(bip39.mnemonic2seed(mnemonic, candidate)):
+                return {'counters': {'candidates': checked},
+                        'results': [candidate]}
+        return {'counters': {'candidates': checked}, 'results': []}
+
+    @staticmethod
+    def summarize(_params, counters, results):
+        """The passphrase, or None"""
+        return {'candidates': counters.get('candidates', 0),
+                'passphrase': results[0] if results else None}
+
+JOBS = dict((job.name, job) for job in (DiceUniformityJob(), WordOrderJob(),
+                                        PassphraseJob()))
+
+def get_job(name):
+    """Job of JOBS by name
+
+    Raises: UnknownJobError
+    """
+    try:
+        return JOBS[name]
+    except KeyError:
+        raise UnknownJobError(name)
+
+class _Lease(object):
+    """A range of units handed to one connection"""
+    __slots__ = ('lease_id', 'start', 'stop', 'session', 'deadline')
+
+    def __init__(self, lease_id, start, stop, session, deadline):
+        self.lease_id = lease_id
+        self.start = start
+        self.stop = stop
+        self.session = session
+        self.deadline = deadline
+
+class _CoordinatorHandler(SocketServer.StreamRequestHandler):
+    """Reads newline-delimited JSON requests from one worker connection"""
+
+    def handle(self):
+        coordinator = self.server.coordinator
+        session = {'hello': False, 'worker': None}
+        try:
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    break
+                response = coordinator.handle_line(session, line)
+                self.wfile.write(json.dumps(response) + '\n')
+                self.wfile.flush()
+        except socket.error:
+            pass
+        finally:
+            coordinator.release(session)
+
+class _ThreadingUnixServer(SocketServer.ThreadingMixIn,
+                           SocketServer.UnixStreamServer):
+    daemon_threads = True
+
+class _ThreadingTCPServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class Coordinator(object):
+    """Hand out the leases of one job and merge what the workers send back
+
+    Args:
+        address (str or Tuple[str, int]): Unix socket path, or (host, port).
+            Hosts other than localhost require a token.
+        job (str): Name of a job of JOBS
+        params (dict): Parameters of the job, JSON-serializable
+        lease_size (int): Units per lease. Default: 1/DEFAULT_LEASES of the job
+        lease_timeout (float): Seconds a lease stays with a worker that
+            doesn't renew it
+        token (str): Shared secret workers must present
+        checkpoint (checkpoint.Checkpoint): If given, completed leases are
+            saved to it and a restarted coordinator skips them
+
+    Raises: UnknownJobError, and whatever the job's validate() raises on
+        bad params (ValueError, KeyError, InvalidWordError, ...)
+    """
+
+    def __init__(self, address, job, params, lease_size=None,
+                 lease_timeout=LEASE_TIMEOUT, token=None, checkpoint=None):
+        self.job = get_job(job)
+        self.params = json.loads(json.dumps(params))
+        self.job.validate(self.params)
+        self.lease_timeout = lease_timeout
+        self.token = token
+        self.checkpoint = checkpoint
+        self.size = self.job.size(self.params)
+        if lease_size is None:
+            lease_size = max(1, -(-self.size // DEFAULT_LEASES))
+        self.n_leases = -(-self.size // lease_size)
+        self.stats = {'leases': 0, 'reassigned': 0, 'duplicates': 0}
+        self.error = None #first error a worker reported with fail
+        self._lock = threading.Lock()
+        self._finished = threading.Event()
+        self._issued = {} #lease id -> _Lease, every lease handed out
+        self._active = {} #lease id -> _Lease, not yet complete or reassigned
+        self._done = {} #start -> results
+        self._counters = {}
+        self._next_id = 0
+        state = checkpoint.load() if checkpoint is not None else None
+        if state is not None:
+            self._counters = state['counters']
+            self._done = dict((start, results)
+                              for start, results in state['done'])
+        self._pending = collections.deque(
+            (start, min(start + lease_size, self.size))
+            for start in xrange(0, self.size, lease_size)
+            if start not in self._done)
+        self._check_finished()
+
+        if isinstance(address, basestring):
+            if os.path.exists(address):
+                os.unlink(address)
+            self._server = _ThreadingUnixServer(address, _CoordinatorHandler)
+        else:
+            if address[0] not in LOCAL_HOSTS and token is None:
+                raise ValueError("A token is required to listen on {0}".format(
+                    address[0]))
+            self._server = _ThreadingTCPServer(address, _CoordinatorHandler)
+        self._server.coordinator = self
+        self.address = self._server.server_address
+        self._thread = None
+        self._began = time.time()
+
+    def start(self):
+        """Serve in a background thread"""
+        self._began = time.time()
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name='coordinator')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def wait(self, timeout=None):
+        """Block until every lease is complete (or a match or a failed
+        lease ends the job)
+
+        Removes the checkpoint once the job is complete.
+
+        Returns: result(), or None on timeout
+        """
+        #Event.wait without a timeout can't be interrupted by Ctrl-C
+        deadline = None if timeout is None else time.time() + timeout
+        while not self._finished.is_set():
+            remaining = 1.0 if deadline is None else deadline - time.time()
+            if remaining <= 0:
+                return None
+            self._finished.wait(min(remaining, 1.0))
+        if self.checkpoint is not None and self.error is None:
+            self.checkpoint.remove()
+        return self.result()
+
+    def result(self):
+        """Merged counters and results so far, and the job's summary"""
+        with self._lock:
+            counters = json.loads(json.dumps(self._counters))
+            results = [result for start in sorted(self._done)
+                       for result in self._done[start]]
+        return {'counters': counters, 'results': results,
+                'summary': self.job.summarize(self.params, counters, results),
+                'complete': self._finished.is_set() and self.error is None,
+                'error': self.error,
+                'leases': self.stats['leases'],
+                'reassigned': self.stats['reassigned'],
+                'duplicates': self.stats['duplicates'],
+                'elapsed': time.time() - self._began}
+
+    def close(self):
+        """Stop serving and release the socket"""
+        self._server.shutdown()
+        self._server.server_close()
+        if isinstance(self.address, basestring) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+    def handle_line(self, session, line):
+        """Response to one request line of a connection"""
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get('id')
+            method = request.get('method')
+            params = request.get('params') or {}
+            if method == 'hello':
+                result = self._hello(session, params)
+            elif not session['hello']:
+                raise AuthenticationError("hello first")
+            elif method == 'lease':
+                result = self._lease(session)
+            elif method == 'renew':
+                result = self._renew(session, params['lease'])
+            elif method == 'complete':
+                result = self._complete(params['lease'], params['counters'],
+                                        params['results'])
+            elif method == 'fail':
+                result = self._fail(params['lease'], params['error'])
+            else:
+                raise ValueError("Unknown method: {0}".format(method))
+            return {'id': request_id, 'result': result}
+        except Exception as err: #pylint: disable=broad-except
+            return {'id': request_id,
+                    'error': {'type': type(err).__name__, 'message': str(err)}}
+
+    def release(self, session):
+        """Take back every lease of a closed connection"""
+        with self._lock:
+            for lease in self._active.values():
+                if lease.session is session:
+                    self._reassign(lease)
+
+    def _hello(self, session, params):
+        if self.token is not None and not hmac.compare_digest(
+                str(params.get('token') or ''), str(self.token)):
+            raise AuthenticationError("Bad token")
+        session['hello'] = True
+        session['worker'] = params.get('worker')
+        return {'job': self.job.name, 'params': self.params,
+                'lease_timeout': self.lease_timeout}
+
+    def _lease(self, session):
+        with self._lock:
+            if self._finished.is_set():
+                return {'done': True}
+            now = time.time()
+            for lease in self._active.values():
+                if lease.deadline < now:
+                    self._reassign(lease)
+            if not self._pending:
+                return {'wait': min(1.0, self.lease_timeout / 4.0)}
+            start, stop = self._pending.popleft()
+            self._next_id += 1
+            lease = _Lease(self._next_id, start, stop, session,
+                           now + self.lease_timeout)
+            self._issued[lease.lease_id] = lease
+            self._active[lease.lease_id] = lease
+            self.stats['leases'] += 1
+            return {'lease': {'id': lease.lease_id, 'start': start,
+                              'stop': stop}}
+
+    def _renew(self, session, lease_id):
+        with self._lock:
+            lease = self._active.get(lease_id)
+            if lease is None or lease.session is not session:
+                return {'active': False}
+            lease.deadline = time.time() + self.lease_timeout
+            return {'active': True}
+
+    def _complete(self, lease_id, counters, results):
+        with self._lock:
+            #a reassigned lease still counts unless its range was completed since
+            lease = self._issued.get(lease_id)
+            if lease is None or lease.start in self._done:
+                self.stats['duplicates'] += 1
+                return {'accepted': False}
+            for other in self._active.values():
+                if other.start == lease.start:
+                    del self._active[other.lease_id]
+            if (lease.start, lease.stop) in self._pending:
+                self._pending.remove((lease.start, lease.stop))
+            self._done[lease.start] = results
+            merge_counters(self._counters, counters)
+            #saved before waking wait(), which removes the checkpoint
+            if self.checkpoint is not None and self.checkpoint.due():
+                self.checkpoint.save({
+                    'counters': self._counters,
+                    'done': sorted(self._done.iteritems())})
+            self._check_finished()
+            return {'accepted': True}
+
+    def _fail(self, lease_id, error):
+        with self._lock:
+            if lease_id not in self._issued:
+                return {'accepted': False}
+            if self.error is None:
+                self.error = error
+            self._pending.clear()
+            self._active.clear()
+            self._finished.set()
+            return {'accepted': True}
+
+    def _reassign(self, lease):
+        del self._active[lease.lease_id]
+        self._pending.appendleft((lease.start, lease.stop))
+        self.stats['reassigned'] += 1
+
+    def _check_finished(self):
+        if self.job.stops_early(self.params) and any(self._done.values()):
+            self._pending.clear()
+            self._active.clear()
+            self._finished.set()
+        elif len(self._done) == self.n_leases:
+            self._finished.set()
+
+class CoordinatorClient(object):
+    """Blocking, thread-safe connection of a worker to a coordinator
+
+    Retries the connection for connect_timeout seconds, so workers may be
+    started before the coordinator.
+    """
+
+    def __init__(self, address, connect_timeout=CONNECT_TIMEOUT):
+        deadline = time.time() + connect_timeout
+        while True:
+            if isinstance(address, basestring):
+                self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            else:
+                self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            try:
+                self._sock.connect(address)
+                break
+            except socket.error:
+                self._sock.close()
+                if time.time() >= deadline:
+                    raise
+                time.sleep(0.2)
+        self._file = self._sock.makefile('rwb')
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def call(self, method, **params):
+        """Issue one request and return its result
+
+        Raises: RemoteError if the coordinator answered with an error,
+            CoordinatorGoneError if it closed the connection
+        """
+        with self._lock:
+            self._next_id += 1
+            try:
+                self._file.write(json.dumps({'id': self._next_id,
+                                             'method': method,
+                                             'params': params}) + '\n')
+                self._file.flush()
+                line = self._file.readline()
+            except socket.error:
+                raise CoordinatorGoneError()
+            if not line:
+                raise CoordinatorGoneError()
+            response = json.loads(line)
+            assert response['id'] == self._next_id
+            if 'error' in response:
+                raise RemoteError("{type}: {message}".format(**response['error']))
+            return response['result']
+
+    def close(self):
+        """Close the connection"""
+        try:
+            self._file.close()
+        except socket.error:
+            pass
+        self._sock.close()
+
+def _heartbeat(client, lease_id, interval, stopped):
+    while not stopped.wait(interval):
+        try:
+            client.call('renew', lease=lease_id)
+        except (CoordinatorGoneError, RemoteError):
+            return
+
+def run_worker(address, token=None, worker=None,
+               connect_timeout=CONNECT_TIMEOUT):
+    """Run leases of a coordinator's job until it is done or gone
+
+    A heartbeat thread renews the current lease while it runs.
+
+    Returns: number of leases completed and accepted
+    """
+    client = CoordinatorClient(address, connect_timeout)
+    n_accepted = 0
+    try:
+        hello = client.call('hello', token=token,
+                            worker=worker or '{0}:{1}'.format(
+                                socket.gethostname(), os.getpid()))
+        job = get_job(hello['job'])
+        interval = hello['lease_timeout'] / 3.0
+        while True:
+            reply = client.call('lease')
+            if reply.get('done'):
+                break
+            if 'wait' in reply:
+                time.sleep(reply['wait'])
+                continue
+            lease = reply['lease']
+            stopped = threading.Event()
+            heartbeat = threading.Thread(
+                target=_heartbeat, args=(client, lease['id'], interval, stopped))
+            heartbeat.daemon = True
+            heartbeat.start()
+            try:
+                outcome = job.run(hello['params'], lease['start'], lease['stop'])
+            except Exception as err: #pylint: disable=broad-except
+                client.call('fail', lease=lease['id'], error='{0}: {1}'.format(
+                    type(err).__name__, err))
+                continue
+            finally:
+                stopped.set()
+                heartbeat.join()
+            if client.call('complete', lease=lease['id'],
+                           counters=outcome['counters'],
+                           results=outcome['results'])['accepted']:
+                n_accepted += 1
+    except CoordinatorGoneError:
+        pass
+    finally:
+        client.close()
+    return n_accepted
+
+def start_workers(address, processes, token=None,
+                  connect_timeout=CONNECT_TIMEOUT):
+    """Start processes local worker processes; returns them"""
+    workers = [multiprocessing.Process(
+        target=run_worker, args=(address, token, None, connect_timeout))
+               for _ in range(processes)]
+    for worker in workers:
+        worker.daemon = True
+        worker.start()
+    return workers
+
+def _address(args):
+    return args.unix if args.unix else (args.host, args.port)
+
+def _main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command')
+    coordinate = subparsers.add_parser('coordinate', help='hand out a job')
+    work = subparsers.add_parser('work', help='run leases of a coordinator')
+    for subparser in (coordinate, work):
+        subparser.add_argument('--unix', help='Unix socket path')
+        subparser.add_argument('--host', default=DEFAULT_HOST)
+        subparser.add_argument('--port', type=int, default=DEFAULT_PORT)
+        subparser.add_argument('--token', help='shared secret of the workers')
+    coordinate.add_argument('--job', required=True, choices=sorted(JOBS))
+    coordinate.add_argument('--params', default='{}',
+                            help='job parameters as JSON, or @FILE')
+    coordinate.add_argument('--lease-size', type=int, default=None)
+    coordinate.add_argument('--lease-timeout', type=float, default=LEASE_TIMEOUT)
+    coordinate.add_argument('--output', help='write the merged result as JSON')
+    checkpoint_mod.add_checkpoint_args(coordinate)
+    work.add_argument('--processes', type=int, default=None,
+                      help='worker processes (default: #CPUs)')
+    work.add_argument('--connect-timeout', type=float, default=CONNECT_TIMEOUT)
+    args = parser.parse_args()
+
+    if args.command == 'work':
+        processes = args.processes or multiprocessing.cpu_count()
+        workers = start_workers(_address(args), processes, args.token,
+                                args.connect_timeout)
+        for worker in workers:
+            worker.join()
+        return
+
+    if args.params.startswith('@'):
+        with open(args.params[1:], 'r') as params_file:
+            params = json.load(params_file)
+    else:
+        params = json.loads(args.params)
+    checkpoint = None
+    if args.checkpoint:
+        checkpoint = checkpoint_mod.Checkpoint(
+            args.checkpoint, 'distributed_' + args.job,
+            {'params': params, 'lease_size': args.lease_size},
+            args.checkpoint_interval)
+    try:
+        coordinator = Coordinator(_address(args), args.job, params,
+                                  args.lease_size, args.lease_timeout,
+                                  args.token, checkpoint)
+    except (ValueError, KeyError, TypeError, UnknownJobError,
+            bip32.InvalidBase58Error, bip39.InvalidWordError) as err:
+        parser.error(str(err) or type(err).__name__)
+    coordinator.start()
+    print "Coordinating {0} ({1} units in {2} leases) on {3}".format(
+        args.job, coordinator.size, coordinator.n_leases, coordinator.address)
+    try:
+        result = coordinator.wait()
+    except KeyboardInterrupt:
+        result = coordinator.result()
+    finally:
+        coordinator.close()
+    print "{0} leases handed out, {1} reassigned, {2:.1f}s".format(
+        result['leases'], result['reassigned'], result['elapsed'])
+    print json.dumps(result['summary'], sort_keys=True)
+    if result['error']:
+        print "Failed: " + result['error']
+    if args.output:
+        with open(args.output, 'w') as output:
+            json.dump(result, output, sort_keys=True)
+    if not result['complete']:
+        sys.exit(1)
+
+if __name__ == '__main__':
+    _main()
@@ -25,15 +25,16 @@ will bias the binary conversion so that bits are no longer uniformly distributed
 Also consequent to this, bits can only be selected in multiples of 2.
 """
 #Python Standard Library 2.7
-import os
 import math
+import argparse
+import functools
 from itertools import repeat
 
-#PyPI modules
-import progressbar #pip install progressbar2
-
 #bip39_gym modules
 import bip39 #bip39.py
+import checkpoint as checkpoint_mod #checkpoint.py
+import entropy_sources #entropy_sources.py
+import telemetry #telemetry.py
 
 TEST_ITERATIONS = 10000
 
@@ -69,17 +70,24 @@ def raw_str_to_binstring(raw_str):
     """Convert raw string to bit string"""
     if not isinstance(raw_str, str):
         raise TypeError
-    return ''.join(format(ord(char), 'b').zfill(8) for char in raw_str)
+    return bip39.encode_binary_string(raw_str)
 
-def get_entropy(n_bits):
+def get_entropy(n_bits, source=None):
     """Get some bytes of entropy and return specified number of bits as bit string
 
+    Args:
+        n_bits (int): Number of bits
+        source (entropy_sources.EntropySource): Where the bytes come from.
+            Default: the shared, pooled os.urandom source
+
     Raises: TypeError, ValueError
     """
     _assert_int(n_bits)
 
     n_bytes = bits_to_bytes(n_bits)
-    rand = os.urandom(n_bytes)
+    if source is None:
+        source = entropy_sources.get_default_source()
+    rand = source.get_bytes(n_bytes)
     return raw_str_to_binstring(rand)[0:n_bits]
 
 def xor(bitstring1, bitstring2):
@@ -174,23 +182,50 @@ def die_rolls_to_bitstring(dice_vals, bitstring_len):
 
     return bitstring[-bitstring_len:] #take first n bits generated
 
-def entropy_test(n_bits, entropy_func):
+def entropy_test(n_bits, entropy_func, report=None, source=None,
+                 checkpoint=None, iterations=None, metrics=None,
+                 report_interval=telemetry.REPORT_INTERVAL):
     """Test function for bias in specific locations or ranges
 
-    Side-effects: Display progress bar in console.
+    Side-effects: Display progress on stderr.
 
     Args:
         n_bits (int): Bits of entropy to be produced
         entropy_func (function): Entropy generator that accepts n_bits as arg
             and produces a bit string.
+        report (function): Called with each result line. Default: print
+        source (entropy_sources.EntropySource): If given, passed on to
+            entropy_func as its source keyword argument
+        checkpoint (checkpoint.Checkpoint): If given, the counters and source
+            state are saved to it periodically and a run resumes from it
+        iterations (int): Bit strings to test, plus one. Default:
+            TEST_ITERATIONS
+        metrics (str): If given, a telemetry snapshot is kept in this file
+
+    Returns: True if no bit position failed
     """
     _assert_non_negative_int(n_bits)
+    if report is None:
+        report = _print
+    if iterations is None:
+        iterations = TEST_ITERATIONS
+    func = entropy_func
+    if source is not None:
+        func = functools.partial(entropy_func, source=source)
 
     num_0 = [0] * n_bits
     num_1 = [0] * n_bits
-    with progressbar.ProgressBar(max_value=TEST_ITERATIONS) as prog_bar:
-        for iteration in range(0, TEST_ITERATIONS + 1):
-            bitstring = entropy_func(n_bits)
+    start = 0
+    state = checkpoint.load() if checkpoint is not None else None
+    if state is not None:
+        start, num_0, num_1 = state['iteration'], state['num_0'], state['num_1']
+        checkpoint_mod.restore_source(source, state['source'])
+        report("Resuming at iteration {0} from {1}".format(start, checkpoint.path))
+    with telemetry.Progress(iterations + 1, 'entropy_test', 'bitstrings',
+                            report_interval, metrics=metrics,
+                            start=start) as progress:
+        for iteration in range(start, iterations + 1):
+            bitstring = func(n_bits)
             assert len(bitstring) == n_bits
             for index, val in enumerate(bitstring):
                 if val == "0":
@@ -198,7 +233,11 @@ def entropy_test(n_bits, entropy_func):
                 else:
                     num_1[index] += 1
 
-            prog_bar.update(iteration)
+            progress.update(iteration + 1)
+            if checkpoint is not None and checkpoint.due():
+                checkpoint.save({'iteration': iteration + 1, 'num_0': num_0,
+                                 'num_1': num_1,
+                                 'source': checkpoint_mod.source_state(source)})
 
     fail = False
     worst_index = -1
@@ -212,21 +251,42 @@ def entropy_test(n_bits, entropy_func):
                 pct_1 < 0.5 - ENTROPY_TEST_FAILURE or
                 pct_1 > 0.5 + ENTROPY_TEST_FAILURE):
             fail = True
-            print "FAILURE: {index}:\t0: {num_0} ({pct_0})\t1: {num_1} ({pct_1})".format(
+            report("FAILURE: {index}:\t0: {num_0} ({pct_0})\t1: {num_1} ({pct_1})".format(
                 index=index, num_0=num_0[index], pct_0=pct_0, num_1=num_1[index],
-                pct_1=pct_1)
+                pct_1=pct_1))
         max_pct = max(pct_0, pct_1)
         if  max_pct > worst_high:
             worst_index = index
             worst_high = max_pct
 
     if not fail:
-        print "Worst index was: {index} ({pct})".format(
-            index=worst_index, pct=worst_high)
-
-def _test_uniformity_256_bits():
+        report("Worst index was: {index} ({pct})".format(
+            index=worst_index, pct=worst_high))
+    if checkpoint is not None:
+        checkpoint.remove()
+    return not fail
+
+def entropy_test_checkpoint(path, n_bits, entropy_func, source=None,
+                            iterations=None,
+                            interval=checkpoint_mod.CHECKPOINT_INTERVAL):
+    """Checkpoint of an entropy_test run, None if path is None"""
+    if path is None:
+        return None
+    return checkpoint_mod.Checkpoint(
+        path, 'entropy_test',
+        {'n_bits': n_bits, 'entropy_func': entropy_func.__name__,
+         'source': checkpoint_mod.source_name(source),
+         'iterations': iterations or TEST_ITERATIONS}, interval)
+
+def _test_uniformity_256_bits(source=None, checkpoint_path=None,
+                              interval=checkpoint_mod.CHECKPOINT_INTERVAL,
+                              metrics=None,
+                              report_interval=telemetry.REPORT_INTERVAL):
     """Test get_entropy() for per-bit-position bias"""
-    entropy_test(n_bits=256, entropy_func=get_entropy)
+    entropy_test(n_bits=256, entropy_func=get_entropy, source=source,
+                 checkpoint=entropy_test_checkpoint(
+                     checkpoint_path, 256, get_entropy, source, interval=interval),
+                 metrics=metrics, report_interval=report_interval)
 
 def _assert_int(*args):
     for arg in args:
@@ -245,9 +305,39 @@ def _assert_non_negative_int(*args):
         if arg < 0:
             raise ValueError
 
+def _print(_str):
+    print _str
+
 def _dprint(_str):
     if ENABLE_DEBUG_PRINT:
         print "DEBUG: {0}".format(_str)
 
+def source_from_args(args):
+    """Build an entropy source from parsed --drbg-seed/--replay arguments
+
+    Returns None for the default os.urandom source.
+    """
+    if args.replay:
+        return entropy_sources.ReplaySource(args.replay)
+    if args.drbg_seed:
+        return entropy_sources.HmacDrbgSource(args.drbg_seed.decode('hex'))
+    return None
+
+def add_source_args(parser):
+    """Add the options read by source_from_args to an argparse parser"""
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument('--drbg-seed', metavar='HEX',
+                       help='deterministic HMAC_DRBG seed (testing only)')
+    group.add_argument('--replay', metavar='FILE',
+                       help='replay random bytes from a file (testing only)')
+
 if __name__ == '__main__':
-    _test_uniformity_256_bits()
+    _PARSER = argparse.ArgumentParser(
+        description='Check get_entropy for per-bit-position bias')
+    add_source_args(_PARSER)
+    checkpoint_mod.add_checkpoint_args(_PARSER)
+    telemetry.add_telemetry_args(_PARSER)
+    _ARGS = _PARSER.parse_args()
+    _test_uniformity_256_bits(source_from_args(_ARGS), _ARGS.checkpoint,
+                              _ARGS.checkpoint_interval, _ARGS.metrics,
+                              _ARGS.report_interval)
@@ -0,0 +1,374 @@
+"""Membership and duplicate queries over large sets of entropies
+
+An index is a sorted array of fixed-size keys, one per distinct entropy,
+memory-mapped and searched with bisect, so a lookup touches about log2(n)
+pages of a file that may be much larger than memory. A Bloom filter stored
+after the keys answers most misses without touching the key array at all.
+
+A key is the first KEY_SIZE bytes of SHA256(length byte + entropy). Keys are
+not secret-preserving: anyone with the index can test whether a guessed
+entropy is in it, so keep it as safe as the mnemonics themselves.
+
+Building and deduplicating sort in bounded memory: keys are sorted in runs of
+at most run_records, written to temporary files, and merged. Bulk lookups
+sort the keys of each batch of at most run_records entropies in memory, so
+that each search of a batch starts where the previous one ended.
+
+################
+# Index format #
+################
+
+All integers are little-endian.
+
+| Offset | Size                | Contents                                     |
++--------+---------------------+----------------------------------------------+
+|      0 | 24                  | Header (see HEADER_FORMAT)                   |
+|     24 | n_keys * key_size   | Distinct keys in ascending order             |
+|        | bloom_bits / 8      | Bloom filter bits, bit i is bit i % 8 of     |
+|        |                     | byte i / 8. Absent if bloom_bits is 0        |
+
+$ python entropy_index.py build seen.idx archive.b39c
+$ python entropy_index.py lookup seen.idx new.b39c
+$ python entropy_index.py dedup archive.b39c
+"""
+#Python Standard Library 2.7
+import os
+import sys
+import heapq
+import mmap
+import struct
+import bisect
+import hashlib
+import argparse
+import tempfile
+import itertools
+
+#bip39_gym modules
+import corpus #corpus.py
+
+MAGIC = 'B39X'
+VERSION = 1
+#magic, version, key_size, bloom_hashes, n_keys, bloom_bits
+HEADER_FORMAT = '<4sHBBQQ'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+KEY_SIZE = 16
+RECORD_NUM_FORMAT = '>Q' #big-endian, so records sort by key then number
+RECORD_SIZE = KEY_SIZE + struct.calcsize(RECORD_NUM_FORMAT)
+
+RUN_RECORDS = 1000000
+READ_RECORDS = 4096 #records read at once from a run file
+BLOOM_BITS_PER_KEY = 10
+BLOOM_HASHES = 4 #each takes 4 bytes of the key
+
+class CorruptIndexError(Exception):
+    """An index file is truncated or its header is invalid"""
+    pass
+
+def entropy_key(entropy_bytes):
+    """Index key of a raw entropy"""
+    return hashlib.sha256(chr(len(entropy_bytes)) + entropy_bytes).digest()[0:KEY_SIZE]
+
+def _bloom_positions(key, bloom_bits, bloom_hashes):
+    return [struct.unpack_from('<I', key, 4 * num)[0] % bloom_bits
+            for num in range(bloom_hashes)]
+
+def _write_run(records, tmpdir):
+    records.sort()
+    handle, path = tempfile.mkstemp(dir=tmpdir, suffix='.run')
+    with os.fdopen(handle, 'wb') as run_file:
+        run_file.write(''.join(records))
+    return path
+
+def _read_run(path):
+    with open(path, 'rb') as run_file:
+        while True:
+            data = run_file.read(RECORD_SIZE * READ_RECORDS)
+            if not data:
+                return
+            for offset in xrange(0, len(data), RECORD_SIZE):
+                yield data[offset:offset + RECORD_SIZE]
+
+def _sorted_records(entropies, run_records, tmpdir, run_paths):
+    """Yield (key + record number) records of all entropies in sorted order
+
+    Temporary run files are appended to run_paths for the caller to remove.
+    """
+    records = []
+    for num, entropy_bytes in enumerate(entropies):
+        records.append(entropy_key(entropy_bytes) +
+                       struct.pack(RECORD_NUM_FORMAT, num))
+        if len(records) >= run_records:
+            run_paths.append(_write_run(records, tmpdir))
+            records = []
+    records.sort()
+    runs = [_read_run(path) for path in run_paths] + [iter(records)]
+    return heapq.merge(*runs)
+
+def _remove(paths):
+    for path in paths:
+        os.unlink(path)
+
+def find_duplicates(entropies, run_records=RUN_RECORDS, tmpdir=None):
+    """Find entropies that occur more than once, in bounded memory
+
+    Args:
+        entropies (Iterable[str]): Raw entropies
+        run_records (int): Most records sorted in memory at once
+        tmpdir (str): Directory for sorted runs. Default: system temp dir
+
+    Returns: List of lists of the positions in entropies of equal entropies
+    """
+    run_paths = []
+    try:
+        duplicates = []
+        records = _sorted_records(entropies, run_records, tmpdir, run_paths)
+        for _, group in itertools.groupby(records, lambda record: record[0:KEY_SIZE]):
+            nums = [struct.unpack(RECORD_NUM_FORMAT, record[KEY_SIZE:])[0]
+                    for record in group]
+            if len(nums) > 1:
+                duplicates.append(nums)
+        return duplicates
+    finally:
+        _remove(run_paths)
+
+def _write_index(path, sorted_keys, bloom_bits_per_key):
+    """Write distinct sorted keys and their Bloom filter atomically
+
+    Returns: Number of keys written
+    """
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.',
+                                        suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'w+b') as index_file:
+            index_file.write('\x00' * HEADER_SIZE)
+            n_keys = 0
+            previous = None
+            for key in sorted_keys:
+                if key != previous:
+                    index_file.write(key)
+                    n_keys += 1
+                    previous = key
+
+            bloom_bits = n_keys * bloom_bits_per_key
+            if bloom_bits > 0:
+                #second pass over the keys just written
+                bloom = bytearray(bloom_bits // 8 + 1)
+                bloom_bits = len(bloom) * 8
+                index_file.seek(HEADER_SIZE)
+                for _ in xrange(n_keys):
+                    key = index_file.read(KEY_SIZE)
+                    for position in _bloom_positions(key, bloom_bits, BLOOM_HASHES):
+                        bloom[position >> 3] |= 1 << (position & 7)
+                index_file.seek(0, os.SEEK_END)
+                index_file.write(str(bloom))
+            index_file.seek(0)
+            index_file.write(struct.pack(HEADER_FORMAT, MAGIC, VERSION, KEY_SIZE,
+                                         BLOOM_HASHES if bloom_bits else 0,
+                                         n_keys, bloom_bits))
+        os.rename(tmp_path, path)
+    except:
+        os.unlink(tmp_path)
+        raise
+    return n_keys
+
+def build_index(path, entropies, bloom_bits_per_key=BLOOM_BITS_PER_KEY,
+                run_records=RUN_RECORDS, tmpdir=None):
+    """Build an index of entropies in bounded memory
+
+    Args:
+        path (str): Index file, replaced atomically
+        entropies (Iterable[str]): Raw entropies, duplicates allowed
+        bloom_bits_per_key (int): Bloom filter size. 0 for no filter
+
+    Returns: Number of distinct entropies
+    """
+    run_paths = []
+    try:
+        records = _sorted_records(entropies, run_records, tmpdir, run_paths)
+        return _write_index(path, (record[0:KEY_SIZE] for record in records),
+                            bloom_bits_per_key)
+    finally:
+        _remove(run_paths)
+
+def insert(path, entropies, bloom_bits_per_key=BLOOM_BITS_PER_KEY,
+           run_records=RUN_RECORDS, tmpdir=None):
+    """Bulk insert entropies into an existing index, replacing it atomically
+
+    Returns: Number of distinct entropies in the new index
+    """
+    run_paths = []
+    index = EntropyIndex(path)
+    try:
+        records = _sorted_records(entropies, run_records, tmpdir, run_paths)
+        new_keys = (record[0:KEY_SIZE] for record in records)
+        return _write_index(path, heapq.merge(index.iter_keys(), new_keys),
+                            bloom_bits_per_key)
+    finally:
+        index.close()
+        _remove(run_paths)
+
+class _Keys(object):
+    """Sequence view of the key array, for bisect"""
+    __slots__ = ('_index',)
+
+    def __init__(self, index):
+        self._index = index
+
+    def __len__(self):
+        return self._index.n_keys
+
+    def __getitem__(self, position):
+        return self._index.key(position)
+
+class EntropyIndex(object):
+    """A memory-mapped index opened for lookups
+
+    Raises: CorruptIndexError
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as index_file:
+            try:
+                self._map = mmap.mmap(index_file.fileno(), 0,
+                                      access=mmap.ACCESS_READ)
+            except ValueError: #empty file
+                raise CorruptIndexError(path)
+        if len(self._map) < HEADER_SIZE:
+            self._map.close()
+            raise CorruptIndexError(path)
+        magic, version, key_size, self.bloom_hashes, self.n_keys, \
+            self.bloom_bits = struct.unpack_from(HEADER_FORMAT, self._map)
+        self._bloom_at = HEADER_SIZE + self.n_keys * KEY_SIZE
+        if (magic != MAGIC or version != VERSION or key_size != KEY_SIZE or
+                self.bloom_bits % 8 != 0 or
+                len(self._map) != self._bloom_at + self.bloom_bits // 8):
+            self._map.close()
+            raise CorruptIndexError(path)
+        self._keys = _Keys(self)
+
+    def __len__(self):
+        return self.n_keys
+
+    def key(self, position):
+        """Key at a position of the sorted array"""
+        offset = HEADER_SIZE + position * KEY_SIZE
+        return self._map[offset:offset + KEY_SIZE]
+
+    def iter_keys(self):
+        """Yield every key in ascending order"""
+        for position in xrange(self.n_keys):
+            yield self.key(position)
+
+    def _bloom_rejects(self, key):
+        if self.bloom_bits == 0:
+            return False
+        for position in _bloom_positions(key, self.bloom_bits, self.bloom_hashes):
+            if not ord(self._map[self._bloom_at + (position >> 3)]) & \
+                    (1 << (position & 7)):
+                return True
+        return False
+
+    def contains_key(self, key, lo=0):
+        """Whether a key is in the index, searching from position lo
+
+        Returns: (found, position where the search ended)
+        """
+        if self._bloom_rejects(key):
+            return False, lo
+        position = bisect.bisect_left(self._keys, key, lo)
+        return position < self.n_keys and self.key(position) == key, position
+
+    def __contains__(self, entropy_bytes):
+        return self.contains_key(entropy_key(entropy_bytes))[0]
+
+    def lookup_many(self, entropies, run_records=RUN_RECORDS):
+        """Look up many raw entropies, in bounded memory
+
+        Entropies are read in batches of at most run_records. The keys of a
+        batch are searched in sorted order, so each search starts where the
+        previous one ended.
+
+        Yields: Whether each entropy is in the index, in the order of entropies
+        """
+        entropies = iter(entropies)
+        while True:
+            batch = list(itertools.islice(entropies, run_records))
+            if not batch:
+                return
+            found = [False] * len(batch)
+            position = 0
+            for key, num in sorted((entropy_key(entropy_bytes), num)
+                                   for num, entropy_bytes in enumerate(batch)):
+                found[num], position = self.contains_key(key, position)
+            for is_found in found:
+                yield is_found
+
+    def close(self):
+        """Unmap the file"""
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+def iter_corpus_entropies(paths):
+    """Yield the raw entropy of every record of corpus.py files"""
+    for path in paths:
+        with corpus.CorpusReader(path) as reader:
+            for num in xrange(len(reader)):
+                yield reader.entropy_bytes(num)
+
+def _main():
+    parser = argparse.ArgumentParser(
+        description='Membership and duplicate queries over entropy corpora')
+    subparsers = parser.add_subparsers(dest='command')
+    build = subparsers.add_parser('build', help='build an index of corpora')
+    build.add_argument('index')
+    build.add_argument('corpora', nargs='+')
+    build.add_argument('--bloom-bits-per-key', type=int,
+                       default=BLOOM_BITS_PER_KEY)
+    add = subparsers.add_parser('insert', help='add corpora to an index')
+    add.add_argument('index')
+    add.add_argument('corpora', nargs='+')
+    lookup = subparsers.add_parser(
+        'lookup', help='list records of corpora already in an index')
+    lookup.add_argument('index')
+    lookup.add_argument('corpora', nargs='+')
+    dedup = subparsers.add_parser('dedup', help='list duplicate records')
+    dedup.add_argument('corpora', nargs='+')
+    for subparser in (build, add, lookup, dedup):
+        subparser.add_argument('--run-records', type=int, default=RUN_RECORDS)
+    args = parser.parse_args()
+
+    entropies = iter_corpus_entropies(args.corpora)
+    if args.command == 'build':
+        n_keys = build_index(args.index, entropies, args.bloom_bits_per_key,
+                             args.run_records)
+        print "Indexed {0} distinct entropies".format(n_keys)
+    elif args.command == 'insert':
+        n_keys = insert(args.index, entropies, run_records=args.run_records)
+        print "Index now has {0} distinct entropies".format(n_keys)
+    elif args.command == 'lookup':
+        n_seen = 0
+        with EntropyIndex(args.index) as index:
+            for num, found in enumerate(index.lookup_many(entropies,
+                                                          args.run_records)):
+                if found:
+                    n_seen += 1
+                    print "Record {0} is already in the index".format(num)
+        print "{0} records already seen".format(n_seen)
+        sys.exit(1 if n_seen else 0)
+    else:
+        duplicates = find_duplicates(entropies, args.run_records)
+        for nums in duplicates:
+            print "Duplicate records: {0}".format(
+                ', '.join(str(num) for num in nums))
+        print "{0} duplicated entropies".format(len(duplicates))
+        sys.exit(1 if duplicates else 0)
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,219 @@
+"""Pluggable sources of random bytes for entropy.get_entropy
+
+All sources implement get_bytes(n_bytes) and are safe to share between
+threads.
+
+UrandomSource: the OS CSPRNG, read in large chunks into an internal pool so
+    that many small requests cost one syscall. The pool is discarded after a
+    fork so that parent and child never serve the same bytes.
+HmacDrbgSource: deterministic HMAC_DRBG (NIST SP 800-90A, SHA-256) for
+    reproducible test and benchmark runs. Never use it for real mnemonics.
+ReplaySource: serves the bytes of a file in order, e.g. one written by a
+    RecordingSource, to reproduce a run exactly.
+"""
+#Python Standard Library 2.7
+import os
+import hmac
+import random
+import hashlib
+import binascii
+import threading
+
+URANDOM_POOL_SIZE = 4096 #bytes
+
+#SP 800-90A, 10.1: max_number_of_bits_per_request = 2**19
+DRBG_MAX_BYTES_PER_REQUEST = 2 ** 16
+
+class ExhaustedSourceError(Exception):
+    """A finite source has no bytes left for the request"""
+    pass
+
+class EntropySource(object):
+    """Interface of entropy sources"""
+
+    def get_bytes(self, n_bytes):
+        """Return n_bytes random bytes as raw string"""
+        raise NotImplementedError
+
+class UrandomSource(EntropySource):
+    """os.urandom served from a refillable pool
+
+    Args:
+        pool_size (int): Bytes read per os.urandom call. Requests at least
+            this large bypass the pool.
+    """
+
+    def __init__(self, pool_size=URANDOM_POOL_SIZE):
+        self.pool_size = pool_size
+        self._pool = ''
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+
+    def get_bytes(self, n_bytes):
+        if n_bytes >= self.pool_size:
+            return os.urandom(n_bytes)
+        with self._lock:
+            if self._pid != os.getpid():
+                self._pool = ''
+                self._pid = os.getpid()
+            if len(self._pool) < n_bytes:
+                self._pool += os.urandom(self.pool_size)
+            rand = self._pool[0:n_bytes]
+            self._pool = self._pool[n_bytes:]
+        return rand
+
+class HmacDrbgSource(EntropySource):
+    """Deterministic HMAC_DRBG with SHA-256, without reseeding
+
+    Args:
+        seed (str): Entropy input (and nonce) as raw string
+        personalization (str): Optional personalization string, e.g. to
+            derive independent streams from one seed
+    """
+
+    def __init__(self, seed, personalization=''):
+        self._key = '\x00' * 32
+        self._value = '\x01' * 32
+        self._counter = 1
+        self._lock = threading.Lock()
+        self._update(seed + personalization)
+        self._fingerprint = hashlib.sha256(self._key + self._value).hexdigest()
+
+    def _hmac(self, data):
+        return hmac.new(self._key, data, hashlib.sha256).digest()
+
+    def _update(self, provided_data):
+        self._key = self._hmac(self._value + '\x00' + provided_data)
+        self._value = self._hmac(self._value)
+        if provided_data:
+            self._key = self._hmac(self._value + '\x01' + provided_data)
+            self._value = self._hmac(self._value)
+
+    def _generate(self, n_bytes):
+        chunks = []
+        produced = 0
+        while produced < n_bytes:
+            self._value = self._hmac(self._value)
+            chunks.append(self._value)
+            produced += len(self._value)
+        self._update('')
+        self._counter += 1
+        return ''.join(chunks)[0:n_bytes]
+
+    def get_bytes(self, n_bytes):
+        with self._lock:
+            chunks = []
+            while n_bytes > 0:
+                request = min(n_bytes, DRBG_MAX_BYTES_PER_REQUEST)
+                chunks.append(self._generate(request))
+                n_bytes -= request
+            return ''.join(chunks)
+
+    def fingerprint(self):
+        """SHA-256 of the state right after seeding, which tells streams
+        apart without revealing the seed"""
+        return self._fingerprint
+
+    def getstate(self):
+        """Internal state, for resuming a run with setstate"""
+        with self._lock:
+            return (self._key, self._value, self._counter)
+
+    def setstate(self, state):
+        """Restore state returned by getstate"""
+        with self._lock:
+            self._key, self._value, self._counter = state
+
+class ReplaySource(EntropySource):
+    """Serve the bytes of a file in order
+
+    Raises: ExhaustedSourceError once the file has too few bytes left
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._lock = threading.Lock()
+
+    def get_bytes(self, n_bytes):
+        with self._lock:
+            rand = self._file.read(n_bytes)
+        if len(rand) < n_bytes:
+            raise ExhaustedSourceError()
+        return rand
+
+    def fingerprint(self):
+        """Absolute path and size of the file"""
+        return '{0}:{1}'.format(os.path.abspath(self.path),
+                                os.path.getsize(self.path))
+
+    def tell(self):
+        """Number of bytes served so far"""
+        with self._lock:
+            return self._file.tell()
+
+    def seek(self, offset):
+        """Continue serving from a byte offset, e.g. one returned by tell"""
+        with self._lock:
+            self._file.seek(offset)
+
+    def close(self):
+        """Close the file"""
+        self._file.close()
+
+class RecordingSource(EntropySource):
+    """Append every byte served by another source to a file for replay"""
+
+    def __init__(self, source, path):
+        self.source = source
+        self._file = open(path, 'ab')
+        self._lock = threading.Lock()
+
+    def get_bytes(self, n_bytes):
+        with self._lock:
+            rand = self.source.get_bytes(n_bytes)
+            self._file.write(rand)
+            self._file.flush()
+        return rand
+
+    def close(self):
+        """Close the file"""
+        self._file.close()
+
+class SourceRandom(random.Random):
+    """random.Random drawing from an entropy source, like random.SystemRandom
+
+    Lets simulations that use randint() etc. run from any source, e.g. an
+    HmacDrbgSource for reproducible dice rolls.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        random.Random.__init__(self)
+
+    def random(self):
+        """Get the next random number in the range [0.0, 1.0)"""
+        return (long(binascii.hexlify(self.source.get_bytes(7)), 16) >> 3) * \
+            2.0 ** -53
+
+    def getrandbits(self, k):
+        """Get an int with k random bits"""
+        if k <= 0:
+            raise ValueError('number of bits must be greater than zero')
+        n_bytes = (k + 7) // 8
+        value = long(binascii.hexlify(self.source.get_bytes(n_bytes)), 16)
+        return value >> (n_bytes * 8 - k)
+
+    def seed(self, *args, **kwds):
+        """Stub: the source determines the sequence"""
+        return None
+
+    def _notimplemented(self, *args, **kwds):
+        raise NotImplementedError('Source state is not available')
+    getstate = setstate = _notimplemented
+
+_DEFAULT_SOURCE = UrandomSource()
+
+def get_default_source():
+    """Get the shared UrandomSource used when no source is given"""
+    return _DEFAULT_SOURCE
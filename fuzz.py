@@ -0,0 +1,321 @@
+"""Differential round-trip fuzzing of the BIP39 codec
+
+Every case is a raw entropy of one of the allowed lengths. It is encoded and
+decoded through bip39 (single, batch and Mnemonic paths) and through the
+independent integer-arithmetic reference implementation below, and every
+result must agree. A mutated mnemonic (one word replaced) must be accepted or
+rejected by both implementations alike.
+
+Cases are split into shards. Each shard draws its cases from an HMAC_DRBG
+seeded with the run seed and the shard number, so a reported failure is
+reproduced exactly with --seed and --shard, or just the entropy with
+--entropy. Shards run on a process pool.
+
+Besides random entropy, a share of the cases is adversarial: all-zero and
+all-one (the cases app.num_entropy_warnings flags), a single bit set or
+cleared, repeated bytes and alternating bit patterns.
+
+$ python fuzz.py --cases 1000000 --seed 00
+$ python fuzz.py --seed 00 --shard 17
+$ python fuzz.py --entropy 80000000000000000000000000000000
+"""
+#Python Standard Library 2.7
+import sys
+import time
+import struct
+import hashlib
+import argparse
+import binascii
+import multiprocessing
+
+#bip39_gym modules
+import app #app.py
+import bip39 #bip39.py
+import entropy_sources #entropy_sources.py
+
+ENTROPY_LENGTHS = tuple(range(bip39.ENT_MIN / 8, bip39.ENT_MAX / 8 + 1,
+                              bip39.ENT_MOD / 8)) #bytes
+
+DEFAULT_CASES = 100000
+CASES_PER_SHARD = 10000
+BATCH_SIZE = 256
+ADVERSARIAL_EVERY = 4 #every 4th case is adversarial
+MAX_FAILURES_PER_SHARD = 20
+
+class ReferenceCodec(object):
+    """Independent BIP39 codec working on integers instead of binary strings
+
+    Reads the wordlist file itself and shares no code with bip39.py.
+    """
+
+    def __init__(self, wordlist_file=bip39.WORDLIST_FILE):
+        with open(wordlist_file, 'r') as words:
+            self.words = [word.strip() for word in words if word.strip()]
+        self.indices = dict((word, index) for index, word in enumerate(self.words))
+
+    @staticmethod
+    def _checksum(entropy_bytes):
+        n_bits = len(entropy_bytes) / 4
+        return ord(hashlib.sha256(entropy_bytes).digest()[0]) >> (8 - n_bits)
+
+    def encode(self, entropy_bytes):
+        """Mnemonic of raw entropy"""
+        n_checksum_bits = len(entropy_bytes) / 4
+        value = long(binascii.hexlify(entropy_bytes), 16)
+        value = (value << n_checksum_bits) | self._checksum(entropy_bytes)
+        n_words = (len(entropy_bytes) * 8 + n_checksum_bits) / 11
+        return ' '.join(self.words[(value >> (11 * (n_words - 1 - num))) & 0x7FF]
+                        for num in range(n_words))
+
+    def decode(self, mnemonic):
+        """Raw entropy of a mnemonic, or None if it is invalid"""
+        value = 0
+        words = mnemonic.split(' ')
+        if len(words) % 3 != 0:
+            return None
+        for word in words:
+            if word not in self.indices:
+                return None
+            value = (value << 11) | self.indices[word]
+        n_checksum_bits = len(words) * 11 / 33
+        n_bytes = n_checksum_bits * 4
+        entropy_bytes = binascii.unhexlify(
+            '{0:0{1}x}'.format(value >> n_checksum_bits, n_bytes * 2))
+        if value & ((1 << n_checksum_bits) - 1) != self._checksum(entropy_bytes):
+            return None
+        return entropy_bytes
+
+def expected_warnings(entropy_bytes):
+    """How many warnings app.num_entropy_warnings must give"""
+    return 1 if entropy_bytes.strip('\x00') == '' or \
+        entropy_bytes.strip('\xff') == '' else 0
+
+def _rand_int(rand, upper):
+    """Int in [0, upper) from 4 random bytes; the bias is irrelevant here"""
+    return struct.unpack('<I', rand)[0] % upper
+
+def _adversarial(source, length, kind):
+    rand = source.get_bytes(4)
+    if kind == 0:
+        return '\x00' * length
+    if kind == 1:
+        return '\xff' * length
+    bit = _rand_int(rand, length * 8)
+    if kind == 2: #one bit set
+        value = 1 << bit
+    elif kind == 3: #one bit cleared
+        value = ((1 << length * 8) - 1) ^ (1 << bit)
+    elif kind == 4: #repeated byte
+        return chr(_rand_int(rand, 256)) * length
+    else: #alternating bits, either phase
+        return ('\x55' if bit % 2 else '\xaa') * length
+    return binascii.unhexlify('{0:0{1}x}'.format(value, length * 2))
+
+N_ADVERSARIAL_KINDS = 6
+
+def shard_source(seed, shard):
+    """The deterministic source of a shard's cases"""
+    return entropy_sources.HmacDrbgSource(
+        seed, personalization='shard {0}'.format(shard))
+
+def generate_cases(source, n_cases):
+    """Yield (raw entropy, mutation word position, replacement word index)
+
+    Cycles through every entropy length; every ADVERSARIAL_EVERY-th case is
+    adversarial, cycling through every kind.
+    """
+    for num in xrange(n_cases):
+        length = ENTROPY_LENGTHS[num % len(ENTROPY_LENGTHS)]
+        if num % ADVERSARIAL_EVERY == 0:
+            kind = (num / ADVERSARIAL_EVERY) % N_ADVERSARIAL_KINDS
+            entropy_bytes = _adversarial(source, length, kind)
+        else:
+            entropy_bytes = source.get_bytes(length)
+        n_words = (length * 8 + length / 4) / 11
+        yield (entropy_bytes, _rand_int(source.get_bytes(4), n_words),
+               _rand_int(source.get_bytes(4), 2048))
+
+def check_case(entropy_bytes, position, replacement, reference, codec):
+    """Check one case on the single-value paths
+
+    Returns: (mnemonic, List of (check, message) failures)
+    """
+    failures = []
+    entropy_bin = bip39.encode_binary_string(entropy_bytes)
+    expected = reference.encode(entropy_bytes)
+    mnemonic = codec.binstring2mnemonic(entropy_bin)
+    if mnemonic != expected:
+        failures.append(('encode', mnemonic))
+    try:
+        decoded = codec.mnemonic2binstring(expected)
+        if decoded != entropy_bin:
+            failures.append(('decode', decoded))
+    except Exception as err: #pylint: disable=broad-except
+        failures.append(('decode', repr(err)))
+    if reference.decode(expected) != entropy_bytes:
+        failures.append(('reference', 'reference round trip failed'))
+
+    from_bytes = bip39.Mnemonic.from_bytes(entropy_bytes, codec)
+    if from_bytes.mnemonic != expected or list(from_bytes.indices) != \
+            [reference.indices[word] for word in expected.split(' ')]:
+        failures.append(('Mnemonic.from_bytes', from_bytes.mnemonic))
+    from_mnemonic = bip39.Mnemonic.from_mnemonic(expected, codec)
+    if not from_mnemonic.valid or from_mnemonic.entropy_bytes != entropy_bytes:
+        failures.append(('Mnemonic.from_mnemonic', from_mnemonic.entropy_hex))
+
+    warnings = app.num_entropy_warnings(entropy_bin, print_warning=False)
+    if warnings != expected_warnings(entropy_bytes):
+        failures.append(('num_entropy_warnings', str(warnings)))
+
+    #differential check on a mutated mnemonic
+    words = expected.split(' ')
+    words[position] = reference.words[replacement]
+    mutated = ' '.join(words)
+    reference_entropy = reference.decode(mutated)
+    try:
+        decoded = bip39.decode_binary_string(codec.mnemonic2binstring(mutated))
+    except bip39.FailedCheckSumError:
+        decoded = None
+    except Exception as err: #pylint: disable=broad-except
+        decoded = repr(err)
+    if decoded != reference_entropy:
+        failures.append(('mutated', mutated))
+    return expected, failures
+
+def run_shard(args):
+    """Process pool worker: run one shard
+
+    Args: (seed, shard, n_cases) tuple
+
+    Returns: (shard, n_cases, failures, seconds). Failures are (shard, case
+        number, entropy hex, check, message) tuples.
+    """
+    seed, shard, n_cases = args
+    began = time.time()
+    reference = ReferenceCodec()
+    codec = bip39.get_default_codec(print_warning=False)
+    failures = []
+
+    def fail(case_num, entropy_bytes, check, message):
+        if len(failures) < MAX_FAILURES_PER_SHARD:
+            failures.append((shard, case_num, binascii.hexlify(entropy_bytes),
+                             check, message))
+
+    batch = []
+    def check_batch():
+        entropy_bins = [bip39.encode_binary_string(case[1]) for case in batch]
+        mnemonics = codec.binstrings2mnemonics(entropy_bins)
+        decoded = codec.mnemonics2binstrings([case[2] for case in batch])
+        for num, (case_num, entropy_bytes, expected) in enumerate(batch):
+            if mnemonics[num] != expected:
+                fail(case_num, entropy_bytes, 'binstrings2mnemonics',
+                     mnemonics[num])
+            if decoded[num] != entropy_bins[num]:
+                fail(case_num, entropy_bytes, 'mnemonics2binstrings',
+                     decoded[num])
+        del batch[:]
+
+    cases = generate_cases(shard_source(seed, shard), n_cases)
+    for case_num, (entropy_bytes, position, replacement) in enumerate(cases):
+        try:
+            expected, case_failures = check_case(entropy_bytes, position,
+                                                 replacement, reference, codec)
+        except Exception as err: #pylint: disable=broad-except
+            fail(case_num, entropy_bytes, 'exception', repr(err))
+            continue
+        for check, message in case_failures:
+            fail(case_num, entropy_bytes, check, message)
+        batch.append((case_num, entropy_bytes, expected))
+        if len(batch) == BATCH_SIZE:
+            try:
+                check_batch()
+            except Exception as err: #pylint: disable=broad-except
+                fail(batch[0][0], batch[0][1], 'batch', repr(err))
+                del batch[:]
+    if batch:
+        try:
+            check_batch()
+        except Exception as err: #pylint: disable=broad-except
+            fail(batch[0][0], batch[0][1], 'batch', repr(err))
+    return shard, n_cases, failures, time.time() - began
+
+def run_fuzz(seed, n_cases=DEFAULT_CASES, processes=None,
+             cases_per_shard=CASES_PER_SHARD, shards=None):
+    """Fuzz n_cases cases split into shards
+
+    Args:
+        seed (str): Raw seed of the run
+        processes (int): Worker processes. 0 runs shards on the calling
+            process. Default: number of CPUs
+        shards (List[int]): Run only these shards, e.g. to reproduce a failure
+
+    Returns: dict with cases, failures and elapsed (wall clock seconds)
+    """
+    n_shards = (n_cases + cases_per_shard - 1) // cases_per_shard
+    if shards is None:
+        shards = range(n_shards)
+    jobs = [(seed, shard, min(cases_per_shard, n_cases - shard * cases_per_shard))
+            for shard in shards]
+    began = time.time()
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if processes == 0:
+        results = [run_shard(job) for job in jobs]
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            results = list(pool.imap_unordered(run_shard, jobs))
+        finally:
+            pool.terminate()
+            pool.join()
+    report = {'cases': 0, 'failures': [], 'elapsed': time.time() - began}
+    for _, shard_cases, failures, _ in sorted(results):
+        report['cases'] += shard_cases
+        report['failures'].extend(failures)
+    return report
+
+def print_report(report, seed, n_cases, cases_per_shard):
+    """Print failures with the options reproducing them, and throughput"""
+    for shard, case_num, entropy_hex, check, message in report['failures']:
+        print "FAILURE: shard {0} case {1} ({2}): {3}: {4}".format(
+            shard, case_num, entropy_hex, check, message)
+        print ("    reproduce: python fuzz.py --seed {0} --cases {1} "
+               "--cases-per-shard {2} --shard {3}").format(
+                   binascii.hexlify(seed), n_cases, cases_per_shard, shard)
+    print "Fuzzed {0} cases in {1:.2f}s ({2:.0f} cases/s), {3} failures".format(
+        report['cases'], report['elapsed'],
+        report['cases'] / max(report['elapsed'], 1e-9), len(report['failures']))
+
+def _main():
+    parser = argparse.ArgumentParser(
+        description='Differential round-trip fuzzing of the BIP39 codec')
+    parser.add_argument('--cases', type=int, default=DEFAULT_CASES)
+    parser.add_argument('--seed', metavar='HEX',
+                        help='run seed (default: random, printed)')
+    parser.add_argument('--shard', type=int, action='append',
+                        help='run only this shard (repeatable)')
+    parser.add_argument('--cases-per-shard', type=int, default=CASES_PER_SHARD)
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes (default: #CPUs)')
+    parser.add_argument('--entropy', metavar='HEX',
+                        help='check a single entropy and exit')
+    args = parser.parse_args()
+
+    if args.entropy:
+        entropy_bytes = binascii.unhexlify(args.entropy)
+        _, failures = check_case(entropy_bytes, 0, 0, ReferenceCodec(),
+                                 bip39.get_default_codec(print_warning=False))
+        for check, message in failures:
+            print "FAILURE: {0}: {1}".format(check, message)
+        sys.exit(1 if failures else 0)
+
+    seed = binascii.unhexlify(args.seed) if args.seed else \
+        entropy_sources.get_default_source().get_bytes(16)
+    print "Seed: {0}".format(binascii.hexlify(seed))
+    report = run_fuzz(seed, args.cases, args.processes, args.cases_per_shard,
+                      args.shard)
+    print_report(report, seed, args.cases, args.cases_per_shard)
+    sys.exit(1 if report['failures'] else 0)
+
+if __name__ == '__main__':
+    _main()
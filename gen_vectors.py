@@ -0,0 +1,313 @@
+"""Generate random BIP39 test vector corpora of any size
+
+Records use the schema of data/random_vectors.json (n_words, entropy_hex,
+entropy_binary, word_indices, mnemonic, passphrase, seed), so the output can
+be checked with conformance.py and fed to fuzzers and benchmarks.
+
+Entropy for a whole batch of records is read from the source at once, each
+batch is encoded with the batch codec, and seeds (the PBKDF2 bottleneck) are
+derived on a process pool with a bounded number of batches in flight. Output
+is streamed, so memory use doesn't grow with the number of records.
+
+Word counts are assigned round-robin from the requested set, so every length
+is equally represented in any run of records.
+
+#################
+# Binary format #
+#################
+
+Files ending in BINARY_SUFFIX hold only what can't be derived: the entropy
+and, optionally, the seed. All integers are little-endian.
+
+| Offset | Size           | Contents                                       |
++--------+----------------+------------------------------------------------+
+|      0 | 10             | Header (see BINARY_HEADER_FORMAT)              |
+|     10 | passphrase_len | Passphrase of every seed, UTF-8                |
+|        | ...            | Fixed-size records: entropy length in bytes    |
+|        |                | (1 byte), entropy zero-padded to 32 bytes, then|
+|        |                | the 64 byte seed if FLAG_SEEDS is set          |
+
+$ python gen_vectors.py corpus.jsonl -n 1000000 --words 12,24
+$ python gen_vectors.py corpus.b39v -n 1000000 --drbg-seed 00
+"""
+#Python Standard Library 2.7
+import sys
+import json
+import time
+import struct
+import argparse
+import binascii
+import collections
+import multiprocessing
+
+#bip39_gym modules
+import bip39 #bip39.py
+import entropy #entropy.py
+import entropy_sources #entropy_sources.py
+
+ALLOWED_WORD_COUNTS = tuple(sorted(bip39.LAYOUTS))
+DEFAULT_WORD_COUNTS = (12, 15, 18, 21, 24)
+
+BATCH_SIZE = 256
+BATCHES_IN_FLIGHT_PER_PROCESS = 4
+
+BINARY_SUFFIX = '.b39v'
+BINARY_MAGIC = 'B39V'
+BINARY_VERSION = 1
+#magic, version, flags, passphrase_len
+BINARY_HEADER_FORMAT = '<4sHHH'
+BINARY_HEADER_SIZE = struct.calcsize(BINARY_HEADER_FORMAT)
+FLAG_SEEDS = 0x0001
+MAX_ENTROPY_BYTES = bip39.ENT_MAX / 8
+SEED_BYTES = 64
+
+#3 word mnemonics (32 bits of entropy) are generated too, as in the bundled
+#random vectors
+_CODEC = bip39.get_default_codec(print_warning=False).copy(
+    ent_min=bip39.ENT_MOD)
+
+def entropy_bits(n_words):
+    """Entropy length in bits of a mnemonic with n_words words
+
+    Raises: ValueError if n_words isn't a multiple of 3 between 3 and 24
+    """
+    if n_words not in ALLOWED_WORD_COUNTS:
+        raise ValueError("Unsupported number of words: {0}".format(n_words))
+    return bip39.LAYOUTS[n_words].ent
+
+def generate_entropies(n_records, word_counts=DEFAULT_WORD_COUNTS, source=None,
+                       first_record=0):
+    """Get raw entropy strings for a batch with a single read from the source
+
+    Args:
+        n_records (int): Number of entropies
+        word_counts (Sequence[int]): Mnemonic lengths, assigned round-robin
+        source (entropy_sources.EntropySource): Default: os.urandom pool
+        first_record (int): Position of the batch in the whole run, so that
+            the round-robin continues across batches
+    """
+    if source is None:
+        source = entropy_sources.get_default_source()
+    lengths = [entropy_bits(word_counts[(first_record + num) % len(word_counts)]) / 8
+               for num in xrange(n_records)]
+    rand = source.get_bytes(sum(lengths))
+    entropies = []
+    offset = 0
+    for length in lengths:
+        entropies.append(rand[offset:offset + length])
+        offset += length
+    return entropies
+
+def _seeds_worker(args):
+    """Process pool worker: derive the seeds of a batch of mnemonics"""
+    mnemonics, passphrase = args
+    return [bip39.mnemonic2seed(mnemonic, passphrase) for mnemonic in mnemonics]
+
+def make_records(entropies, seeds=None, passphrase=''):
+    """Build records in the random_vectors.json schema from raw entropies
+
+    Args:
+        entropies (List[str]): Raw entropy strings
+        seeds (List[str]): Hex seeds in the same order, or None to omit them
+    """
+    entropy_bins = [bip39.encode_binary_string(raw) for raw in entropies]
+    mnemonics = _CODEC.binstrings2mnemonics(entropy_bins)
+    records = []
+    for num, entropy_bin in enumerate(entropy_bins):
+        indices = bip39.binstring2word_index(entropy_bin +
+                                             bip39.checksum(entropy_bin))
+        record = collections.OrderedDict([
+            ('n_words', len(indices)),
+            ('entropy_hex', binascii.hexlify(entropies[num])),
+            ('entropy_binary', entropy_bin),
+            ('word_indices', indices),
+            ('mnemonic', mnemonics[num]),
+            ('passphrase', passphrase)])
+        if seeds is not None:
+            record['seed'] = seeds[num]
+        records.append(record)
+    return records
+
+class JsonlWriter(object):
+    """Write records as one JSON object per line"""
+
+    def __init__(self, out_file):
+        self.out_file = out_file
+
+    def write(self, entropies, seeds, passphrase):
+        """Write a batch of records"""
+        self.out_file.write(''.join(
+            json.dumps(record) + '\n'
+            for record in make_records(entropies, seeds, passphrase)))
+
+class BinaryWriter(object):
+    """Write entropies and seeds as fixed-size binary records
+
+    The passphrase is stored once in the header, so every batch written must
+    use the same one.
+    """
+
+    def __init__(self, out_file, with_seeds=True, passphrase=''):
+        self.out_file = out_file
+        self.with_seeds = with_seeds
+        self.passphrase = passphrase
+        out_file.write(struct.pack(BINARY_HEADER_FORMAT, BINARY_MAGIC,
+                                   BINARY_VERSION,
+                                   FLAG_SEEDS if with_seeds else 0,
+                                   len(passphrase)))
+        out_file.write(passphrase)
+
+    def write(self, entropies, seeds, passphrase):
+        """Write a batch of records
+
+        Raises: ValueError if passphrase differs from the header's
+        """
+        if passphrase != self.passphrase:
+            raise ValueError("Binary vector files have a single passphrase")
+        chunks = []
+        for num, raw in enumerate(entropies):
+            chunks.append(chr(len(raw)))
+            chunks.append(raw.ljust(MAX_ENTROPY_BYTES, '\x00'))
+            if self.with_seeds:
+                chunks.append(binascii.unhexlify(seeds[num]))
+        self.out_file.write(''.join(chunks))
+
+def binary_record_size(with_seeds):
+    """Size in bytes of one binary record"""
+    return 1 + MAX_ENTROPY_BYTES + (SEED_BYTES if with_seeds else 0)
+
+def iter_binary_vectors(path):
+    """Yield records in the random_vectors.json schema from a binary file
+
+    Derived columns are recomputed from the stored entropy.
+
+    Raises: ValueError if the file is not a binary vector file
+    """
+    with open(path, 'rb') as in_file:
+        header = in_file.read(BINARY_HEADER_SIZE)
+        if len(header) != BINARY_HEADER_SIZE:
+            raise ValueError("{0} is not a binary vector file".format(path))
+        magic, version, flags, passphrase_len = struct.unpack(
+            BINARY_HEADER_FORMAT, header)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION:
+            raise ValueError("{0} is not a binary vector file".format(path))
+        passphrase = in_file.read(passphrase_len)
+        with_seeds = bool(flags & FLAG_SEEDS)
+        record_size = binary_record_size(with_seeds)
+        while True:
+            data = in_file.read(record_size * BATCH_SIZE)
+            if len(data) % record_size != 0:
+                raise ValueError("{0} is truncated".format(path))
+            if not data:
+                break
+            entropies = []
+            seeds = [] if with_seeds else None
+            for offset in xrange(0, len(data), record_size):
+                length = ord(data[offset])
+                entropies.append(data[offset + 1:offset + 1 + length])
+                if with_seeds:
+                    seeds.append(binascii.hexlify(
+                        data[offset + 1 + MAX_ENTROPY_BYTES:offset + record_size]))
+            for record in make_records(entropies, seeds, passphrase):
+                yield record
+
+def generate(writer, n_records, word_counts=DEFAULT_WORD_COUNTS, source=None,
+             passphrase='', with_seeds=True, processes=None,
+             batch_size=BATCH_SIZE):
+    """Generate n_records random vectors into a writer
+
+    Args:
+        writer (JsonlWriter or BinaryWriter): Output
+        processes (int): Seed derivation processes. 0 derives seeds on the
+            calling process. Default: number of CPUs
+
+    Returns: Number of records written
+    """
+    def batches():
+        for first in xrange(0, n_records, batch_size):
+            yield generate_entropies(min(batch_size, n_records - first),
+                                     word_counts, source, first)
+
+    def seed_job(entropies):
+        mnemonics = _CODEC.binstrings2mnemonics(
+            [bip39.encode_binary_string(raw) for raw in entropies])
+        return (mnemonics, passphrase)
+
+    written = [0]
+    def write(entropies, seeds):
+        writer.write(entropies, seeds, passphrase)
+        written[0] += len(entropies)
+
+    if not with_seeds or processes == 0:
+        for entropies in batches():
+            write(entropies, _seeds_worker(seed_job(entropies))
+                  if with_seeds else None)
+        return written[0]
+
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    pool = multiprocessing.Pool(processes)
+    try:
+        in_flight = collections.deque()
+        for entropies in batches():
+            in_flight.append((entropies, pool.apply_async(
+                _seeds_worker, (seed_job(entropies),))))
+            if len(in_flight) >= processes * BATCHES_IN_FLIGHT_PER_PROCESS:
+                entropies, result = in_flight.popleft()
+                write(entropies, result.get())
+        while in_flight:
+            entropies, result = in_flight.popleft()
+            write(entropies, result.get())
+    finally:
+        pool.terminate()
+        pool.join()
+    return written[0]
+
+def _parse_word_counts(text):
+    try:
+        word_counts = tuple(int(word_count) for word_count in text.split(','))
+        for word_count in word_counts:
+            entropy_bits(word_count)
+    except ValueError:
+        raise argparse.ArgumentTypeError(
+            "expected comma separated word counts from {0}".format(
+                ALLOWED_WORD_COUNTS))
+    return word_counts
+
+def _main():
+    parser = argparse.ArgumentParser(
+        description='Generate random BIP39 test vectors')
+    parser.add_argument('output',
+                        help='output file, .jsonl or {0}'.format(BINARY_SUFFIX))
+    parser.add_argument('-n', '--records', type=int, default=1000)
+    parser.add_argument('--words', type=_parse_word_counts,
+                        default=DEFAULT_WORD_COUNTS,
+                        help='comma separated word counts (default: {0})'.format(
+                            ','.join(str(count) for count in DEFAULT_WORD_COUNTS)))
+    parser.add_argument('--passphrase', default='')
+    parser.add_argument('--no-seed', action='store_true',
+                        help="don't derive seeds (much faster)")
+    parser.add_argument('--processes', type=int, default=None,
+                        help='seed derivation processes (default: #CPUs)')
+    entropy.add_source_args(parser)
+    args = parser.parse_args()
+
+    with_seeds = not args.no_seed
+    began = time.time()
+    with open(args.output, 'wb') as out_file:
+        if args.output.endswith(BINARY_SUFFIX):
+            writer = BinaryWriter(out_file, with_seeds, args.passphrase)
+        elif args.output.endswith('.jsonl'):
+            writer = JsonlWriter(out_file)
+        else:
+            parser.error("output must end with .jsonl or {0}".format(
+                BINARY_SUFFIX))
+        n_records = generate(writer, args.records, args.words,
+                             entropy.source_from_args(args), args.passphrase,
+                             with_seeds, args.processes)
+    elapsed = time.time() - began
+    sys.stderr.write("Wrote {0} vectors in {1:.2f}s ({2:.0f} vectors/s)\n".format(
+        n_records, elapsed, n_records / max(elapsed, 1e-9)))
+
+if __name__ == '__main__':
+    _main()
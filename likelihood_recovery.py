@@ -0,0 +1,405 @@
+"""Best-first recovery of damaged mnemonic backups, most likely first
+
+Each word of the backup is a token:
+
+word: a clearly readable word, kept as is
+word? or a token not in the wordlist: an uncertain reading, scored against
+    every word of the wordlist
+pre*: any word starting with pre (Wordlist.prefix_matches), equally likely
+?: an unreadable word, all 2048 words equally likely
+
+An uncertain reading is scored with a weighted edit distance (Damerau-
+Levenshtein) to each word, where substituting keys that are neighbours on a
+QWERTY keyboard or characters confused by OCR or handwriting (CONFUSIONS,
+including pairs like rn/m) is cheaper than other edits. Stopping early also
+costs little, since BIP39 words are commonly written down as their first
+four letters. A cost c gives a likelihood proportional to exp(-c); the
+likelihoods of each position are normalized over the wordlist and the best
+MAX_ALTERNATIVES are kept.
+
+Candidates (one alternative per position) are enumerated best-first: a heap
+holds the frontier of rank tuples, and each tuple is reached from exactly
+one parent (the tuple with its last nonzero rank lowered by one), so no set
+of visited tuples is needed. Candidates come out in order of decreasing
+probability. The heap is bounded to max_queue entries; beyond that the least
+likely entries are dropped, and the search is no longer exhaustive past the
+best probability dropped (reported in stats).
+
+Popped candidates are checked with the checksum in NumPy batches; survivors
+are streamed in probability order and can be matched against a seed prefix,
+xprv/xpub or address (passphrase_recovery targets) on a process pool.
+
+$ python likelihood_recovery.py --mnemonic "legal winnr thank year wave sausage worth usefu? legal winner thank ?"
+"""
+#Python Standard Library 2.7
+import sys
+import math
+import time
+import heapq
+import getpass
+import hashlib
+import argparse
+import itertools
+import collections
+import multiprocessing
+
+#PyPI modules
+import numpy as np #pip install numpy
+
+#bip39_gym modules
+import bip32 #bip32.py
+import bip39 #bip39.py
+import passphrase_recovery #passphrase_recovery.py
+import wordlists #wordlists.py
+
+MAX_ALTERNATIVES = 128
+
+MAX_QUEUE = 2 ** 20
+
+BATCH_SIZE = 4096
+
+BATCHES_IN_FLIGHT_PER_PROCESS = 2
+
+#edit costs, in nats of likelihood
+INSERT_COST = 2.0
+DELETE_COST = 2.0
+SUBSTITUTE_COST = 3.0
+KEYBOARD_COST = 1.2
+CONFUSION_COST = 0.8
+TRANSPOSE_COST = 1.2
+#per character left off the end of a word
+TRUNCATE_COST = 0.3
+#readings of at least this many letters identify a BIP39 word
+UNIQUE_PREFIX = 4
+
+#OCR and handwriting confusions: (written, read) both ways
+CONFUSIONS = [
+    ('a', 'o'), ('a', 'e'), ('c', 'e'), ('e', 'o'), ('i', 'l'), ('i', 'j'),
+    ('l', 't'), ('n', 'h'), ('n', 'r'), ('u', 'v'), ('u', 'n'), ('m', 'n'),
+    ('g', 'q'), ('g', 'y'), ('b', 'h'), ('f', 't'), ('k', 'h'), ('y', 'v'),
+    ('o', '0'), ('l', '1'), ('i', '1'), ('s', '5'), ('b', '6'), ('g', '9'),
+    ('z', '2'), ('rn', 'm'), ('vv', 'w'), ('cl', 'd'), ('ii', 'u'),
+]
+
+KEYBOARD_ROWS = ('qwertyuiop', 'asdfghjkl', 'zxcvbnm')
+KEYBOARD_ROW_OFFSETS = (0.0, 0.25, 0.75)
+
+def _keyboard_neighbours():
+    positions = {}
+    for row, (keys, offset) in enumerate(zip(KEYBOARD_ROWS, KEYBOARD_ROW_OFFSETS)):
+        for col, key in enumerate(keys):
+            positions[key] = (row, col + offset)
+    neighbours = set()
+    for key1, (row1, col1) in positions.iteritems():
+        for key2, (row2, col2) in positions.iteritems():
+            if key1 != key2 and math.hypot(row1 - row2, col1 - col2) < 1.3:
+                neighbours.add((key1, key2))
+    return neighbours
+
+def _substitution_costs():
+    costs = {}
+    for pair in _keyboard_neighbours():
+        costs[pair] = KEYBOARD_COST
+    for written, read in CONFUSIONS:
+        if len(written) == len(read) == 1:
+            costs[(written, read)] = costs[(read, written)] = CONFUSION_COST
+    return costs
+
+_SUBSTITUTION_COSTS = _substitution_costs()
+#multi-character confusions keyed by (read, written)
+_MULTI_CONFUSIONS = set()
+for _written, _read in CONFUSIONS:
+    if len(_written) != 1 or len(_read) != 1:
+        _MULTI_CONFUSIONS.add((_written, _read))
+        _MULTI_CONFUSIONS.add((_read, _written))
+
+def reading_cost(reading, word):
+    """Cost of reading a written word as reading
+
+    Weighted Damerau-Levenshtein distance with cheap keyboard and confusion
+    substitutions and 2:1 confusions, where the reading may stop early.
+    """
+    n_read, n_word = len(reading), len(word)
+    rows = [[0.0] * (n_word + 1) for _ in range(n_read + 1)]
+    for j in range(1, n_word + 1):
+        rows[0][j] = j * INSERT_COST
+    for i in range(1, n_read + 1):
+        row, prev = rows[i], rows[i - 1]
+        row[0] = i * DELETE_COST
+        char = reading[i - 1]
+        for j in range(1, n_word + 1):
+            written = word[j - 1]
+            if char == written:
+                best = prev[j - 1]
+            else:
+                best = prev[j - 1] + _SUBSTITUTION_COSTS.get((written, char),
+                                                             SUBSTITUTE_COST)
+            best = min(best, prev[j] + DELETE_COST, row[j - 1] + INSERT_COST)
+            if (i > 1 and j > 1 and char == word[j - 2] and
+                    reading[i - 2] == written):
+                best = min(best, rows[i - 2][j - 2] + TRANSPOSE_COST)
+            if i > 1 and (word[j - 1], reading[i - 2:i]) in _MULTI_CONFUSIONS:
+                best = min(best, rows[i - 2][j - 1] + CONFUSION_COST)
+            if j > 1 and (word[j - 2:j], char) in _MULTI_CONFUSIONS:
+                best = min(best, prev[j - 2] + CONFUSION_COST)
+            row[j] = best
+    last = rows[n_read]
+    #the reading may be the start of the word, e.g. its first four letters
+    truncated = min(last[j] + (n_word - j) * TRUNCATE_COST
+                    for j in range(n_word + 1))
+    if n_read >= UNIQUE_PREFIX and word.startswith(reading):
+        truncated = 0.0
+    return min(last[n_word], truncated)
+
+def parse_token(token):
+    """(kind, text) of a token: 'word', 'reading', 'prefix' or 'unknown'"""
+    if token == '?':
+        return 'unknown', ''
+    if token.endswith('*'):
+        return 'prefix', token[:-1]
+    if token.endswith('?'):
+        return 'reading', token[:-1]
+    return 'word', token
+
+def position_alternatives(token, wordlist, max_alternatives=MAX_ALTERNATIVES):
+    """Likely word indices of one position, most likely first
+
+    Args:
+        token (str): Token as described in the module docstring
+        wordlist (wordlists.Wordlist): Wordlist of the mnemonic
+
+    Returns: List[Tuple[float, int]] of (log probability, word index)
+
+    Raises: ValueError if no word matches a prefix
+    """
+    kind, text = parse_token(token)
+    text = wordlists.normalize(text.lower())
+    if kind == 'word':
+        index = wordlist.find(text)
+        if index >= 0:
+            return [(0.0, index)]
+        kind = 'reading'
+    if kind == 'unknown':
+        return [(-math.log(len(wordlist)), index)
+                for index in range(len(wordlist))]
+    if kind == 'prefix':
+        matches = wordlist.prefix_matches(text)
+        if not matches:
+            raise ValueError("No word starts with {0}".format(text))
+        return [(-math.log(len(matches)), index) for index in matches]
+    costs = np.array([reading_cost(text, word) for word in wordlist])
+    log_probs = -costs - np.log(np.exp(-costs).sum())
+    best = np.argsort(costs, kind='mergesort')[:max_alternatives]
+    return [(float(log_probs[index]), int(index)) for index in best]
+
+def best_first(alternatives, max_queue=MAX_QUEUE, stats=None):
+    """Yield (log probability, word indices) of every combination, best first
+
+    Args:
+        alternatives (List[List[Tuple[float, int]]]): Per position, sorted
+            by decreasing log probability
+        stats (dict): If given, 'dropped' counts heap entries dropped to
+            stay within max_queue and 'dropped_best' is the best log
+            probability dropped
+    """
+    if stats is None:
+        stats = {}
+    stats['dropped'] = 0
+    stats['dropped_best'] = None
+    n_positions = len(alternatives)
+    start = (0,) * n_positions
+    heap = [(-sum(alts[0][0] for alts in alternatives), start, 0)]
+    while heap:
+        neg_log_prob, ranks, pivot = heapq.heappop(heap)
+        yield -neg_log_prob, tuple(alternatives[pos][rank][1]
+                                   for pos, rank in enumerate(ranks))
+        #children raise one rank at or after the last raised position
+        for pos in range(pivot, n_positions):
+            rank = ranks[pos] + 1
+            if rank < len(alternatives[pos]):
+                child = ranks[:pos] + (rank,) + ranks[pos + 1:]
+                heapq.heappush(heap, (
+                    neg_log_prob - alternatives[pos][rank][0] +
+                    alternatives[pos][rank - 1][0], child, pos))
+        if len(heap) > max_queue:
+            #a sorted list is a heap; keep the better half
+            heap.sort()
+            dropped_best = -heap[max_queue // 2][0]
+            stats['dropped'] += len(heap) - max_queue // 2
+            if stats['dropped_best'] is None or dropped_best > stats['dropped_best']:
+                stats['dropped_best'] = dropped_best
+            del heap[max_queue // 2:]
+
+_INDEX_SHIFTS = np.arange(bip39.WORDLIST_PIECE_BITS - 1, -1, -1)
+
+def batch_checksum_valid(indices):
+    """Whether each row of an (n, n_words) matrix of word indices is valid"""
+    indices = np.asarray(indices, dtype=np.int64)
+    n_rows, n_words = indices.shape
+    layout = bip39.get_layout(n_words)
+    n_bits, cs_bits, ent_bytes = layout.n_bits, layout.cs, layout.n_bytes
+    bits = ((indices[:, :, np.newaxis] >> _INDEX_SHIFTS) & 1).astype(np.uint8)
+    packed = np.packbits(bits.reshape(n_rows, n_bits), axis=1)
+    data = np.ascontiguousarray(packed[:, :ent_bytes]).tostring()
+    digests = np.frombuffer(''.join([
+        hashlib.sha256(data[i:i + ent_bytes]).digest()[0]
+        for i in xrange(0, len(data), ent_bytes)]), dtype=np.uint8)
+    return (packed[:, ent_bytes] ^ digests) >> (8 - cs_bits) == 0
+
+def search(alternatives, batch_size=BATCH_SIZE, max_queue=MAX_QUEUE, stats=None):
+    """Yield (log probability, word indices) of valid mnemonics, best first
+
+    Args:
+        stats (dict): If given, 'candidates' counts the candidates checked,
+            besides the keys set by best_first
+    """
+    if stats is None:
+        stats = {}
+    stats['candidates'] = 0
+    candidates = best_first(alternatives, max_queue, stats)
+    while True:
+        batch = list(itertools.islice(candidates, batch_size))
+        if not batch:
+            return
+        stats['candidates'] += len(batch)
+        valid = batch_checksum_valid([indices for _, indices in batch])
+        for num in np.flatnonzero(valid):
+            yield batch[num]
+
+def _match_batch(job):
+    mnemonics, target, passphrase = job
+    for mnemonic in mnemonics:
+        if target.matches(bip39.mnemonic2seed(mnemonic, passphrase)):
+            return mnemonic
+    return None
+
+def find_match(survivors, target, passphrase='', processes=None,
+               batch_size=passphrase_recovery.CHUNK_CANDIDATES, report=None):
+    """First mnemonic of a stream of mnemonics that matches the target
+
+    Mnemonics are checked in batches on a process pool; the first match in
+    stream order wins.
+
+    Args:
+        processes (int): Worker processes. 0 checks on the calling process.
+            Default: number of CPUs
+    """
+    if report is None:
+        report = _print
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    survivors = iter(survivors)
+    def jobs():
+        while True:
+            batch = list(itertools.islice(survivors, batch_size))
+            if not batch:
+                return
+            yield batch, target, passphrase
+    if processes == 0:
+        for job in jobs():
+            match = _match_batch(job)
+            if match is not None:
+                return match
+        return None
+    pool = multiprocessing.Pool(processes)
+    try:
+        in_flight = collections.deque()
+        for job in jobs():
+            in_flight.append(pool.apply_async(_match_batch, (job,)))
+            if len(in_flight) >= processes * BATCHES_IN_FLIGHT_PER_PROCESS:
+                match = in_flight.popleft().get()
+                if match is not None:
+                    return match
+        while in_flight:
+            match = in_flight.popleft().get()
+            if match is not None:
+                return match
+    finally:
+        pool.terminate()
+        pool.join()
+    return None
+
+def _print(_str):
+    print _str
+
+def _main():
+    parser = argparse.ArgumentParser(
+        description='Recover a damaged mnemonic backup, most likely first')
+    parser.add_argument('--mnemonic',
+                        help='tokens as read (default: prompt without echo)')
+    parser.add_argument('--language', default='english',
+                        choices=wordlists.LANGUAGES)
+    parser.add_argument('--limit', type=int, default=20,
+                        help='valid mnemonics to print without a target')
+    targets = parser.add_mutually_exclusive_group()
+    targets.add_argument('--seed-prefix', metavar='HEX')
+    targets.add_argument('--xprv')
+    targets.add_argument('--xpub')
+    targets.add_argument('--address', help='P2PKH address')
+    parser.add_argument('--path', help="derivation path, e.g. m/44'/0'/0'/0/0")
+    parser.add_argument('--passphrase', default='')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes (default: #CPUs)')
+    parser.add_argument('--max-alternatives', type=int, default=MAX_ALTERNATIVES)
+    parser.add_argument('--max-queue', type=int, default=MAX_QUEUE)
+    args = parser.parse_args()
+
+    tokens = (args.mnemonic or getpass.getpass('Mnemonic: ')).split()
+    wordlist = wordlists.open_wordlist(args.language)
+    try:
+        alternatives = [position_alternatives(token, wordlist,
+                                              args.max_alternatives)
+                        for token in tokens]
+    except ValueError as err:
+        parser.error(str(err))
+    layout = bip39.get_layout(len(tokens))
+    if layout is None or not bip39.ENT_MIN <= layout.ent <= bip39.ENT_MAX:
+        parser.error('not a valid number of words: {0}'.format(len(tokens)))
+    search_space = 1
+    for alts in alternatives:
+        search_space *= len(alts)
+    print "Search space: {0} candidates".format(search_space)
+
+    target = None
+    try:
+        if args.seed_prefix:
+            target = passphrase_recovery.SeedPrefixTarget(args.seed_prefix)
+        elif args.address:
+            target = passphrase_recovery.AddressTarget(
+                args.address, args.path or passphrase_recovery.DEFAULT_ADDRESS_PATH)
+        elif args.xprv or args.xpub:
+            target = passphrase_recovery.ExtendedKeyTarget(
+                args.xprv or args.xpub, args.path or 'm')
+    except (ValueError, bip32.InvalidBase58Error) as err:
+        parser.error('invalid target: {0}'.format(err))
+
+    began = time.time()
+    stats = {}
+    survivors = search(alternatives, max_queue=args.max_queue, stats=stats)
+    mnemonics = (wordlist.join([wordlist[index] for index in indices])
+                 for _, indices in survivors)
+    if target is None:
+        for num, (log_prob, indices) in enumerate(survivors):
+            if num == args.limit:
+                break
+            print "{0:.3g}\t{1}".format(
+                math.exp(log_prob),
+                wordlist.join([wordlist[index] for index in indices]))
+        match = None
+    else:
+        match = find_match(mnemonics, target, args.passphrase, args.processes)
+    elapsed = time.time() - began
+    print "{0} candidates checked in {1:.1f}s ({2:.0f} candidates/s)".format(
+        stats['candidates'], elapsed, stats['candidates'] / max(elapsed, 1e-9))
+    if stats['dropped']:
+        print ("WARNING: dropped {0} queue entries; not exhaustive below "
+               "probability {1:.3g}").format(stats['dropped'],
+                                             math.exp(stats['dropped_best']))
+    if target is not None:
+        if match is None:
+            print "No candidate matched the target"
+            sys.exit(1)
+        print "Found: {0}".format(match)
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,361 @@
+"""Streaming min-entropy estimates of dice rolls and random bytes
+
+Pass/fail bias checks (entropy.entropy_test, check_dice_entropy.py) say
+whether a source looks uniform. These estimators, after NIST SP 800-90B
+section 6.3, say how many bits of min-entropy each symbol actually
+delivers, which decides how many rolls or bytes to ask for:
+
+mcv: most common value, with a 99% upper bound on its probability
+collision: mean time until a symbol repeats
+markov: probability of the most likely sequence of MARKOV_LENGTH symbols
+    under a first-order Markov model
+compression: Maurer's universal statistic, the mean log2 distance between
+    repeats of a symbol
+
+The collision, Markov and compression estimates are the non-binary forms of
+the 2016 draft of SP 800-90B; the final standard only defines them for bits,
+which --bits selects for random bytes.
+
+MinEntropyEstimator.update() takes the samples in chunks and keeps constant
+state per alphabet (symbol counts, transition counts, last positions and
+running sums), so samples of tens of millions of symbols can be streamed.
+
+Dice logs are the raw rolls, 1 to 6 (or to --sides), before the filtering
+in entropy.die_rolls_to_bitstring.
+
+$ python min_entropy.py dice rolls.txt
+$ python min_entropy.py urandom --bytes 10000000
+"""
+#Python Standard Library 2.7
+import sys
+import math
+import argparse
+
+#PyPI modules
+import numpy as np #pip install numpy
+
+#bip39_gym modules
+import bip39 #bip39.py
+import entropy #entropy.py
+
+#99% one-sided confidence
+Z_ALPHA = 2.576
+
+MARKOV_LENGTH = 128
+COMPRESSION_DICTIONARY = 1000
+COMPRESSION_MAX_TERMS = 2 ** 22
+SEARCH_ITERATIONS = 64 #bisection steps
+
+DIE_SIDES = 6
+CHUNK_SYMBOLS = 2 ** 20
+
+class EstimatorSampleError(ValueError):
+    """Too few samples for an estimate"""
+    pass
+
+def _bisect_probability(expected, target, alphabet_size):
+    """Find p in [1/k, 1) with expected(p) == target, expected decreasing
+
+    Returns 1/k if target is at least expected(1/k).
+    """
+    low = 1.0 / alphabet_size
+    if target >= expected(low):
+        return low
+    #closer to 1, the closed forms lose all precision to cancellation
+    high = 1.0 - 1e-4
+    if target <= expected(high):
+        return high
+    for _ in range(SEARCH_ITERATIONS):
+        middle = (low + high) / 2
+        if expected(middle) > target:
+            low = middle
+        else:
+            high = middle
+    return (low + high) / 2
+
+def _collision_expectation(p, alphabet_size):
+    """Expected collision time when one symbol has probability p"""
+    k = alphabet_size
+    q = (1 - p) / (k - 1)
+    z = 1 / q
+    #F(q) = Gamma(k + 1, z) z^(-k-1) e^z = sum_{j=0..k} k! / (j! z^(k+1-j))
+    term = 1 / z
+    total = term
+    for j in range(k, 0, -1):
+        term *= j / z
+        total += term
+    diff = (1 / p - 1 / q) / k
+    return p / (q * q) * (1 + diff) * total - p / q * diff
+
+def _compression_g(z, n_symbols):
+    """G(z) of the compression estimate, summed over t = d+1..n_symbols"""
+    d = COMPRESSION_DICTIONARY
+    n_terms = int(min(n_symbols, d + 1 + 40 / z, COMPRESSION_MAX_TERMS))
+    u = np.arange(1, n_terms + 1, dtype=np.float64)
+    log_u = np.log2(u)
+    powers = (1 - z) ** (u - 1)
+    #inner(t) = sum_{u<t} log2(u) z^2 (1-z)^(u-1) + log2(t) z (1-z)^(t-1)
+    partial = np.concatenate(([0.0], np.cumsum(log_u * z * z * powers)[:-1]))
+    inner = partial + log_u * z * powers
+    total = inner[d:].sum()
+    #beyond n_terms the inner sum has converged
+    total += (n_symbols - max(n_terms, d)) * (partial[-1] +
+                                              log_u[-1] * z * z * powers[-1])
+    return total / (n_symbols - d)
+
+class MinEntropyEstimator(object):
+    """Min-entropy estimates updated chunk by chunk in constant memory
+
+    Args:
+        alphabet_size (int): Symbols are ints in [0, alphabet_size)
+    """
+
+    def __init__(self, alphabet_size):
+        if alphabet_size < 2:
+            raise ValueError("Alphabet needs at least 2 symbols")
+        self.alphabet_size = alphabet_size
+        self.n_symbols = 0
+        self._counts = np.zeros(alphabet_size, dtype=np.int64)
+        self._transitions = np.zeros((alphabet_size, alphabet_size), dtype=np.int64)
+        self._previous = None
+        #collision: symbols since the last collision, and collision times
+        self._run = set()
+        self._collisions = 0
+        self._collision_sum = 0
+        self._collision_sumsq = 0
+        #compression: 1-based position each symbol was last seen at, 0 if never
+        self._last_seen = np.zeros(alphabet_size, dtype=np.int64)
+        self._log_distances = 0
+        self._log_sum = 0.0
+        self._log_sumsq = 0.0
+
+    def update(self, symbols):
+        """Add a chunk of samples
+
+        Raises: ValueError if a symbol is outside the alphabet
+        """
+        symbols = np.asarray(symbols, dtype=np.int64).ravel()
+        if len(symbols) == 0:
+            return
+        if symbols.min() < 0 or symbols.max() >= self.alphabet_size:
+            raise ValueError("Symbol outside alphabet of {0}".format(
+                self.alphabet_size))
+        k = self.alphabet_size
+        self._counts += np.bincount(symbols, minlength=k)
+
+        if self._previous is None:
+            previous = symbols[:-1]
+            following = symbols[1:]
+        else:
+            previous = np.concatenate(([self._previous], symbols[:-1]))
+            following = symbols
+        self._transitions += np.bincount(previous * k + following,
+                                         minlength=k * k).reshape(k, k)
+        self._previous = symbols[-1]
+
+        run = self._run
+        for symbol in symbols.tolist():
+            if symbol in run:
+                run_len = len(run) + 1
+                self._collisions += 1
+                self._collision_sum += run_len
+                self._collision_sumsq += run_len * run_len
+                run.clear()
+            else:
+                run.add(symbol)
+
+        self._update_compression(symbols)
+        self.n_symbols += len(symbols)
+
+    def _update_compression(self, symbols):
+        positions = self.n_symbols + 1 + np.arange(len(symbols), dtype=np.int64)
+        order = np.argsort(symbols, kind='mergesort')
+        sorted_symbols = symbols[order]
+        sorted_positions = positions[order]
+        first = np.ones(len(symbols), dtype=bool)
+        first[1:] = sorted_symbols[1:] != sorted_symbols[:-1]
+        previous = np.empty_like(sorted_positions)
+        previous[1:] = sorted_positions[:-1]
+        previous[first] = self._last_seen[sorted_symbols[first]]
+        distances = np.where(previous == 0, sorted_positions,
+                             sorted_positions - previous)
+        logs = np.log2(distances[sorted_positions > COMPRESSION_DICTIONARY])
+        self._log_distances += len(logs)
+        self._log_sum += logs.sum()
+        self._log_sumsq += (logs * logs).sum()
+        last = np.ones(len(symbols), dtype=bool)
+        last[:-1] = sorted_symbols[:-1] != sorted_symbols[1:]
+        self._last_seen[sorted_symbols[last]] = sorted_positions[last]
+
+    def _max_entropy(self):
+        return math.log(self.alphabet_size, 2)
+
+    def mcv(self):
+        """Most common value estimate in bits per symbol
+
+        Raises: EstimatorSampleError
+        """
+        n = self.n_symbols
+        if n < 2:
+            raise EstimatorSampleError("mcv needs 2 samples")
+        p_hat = self._counts.max() / float(n)
+        p_upper = min(1.0, p_hat + Z_ALPHA * math.sqrt(p_hat * (1 - p_hat) / (n - 1)))
+        return max(0.0, -math.log(p_upper, 2))
+
+    def collision(self):
+        """Collision estimate in bits per symbol
+
+        Raises: EstimatorSampleError
+        """
+        v = self._collisions
+        if v < 2:
+            raise EstimatorSampleError("collision needs 2 collisions")
+        mean = self._collision_sum / float(v)
+        variance = max(0.0, (self._collision_sumsq - v * mean * mean) / (v - 1))
+        lower = mean - Z_ALPHA * math.sqrt(variance) / math.sqrt(v)
+        p = _bisect_probability(
+            lambda p: _collision_expectation(p, self.alphabet_size), lower,
+            self.alphabet_size)
+        return min(-math.log(p, 2), self._max_entropy())
+
+    def markov(self):
+        """Markov estimate in bits per symbol
+
+        Raises: EstimatorSampleError
+        """
+        if self.n_symbols < 2:
+            raise EstimatorSampleError("markov needs 2 samples")
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_initial = np.log2(self._counts / float(self.n_symbols))
+            row_totals = self._transitions.sum(axis=1)[:, np.newaxis]
+            log_transitions = np.log2(self._transitions / row_totals.astype(np.float64))
+        log_transitions[np.isnan(log_transitions)] = -np.inf
+        #most likely sequence of MARKOV_LENGTH symbols, in log2 space
+        best = log_initial
+        for _ in range(MARKOV_LENGTH - 1):
+            best = (best[:, np.newaxis] + log_transitions).max(axis=0)
+        return max(0.0, min(-best.max() / MARKOV_LENGTH, self._max_entropy()))
+
+    def compression(self):
+        """Compression estimate in bits per symbol
+
+        Raises: EstimatorSampleError
+        """
+        v = self._log_distances
+        if v < 2:
+            raise EstimatorSampleError("compression needs {0} samples".format(
+                COMPRESSION_DICTIONARY + 2))
+        k = self.alphabet_size
+        bits = self._max_entropy()
+        mean = self._log_sum / v
+        variance = max(0.0, (self._log_sumsq - v * mean * mean) / (v - 1))
+        #Maurer's correction for the variance of the sum
+        c = 0.7 - 0.8 / bits + (4 + 32 / bits) * v ** (-3 / bits) / 15
+        lower = mean - Z_ALPHA * c * math.sqrt(variance) / math.sqrt(v)
+        n = self.n_symbols
+        p = _bisect_probability(
+            lambda p: _compression_g(p, n) + (k - 1) * _compression_g(
+                (1 - p) / (k - 1), n), lower, k)
+        return min(-math.log(p, 2), bits)
+
+    def estimates(self):
+        """All estimates in bits per symbol, and their minimum as 'min'
+
+        Estimates without enough samples are left out.
+        """
+        results = {}
+        for name in ('mcv', 'collision', 'markov', 'compression'):
+            try:
+                results[name] = getattr(self, name)()
+            except EstimatorSampleError:
+                pass
+        if results:
+            results['min'] = min(results.values())
+        return results
+
+def symbols_needed(bits, min_entropy):
+    """Number of symbols that deliver bits of min-entropy"""
+    if min_entropy <= 0:
+        return None
+    return int(math.ceil(bits / min_entropy))
+
+def iter_dice_log(path, chunk_symbols=CHUNK_SYMBOLS, sides=DIE_SIDES):
+    """Yield chunks of 0-based symbols from a log of raw rolls 1 to sides
+
+    Rolls are separated by whitespace, as typed into app.py or
+    physical_entropy.py.
+
+    Raises: ValueError for anything other than a roll
+    """
+    chunk = []
+    with open(path, 'r') as log:
+        for line in log:
+            for roll in line.split():
+                value = int(roll)
+                if value < 1 or value > sides:
+                    raise ValueError("Not a die roll: {0}".format(roll))
+                chunk.append(value - 1)
+            if len(chunk) >= chunk_symbols:
+                yield np.array(chunk, dtype=np.int64)
+                chunk = []
+    if chunk:
+        yield np.array(chunk, dtype=np.int64)
+
+def iter_entropy_symbols(n_bytes, as_bits=False, source=None,
+                         chunk_bytes=CHUNK_SYMBOLS):
+    """Yield chunks of bytes (or their bits) drawn with entropy.get_entropy"""
+    remaining = n_bytes
+    while remaining > 0:
+        size = min(chunk_bytes, remaining)
+        raw = bip39.decode_binary_string(entropy.get_entropy(size * 8, source))
+        symbols = np.frombuffer(raw, dtype=np.uint8)
+        yield np.unpackbits(symbols) if as_bits else symbols
+        remaining -= size
+
+def print_estimates(estimator, symbol_name):
+    """Print each estimate, and the symbols needed for BIP39 entropy sizes"""
+    results = estimator.estimates()
+    print "{0} samples, alphabet of {1}".format(estimator.n_symbols,
+                                                estimator.alphabet_size)
+    for name in ('mcv', 'collision', 'markov', 'compression', 'min'):
+        if name in results:
+            print "{0:<12}{1:>8.4f} bits per {2}".format(name, results[name],
+                                                          symbol_name)
+    if 'min' in results:
+        for bits in (bip39.ENT_MIN, bip39.ENT_MAX):
+            print "{0} bits of entropy need {1} {2}s".format(
+                bits, symbols_needed(bits, results['min']), symbol_name)
+
+def _main():
+    parser = argparse.ArgumentParser(
+        description='Estimate min-entropy of dice rolls or random bytes')
+    subparsers = parser.add_subparsers(dest='command')
+    dice = subparsers.add_parser('dice', help='raw dice roll logs')
+    dice.add_argument('logs', nargs='+')
+    dice.add_argument('--sides', type=int, default=DIE_SIDES,
+                      help='sides of the die (default: %(default)s)')
+    urandom = subparsers.add_parser('urandom', help='bytes from get_entropy')
+    urandom.add_argument('--bytes', type=int, default=1000000)
+    urandom.add_argument('--bits', action='store_true',
+                         help='estimate per bit instead of per byte')
+    entropy.add_source_args(urandom)
+    args = parser.parse_args()
+
+    if args.command == 'dice':
+        estimator = MinEntropyEstimator(args.sides)
+        for path in args.logs:
+            for chunk in iter_dice_log(path, sides=args.sides):
+                estimator.update(chunk)
+        print_estimates(estimator, 'roll')
+    else:
+        estimator = MinEntropyEstimator(2 if args.bits else 256)
+        for chunk in iter_entropy_symbols(args.bytes, args.bits,
+                                          entropy.source_from_args(args)):
+            estimator.update(chunk)
+        print_estimates(estimator, 'bit' if args.bits else 'byte')
+    if not estimator.estimates():
+        print "Not enough samples"
+        sys.exit(1)
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,257 @@
+"""Validate a mnemonic while it is typed, one keystroke or word at a time
+
+MnemonicEntry is a small state machine over the words entered so far and the
+word being typed:
+
+ENTERING: every word so far is in the wordlist and the word being typed is
+    the prefix of at least one word
+BAD_PREFIX: no word starts with what is being typed
+BAD_CHECKSUM: the words make up a mnemonic length (a multiple of 3) but the
+    checksum doesn't match
+VALID: the words make up a mnemonic with a valid checksum
+
+Nothing is ever recomputed from the whole sentence. Each keystroke narrows
+(or, on backspace, restores) the range of sorted words that start with the
+typed prefix, a bisection within the previous range. Each accepted word
+shifts its 11 bits into an integer holding the packed entropy and checksum,
+so the checksum verdict for the words so far costs one SHA-256 of at most 32
+bytes. When the number of words is known, completions of the last word are
+limited to the 2**(11 - CS) words that give a valid checksum.
+"""
+#Python Standard Library 2.7
+import bisect
+
+#bip39_gym modules
+import bip39 #bip39.py
+import wordlists #wordlists.py
+
+ENTERING = 'entering'
+BAD_PREFIX = 'bad_prefix'
+BAD_CHECKSUM = 'bad_checksum'
+VALID = 'valid'
+
+#BIP39: the first 4 letters identify a word unambiguously
+UNIQUE_PREFIX_LEN = 4
+
+ACCEPT_KEYS = ' \n\r\t'
+DELETE_KEYS = '\b\x7f'
+
+class TooManyWordsError(ValueError):
+    """A word was added past the expected number of words"""
+    pass
+
+_SORTED_WORDS = {}
+
+def _sorted_words(wordlist):
+    """(sorted words, word index of each) of a wordlist, cached"""
+    key = id(wordlist)
+    if key not in _SORTED_WORDS:
+        pairs = sorted((word, index) for index, word in enumerate(wordlist))
+        #keep the wordlist alive so that its id isn't reused
+        _SORTED_WORDS[key] = (wordlist, [word for word, _ in pairs],
+                              [index for _, index in pairs])
+    return _SORTED_WORDS[key][1:]
+
+class MnemonicEntry(object):
+    """Incremental validator of a mnemonic being typed
+
+    Args:
+        codec (bip39.Bip39Codec): Default: the default (English) codec
+        n_words (int): Expected number of words, if known. Completions of the
+            last word are then limited to those with a valid checksum, and no
+            word is accepted past it.
+    """
+
+    def __init__(self, codec=None, n_words=None):
+        if codec is None:
+            codec = bip39.get_default_codec(print_warning=False)
+        if n_words is not None and bip39.get_layout(n_words) is None:
+            raise ValueError("Not a mnemonic length: {0}".format(n_words))
+        self.codec = codec
+        self.n_words = n_words
+        self.indices = []
+        self._words, self._word_indices = _sorted_words(codec.wordlist)
+        #(typed prefix, range of sorted words starting with it) per keystroke
+        self._typed = [('', 0, len(self._words))]
+        self._bits = 0
+        self._last_words = None
+
+    @property
+    def prefix(self):
+        """The word being typed"""
+        return self._typed[-1][0]
+
+    @property
+    def words(self):
+        """Words accepted so far"""
+        return [self.codec.wordlist[index] for index in self.indices]
+
+    @property
+    def mnemonic(self):
+        """Words accepted so far as a sentence"""
+        return self.codec.separator.join(self.words)
+
+    @property
+    def complete(self):
+        """Whether the expected number of words has been entered"""
+        return self.n_words is not None and len(self.indices) == self.n_words
+
+    @property
+    def checksum_valid(self):
+        """Whether the words so far have a valid checksum, None if their
+        number isn't a multiple of 3"""
+        layout = bip39.get_layout(len(self.indices))
+        if layout is None:
+            return None
+        return layout.checksum(self._bits >> layout.cs) == \
+            self._bits & layout.cs_mask
+
+    @property
+    def binstring(self):
+        """Entropy of the words so far as binary string, without checksum
+
+        Raises: ValueError if the words aren't a mnemonic with a valid checksum
+        """
+        if not self.checksum_valid:
+            raise ValueError("Not a mnemonic with a valid checksum")
+        layout = bip39.get_layout(len(self.indices))
+        return layout.binstring(self._bits >> layout.cs)
+
+    @property
+    def state(self):
+        """ENTERING, BAD_PREFIX, BAD_CHECKSUM or VALID"""
+        _, low, high = self._typed[-1]
+        if low == high:
+            return BAD_PREFIX
+        if self.prefix:
+            return ENTERING
+        checksum_valid = self.checksum_valid
+        if checksum_valid is None or (self.n_words is not None and
+                                      not self.complete):
+            return ENTERING
+        return VALID if checksum_valid else BAD_CHECKSUM
+
+    def add_char(self, char):
+        """Extend the word being typed by one character
+
+        Returns: whether some word still starts with the typed prefix
+        """
+        prefix = self.prefix + char
+        if self.codec.normalize:
+            try:
+                prefix = wordlists.normalize(prefix)
+            except UnicodeDecodeError:
+                pass #part of a multi-byte character
+        typed, low, high = self._typed[-1]
+        if not prefix.startswith(typed):
+            #normalization rewrote an earlier character
+            low, high = 0, len(self._words)
+        low = bisect.bisect_left(self._words, prefix, low, high)
+        #0xff never occurs in UTF-8, so it sorts after every continuation
+        high = bisect.bisect_left(self._words, prefix + '\xff', low, high)
+        self._typed.append((prefix, low, high))
+        return low < high
+
+    def delete_char(self):
+        """Remove the last typed character, or the last word if there is none"""
+        if len(self._typed) > 1:
+            self._typed.pop()
+        elif self.indices:
+            word = self.remove_word()
+            for char in word.decode('utf-8'):
+                self.add_char(char.encode('utf-8'))
+            self._typed.pop()
+
+    def _match(self):
+        """Index of the word the typed prefix stands for, or None"""
+        _, low, high = self._typed[-1]
+        if low < high and self._words[low] == self.prefix:
+            return self._word_indices[low]
+        if high - low == 1 and len(self.prefix) >= UNIQUE_PREFIX_LEN:
+            return self._word_indices[low]
+        return None
+
+    def accept(self):
+        """Accept the typed prefix as a word: the word itself, or the only
+        word starting with at least UNIQUE_PREFIX_LEN typed letters
+
+        Raises: InvalidWordError, TooManyWordsError
+        """
+        index = self._match()
+        if index is None:
+            raise bip39.InvalidWordError(self.prefix)
+        self._push(index)
+        del self._typed[1:]
+        return self.codec.wordlist[index]
+
+    def add_word(self, word):
+        """Accept a whole word
+
+        Raises: InvalidWordError, TooManyWordsError
+        """
+        if self.prefix:
+            raise ValueError("A word is being typed")
+        self._push(self.codec.get_index_from_word(word))
+
+    def remove_word(self):
+        """Remove the last accepted word and return it"""
+        index = self.indices.pop()
+        self._bits >>= bip39.WORDLIST_PIECE_BITS
+        return self.codec.wordlist[index]
+
+    def _push(self, index):
+        if self.n_words is not None and len(self.indices) == self.n_words:
+            raise TooManyWordsError()
+        self.indices.append(index)
+        self._bits = (self._bits << bip39.WORDLIST_PIECE_BITS) | index
+
+    def type(self, keys):
+        """Feed keystrokes: letters, ACCEPT_KEYS to end a word, DELETE_KEYS
+        to delete
+
+        Raises: InvalidWordError, TooManyWordsError when ending a word
+        """
+        for key in keys:
+            if key in ACCEPT_KEYS:
+                if self.prefix:
+                    self.accept()
+            elif key in DELETE_KEYS:
+                self.delete_char()
+            else:
+                self.add_char(key)
+        return self.state
+
+    def _valid_last_indices(self):
+        """Word indices that complete the mnemonic with a valid checksum"""
+        if self._last_words is None or self._last_words[0] != self._bits:
+            layout = bip39.get_layout(self.n_words)
+            self._last_words = (self._bits,
+                                set(layout.last_indices(self._bits)))
+        return self._last_words[1]
+
+    def suggestions(self, word, limit=None):
+        """Completions of the longest prefix of word that some word starts
+        with, e.g. to suggest corrections of a word not in the wordlist"""
+        depth = len(self._typed)
+        for char in word:
+            if not self.add_char(char):
+                self._typed.pop()
+                break
+        suggestions = self.completions(limit)
+        del self._typed[depth:]
+        return suggestions
+
+    def completions(self, limit=None):
+        """Words starting with the typed prefix, in sorted order
+
+        At the last word of a mnemonic of known length, only the words that
+        give a valid checksum.
+        """
+        _, low, high = self._typed[-1]
+        if self.n_words is not None and len(self.indices) == self.n_words - 1:
+            valid = self._valid_last_indices()
+            words = [self._words[position] for position in xrange(low, high)
+                     if self._word_indices[position] in valid]
+        else:
+            words = self._words[low:high]
+        return words if limit is None else words[:limit]
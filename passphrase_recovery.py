@@ -0,0 +1,460 @@
+"""Recover a forgotten BIP39 passphrase (the "25th word")
+
+Given the mnemonic and something the right passphrase reproduces, candidate
+passphrases are checked until one matches. Targets:
+
+seed prefix: leading hex digits of the BIP39 seed
+xprv / xpub: the extended key at --path (default: the master key, m)
+address: the P2PKH address at --path (default: DEFAULT_ADDRESS_PATH)
+
+Candidates come from a dictionary file (one per line), guesses given on the
+command line, or a mask such as ?u?l?l?l?d?d (see MASK_CHARSETS). Each
+dictionary word or guess can be expanded to its leetspeak and case variants
+and to every string within an edit distance (insertion, deletion,
+substitution or transposition of adjacent characters).
+
+Every candidate costs a 2048 iteration PBKDF2-HMAC-SHA512, which dominates
+the cost of the target check, so candidates are checked in chunks on a
+process pool and throughput scales with the number of cores. Chunks are
+dispatched with a bounded number in flight, so generators of any size are
+consumed lazily.
+
+With --checkpoint, the number of candidates checked is saved periodically
+and a restarted run skips them. Neither the mnemonic nor the guesses or
+mask are written to the checkpoint; their SHA-256 tells runs apart, and a
+dictionary is told apart by its path and size.
+
+$ python passphrase_recovery.py --address 1LqBGSKuX5yYUonjxT5qGfpUsXKYYWeabA \
+    --dictionary words.txt --case --leet
+$ python passphrase_recovery.py --xpub xpub661My... --mask '?u?l?l?l?d?d'
+$ python passphrase_recovery.py --seed-prefix 5eb00bbd --guess hunter2 --edits 2
+"""
+#Python Standard Library 2.7
+import os
+import sys
+import json
+import time
+import string
+import getpass
+import hashlib
+import argparse
+import itertools
+import collections
+import multiprocessing
+
+#bip39_gym modules
+import bip32 #bip32.py
+import bip39 #bip39.py
+import checkpoint as checkpoint_mod #checkpoint.py
+import telemetry #telemetry.py
+import wordlists #wordlists.py
+
+#BIP 44: first receive address of the first Bitcoin account
+DEFAULT_ADDRESS_PATH = "m/44'/0'/0'/0/0"
+
+CHUNK_CANDIDATES = 64
+
+CHUNKS_IN_FLIGHT_PER_PROCESS = 4
+
+REPORT_INTERVAL = 10 #seconds
+
+MASK_CHARSETS = {
+    'l': string.ascii_lowercase,
+    'u': string.ascii_uppercase,
+    'd': string.digits,
+    's': ' ' + string.punctuation,
+}
+MASK_CHARSETS['a'] = ''.join(MASK_CHARSETS[name] for name in 'luds')
+
+#printable ASCII, the default alphabet of edit_variants
+EDIT_ALPHABET = MASK_CHARSETS['a']
+
+LEET_SUBSTITUTIONS = {
+    'a': '4@',
+    'b': '8',
+    'e': '3',
+    'g': '9',
+    'i': '1!',
+    'l': '1',
+    'o': '0',
+    's': '5$',
+    't': '7',
+}
+
+class SeedPrefixTarget(object):
+    """Matches seeds starting with the given hex digits"""
+
+    def __init__(self, prefix_hex):
+        int(prefix_hex, 16) #raises ValueError if not hex
+        self.prefix = prefix_hex.lower()
+        self.description = 'seed {0}'.format(self.prefix)
+
+    def matches(self, seed_hex):
+        """Whether a hex seed is the one looked for"""
+        return seed_hex.startswith(self.prefix)
+
+class ExtendedKeyTarget(object):
+    """Matches seeds that derive the given xprv or xpub at path
+
+    Raises: InvalidBase58Error, ValueError
+    """
+
+    def __init__(self, extended_key, path='m'):
+        bip32.base58check_decode(extended_key)
+        bip32.parse_path(path)
+        self.extended_key = extended_key
+        self.path = path
+        self.public = extended_key.startswith('xpub')
+        self.description = '{0} at {1}'.format(extended_key, path)
+
+    def matches(self, seed_hex):
+        """Whether a hex seed is the one looked for"""
+        derive = bip32.seed2xpub if self.public else bip32.seed2xprv
+        return derive(seed_hex, self.path) == self.extended_key
+
+class AddressTarget(object):
+    """Matches seeds that derive the given P2PKH address at path
+
+    Raises: InvalidBase58Error, ValueError
+    """
+
+    def __init__(self, address, path=DEFAULT_ADDRESS_PATH):
+        if bip32.base58check_decode(address)[0:1] != chr(bip32.P2PKH_VERSION):
+            raise ValueError("Not a P2PKH address: {0}".format(address))
+        bip32.parse_path(path)
+        self.address = address
+        self.path = path
+        self.description = 'address {0} at {1}'.format(address, path)
+
+    def matches(self, seed_hex):
+        """Whether a hex seed is the one looked for"""
+        return bip32.seed2address(seed_hex, self.path) == self.address
+
+def dictionary_candidates(path):
+    """Yield each line of a file, without its line ending"""
+    with open(path, 'r') as dictionary:
+        for line in dictionary:
+            yield line.rstrip('\r\n')
+
+def mask_positions(mask):
+    """Characters allowed at each position of a mask
+
+    ?l ?u ?d ?s ?a stand for one character of MASK_CHARSETS, ?? for a literal
+    question mark; other characters stand for themselves.
+
+    Raises: ValueError for an unknown ?x
+    """
+    positions = []
+    chars = iter(mask)
+    for char in chars:
+        if char == '?':
+            name = next(chars, '')
+            if name == '?':
+                positions.append('?')
+            elif name in MASK_CHARSETS:
+                positions.append(MASK_CHARSETS[name])
+            else:
+                raise ValueError("Unknown mask charset: ?{0}".format(name))
+        else:
+            positions.append(char)
+    return positions
+
+def mask_candidates(mask):
+    """Yield every string matching a mask (see mask_positions)
+
+    Raises: ValueError for an unknown ?x
+    """
+    for candidate in itertools.product(*mask_positions(mask)):
+        yield ''.join(candidate)
+
+def _unique(candidates):
+    seen = set()
+    for candidate in candidates:
+        if candidate not in seen:
+            seen.add(candidate)
+            yield candidate
+
+def case_variants(word):
+    """Yield every upper/lower case combination of a word, the word first"""
+    options = [(char, char.swapcase()) if char.isalpha() else (char,)
+               for char in word]
+    return _unique(''.join(chars) for chars in itertools.product(*options))
+
+def leet_variants(word):
+    """Yield every combination of LEET_SUBSTITUTIONS, the word first"""
+    options = [(char,) + tuple(LEET_SUBSTITUTIONS.get(char.lower(), ''))
+               for char in word]
+    return _unique(''.join(chars) for chars in itertools.product(*options))
+
+def _single_edits(word, alphabet):
+    for pos in range(len(word) + 1):
+        head, tail = word[:pos], word[pos:]
+        if tail:
+            yield head + tail[1:]
+            for char in alphabet:
+                yield head + char + tail[1:]
+        if len(tail) > 1:
+            yield head + tail[1] + tail[0] + tail[2:]
+        for char in alphabet:
+            yield head + char + tail
+
+def edit_variants(word, distance, alphabet=EDIT_ALPHABET):
+    """Yield every string within an edit distance of word, nearest first
+
+    Edits are insertions, deletions and substitutions of one character of
+    alphabet, and transpositions of adjacent characters.
+    """
+    seen = set([word])
+    frontier = [word]
+    yield word
+    for _ in range(distance):
+        next_frontier = []
+        for base in frontier:
+            for variant in _single_edits(base, alphabet):
+                if variant not in seen:
+                    seen.add(variant)
+                    next_frontier.append(variant)
+                    yield variant
+        frontier = next_frontier
+
+def expand(words, leet=False, case=False, edits=0, alphabet=EDIT_ALPHABET):
+    """Yield the variants of each word: leetspeak, then case, then edits
+
+    Variants of one word are yielded once each; the same variant of two
+    different words is not deduplicated.
+    """
+    for word in words:
+        variants = [word]
+        if leet:
+            variants = list(_unique(leet for variant in variants
+                                    for leet in leet_variants(variant)))
+        if case:
+            variants = list(_unique(cased for variant in variants
+                                    for cased in case_variants(variant)))
+        if edits:
+            variants = _unique(edited for variant in variants
+                               for edited in edit_variants(variant, edits,
+                                                           alphabet))
+        for variant in variants:
+            yield variant
+
+def check_chunk(job):
+    """First passphrase of a chunk that matches the target
+
+    Candidates that aren't valid UTF-8 (e.g. lines of a Latin-1 dictionary)
+    can't be BIP39 passphrases; they are skipped and counted.
+
+    Args:
+        job (tuple): (mnemonic, target, candidates)
+
+    Returns: (the passphrase or None, number of candidates skipped)
+    """
+    mnemonic, target, candidates = job
+    skipped = 0
+    for candidate in candidates:
+        try:
+            seed_hex = bip39.mnemonic2seed(mnemonic, candidate)
+        except UnicodeDecodeError:
+            skipped += 1
+            continue
+        if target.matches(seed_hex):
+            return candidate, skipped
+    return None, skipped
+
+def _chunks(candidates, chunk_size):
+    while True:
+        chunk = list(itertools.islice(candidates, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+def recover(mnemonic, target, candidates, processes=None,
+            chunk_size=CHUNK_CANDIDATES, checkpoint=None, report=None,
+            report_interval=REPORT_INTERVAL, metrics=None):
+    """Check candidate passphrases in order until one matches the target
+
+    Args:
+        mnemonic (str): Mnemonic sentence
+        target: SeedPrefixTarget, ExtendedKeyTarget or AddressTarget
+        candidates (iterable): Candidate passphrases, in the same order on
+            every run if a checkpoint is used
+        processes (int): Worker processes. 0 checks on the calling process.
+            Default: number of CPUs
+        checkpoint (checkpoint.Checkpoint): If given, the number of candidates
+            checked is saved to it periodically and a run resumes from it
+        report (function): Called with progress lines. Default: print
+        metrics (str): If given, a telemetry snapshot (rate, worker
+            utilization, memory) is kept in this file
+
+    Returns: the passphrase, or None if no candidate matched
+    """
+    if report is None:
+        report = _print
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    position = 0
+    state = checkpoint.load() if checkpoint is not None else None
+    if state is not None:
+        position = state['position']
+        report("Resuming after {0} candidates from {1}".format(
+            position, checkpoint.path))
+    chunks = _chunks(itertools.islice(iter(candidates), position, None),
+                     chunk_size)
+    began = time.time()
+    progress = telemetry.Progress(job='passphrase_recovery', unit='candidates',
+                                  interval=report_interval, report=report,
+                                  metrics=metrics, workers=max(processes, 1),
+                                  start=position)
+
+    skipped = [0]
+
+    def collect(n_candidates, outcome):
+        (found, n_skipped), busy = outcome
+        skipped[0] += n_skipped
+        progress.add(n_candidates)
+        progress.worker_busy(busy)
+        if checkpoint is not None and checkpoint.due():
+            checkpoint.save({'position': progress.done})
+        return found
+
+    found = None
+    if processes == 0:
+        for chunk in chunks:
+            found = collect(len(chunk), telemetry.timed_call(
+                (check_chunk, (mnemonic, target, chunk))))
+            if found is not None:
+                break
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            in_flight = collections.deque()
+            for chunk in chunks:
+                in_flight.append((len(chunk), pool.apply_async(
+                    telemetry.timed_call,
+                    ((check_chunk, (mnemonic, target, chunk)),))))
+                if len(in_flight) >= processes * CHUNKS_IN_FLIGHT_PER_PROCESS:
+                    n_candidates, result = in_flight.popleft()
+                    found = collect(n_candidates, result.get())
+                    if found is not None:
+                        break
+            while in_flight and found is None:
+                n_candidates, result = in_flight.popleft()
+                found = collect(n_candidates, result.get())
+        finally:
+            pool.terminate()
+            pool.join()
+    progress.finish(line=False)
+    elapsed = time.time() - began
+    report("{0} candidates checked in {1:.1f}s ({2:.1f} candidates/s)".format(
+        progress.done, elapsed,
+        (progress.done - position) / max(elapsed, 1e-9)))
+    if skipped[0]:
+        report("{0} candidates skipped as not valid UTF-8".format(skipped[0]))
+    if checkpoint is not None:
+        checkpoint.remove()
+    return found
+
+def recovery_checkpoint(path, mnemonic, target, generator_args,
+                        interval=checkpoint_mod.CHECKPOINT_INTERVAL):
+    """Checkpoint of a recovery run, None if path is None
+
+    Neither the mnemonic nor the candidate arguments (guesses and masks are
+    close to the passphrase) are written to it, only their SHA-256.
+
+    Args:
+        generator_args (dict): Whatever defines the candidate sequence,
+            JSON-serializable
+    """
+    if path is None:
+        return None
+    return checkpoint_mod.Checkpoint(
+        path, 'passphrase_recovery',
+        {'mnemonic_sha256': hashlib.sha256(
+            wordlists.normalize(mnemonic)).hexdigest(),
+         'target': target.description,
+         'candidates_sha256': hashlib.sha256(
+             json.dumps(generator_args, sort_keys=True)).hexdigest()},
+        interval)
+
+def _print(_str):
+    print _str
+
+def _main():
+    parser = argparse.ArgumentParser(
+        description='Recover a BIP39 passphrase from a known seed, key or address')
+    parser.add_argument('--mnemonic',
+                        help='mnemonic sentence (default: prompt without echo)')
+    targets = parser.add_mutually_exclusive_group(required=True)
+    targets.add_argument('--seed-prefix', metavar='HEX')
+    targets.add_argument('--xprv')
+    targets.add_argument('--xpub')
+    targets.add_argument('--address', help='P2PKH address')
+    parser.add_argument('--path', help="derivation path, e.g. m/44'/0'/0'/0/0")
+    sources = parser.add_mutually_exclusive_group(required=True)
+    sources.add_argument('--dictionary', metavar='FILE')
+    sources.add_argument('--guess', action='append',
+                         help='a passphrase close to the real one (repeatable)')
+    sources.add_argument('--mask', help='e.g. ?u?l?l?l?d?d')
+    parser.add_argument('--leet', action='store_true')
+    parser.add_argument('--case', action='store_true')
+    parser.add_argument('--edits', type=int, default=0, metavar='N',
+                        help='also try everything within N edits')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes (default: #CPUs)')
+    parser.add_argument('--chunk', type=int, default=CHUNK_CANDIDATES,
+                        help='candidates per job')
+    checkpoint_mod.add_checkpoint_args(parser)
+    telemetry.add_telemetry_args(parser, REPORT_INTERVAL)
+    args = parser.parse_args()
+
+    mnemonic = args.mnemonic or getpass.getpass('Mnemonic: ')
+    mnemonic = ' '.join(mnemonic.split())
+    try:
+        if not bip39.Mnemonic.from_mnemonic(mnemonic).valid:
+            print "WARNING: the mnemonic has an unknown word or a bad checksum"
+    except ValueError:
+        parser.error('empty mnemonic')
+
+    try:
+        if args.seed_prefix:
+            target = SeedPrefixTarget(args.seed_prefix)
+        elif args.address:
+            target = AddressTarget(args.address, args.path or DEFAULT_ADDRESS_PATH)
+        else:
+            target = ExtendedKeyTarget(args.xprv or args.xpub, args.path or 'm')
+    except (ValueError, bip32.InvalidBase58Error) as err:
+        parser.error('invalid target: {0}'.format(err))
+
+    if args.mask and (args.leet or args.case or args.edits):
+        parser.error('--leet, --case and --edits only expand --dictionary '
+                     'and --guess candidates, not --mask')
+    if args.mask:
+        candidates = mask_candidates(args.mask)
+    else:
+        words = args.guess or dictionary_candidates(args.dictionary)
+        candidates = expand(words, args.leet, args.case, args.edits)
+    generator_args = dict((name, getattr(args, name)) for name in (
+        'guess', 'mask', 'leet', 'case', 'edits'))
+    if args.dictionary:
+        #another file, or the same one edited, gives other candidates
+        try:
+            generator_args['dictionary'] = '{0}:{1}'.format(
+                os.path.abspath(args.dictionary),
+                os.path.getsize(args.dictionary))
+        except OSError as err:
+            parser.error(str(err))
+    checkpoint = recovery_checkpoint(args.checkpoint, mnemonic, target,
+                                     generator_args, args.checkpoint_interval)
+
+    print "Target: {0}".format(target.description)
+    passphrase = recover(mnemonic, target, candidates, args.processes,
+                         args.chunk, checkpoint,
+                         report_interval=args.report_interval,
+                         metrics=args.metrics)
+    if passphrase is None:
+        print "No candidate matched"
+        sys.exit(1)
+    print "Found passphrase: {0!r}".format(passphrase)
+
+if __name__ == '__main__':
+    _main()
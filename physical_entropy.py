@@ -0,0 +1,403 @@
+"""Unbiased bits from dice of any size, coin flips and shuffled cards
+
+entropy.die_rolls_to_bitstring only takes d6 rolls and throws away every 4
+and 5, which keeps 2 of the 2.58 bits of a roll at best and 1.33 on average.
+Here every physical action is read as a digit of a mixed-radix number
+instead:
+
+coin: H or T, radix 2
+d4, d6, d8, d10, d12, d20: the face value, radix the number of sides. As
+    with entropy.die_rolls_to_bitstring, the highest face counts as 0; the 0
+    face of a d10 is 0 too
+cards: cards of a shuffled deck as dealt, e.g. AS 10H QD 2C (T for 10). A
+    deck is ranked by its Lehmer code: the i-th card dealt (from 0) is the
+    digit of radix 52 - i giving the number of cards still in the deck that
+    sort before it, so a whole shuffle is a uniform number below 52!
+    (225.58 bits). Cards after the 52nd start a new deck.
+
+###############
+# Extraction #
+###############
+
+Extractor keeps the digits so far as a number `value` that is uniform below
+`bound`, the product of their radices. Once bound reaches 2**n_bits, the
+largest multiple of 2**n_bits below bound, `accepted`, decides:
+
+value < accepted: the low n_bits of value are uniform, and are the result
+otherwise: value - accepted is uniform below bound - accepted, so the
+    rejected digits are kept as a smaller bound and more digits are asked for
+
+A rejection happens with probability below 2**n_bits / bound. It costs the
+bits by which bound exceeded 2**n_bits, never the whole input, so the
+number of actions is close to n_bits / log2(radix). For 256 bits that is
+at least 60 d20 rolls, 100 d6 rolls or a shuffle and 6 more cards (0.14
+rejections on average for d6), where die_rolls_to_bitstring needs 192 d6
+rolls on average.
+
+Exact uniformity can be checked exhaustively with output_counts, over every
+sequence of a few digits, and statistically with entropy.entropy_test on
+simulate_bits:
+
+$ python physical_entropy.py collect d20 --bits 256
+$ python physical_entropy.py check
+"""
+#Python Standard Library 2.7
+import math
+import random
+import argparse
+import functools
+import itertools
+import collections
+
+#bip39_gym modules
+import bip39 #bip39.py
+import check_dice_entropy #check_dice_entropy.py
+import entropy #entropy.py
+import entropy_sources #entropy_sources.py
+
+#kind: (radix, action, what it is done with)
+KINDS = collections.OrderedDict([
+    ('coin', (2, 'flip', 'a coin')),
+    ('d4', (4, 'roll', 'a d4')),
+    ('d6', (6, 'roll', 'a d6')),
+    ('d8', (8, 'roll', 'a d8')),
+    ('d10', (10, 'roll', 'a d10')),
+    ('d12', (12, 'roll', 'a d12')),
+    ('d20', (20, 'roll', 'a d20')),
+    ('cards', (52, 'card', 'a shuffled deck'))])
+
+COIN_SIDES = 'TH' #T is 0, H is 1
+
+CARD_RANKS = 'A23456789TJQK'
+CARD_SUITS = 'CDHS'
+DECK = [rank + suit for suit in CARD_SUITS for rank in CARD_RANKS]
+
+#exhaustive checks: longest bit string, most sequences of digits per case and
+#size of the deck, which keeps shuffles few enough to enumerate
+CHECK_MAX_BITS = 8
+CHECK_MAX_SEQUENCES = 50000
+CHECK_DECK_SIZE = 6
+
+def parse_card(token):
+    """Card of a token such as 'AS', '10h' or 'td'
+
+    Raises: ValueError
+    """
+    card = token.upper().replace('10', 'T')
+    if card not in DECK:
+        raise ValueError("Not a card: {0}".format(token))
+    return card
+
+def radices(kind, deck_size=len(DECK)):
+    """Radix of each successive flip, roll or card, endlessly
+
+    Args:
+        deck_size (int): Cards only: size of the deck
+    """
+    if kind == 'cards':
+        return itertools.cycle(range(deck_size, 0, -1))
+    return itertools.repeat(KINDS[kind][0])
+
+class Reader(object):
+    """Reads the tokens of one kind of input (see KINDS) as (digit, radix)"""
+    __slots__ = ('kind', 'radix', '_remaining')
+
+    def __init__(self, kind):
+        if kind not in KINDS:
+            raise ValueError("Unknown kind of input: {0}".format(kind))
+        self.kind = kind
+        self.radix = KINDS[kind][0]
+        self._remaining = list(DECK)
+
+    def digit(self, token):
+        """(digit, radix) of a token
+
+        Raises: ValueError for a token that isn't one of this kind, or a card
+            already dealt from the current deck
+        """
+        if self.kind == 'coin':
+            side = COIN_SIDES.find(token.upper())
+            if len(token) != 1 or side < 0:
+                raise ValueError("Not H or T: {0}".format(token))
+            return side, self.radix
+        if self.kind == 'cards':
+            card = parse_card(token)
+            if card not in self._remaining:
+                raise ValueError("Already dealt: {0}".format(token))
+            digit = self._remaining.index(card)
+            radix = len(self._remaining)
+            self._remaining.pop(digit)
+            if not self._remaining:
+                self._remaining = list(DECK)
+            return digit, radix
+        try:
+            value = int(token)
+        except ValueError:
+            raise ValueError("Not a number: {0}".format(token))
+        if value < 0 or value > self.radix or (value == 0 and self.radix != 10):
+            raise ValueError("Not a {0} face: {1}".format(self.kind, token))
+        return value % self.radix, self.radix
+
+def lehmer_code(cards):
+    """(digit, radix) pairs of cards dealt from a shuffled deck
+
+    Raises: ValueError for unknown or repeated cards
+    """
+    reader = Reader('cards')
+    return [reader.digit(card) for card in cards]
+
+def rank_cards(cards):
+    """Rank of a deal among all deals of as many cards, 0 to 52! - 1 for a
+    whole deck
+
+    Raises: ValueError for unknown or repeated cards
+    """
+    rank = 0
+    for digit, radix in lehmer_code(cards):
+        rank = rank * radix + digit
+    return rank
+
+def bits_per_action(kind):
+    """Entropy of one flip, roll or card, in bits"""
+    return math.log(KINDS[kind][0], 2)
+
+def bits_per_shuffle(n_cards=len(DECK)):
+    """Entropy of a whole shuffle, log2(n_cards!), in bits"""
+    return sum(math.log(radix, 2) for radix in range(2, n_cards + 1))
+
+def min_actions(kind, n_bits):
+    """Fewest flips, rolls or cards that can give n_bits"""
+    bound = 1
+    actions = 0
+    for radix in radices(kind):
+        if bound >> n_bits:
+            return actions
+        bound *= radix
+        actions += 1
+
+class Extractor(object):
+    """Unbiased bit string of n_bits from digits of any radices
+
+    See the module doc. bitstring is None until enough digits were added.
+    """
+    __slots__ = ('n_bits', 'value', 'bound', 'digits', 'input_bits',
+                 'rejections', 'bitstring')
+
+    def __init__(self, n_bits):
+        entropy._assert_positive_int(n_bits)
+        self.n_bits = n_bits
+        self.value = 0
+        self.bound = 1
+        self.digits = 0
+        self.input_bits = 0.0
+        self.rejections = 0
+        self.bitstring = None
+
+    def add(self, digit, radix):
+        """Add a digit uniform in [0, radix)
+
+        Returns: Whether the bit string is complete
+
+        Raises: ValueError
+        """
+        if not 0 <= digit < radix:
+            raise ValueError("Digit {0} outside radix {1}".format(digit, radix))
+        if self.bitstring is not None:
+            return True
+        self.value = self.value * radix + digit
+        self.bound *= radix
+        self.digits += 1
+        self.input_bits += math.log(radix, 2)
+        if self.bound >> self.n_bits:
+            accepted = (self.bound >> self.n_bits) << self.n_bits
+            if self.value < accepted:
+                self.bitstring = bip39.dec2bin(
+                    self.value & ((1 << self.n_bits) - 1), self.n_bits)
+                return True
+            self.rejections += 1
+            self.value -= accepted
+            self.bound -= accepted
+        return False
+
+    @property
+    def efficiency(self):
+        """Share of the input entropy that ended up in the bit string"""
+        if self.bitstring is None or not self.input_bits:
+            return 0.0
+        return self.n_bits / self.input_bits
+
+def digits_to_bitstring(digits, n_bits):
+    """Bit string of (digit, radix) pairs
+
+    Raises: InsufficientEntropyError if they don't make up n_bits, ValueError
+    """
+    extractor = Extractor(n_bits)
+    for digit, radix in digits:
+        if extractor.add(digit, radix):
+            return extractor.bitstring
+    raise entropy.InsufficientEntropyError()
+
+def tokens_to_bitstring(kind, tokens, n_bits):
+    """Bit string of flips, rolls or cards as typed, e.g. ['17', '3', '20']
+
+    Raises: InsufficientEntropyError, ValueError
+    """
+    reader = Reader(kind)
+    return digits_to_bitstring([reader.digit(token) for token in tokens],
+                               n_bits)
+
+def collect(kind, n_bits, read=raw_input, report=None):
+    """Ask for flips, rolls or cards until they give n_bits
+
+    Tokens that can't be read are reported and skipped; tokens after the
+    last one needed are ignored.
+
+    Args:
+        read (function): Called with a prompt, returns a line of tokens
+        report (function): Called with each message. Default: print
+
+    Returns: The Extractor, with its bitstring
+    """
+    if report is None:
+        report = entropy._print
+    _, action, what = KINDS[kind]
+    reader = Reader(kind)
+    extractor = Extractor(n_bits)
+    report(("{0} bits need at least {1} {2}s of {3} ({4:.2f} bits per "
+            "{2}{5}); enter them separated by spaces").format(
+                n_bits, min_actions(kind, n_bits), action, what,
+                bits_per_action(kind), ', {0:.2f} per shuffle'.format(
+                    bits_per_shuffle()) if kind == 'cards' else ''))
+    while extractor.bitstring is None:
+        line = read('{0} {1}s so far: '.format(extractor.digits, action))
+        for token in line.split():
+            try:
+                digit, radix = reader.digit(token)
+            except ValueError as err:
+                report("Skipped: {0}".format(err))
+                continue
+            if extractor.add(digit, radix):
+                break
+    report(("{0} bits from {1} {2}s: {3:.2f} bits per {2}, {4:.0%} of "
+            "their entropy").format(n_bits, extractor.digits, action,
+                                    n_bits / float(extractor.digits),
+                                    extractor.efficiency))
+    return extractor
+
+def simulate_bits(kind, n_bits, source=None):
+    """Bit string of simulated flips, rolls or shuffles, for entropy_test
+
+    Args:
+        source (entropy_sources.EntropySource): Where the simulated actions
+            come from. Default: random.SystemRandom
+    """
+    if source is None:
+        rand = random.SystemRandom()
+    else:
+        rand = entropy_sources.SourceRandom(source)
+    reader = Reader(kind)
+    extractor = Extractor(n_bits)
+    while True:
+        if kind == 'cards':
+            tokens = list(DECK)
+            rand.shuffle(tokens)
+        elif kind == 'coin':
+            tokens = [rand.choice(COIN_SIDES)]
+        else:
+            tokens = [str(rand.randint(1, reader.radix))]
+        for token in tokens:
+            if extractor.add(*reader.digit(token)):
+                return extractor.bitstring
+
+def output_counts(radices, n_bits):
+    """How often each bit string comes out of every sequence of digits
+
+    Args:
+        radices (List[int]): Radix of each digit
+
+    Returns: (dict of bit string: number of sequences giving it, number of
+        sequences too short for n_bits)
+    """
+    counts = collections.defaultdict(int)
+    incomplete = 0
+    for digits in itertools.product(*[range(radix) for radix in radices]):
+        try:
+            counts[digits_to_bitstring(zip(digits, radices), n_bits)] += 1
+        except entropy.InsufficientEntropyError:
+            incomplete += 1
+    return dict(counts), incomplete
+
+def uniformity_failures(kind, n_bits, n_digits, deck_size=len(DECK)):
+    """Failure messages of the exhaustive check of one case, empty if every
+    bit string and every bit position is equally likely"""
+    counts, _ = output_counts(
+        list(itertools.islice(radices(kind, deck_size), n_digits)), n_bits)
+    if not counts:
+        return []
+    failures = []
+    if len(counts) != 1 << n_bits or len(set(counts.values())) != 1:
+        failures.append(("Failure for {0} bits of {1} {2}s: Bit strings not "
+                         "uniform").format(n_bits, n_digits, kind))
+    results_0 = [0] * n_bits
+    results_1 = [0] * n_bits
+    for bitstring, count in counts.items():
+        for index, bit in enumerate(bitstring):
+            if bit == '0':
+                results_0[index] += count
+            else:
+                results_1[index] += count
+    failures.extend(check_dice_entropy.uniformity_failures(
+        n_bits, n_digits, results_0, results_1))
+    return failures
+
+def _check(source=None, iterations=None):
+    """Exhaustive and statistical checks of every kind of input"""
+    passed = True
+    for kind in KINDS:
+        failures = []
+        n_sequences = 1
+        for n_digits, radix in enumerate(radices(kind, CHECK_DECK_SIZE), 1):
+            n_sequences *= radix
+            if n_sequences > CHECK_MAX_SEQUENCES:
+                break
+            for n_bits in range(1, CHECK_MAX_BITS + 1):
+                failures.extend(uniformity_failures(kind, n_bits, n_digits,
+                                                    CHECK_DECK_SIZE))
+        print "{0}: exhaustive check {1}".format(
+            kind, 'failed:' if failures else 'passed')
+        for failure in failures:
+            print failure
+        print "{0}: checking 256 bits for per-index bias".format(kind)
+        passed = entropy.entropy_test(
+            256, functools.partial(simulate_bits, kind), source=source,
+            iterations=iterations) and not failures and passed
+    return passed
+
+def _main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command')
+    collect_parser = subparsers.add_parser(
+        'collect', help='read flips, rolls or cards into a bit string')
+    collect_parser.add_argument('kind', choices=list(KINDS))
+    collect_parser.add_argument('--bits', type=int, default=bip39.ENT_MAX)
+    check_parser = subparsers.add_parser(
+        'check', help='check every kind of input for bias')
+    check_parser.add_argument('--iterations', type=int,
+                              default=entropy.TEST_ITERATIONS)
+    entropy.add_source_args(check_parser)
+    args = parser.parse_args()
+
+    if args.command == 'collect':
+        extractor = collect(args.kind, args.bits)
+        print "Bit string: {0}".format(extractor.bitstring)
+        if bip39.ENT_MIN <= args.bits <= bip39.ENT_MAX and \
+                args.bits % bip39.ENT_MOD == 0:
+            print "Mnemonic: {0}".format(
+                bip39.Mnemonic.from_binstring(extractor.bitstring).mnemonic)
+    else:
+        entropy.ENABLE_DEBUG_PRINT = False
+        if not _check(entropy.source_from_args(args), args.iterations):
+            parser.exit(1)
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,425 @@
+"""Local RPC service for BIP39 operations with request micro-batching
+
+Keeps the wordlist resident so that tools on the same host don't have to
+spawn `python app.py` for every operation. The server only ever binds to a
+Unix socket or to localhost.
+
+#############
+# Protocol #
+#############
+
+Newline-delimited JSON. Each request is one line:
+
+    {"id": 1, "method": "encode", "params": {"entropy_hex": "00ff..."}}
+
+and each response is one line with the same id and either a "result" or an
+"error" member:
+
+    {"id": 1, "result": {"mnemonic": "abandon ..."}}
+    {"id": 1, "error": {"type": "FailedCheckSumError", "message": ""}}
+
+Methods:
+    encode (entropy_hex) -> mnemonic
+    decode (mnemonic) -> entropy_hex, entropy_binary; fails on bad checksum
+    validate (mnemonic) -> valid, reason
+    complete (partial_mnemonic) -> candidates for the final word
+    seed (mnemonic, passphrase) -> seed_hex
+
+############
+# Batching #
+############
+
+Connection threads only parse and enqueue requests. A single batcher thread
+drains the queue for up to BATCH_WINDOW seconds (or BATCH_MAX requests),
+groups them by method and runs each group through the bulk codec functions in
+bip39.py. PBKDF2 seed derivation is handed to a process pool so that it never
+holds up the batcher or the GIL-bound connection threads.
+"""
+#Python Standard Library 2.7
+import os
+import sys
+import json
+import time
+import socket
+import argparse
+import threading
+import traceback
+import multiprocessing
+import Queue
+import SocketServer
+
+#bip39_gym modules
+import bip39 #bip39.py
+
+BATCH_WINDOW = 0.002 #seconds
+BATCH_MAX = 256
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 3939
+
+METHODS = set(['encode', 'decode', 'validate', 'complete', 'seed'])
+
+class UnknownMethodError(Exception):
+    """The requested RPC method is not served"""
+    pass
+
+class RemoteError(Exception):
+    """The server answered a request with an error"""
+    pass
+
+class _PendingRequest(object):
+    """A parsed request waiting for the batcher to fill in its outcome"""
+    __slots__ = ('method', 'params', 'result', 'error', 'done')
+
+    def __init__(self, method, params):
+        self.method = method
+        self.params = params
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+    def resolve(self, result):
+        """Complete the request with a result"""
+        self.result = result
+        self.done.set()
+
+    def reject(self, error):
+        """Complete the request with an exception"""
+        self.error = error
+        self.done.set()
+
+def _seed_worker(args):
+    """Process pool worker: derive seed, never raise across the pool"""
+    mnemonic, passphrase = args
+    try:
+        return (True, bip39.mnemonic2seed(mnemonic, passphrase))
+    except Exception as err: #pylint: disable=broad-except
+        return (False, "{0}: {1}".format(type(err).__name__, err))
+
+class RequestBatcher(object):
+    """Drains pending requests in micro-batches and dispatches them"""
+
+    def __init__(self, codec, seed_pool, batch_window=BATCH_WINDOW,
+                 batch_max=BATCH_MAX):
+        self.codec = codec
+        self.seed_pool = seed_pool
+        self.batch_window = batch_window
+        self.batch_max = batch_max
+        self._queue = Queue.Queue()
+        self._thread = threading.Thread(target=self._run,
+                                        name='bip39-batcher')
+        self._thread.daemon = True
+        self._stopped = False
+
+    def start(self):
+        """Start the batcher thread"""
+        self._thread.start()
+
+    def stop(self):
+        """Ask the batcher thread to exit after the current batch"""
+        self._stopped = True
+        self._queue.put(None)
+        self._thread.join()
+
+    def submit(self, method, params):
+        """Enqueue a request and return its _PendingRequest"""
+        pending = _PendingRequest(method, params)
+        self._queue.put(pending)
+        return pending
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.time() + self.batch_window
+        while len(batch) < self.batch_max:
+            remaining = deadline - time.time()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except Queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not self._stopped:
+            batch = [item for item in self._next_batch() if item is not None]
+            groups = {}
+            for pending in batch:
+                groups.setdefault(pending.method, []).append(pending)
+            for method, group in groups.iteritems():
+                try:
+                    getattr(self, '_batch_' + method)(group)
+                except Exception as err: #pylint: disable=broad-except
+                    for pending in group:
+                        if not pending.done.is_set():
+                            pending.reject(err)
+
+    def _batch_encode(self, group):
+        group, entropy_bins = self._parse_each(group, _entropy_param)
+        if not group:
+            return
+        try:
+            mnemonics = self.codec.binstrings2mnemonics(entropy_bins)
+        except Exception: #pylint: disable=broad-except
+            self._one_by_one(group, self._encode_one)
+            return
+        for pending, mnemonic in zip(group, mnemonics):
+            pending.resolve({'mnemonic': mnemonic})
+
+    def _encode_one(self, params):
+        entropy_bin = _entropy_param(params)
+        return {'mnemonic': self.codec.binstring2mnemonic(entropy_bin)}
+
+    def _batch_decode(self, group):
+        group, mnemonics = self._parse_each(group, _mnemonic_param)
+        if not group:
+            return
+        try:
+            binstrings = self.codec.mnemonics2binstrings(mnemonics)
+        except Exception: #pylint: disable=broad-except
+            #at least one bad mnemonic: isolate it from the rest of the batch
+            self._one_by_one(group, self._decode_one)
+            return
+        for pending, binstring in zip(group, binstrings):
+            pending.resolve(_decoded(binstring))
+
+    def _decode_one(self, params):
+        return _decoded(self.codec.mnemonic2binstring(_mnemonic_param(params)))
+
+    def _batch_validate(self, group):
+        group, mnemonics = self._parse_each(group, _mnemonic_param)
+        if not group:
+            return
+        try:
+            self.codec.mnemonics2binstrings(mnemonics)
+        except Exception: #pylint: disable=broad-except
+            #at least one invalid mnemonic: find out which on their own
+            self._one_by_one(group, self._validate_one)
+            return
+        for pending in group:
+            pending.resolve({'valid': True, 'reason': None})
+
+    def _validate_one(self, params):
+        try:
+            self.codec.mnemonic2binstring(_mnemonic_param(params))
+        except (ValueError, bip39.InvalidWordError,
+                bip39.FailedCheckSumError) as err:
+            return {'valid': False, 'reason': type(err).__name__}
+        return {'valid': True, 'reason': None}
+
+    def _batch_complete(self, group):
+        def complete_one(params):
+            partial = str(params['partial_mnemonic'])
+            return {'candidates': self.codec.get_last_word_candidates(partial)}
+        self._one_by_one(group, complete_one)
+
+    def _batch_seed(self, group):
+        group, jobs = self._parse_each(group, lambda params: (
+            _mnemonic_param(params), params.get('passphrase', u'')))
+        if not group:
+            return
+
+        def on_seeds(outcomes):
+            for pending, (success, value) in zip(group, outcomes):
+                if success:
+                    pending.resolve({'seed_hex': value})
+                else:
+                    pending.reject(ValueError(value))
+
+        if self.seed_pool is None:
+            on_seeds([_seed_worker(job) for job in jobs])
+        else:
+            self.seed_pool.map_async(_seed_worker, jobs, callback=on_seeds)
+
+    @staticmethod
+    def _parse_each(group, parse):
+        """(requests whose params parse, their parsed params); the others
+        are rejected on their own, so they don't fail the rest of the batch"""
+        parsed_group = []
+        values = []
+        for pending in group:
+            try:
+                values.append(parse(pending.params))
+            except Exception as err: #pylint: disable=broad-except
+                pending.reject(err)
+                continue
+            parsed_group.append(pending)
+        return parsed_group, values
+
+    @staticmethod
+    def _one_by_one(group, func):
+        for pending in group:
+            try:
+                pending.resolve(func(pending.params))
+            except Exception as err: #pylint: disable=broad-except
+                pending.reject(err)
+
+def _entropy_param(params):
+    return bip39.hex2bin(str(params['entropy_hex']))
+
+def _mnemonic_param(params):
+    mnemonic = params['mnemonic']
+    if not isinstance(mnemonic, basestring):
+        raise ValueError("mnemonic must be a string, not {0}".format(
+            type(mnemonic).__name__))
+    return mnemonic.encode('utf-8') if isinstance(mnemonic, unicode) \
+        else mnemonic
+
+def _decoded(binstring):
+    return {'entropy_hex': bip39.bin2hex(binstring),
+            'entropy_binary': binstring}
+
+class _RequestHandler(SocketServer.StreamRequestHandler):
+    """Reads newline-delimited JSON requests from one connection"""
+
+    def handle(self):
+        batcher = self.server.batcher
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                break
+            response = _handle_line(batcher, line)
+            self.wfile.write(json.dumps(response) + '\n')
+            self.wfile.flush()
+
+def _handle_line(batcher, line):
+    request_id = None
+    try:
+        request = json.loads(line)
+        request_id = request.get('id')
+        method = request.get('method')
+        if method not in METHODS:
+            raise UnknownMethodError(method)
+        pending = batcher.submit(method, request.get('params') or {})
+        pending.done.wait()
+        if pending.error is not None:
+            raise pending.error
+        return {'id': request_id, 'result': pending.result}
+    except Exception as err: #pylint: disable=broad-except
+        return {'id': request_id,
+                'error': {'type': type(err).__name__, 'message': str(err)}}
+
+class _ThreadingUnixServer(SocketServer.ThreadingMixIn,
+                           SocketServer.UnixStreamServer):
+    daemon_threads = True
+
+class _ThreadingTCPServer(SocketServer.ThreadingMixIn, SocketServer.TCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+class Bip39Server(object):
+    """Serve bip39 operations on a Unix socket or a localhost TCP port
+
+    Args:
+        address (str or Tuple[str, int]): Unix socket path, or (host, port).
+            TCP hosts other than localhost are refused.
+        seed_processes (int): Size of the PBKDF2 process pool. 0 derives seeds
+            on the batcher thread instead. Default: number of CPUs.
+    """
+
+    def __init__(self, address, seed_processes=None, batch_window=BATCH_WINDOW,
+                 batch_max=BATCH_MAX):
+        codec = bip39.Bip39Codec()
+        assert len(codec.wordlist) == 2048
+        #fork the pool before any threads exist
+        if seed_processes is None:
+            seed_processes = multiprocessing.cpu_count()
+        self.seed_pool = (multiprocessing.Pool(seed_processes)
+                          if seed_processes > 0 else None)
+        self.batcher = RequestBatcher(codec, self.seed_pool,
+                                      batch_window=batch_window,
+                                      batch_max=batch_max)
+        if isinstance(address, basestring):
+            if os.path.exists(address):
+                os.unlink(address)
+            self._server = _ThreadingUnixServer(address, _RequestHandler)
+        else:
+            if address[0] not in ('127.0.0.1', 'localhost', '::1'):
+                raise ValueError("Refusing to bind to non-local host")
+            self._server = _ThreadingTCPServer(address, _RequestHandler)
+        self._server.batcher = self.batcher
+        self.address = self._server.server_address
+        self._thread = None
+
+    def start(self):
+        """Serve in a background thread"""
+        self.batcher.start()
+        self._thread = threading.Thread(target=self._server.serve_forever,
+                                        name='bip39-server')
+        self._thread.daemon = True
+        self._thread.start()
+
+    def serve_forever(self):
+        """Serve on the calling thread until interrupted"""
+        self.batcher.start()
+        try:
+            self._server.serve_forever()
+        finally:
+            self.close()
+
+    def close(self):
+        """Stop serving and release the socket and process pool"""
+        self._server.shutdown()
+        self._server.server_close()
+        self.batcher.stop()
+        if self.seed_pool is not None:
+            self.seed_pool.terminate()
+            self.seed_pool.join()
+        if isinstance(self.address, basestring) and os.path.exists(self.address):
+            os.unlink(self.address)
+
+class Bip39Client(object):
+    """Blocking client for Bip39Server; one request in flight at a time"""
+
+    def __init__(self, address, timeout=None):
+        if isinstance(address, basestring):
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        else:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.settimeout(timeout)
+        self._sock.connect(address)
+        self._file = self._sock.makefile('rwb')
+        self._next_id = 0
+
+    def call(self, method, **params):
+        """Issue one request and return its result
+
+        Raises: RemoteError if the server answered with an error
+        """
+        self._next_id += 1
+        self._file.write(json.dumps(
+            {'id': self._next_id, 'method': method, 'params': params}) + '\n')
+        self._file.flush()
+        response = json.loads(self._file.readline())
+        assert response['id'] == self._next_id
+        if 'error' in response:
+            raise RemoteError("{type}: {message}".format(**response['error']))
+        return response['result']
+
+    def close(self):
+        """Close the connection"""
+        self._file.close()
+        self._sock.close()
+
+def _main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--unix', help='Unix socket path to bind')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT,
+                        help='localhost TCP port (if --unix not given)')
+    parser.add_argument('--seed-processes', type=int, default=None,
+                        help='PBKDF2 worker processes (default: #CPUs)')
+    args = parser.parse_args()
+
+    address = args.unix if args.unix else (DEFAULT_HOST, args.port)
+    server = Bip39Server(address, seed_processes=args.seed_processes)
+    print "Serving bip39 on {0}".format(server.address)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except Exception: #pylint: disable=broad-except
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,307 @@
+"""Split mnemonic entropy into k-of-n Shamir shares over GF(256)
+
+Each byte of the secret is the constant term of its own random polynomial of
+degree threshold - 1 over GF(256); share x holds the value of every
+polynomial at x (1 to n). Any threshold shares recover the secret by
+Lagrange interpolation at 0; fewer reveal nothing about it.
+
+Field arithmetic uses the AES / SLIP-39 field, x^8 + x^4 + x^3 + x + 1,
+through log and exp tables (EXP is doubled so that a product is a single
+lookup without a modulo). The NumPy batch functions split or recombine a
+matrix of secrets (one row per secret) with one 256 entry row of MUL_TABLE
+per share, so every byte of every secret is processed by the same few
+array operations.
+
+#################
+# Share format #
+#################
+
+A share of a mnemonic is its index followed by the share bytes as a BIP39
+mnemonic: the first word is the word at the share's index in the wordlist,
+the rest is binstring2mnemonic of the share bytes, checksum included. A share
+of a 12-word mnemonic is 13 words, so a share is never mistaken for a
+mnemonic, and the checksum catches most transcription errors in a share.
+
+Combining fewer than threshold shares, or shares of different splits,
+gives a valid but wrong mnemonic: nothing in the shares can tell.
+
+$ python shamir.py split --threshold 2 --shares 3
+$ python shamir.py combine
+"""
+#Python Standard Library 2.7
+import time
+import getpass
+import argparse
+
+#PyPI modules
+import numpy as np #pip install numpy
+
+#bip39_gym modules
+import bip39 #bip39.py
+import entropy #entropy.py
+import entropy_sources #entropy_sources.py
+
+FIELD_POLYNOMIAL = 0x11b #x^8 + x^4 + x^3 + x + 1
+
+MAX_SHARES = 255
+
+class InvalidShareError(Exception):
+    """Shares are malformed, duplicated or of different lengths"""
+    pass
+
+def _tables():
+    exp = [0] * 510
+    log = [0] * 256
+    value = 1
+    for power in range(255):
+        exp[power] = exp[power + 255] = value
+        log[value] = power
+        #multiply by the generator x + 1 (3)
+        doubled = value << 1
+        if doubled & 0x100:
+            doubled ^= FIELD_POLYNOMIAL
+        value ^= doubled
+    return exp, log
+
+EXP, LOG = _tables()
+
+def gf_mul(left, right):
+    """Product of two field elements"""
+    if left == 0 or right == 0:
+        return 0
+    return EXP[LOG[left] + LOG[right]]
+
+def gf_div(left, right):
+    """Quotient of two field elements
+
+    Raises: ZeroDivisionError
+    """
+    if right == 0:
+        raise ZeroDivisionError()
+    if left == 0:
+        return 0
+    return EXP[LOG[left] + 255 - LOG[right]]
+
+def _mul_table():
+    logs = np.array(LOG, dtype=np.int32)
+    table = np.array(EXP, dtype=np.uint8)[logs[:, None] + logs[None, :]]
+    table[0, :] = 0
+    table[:, 0] = 0
+    return table
+
+MUL_TABLE = _mul_table() #MUL_TABLE[a][b] = gf_mul(a, b)
+
+def _check_split(threshold, n_shares):
+    if not 1 <= threshold <= n_shares <= MAX_SHARES:
+        raise ValueError("Need 1 <= threshold <= shares <= {0}".format(
+            MAX_SHARES))
+
+def lagrange_coefficients(indices):
+    """Coefficient of each share's value in the secret, for shares at indices
+
+    Raises: InvalidShareError for duplicate or out of range indices
+    """
+    if len(set(indices)) != len(indices) or not all(
+            1 <= index <= MAX_SHARES for index in indices):
+        raise InvalidShareError("Share indices must be distinct, 1 to {0}"
+                                .format(MAX_SHARES))
+    coefficients = []
+    for index in indices:
+        coefficient = 1
+        for other in indices:
+            if other != index:
+                coefficient = gf_mul(coefficient, gf_div(other, other ^ index))
+        coefficients.append(coefficient)
+    return coefficients
+
+def split(secret, threshold, n_shares, source=None):
+    """Split a raw byte string into shares
+
+    Args:
+        source (entropy_sources.EntropySource): Where the polynomial
+            coefficients come from. Default: os.urandom
+
+    Returns: List of (index, share bytes), indices 1 to n_shares
+
+    Raises: ValueError
+    """
+    _check_split(threshold, n_shares)
+    if source is None:
+        source = entropy_sources.get_default_source()
+    #one request, laid out as in split_batch
+    randomness = bytearray(source.get_bytes((threshold - 1) * len(secret)))
+    coefficients = [randomness[degree * len(secret):(degree + 1) * len(secret)]
+                    for degree in range(threshold - 1)]
+    shares = []
+    for index in range(1, n_shares + 1):
+        #Horner's rule, highest degree first
+        values = bytearray(len(secret))
+        for coefficient in reversed([bytearray(secret)] + coefficients):
+            values = bytearray(gf_mul(value, index) ^ byte
+                               for value, byte in zip(values, coefficient))
+        shares.append((index, str(values)))
+    return shares
+
+def combine(shares):
+    """Recover the secret from (index, share bytes) pairs
+
+    Raises: InvalidShareError
+    """
+    if not shares or len(set(len(values) for _, values in shares)) != 1:
+        raise InvalidShareError("Shares must be of the same length")
+    coefficients = lagrange_coefficients([index for index, _ in shares])
+    secret = bytearray(len(shares[0][1]))
+    for coefficient, (_, values) in zip(coefficients, shares):
+        for position, value in enumerate(bytearray(values)):
+            secret[position] ^= gf_mul(coefficient, value)
+    return str(secret)
+
+def split_batch(secrets, threshold, n_shares, source=None):
+    """Split every row of a matrix of secrets
+
+    Args:
+        secrets (numpy.ndarray): uint8 matrix, one secret per row
+        source (entropy_sources.EntropySource): Default: os.urandom
+
+    Returns: uint8 array of shape (n_shares, rows, columns); share index i + 1
+        of every secret is [i]
+
+    Raises: ValueError
+    """
+    _check_split(threshold, n_shares)
+    if source is None:
+        source = entropy_sources.get_default_source()
+    secrets = np.asarray(secrets, dtype=np.uint8)
+    coefficients = np.frombuffer(
+        source.get_bytes((threshold - 1) * secrets.size), dtype=np.uint8
+    ).reshape((threshold - 1,) + secrets.shape)
+    shares = np.empty((n_shares,) + secrets.shape, dtype=np.uint8)
+    for index in range(1, n_shares + 1):
+        row = MUL_TABLE[index]
+        values = np.zeros(secrets.shape, dtype=np.uint8)
+        for coefficient in coefficients[::-1]:
+            values = row[values] ^ coefficient
+        shares[index - 1] = row[values] ^ secrets
+    return shares
+
+def combine_batch(indices, shares):
+    """Recover a matrix of secrets from the same shares of each
+
+    Args:
+        indices (List[int]): Share index of each layer of shares
+        shares (numpy.ndarray): uint8 array of shape (len(indices), rows,
+            columns), as returned by split_batch (or a subset of its layers)
+
+    Raises: InvalidShareError
+    """
+    shares = np.asarray(shares, dtype=np.uint8)
+    if len(indices) != len(shares):
+        raise InvalidShareError("One index per layer of shares")
+    secrets = np.zeros(shares.shape[1:], dtype=np.uint8)
+    for coefficient, values in zip(lagrange_coefficients(list(indices)), shares):
+        secrets ^= MUL_TABLE[coefficient][values]
+    return secrets
+
+def split_mnemonic(mnemonic, threshold, n_shares, source=None, codec=None):
+    """Split the entropy of a mnemonic into share mnemonics (see module doc)
+
+    Raises: ValueError, InvalidWordError, FailedCheckSumError
+    """
+    if codec is None:
+        codec = bip39.get_default_codec(print_warning=False)
+    secret = bip39.decode_binary_string(codec.mnemonic2binstring(mnemonic))
+    return [codec.separator.join([
+        codec.wordlist[index],
+        codec.binstring2mnemonic(bip39.encode_binary_string(values))])
+            for index, values in split(secret, threshold, n_shares, source)]
+
+def combine_mnemonics(share_mnemonics, codec=None):
+    """Mnemonic whose entropy the share mnemonics were split from
+
+    Raises: InvalidShareError, InvalidWordError, FailedCheckSumError
+    """
+    if codec is None:
+        codec = bip39.get_default_codec(print_warning=False)
+    shares = []
+    for share in share_mnemonics:
+        words = codec.split_words(share)
+        if len(words) < 2:
+            raise InvalidShareError("Too short for a share: {0}".format(share))
+        index = codec.get_index_from_word(words[0])
+        binstring = codec.mnemonic2binstring(codec.separator.join(words[1:]))
+        shares.append((index, bip39.decode_binary_string(binstring)))
+    return codec.binstring2mnemonic(bip39.encode_binary_string(combine(shares)))
+
+def benchmark(n_secrets, n_bytes, threshold, n_shares, source=None):
+    """Secrets per second split and recovered by the batch functions"""
+    if source is None:
+        source = entropy_sources.get_default_source()
+    secrets = np.frombuffer(source.get_bytes(n_secrets * n_bytes),
+                            dtype=np.uint8).reshape(n_secrets, n_bytes)
+    began = time.time()
+    shares = split_batch(secrets, threshold, n_shares, source)
+    split_time = time.time() - began
+    began = time.time()
+    recovered = combine_batch(range(n_shares - threshold + 1, n_shares + 1),
+                              shares[n_shares - threshold:])
+    combine_time = time.time() - began
+    assert (recovered == secrets).all()
+    return (n_secrets / max(split_time, 1e-9),
+            n_secrets / max(combine_time, 1e-9))
+
+def _main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest='command')
+    split_parser = subparsers.add_parser('split', help='split a mnemonic')
+    split_parser.add_argument('--mnemonic',
+                              help='mnemonic to split (default: prompt '
+                              'without echo)')
+    split_parser.add_argument('--threshold', type=int, required=True)
+    split_parser.add_argument('--shares', type=int, required=True)
+    entropy.add_source_args(split_parser)
+    subparsers.add_parser('combine', help='recover a mnemonic from shares, '
+                          'one per line, ended by an empty line')
+    bench_parser = subparsers.add_parser('benchmark',
+                                         help='time the batch functions')
+    bench_parser.add_argument('--secrets', type=int, default=100000)
+    bench_parser.add_argument('--bytes', type=int, default=32)
+    bench_parser.add_argument('--threshold', type=int, default=3)
+    bench_parser.add_argument('--shares', type=int, default=5)
+    args = parser.parse_args()
+
+    if args.command == 'split':
+        source = entropy.source_from_args(args)
+        if source is not None:
+            print("WARNING: Using a test entropy source instead of "
+                  "/dev/urandom. Never use the resulting shares!")
+        mnemonic = args.mnemonic or getpass.getpass('Mnemonic: ')
+        try:
+            shares = split_mnemonic(mnemonic, args.threshold, args.shares,
+                                    source)
+        except (ValueError, bip39.InvalidWordError,
+                bip39.FailedCheckSumError) as err:
+            parser.error('cannot split: {0!r}'.format(err))
+        for number, share in enumerate(shares, 1):
+            print "Share {0} of {1} ({2} needed): {3}".format(
+                number, args.shares, args.threshold, share)
+    elif args.command == 'combine':
+        share_mnemonics = []
+        while True:
+            line = getpass.getpass('Share (empty to finish): ').strip()
+            if not line:
+                break
+            share_mnemonics.append(line)
+        try:
+            print combine_mnemonics(share_mnemonics)
+        except (InvalidShareError, bip39.InvalidWordError,
+                bip39.FailedCheckSumError) as err:
+            parser.error('cannot combine: {0!r}'.format(err))
+    else:
+        split_rate, combine_rate = benchmark(args.secrets, args.bytes,
+                                             args.threshold, args.shares)
+        print ("{0}-of-{1} shares of {2} byte secrets: split {3:.0f}/s, "
+               "combine {4:.0f}/s").format(args.threshold, args.shares,
+                                           args.bytes, split_rate, combine_rate)
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,219 @@
+"""Throttled progress reports and metrics snapshots for long jobs
+
+A job tells its Progress how far it got as often as it likes, even on every
+iteration of a tight loop: the clock is only read every `every` updates, and
+a report is only made every interval seconds. Unless `every` is given, it is
+tuned after each look at the clock from the measured rate of updates (not of
+items, which an update may count many of), so that the clock is read about
+CHECKS_PER_INTERVAL times per interval whatever an update costs.
+
+A report is a line with the items done, the rate and, when the total is
+known, the ETA. On a terminal the line is redrawn in place.
+
+With a metrics file, each report also atomically replaces it with a JSON
+snapshot for unattended runs:
+
+{"job": str, "items": int, "total": int or null, "elapsed": seconds,
+ "items_per_sec": float, "eta": seconds or null, "workers": int,
+ "utilization": float or null, "max_rss_kb": int, "finished": bool,
+ "time": unix time}
+
+Parallel jobs add the seconds their workers spent on each chunk with
+worker_busy() (see timed_call); utilization is that busy time over
+workers * elapsed. max_rss_kb is the peak resident memory of this process
+plus that of its largest finished child.
+"""
+#Python Standard Library 2.7
+import os
+import sys
+import json
+import time
+import resource
+import tempfile
+
+REPORT_INTERVAL = 1.0 #seconds
+
+CHECKS_PER_INTERVAL = 10
+
+def _format_seconds(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return '{0}:{1:02d}:{2:02d}'.format(hours, minutes, seconds)
+
+def max_rss_kb():
+    """Peak resident memory of this process and its largest finished child"""
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss +
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+
+def write_snapshot(path, snapshot):
+    """Atomically replace path with a JSON snapshot"""
+    handle, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.',
+                                        suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'w') as tmp_file:
+            json.dump(snapshot, tmp_file, sort_keys=True)
+        os.rename(tmp_path, path)
+    except:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+def timed_call(job):
+    """Process pool worker: (func(arg), seconds it took) of job (func, arg)
+
+    func must be a module-level function so that it can be pickled.
+    """
+    func, arg = job
+    began = time.time()
+    result = func(arg)
+    return result, time.time() - began
+
+class Progress(object):
+    """Progress of one job
+
+    Args:
+        total (int): Number of items, if known
+        job (str): Name of the job, for the metrics snapshot
+        unit (str): What an item is, e.g. 'candidates'
+        interval (float): Seconds between reports
+        every (int): Updates between looks at the clock. Default: tuned to
+            the rate
+        report (function): Called with each report line. Default: draw the
+            line on stderr, in place on a terminal. False: no lines.
+        metrics (str): Path of the metrics snapshot, if any
+        workers (int): Processes working on the items, for utilization
+        start (int): Items already done, e.g. by a resumed run; they don't
+            count towards the rate
+    """
+
+    def __init__(self, total=None, job='', unit='items', interval=REPORT_INTERVAL,
+                 every=None, report=None, metrics=None, workers=1, start=0):
+        self.total = total
+        self.job = job
+        self.unit = unit
+        self.interval = interval
+        self.every = every
+        self.metrics = metrics
+        self.workers = workers
+        self.done = start
+        self.busy = 0.0
+        self._start = start
+        self._report = report
+        self._redraw = report is None and sys.stderr.isatty()
+        self._countdown = every or 1
+        self._began = time.time()
+        self._checked = (self._began, self._countdown) #time, updates since
+        self._next_report = self._began + interval
+        self._finished = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.finish()
+
+    def update(self, done):
+        """Set the number of items done; cheap enough for any inner loop"""
+        self.done = done
+        self._countdown -= 1
+        if self._countdown <= 0:
+            self._check()
+
+    def add(self, n_items=1):
+        """Count n_items more items as done"""
+        self.update(self.done + n_items)
+
+    def worker_busy(self, seconds):
+        """Add the seconds a worker spent on items"""
+        self.busy += seconds
+
+    def _check(self):
+        now = time.time()
+        if self.every is None:
+            checked_at, n_updates = self._checked
+            if now > checked_at:
+                rate = n_updates / (now - checked_at)
+                self._countdown = max(1, int(
+                    rate * self.interval / CHECKS_PER_INTERVAL))
+                self._checked = (now, self._countdown)
+            else:
+                #a coarse clock hasn't ticked yet: wait twice as many updates
+                self._countdown = n_updates
+                self._checked = (checked_at, 2 * n_updates)
+        else:
+            self._countdown = self.every
+        if now >= self._next_report:
+            self._next_report = now + self.interval
+            self._emit(now)
+
+    def rate(self, now=None):
+        """Items per second since the start, not counting start"""
+        elapsed = (now or time.time()) - self._began
+        return (self.done - self._start) / elapsed if elapsed > 0 else 0.0
+
+    def eta(self, now=None):
+        """Seconds until the total is reached at the current rate, or None"""
+        rate = self.rate(now)
+        if self.total is None or rate <= 0:
+            return None
+        return max(0.0, (self.total - self.done) / rate)
+
+    def snapshot(self, now=None):
+        """Metrics of the job so far, as written to the metrics file"""
+        now = now or time.time()
+        elapsed = now - self._began
+        utilization = None
+        if self.busy and elapsed > 0:
+            utilization = self.busy / (self.workers * elapsed)
+        return {'job': self.job, 'items': self.done, 'total': self.total,
+                'elapsed': elapsed, 'items_per_sec': self.rate(now),
+                'eta': self.eta(now), 'workers': self.workers,
+                'utilization': utilization, 'max_rss_kb': max_rss_kb(),
+                'finished': self._finished, 'time': now}
+
+    def line(self, now=None):
+        """Report line: items done, rate and ETA"""
+        now = now or time.time()
+        done = str(self.done) if self.total is None else '{0}/{1}'.format(
+            self.done, self.total)
+        line = '{0} {1}, {2:.1f} {1}/s'.format(done, self.unit, self.rate(now))
+        eta = self.eta(now)
+        if eta is not None and not self._finished:
+            line += ', ETA {0}'.format(_format_seconds(eta))
+        return line
+
+    def _emit(self, now):
+        if self._report is None:
+            if self._redraw:
+                sys.stderr.write('\r' + self.line(now).ljust(60))
+                if self._finished:
+                    sys.stderr.write('\n')
+            else:
+                sys.stderr.write(self.line(now) + '\n')
+            sys.stderr.flush()
+        elif self._report is not False:
+            self._report(self.line(now))
+        if self.metrics is not None:
+            write_snapshot(self.metrics, self.snapshot(now))
+
+    def finish(self, line=True):
+        """Make a final report; the metrics file is kept
+
+        Args:
+            line (bool): Whether to report a line too, or just write the
+                final metrics snapshot
+        """
+        if not self._finished:
+            self._finished = True
+            if line:
+                self._emit(time.time())
+            elif self.metrics is not None:
+                write_snapshot(self.metrics, self.snapshot())
+
+def add_telemetry_args(parser, interval=REPORT_INTERVAL):
+    """Add --metrics and --report-interval to an argparse parser"""
+    parser.add_argument('--metrics', metavar='FILE',
+                        help='keep a JSON snapshot of rate, ETA, worker '
+                        'utilization and memory in FILE')
+    parser.add_argument('--report-interval', metavar='SECONDS', type=float,
+                        default=interval)
@@ -1,10 +1,14 @@
 """Unit tests for bip39-entropy-mixin"""
 #Python Standard Library 2.7
+import os
+import shutil
+import tempfile
 import unittest
 import sys
 
 import app #app.py
 import bip39 #bip39.py
+import entropy_index #entropy_index.py
 
 BITS_128 = "10" * 64
 BITS_129 = BITS_128 + "1"
@@ -48,6 +52,10 @@ class FunctionTest(unittest.TestCase):
                                                   print_warning=False), 0)
         self.assertEqual(app.num_entropy_warnings(bip39.dec2bin(sys.maxint - 1),
                                                   print_warning=False), 0)
+        self.assertEqual(app.num_entropy_warnings("0" * 127 + "1",
+                                                  print_warning=False), 0)
+        self.assertEqual(app.num_entropy_warnings("0" * 64 + "1" * 64,
+                                                  print_warning=False), 0)
 
     def test_is_valid_entropy_valid(self):
         """Provide valid examples of entropy"""
@@ -70,3 +78,51 @@ class FunctionTest(unittest.TestCase):
         #More than 256 bits
         assert len(BITS_288) == 288
         self.assertFalse(app.is_valid_entropy(BITS_288, print_error=False))
+
+    def test_is_valid_entropy_codec(self):
+        """Entropy limits come from the codec when one is given"""
+        codec = bip39.Bip39Codec(ent_min=32)
+        assert len(BITS_32) == 32
+        self.assertTrue(app.is_valid_entropy(BITS_32, print_error=False,
+                                             codec=codec))
+
+    def test_is_seen_entropy(self):
+        """Entropy already in an index is reported as seen"""
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'seen.idx')
+            entropy_index.build_index(path, [bip39.decode_binary_string(BITS_128)])
+            with entropy_index.EntropyIndex(path) as index:
+                self.assertTrue(app.is_seen_entropy(BITS_128, index,
+                                                    print_warning=False))
+                self.assertFalse(app.is_seen_entropy("01" * 64, index,
+                                                     print_warning=False))
+        finally:
+            shutil.rmtree(tmpdir)
+
+    def test_mix(self):
+        """Mixing XORs the entropy of two mnemonics"""
+        old = bip39.Mnemonic.from_hex('f' * 32)
+        new = bip39.Mnemonic.from_hex('0f' * 16)
+        self.assertEqual(app.mix(old, new).entropy_hex, 'f0' * 16)
+        with self.assertRaises(ValueError):
+            app.mix(old, bip39.Mnemonic.from_hex('0' * 40))
+
+    def test_read_mnemonic(self):
+        """A mistyped word is reported and entered again"""
+        lines = iter(['legal winner thank yeer wave',
+                      'year wave sausage worth useful legal winner thank',
+                      'yellow', ''])
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            entry = app.read_mnemonic(read=lambda prompt: next(lines))
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        self.assertEqual(entry.mnemonic, 'legal winner thank year wave sausage '
+                         'worth useful legal winner thank yellow')
+        self.assertEqual(entry.binstring, '01111111' * 16)
+        lines = iter(['abandon ' * 11 + 'about', 'never read'])
+        entry = app.read_mnemonic(read=lambda prompt: next(lines))
+        self.assertEqual(entry.binstring, '0' * 128)
@@ -0,0 +1,93 @@
+"""Unit tests for addresses.py"""
+#Python Standard Library 2.7
+import json
+import binascii
+import unittest
+import StringIO
+
+#bip39_gym modules
+import addresses #addresses.py
+import bip39 #bip39.py
+
+ABANDON = ' '.join(['abandon'] * 11 + ['about'])
+
+MNEMONIC = ('legal winner thank year wave sausage worth useful legal winner '
+            'thank yellow')
+
+#BIP 44, 49 and 84 test vectors of ABANDON: (path, address)
+EXPECTED = {
+    "m/44'/0'/0'/0/0": '1LqBGSKuX5yYUonjxT5qGfpUsXKYYWeabA',
+    "m/49'/0'/0'/0/0": '37VucYSaXLCAsxYyAPfbSi9eh4iEcbShgf',
+    "m/84'/0'/0'/0/0": 'bc1qcr8te4kr609gcawutmrza0j4xv80jy8z306fyu',
+    "m/84'/0'/0'/0/1": 'bc1qnjg0jd8228aq7egyzacy8cys3knf9xvrerkf9g',
+    "m/84'/0'/0'/1/0": 'bc1q8c6fshw2dlwun7ekn9qwf37cu2rn755upcp6el'}
+
+class AddressesTest(unittest.TestCase):
+    """Derivation of address batches and the JSON lines pipeline"""
+
+    def test_derive_addresses(self):
+        """Published addresses of the all-abandon mnemonic"""
+        seed = binascii.unhexlify(bip39.mnemonic2seed(ABANDON))
+        derived = addresses.derive_addresses(seed, count=2)
+        self.assertEqual(len(derived), 3 * 2 * 2)
+        by_path = dict((path, address) for _, _, _, _, path, address in derived)
+        for path, address in EXPECTED.iteritems():
+            self.assertEqual(by_path[path], address)
+        self.assertEqual(derived[0][:4], ('p2pkh', 0, 0, 0))
+        derived = addresses.derive_addresses(seed, ('p2wpkh',), accounts=2,
+                                             count=1,
+                                             template="m/{purpose}'/1'/{account}'")
+        self.assertEqual([path for _, _, _, _, path, _ in derived],
+                         ["m/84'/1'/0'/0/0", "m/84'/1'/0'/1/0",
+                          "m/84'/1'/1'/0/0", "m/84'/1'/1'/1/0"])
+        with self.assertRaises(ValueError):
+            addresses.derive_addresses(seed, ('p2tr',))
+        with self.assertRaises(ValueError):
+            addresses.account_path("m/{coin}'", 44, 0)
+
+    def test_generate(self):
+        """Records stream in input order, the same on a process pool"""
+        entries = list(addresses.read_entries(StringIO.StringIO(
+            ABANDON + '\n\nabandon abandon\n' + MNEMONIC + '\tTREZOR\n' +
+            ABANDON + '\n'), passphrase=''))
+        self.assertEqual([entry[0] for entry in entries], [1, 3, 4, 5])
+        self.assertEqual(entries[2][2], 'TREZOR')
+        outputs = []
+        for processes in (0, 2):
+            out_file = StringIO.StringIO()
+            self.assertEqual(addresses.generate(
+                out_file, entries, processes, chunk_size=1, count=3), 4)
+            outputs.append(out_file.getvalue())
+        self.assertEqual(outputs[0], outputs[1])
+        records = [json.loads(line) for line in outputs[0].splitlines()]
+        self.assertEqual(len(records), 3 * 3 * 2 * 3 + 1)
+        self.assertEqual([record['line'] for record in records][17:20],
+                         [1, 3, 4])
+        self.assertEqual(records[18],
+                         {'line': 3, 'error': 'not a valid mnemonic'})
+        self.assertEqual(records[0]['address'], EXPECTED["m/44'/0'/0'/0/0"])
+        self.assertEqual(records[0]['fingerprint'], '73c5da0a')
+        self.assertNotEqual(records[19]['fingerprint'],
+                            records[0]['fingerprint'])
+        self.assertEqual([record['address'] for record in records[:18]],
+                         [record['address'] for record in records[-18:]])
+        for record in records:
+            self.assertNotIn('mnemonic', record)
+        with self.assertRaises(ValueError):
+            addresses.generate(StringIO.StringIO(), entries, 0,
+                               template="m/{purpose}'/x")
+
+    def test_passphrase_not_utf8(self):
+        """A Latin-1 passphrase gets an error record, not a crash"""
+        entries = list(addresses.read_entries(StringIO.StringIO(
+            ABANDON + '\tcaf\xe9\n' + ABANDON + '\n')))
+        for processes in (0, 2):
+            out_file = StringIO.StringIO()
+            addresses.generate(out_file, entries, processes, chunk_size=1,
+                               formats=('p2pkh',), count=1)
+            records = [json.loads(line)
+                       for line in out_file.getvalue().splitlines()]
+            self.assertEqual(records[0], {'line': 1, 'error':
+                                          'passphrase is not valid UTF-8'})
+            self.assertEqual(records[1]['address'],
+                             EXPECTED["m/44'/0'/0'/0/0"])
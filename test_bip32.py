@@ -0,0 +1,120 @@
+"""Unit tests for bip32.py"""
+#Python Standard Library 2.7
+import unittest
+import json
+import binascii
+
+#bip39_gym modules
+import bip32 #bip32.py
+
+TEST_VECTOR_FILE = 'data/vectors.json'
+
+#BIP 32 test vector 1, chain m
+BIP32_SEED = '000102030405060708090a0b0c0d0e0f'
+BIP32_XPRV = ('xprv9s21ZrQH143K3QTDL4LXw2F7HEK3wJUD2nW2nRk4stbPy6cq3jPPqjiChkVv'
+              'vNKmPGJxWUtg6LnF5kejMRNNU3TGtRBeJgk33yuGBxrMPHi')
+
+#BIP 32 test vector 1: path, xpub, xprv
+BIP32_CHAIN = [
+    ('m', 'xpub661MyMwAqRbcFtXgS5sYJABqqG9YLmC4Q1Rdap9gSE8NqtwybGhePY2gZ29E'
+          'SFjqJoCu1Rupje8YtGqsefD265TMg7usUDFdp6W1EGMcet8', BIP32_XPRV),
+    ("m/0'", 'xpub68Gmy5EdvgibQVfPdqkBBCHxA5htiqg55crXYuXoQRKfDBFA1WEjWgP6LHhw'
+             'BZeNK1VTsfTFUHCdrfp1bgwQ9xv5ski8PX9rL2dZXvgGDnw',
+     'xprv9uHRZZhk6KAJC1avXpDAp4MDc3sQKNxDiPvvkX8Br5ngLNv1TxvUxt4cV1rGL5hj'
+     '6KCesnDYUhd7oWgT11eZG7XnxHrnYeSvkzY7d2bhkJ7'),
+    ("m/0H/1", 'xpub6ASuArnXKPbfEwhqN6e3mwBcDTgzisQN1wXN9BJcM47sSikHjJf3UFHKkNAW'
+               'bWMiGj7Wf5uMash7SyYq527Hqck2AxYysAA7xmALppuCkwQ', None)]
+
+#"abandon abandon ... about" without passphrase, BIP 44 first receive address
+ABANDON_SEED = ('5eb00bbddcf069084889a8ab9155568165f5c453ccb85e70811aaed6f6da5fc1'
+                '9a5ac40b389cd370d086206dec8aa6c43daea6690f20ad3d8d48b2d2ce9e38e4')
+ABANDON_ADDRESS = '1LqBGSKuX5yYUonjxT5qGfpUsXKYYWeabA'
+
+class Bip32Test(unittest.TestCase):
+    """Test master key derivation and serialization"""
+
+    def test_bip32_vector(self):
+        """Reproduce the master xprv of BIP32 test vector 1"""
+        self.assertEqual(bip32.seed2xprv(BIP32_SEED), BIP32_XPRV)
+
+    def test_bip39_vectors(self):
+        """Reproduce the master xprv of every Trezor vector"""
+        with open(TEST_VECTOR_FILE, 'r') as vector_file:
+            data = json.load(vector_file)['english']
+        for vector in data:
+            self.assertEqual(bip32.seed2xprv(vector[2]), vector[3])
+
+    def test_base58_round_trip(self):
+        """Leading zero bytes survive Base58"""
+        for data in ('', '\x00', '\x00\x00\x01', '\xff' * 10, 'hello'):
+            self.assertEqual(bip32.base58_decode(bip32.base58_encode(data)),
+                             data)
+        self.assertEqual(bip32.base58_encode('\x00\x00\x01'), '112')
+
+    def test_base58check_invalid(self):
+        """Bad characters and checksums are rejected"""
+        with self.assertRaises(bip32.InvalidBase58Error):
+            bip32.base58check_decode('0OIl')
+        with self.assertRaises(bip32.InvalidBase58Error):
+            bip32.base58check_decode(BIP32_XPRV[:-1] + 'j')
+        self.assertEqual(len(bip32.base58check_decode(BIP32_XPRV)), 78)
+
+    def test_bip32_derivation(self):
+        """Reproduce the extended keys of BIP32 test vector 1 below m"""
+        for path, xpub, xprv in BIP32_CHAIN:
+            self.assertEqual(bip32.seed2xpub(BIP32_SEED, path), xpub)
+            if xprv is not None:
+                self.assertEqual(bip32.seed2xprv(BIP32_SEED, path), xprv)
+
+    def test_address(self):
+        """The first BIP 44 address of the all-abandon mnemonic"""
+        self.assertEqual(bip32.seed2address(ABANDON_SEED, "m/44'/0'/0'/0/0"),
+                         ABANDON_ADDRESS)
+
+    def test_ripemd160(self):
+        """The fallback RIPEMD-160 matches the reference test vectors"""
+        for message, digest in (
+                ('', '9c1185a5c5e9fc54612808977ee8f548b2258d31'),
+                ('abc', '8eb208f7e05d987a9b044a8e98c6b087f15a0bfc'),
+                ('message digest', '5d0689ef49d2fae572b881b123a85ffa21595f36'),
+                ('1234567890' * 8, '9b752e45573d4b39f4dbd3323cab82bf63326bfb')):
+            self.assertEqual(binascii.hexlify(bip32._ripemd160(message)), digest)
+
+    def test_parse_path(self):
+        """Hardened markers and invalid paths"""
+        self.assertEqual(bip32.parse_path('m'), [])
+        self.assertEqual(bip32.parse_path("m/44'/0h/1H/2"),
+                         [bip32.HARDENED + 44, bip32.HARDENED, bip32.HARDENED + 1, 2])
+        for path in ('44/0', 'm/x', 'm/-1', 'm/2147483648'):
+            with self.assertRaises(ValueError):
+                bip32.parse_path(path)
+
+    def test_public_keys(self):
+        """Batch public keys match one at a time"""
+        private_keys = [bip32.master_key(chr(num) * 16)[0] for num in range(20)]
+        self.assertEqual(bip32.public_keys(private_keys),
+                         [bip32.public_key(key) for key in private_keys])
+        self.assertEqual(bip32.public_keys([]), [])
+        #1 * G
+        self.assertEqual(bip32.public_key('\x00' * 31 + '\x01'),
+                         '\x02' + bip32._int2bytes(bip32.CURVE_G[0]))
+        key, chain_code = bip32.master_key(binascii.unhexlify(BIP32_SEED))
+        self.assertEqual(bip32.ckd_priv(key, chain_code, 7),
+                         bip32.ckd_priv(key, chain_code, 7,
+                                        bip32.public_key(key)))
+
+    def test_segwit_addresses(self):
+        """BIP 173 Bech32 vector, BIP 49 and BIP 84 first addresses"""
+        self.assertEqual(bip32.bech32_encode(
+            'bc', 0, binascii.unhexlify('751e76e8199196d454941c45d1b3a323f1433bd6')),
+                         'bc1qw508d6qejxtdg4y5r3zarvary0c5xw7kv8f3t4')
+        with self.assertRaises(ValueError):
+            bip32.bech32_encode('bc', 1, '\x00' * 32)
+        seed = binascii.unhexlify(ABANDON_SEED)
+        for path, address_of, address in (
+                ("m/49'/0'/0'/0/0", bip32.p2sh_p2wpkh_address,
+                 '37VucYSaXLCAsxYyAPfbSi9eh4iEcbShgf'),
+                ("m/84'/0'/0'/0/0", bip32.p2wpkh_address,
+                 'bc1qcr8te4kr609gcawutmrza0j4xv80jy8z306fyu')):
+            private_key = bip32.derive_extended(seed, path)[0]
+            self.assertEqual(address_of(bip32.public_key(private_key)), address)
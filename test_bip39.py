@@ -2,6 +2,8 @@
 #Python Standard Library 2.7
 import unittest
 import json
+import hashlib
+import threading
 
 import bip39 #bip39.py
 
@@ -85,6 +87,195 @@ class Bip39VectorTest(unittest.TestCase):
             computed_mnemonic = bip39.binstring2mnemonic(bin_string)
             self.assertEqual(mnemonic, computed_mnemonic)
 
+    def test_batch_round_trip(self):
+        """Batch codec functions match the test vectors"""
+        bin_strings = [bip39.hex2bin(vector[0]) for vector in self.data]
+        mnemonics = [vector[1] for vector in self.data]
+        self.assertEqual(bip39.binstrings2mnemonics(bin_strings), mnemonics)
+        self.assertEqual(bip39.mnemonics2binstrings(mnemonics), bin_strings)
+
+    def test_mnemonic_to_seed(self):
+        """Reproduce the seeds of the first vectors (passphrase TREZOR)"""
+        for vector in self.data[:4]:
+            self.assertEqual(bip39.mnemonic2seed(vector[1], 'TREZOR'),
+                             vector[2])
+
+    def test_last_word_candidates(self):
+        """The real final word is among the checksum-valid completions"""
+        for vector in self.data:
+            words = vector[1].split()
+            candidates = bip39.get_last_word_candidates(' '.join(words[:-1]))
+            self.assertEqual(len(candidates), 2 ** (11 - len(words) / 3))
+            self.assertIn(words[-1], candidates)
+
+class Bip39CodecTest(unittest.TestCase):
+    """Test codec instances independently of the module-level default"""
+
+    def setUp(self):
+        with open(TEST_VECTOR_FILE, 'r') as vector_file:
+            self.data = json.load(vector_file)['english']
+
+    def tearDown(self):
+        pass
+
+    def test_default_codec_matches_module(self):
+        """Module functions and a fresh codec agree on every vector"""
+        codec = bip39.Bip39Codec()
+        for vector in self.data:
+            bin_string = bip39.hex2bin(vector[0])
+            self.assertEqual(codec.binstring2mnemonic(bin_string), vector[1])
+            self.assertEqual(codec.mnemonic2binstring(vector[1]), bin_string)
+
+    def test_custom_wordlist(self):
+        """A codec with its own wordlist doesn't affect the default"""
+        reversed_codec = bip39.Bip39Codec(
+            wordlist=list(reversed(bip39.get_wordlist())))
+        self.assertEqual(reversed_codec.get_word_from_index(0), 'zoo')
+        self.assertEqual(reversed_codec.get_index_from_word('abandon'), 2047)
+        self.assertEqual(bip39.get_word_from_index(0), 'abandon')
+        bin_string = bip39.hex2bin(self.data[0][0])
+        mnemonic = reversed_codec.binstring2mnemonic(bin_string)
+        self.assertEqual(reversed_codec.mnemonic2binstring(mnemonic), bin_string)
+
+    def test_warning_sink(self):
+        """Warnings go to the codec's sink instead of stdout"""
+        warnings = []
+        codec = bip39.Bip39Codec(warning_sink=warnings.append)
+        codec.mnemonic2binstring('voice catch possible')
+        self.assertEqual(len(warnings), 0)
+        with self.assertRaises(bip39.FailedCheckSumError):
+            codec.mnemonic2binstring('voice catch')
+        self.assertEqual(len(warnings), 1)
+        silent = codec.copy(warning_sink=None)
+        self.assertIs(silent.wordlist, codec.wordlist)
+        with self.assertRaises(bip39.FailedCheckSumError):
+            silent.mnemonic2binstring('voice catch')
+        self.assertEqual(len(warnings), 1)
+
+    def test_copy_invalid(self):
+        """Only options can be overridden when copying"""
+        with self.assertRaises(TypeError):
+            bip39.Bip39Codec().copy(wordlist=[])
+
+    def test_entropy_length_error(self):
+        """Entropy limits are owned by the codec"""
+        codec = bip39.Bip39Codec()
+        self.assertIsNone(codec.entropy_length_error(128))
+        self.assertIsNotNone(codec.entropy_length_error(32))
+        self.assertIsNotNone(codec.entropy_length_error(129))
+        relaxed = codec.copy(ent_min=32)
+        self.assertIsNone(relaxed.entropy_length_error(32))
+
+    def test_threads(self):
+        """Codecs with different wordlists run side by side in threads"""
+        codecs = [bip39.Bip39Codec(),
+                  bip39.Bip39Codec(wordlist=list(reversed(bip39.get_wordlist())))]
+        failures = []
+
+        def run(codec):
+            for _ in range(20):
+                for vector in self.data:
+                    bin_string = bip39.hex2bin(vector[0])
+                    mnemonic = codec.binstring2mnemonic(bin_string)
+                    if codec.mnemonic2binstring(mnemonic) != bin_string:
+                        failures.append(mnemonic)
+
+        threads = [threading.Thread(target=run, args=(codec,))
+                   for codec in codecs * 4]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(failures, [])
+
+class MnemonicTest(unittest.TestCase):
+    """Test lazily derived forms of Mnemonic objects"""
+
+    def setUp(self):
+        with open(TEST_VECTOR_FILE, 'r') as vector_file:
+            self.data = json.load(vector_file)['english']
+
+    def tearDown(self):
+        pass
+
+    def test_all_constructors_agree(self):
+        """Every representation derives every other one"""
+        for vector in self.data:
+            entropy_hex, mnemonic = vector[0], vector[1]
+            from_hex = bip39.Mnemonic.from_hex(entropy_hex)
+            built = [from_hex,
+                     bip39.Mnemonic.from_mnemonic(mnemonic),
+                     bip39.Mnemonic.from_words(mnemonic.split()),
+                     bip39.Mnemonic.from_indices(bip39.get_indices(mnemonic)),
+                     bip39.Mnemonic.from_bytes(entropy_hex.decode('hex')),
+                     bip39.Mnemonic.from_binstring(bip39.hex2bin(entropy_hex))]
+            for other in built:
+                self.assertEqual(other.mnemonic, mnemonic)
+                self.assertEqual(other.entropy_hex, entropy_hex)
+                self.assertEqual(other.entropy_bytes, entropy_hex.decode('hex'))
+                self.assertEqual(other.words, tuple(mnemonic.split()))
+                self.assertTrue(other.valid)
+                self.assertEqual(other, from_hex)
+            self.assertEqual(len(set(built)), 1)
+
+    def test_seed_cached_per_passphrase(self):
+        """Seeds match the vectors and are computed once per passphrase"""
+        vector = self.data[0]
+        mnemonic = bip39.Mnemonic.from_hex(vector[0])
+        seed = mnemonic.seed('TREZOR')
+        self.assertEqual(seed, vector[2])
+        self.assertIs(mnemonic.seed('TREZOR'), seed)
+        self.assertNotEqual(mnemonic.seed(''), seed)
+
+    def test_derived_forms_cached(self):
+        """Derived forms are computed on first access only"""
+        mnemonic = bip39.Mnemonic.from_hex(self.data[1][0])
+        self.assertIs(mnemonic.mnemonic, mnemonic.mnemonic)
+        self.assertIs(mnemonic.indices, mnemonic.indices)
+
+    def test_invalid(self):
+        """Bad checksums and unknown words make a mnemonic invalid"""
+        self.assertFalse(bip39.Mnemonic.from_mnemonic('town iron abandon').valid)
+        self.assertTrue(bip39.Mnemonic.from_mnemonic('voice catch possible').valid)
+        unknown = bip39.Mnemonic.from_mnemonic('mimble wimble')
+        self.assertFalse(unknown.valid)
+        with self.assertRaises(bip39.InvalidWordError):
+            unknown.binstring
+        with self.assertRaises(ValueError):
+            bip39.Mnemonic.from_mnemonic('')
+        with self.assertRaises(bip39.WordNotDefinedAtIndexError):
+            bip39.Mnemonic.from_indices([2048])
+
+    def test_entropy_lengths(self):
+        """Entropy no mnemonic holds makes an invalid Mnemonic without words"""
+        for built in (bip39.Mnemonic.from_hex('abcd'),
+                      bip39.Mnemonic.from_bytes('\x00' * 5),
+                      bip39.Mnemonic.from_binstring('0' * 128 + '1')):
+            self.assertFalse(built.valid)
+            with self.assertRaises(ValueError):
+                built.mnemonic
+            self.assertIn('bits of entropy', repr(built))
+        self.assertEqual(bip39.Mnemonic.from_bytes('\x00' * 5).entropy_hex,
+                         '0' * 10)
+        for n_bytes in (4, 8, 12, 32, 64):
+            built = bip39.Mnemonic.from_bytes('\x00' * n_bytes)
+            self.assertTrue(built.valid)
+            self.assertEqual(len(built), n_bytes * 3 // 4)
+            self.assertTrue(bip39.Mnemonic.from_mnemonic(built.mnemonic).valid)
+        self.assertIsNone(bip39.get_ent_layout(40))
+        self.assertEqual(bip39.get_ent_layout(256).n_words, 24)
+
+    def test_immutable(self):
+        """Attributes can't be set or deleted"""
+        mnemonic = bip39.Mnemonic.from_hex(self.data[0][0])
+        with self.assertRaises(AttributeError):
+            mnemonic.foo = 1
+        with self.assertRaises(AttributeError):
+            mnemonic._binstring = '0'
+        with self.assertRaises(AttributeError):
+            del mnemonic._binstring
+        self.assertNotIn(self.data[0][1], repr(mnemonic))
+
 class FunctionTest(unittest.TestCase):
     """Test various helper functions"""
 
@@ -248,6 +439,46 @@ class FunctionTest(unittest.TestCase):
         with self.assertRaises(bip39.FailedCheckSumError):
             bip39.mnemonic2binstring('town iron abandon')
 
+    def test_mnemonics2binstrings_invalid(self):
+        """The batch decoder raises on the first bad mnemonic"""
+        with self.assertRaises(bip39.InvalidWordError):
+            bip39.mnemonics2binstrings(['voice catch possible', 'mimble wimble'])
+        with self.assertRaises(bip39.FailedCheckSumError):
+            bip39.mnemonics2binstrings(['town iron abandon'])
+
+    def test_last_word_candidates_invalid(self):
+        """Completion requires a multiple of 3 words in the full mnemonic"""
+        with self.assertRaises(ValueError):
+            bip39.get_last_word_candidates('voice catch possible')
+        with self.assertRaises(bip39.InvalidWordError):
+            bip39.get_last_word_candidates('voice mimble')
+
+    def test_word_index2binstring_all(self):
+        """Table lookups agree with dec2bin for every index"""
+        for index in range(2048):
+            binstring = bip39.word_index2binstring(index)
+            self.assertEqual(binstring, bip39.dec2bin(index, zero_padding=11))
+            self.assertEqual(bip39.binstring2word_index(binstring), [index])
+        with self.assertRaises(bip39.InvalidIntValueError):
+            bip39.word_index2binstring(1.0)
+
+    def test_binary_string_round_trip(self):
+        """Every byte converts to 8 bits and back"""
+        raw_str = ''.join(chr(byte) for byte in range(256))
+        binstring = bip39.encode_binary_string(raw_str)
+        self.assertEqual(binstring, ''.join(bip39.dec2bin(byte, zero_padding=8)
+                                            for byte in range(256)))
+        self.assertEqual(bip39.decode_binary_string(binstring), raw_str)
+        #incomplete trailing byte is ignored
+        self.assertEqual(bip39.decode_binary_string('000000010'), '\x01')
+
+    def test_binary_string_invalid(self):
+        """Characters other than 0 and 1 are rejected"""
+        with self.assertRaises(ValueError):
+            bip39.decode_binary_string('0000000a')
+        with self.assertRaises(ValueError):
+            bip39.binstring2word_index('0000000000a')
+
     def test_bin2hex_valid(self):
         """Test function with valid binary strings"""
         self.assertEqual(bip39.bin2hex('0'), '0')
@@ -271,3 +502,72 @@ class FunctionTest(unittest.TestCase):
 
         with self.assertRaises(ValueError):
             bip39.bin2hex("012")
+
+class LayoutTest(unittest.TestCase):
+    """Per-length layouts of entropy and checksum bits"""
+
+    def test_table(self):
+        """BIP39's table of ENT and CS per number of words"""
+        self.assertEqual(
+            [(n_words, bip39.LAYOUTS[n_words].ent, bip39.LAYOUTS[n_words].cs)
+             for n_words in sorted(bip39.LAYOUTS)],
+            [(3, 32, 1), (6, 64, 2), (9, 96, 3), (12, 128, 4), (15, 160, 5),
+             (18, 192, 6), (21, 224, 7), (24, 256, 8)])
+        for n_words in (0, 1, 2, 13, 25, bip39.MAX_WORDS + 3):
+            self.assertIsNone(bip39.get_layout(n_words))
+        self.assertEqual(bip39.get_layout(bip39.MAX_WORDS).cs, 256)
+        codec = bip39.get_default_codec(print_warning=False)
+        self.assertEqual([n_words for n_words in range(30)
+                          if codec.is_normal_length(n_words)],
+                         [12, 15, 18, 21, 24])
+
+    def test_checksum(self):
+        """Checksums are the leading CS bits of the entropy's SHA-256"""
+        for n_words in (3, 12, 24, 48, bip39.MAX_WORDS):
+            layout = bip39.get_layout(n_words)
+            for entropy in (0, 1, 0x5a5a5a5a << (layout.ent - 32),
+                            (1 << layout.ent) - 1):
+                binstring = layout.binstring(entropy)
+                self.assertEqual(len(binstring), layout.ent)
+                digest = hashlib.sha256(
+                    bip39.decode_binary_string(binstring)).digest()
+                expected = bip39.encode_binary_string(digest)[0:layout.cs]
+                self.assertEqual(bip39.dec2bin(layout.checksum(entropy),
+                                               zero_padding=layout.cs),
+                                 expected)
+                self.assertEqual(bip39.checksum(binstring), expected)
+
+    def test_encode_lengths(self):
+        """Every layout encodes; other lengths are refused, not truncated"""
+        codec = bip39.get_default_codec(print_warning=False)
+        binstrings = [bip39.LAYOUTS[n_words].binstring(0x5a5a5a5a)
+                      for n_words in sorted(bip39.LAYOUTS)]
+        mnemonics = codec.binstrings2mnemonics(binstrings)
+        for binstring, mnemonic in zip(binstrings, mnemonics):
+            self.assertEqual(codec.binstring2mnemonic(binstring), mnemonic)
+            self.assertEqual(codec.mnemonic2binstring(mnemonic), binstring)
+        for binstring in ('', '0' * 40, '0' * 127, ' 0b' + '1' * 29,
+                          '0' * 31 + '2'):
+            with self.assertRaises(ValueError):
+                codec.binstring2mnemonic(binstring)
+            with self.assertRaises(ValueError):
+                codec.binstrings2mnemonics(binstrings + [binstring])
+        with self.assertRaises(ValueError):
+            bip39.checksum('0' * 40)
+        self.assertFalse(bip39.Mnemonic.from_words(['abandon'] * 4).valid)
+
+    def test_lengths_past_table(self):
+        """Mnemonics longer than the table decode like the others"""
+        codec = bip39.get_default_codec(print_warning=False)
+        binstring = '10' * 256
+        mnemonic = codec.binstring2mnemonic(binstring)
+        self.assertEqual(len(mnemonic.split()), 48)
+        self.assertEqual(codec.mnemonic2binstring(mnemonic), binstring)
+        self.assertEqual(bip39.Mnemonic.from_mnemonic(mnemonic).binstring,
+                         binstring)
+        self.assertEqual(len(codec.get_last_word_candidates(
+            ' '.join(mnemonic.split()[:-1]))), 1)
+        with self.assertRaises(bip39.FailedCheckSumError):
+            codec.mnemonic2binstring(' '.join(mnemonic.split()[:-2]))
+        self.assertFalse(bip39.Mnemonic.from_mnemonic(
+            ' '.join(mnemonic.split()[:-2])).valid)
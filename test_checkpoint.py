@@ -0,0 +1,160 @@
+"""Unit tests for checkpoint.py"""
+#Python Standard Library 2.7
+import os
+import shutil
+import tempfile
+import unittest
+
+#bip39_gym modules
+import checkpoint #checkpoint.py
+import check_dice_entropy #check_dice_entropy.py
+import entropy #entropy.py
+import entropy_sources #entropy_sources.py
+
+class Interrupt(Exception):
+    """Stands in for a KeyboardInterrupt or a killed process"""
+    pass
+
+def interrupt_after(func, n_calls):
+    """Wrap func to raise Interrupt on call n_calls + 1"""
+    calls = [0]
+    def wrapper(*args, **kwargs):
+        calls[0] += 1
+        if calls[0] > n_calls:
+            raise Interrupt()
+        return func(*args, **kwargs)
+    wrapper.__name__ = func.__name__
+    return wrapper
+
+class CheckpointTest(unittest.TestCase):
+    """Saving, loading and resuming checkpoints"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'job.ckpt')
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_save_load(self):
+        """State round-trips and only matching jobs may resume"""
+        job = checkpoint.Checkpoint(self.path, 'job', {'n_bits': 256,
+                                                        'sizes': (1, 2)})
+        self.assertIsNone(job.load())
+        job.save({'iteration': 5, 'counts': [1, 2, 3]})
+        job.save({'iteration': 6, 'counts': [1, 2, 4]})
+        self.assertEqual(os.listdir(self.tmpdir), ['job.ckpt'])
+        self.assertEqual(job.load(), {'iteration': 6, 'counts': [1, 2, 4]})
+        with self.assertRaises(checkpoint.CheckpointMismatchError):
+            checkpoint.Checkpoint(self.path, 'job', {'n_bits': 128}).load()
+        with self.assertRaises(checkpoint.CheckpointMismatchError):
+            checkpoint.Checkpoint(self.path, 'other', job.params).load()
+        job.remove()
+        self.assertFalse(os.path.exists(self.path))
+        with open(self.path, 'w') as checkpoint_file:
+            checkpoint_file.write('{"version": 1, "job": "jo')
+        with self.assertRaises(checkpoint.CorruptCheckpointError):
+            job.load()
+
+    def test_due(self):
+        """Saves are due every interval seconds"""
+        self.assertTrue(checkpoint.Checkpoint(self.path, 'job', {}, 0).due())
+        self.assertFalse(checkpoint.Checkpoint(self.path, 'job', {}, 60).due())
+
+    def test_source_state(self):
+        """DRBG and replay sources continue where they were saved"""
+        source = entropy_sources.HmacDrbgSource('\x00')
+        source.get_bytes(10)
+        state = checkpoint.source_state(source)
+        expected = source.get_bytes(32)
+        resumed = entropy_sources.HmacDrbgSource('\x00')
+        checkpoint.restore_source(resumed, state)
+        self.assertEqual(resumed.get_bytes(32), expected)
+
+        replay_path = os.path.join(self.tmpdir, 'replay.bin')
+        with open(replay_path, 'wb') as replay_file:
+            replay_file.write(''.join(chr(byte) for byte in range(64)))
+        replay = entropy_sources.ReplaySource(replay_path)
+        replay.get_bytes(10)
+        state = checkpoint.source_state(replay)
+        replay.close()
+        replay = entropy_sources.ReplaySource(replay_path)
+        checkpoint.restore_source(replay, state)
+        self.assertEqual(replay.get_bytes(2), '\x0a\x0b')
+        replay.close()
+
+        self.assertIsNone(checkpoint.source_state(None))
+        with self.assertRaises(checkpoint.CheckpointMismatchError):
+            checkpoint.restore_source(source, {'type': 'replay', 'offset': 0})
+
+    def test_entropy_test_resume(self):
+        """An interrupted entropy_test resumes to the uninterrupted result"""
+        expected = []
+        entropy.entropy_test(16, entropy.get_entropy, expected.append,
+                             entropy_sources.HmacDrbgSource('\x00'),
+                             iterations=300)
+        job = entropy.entropy_test_checkpoint(
+            self.path, 16, entropy.get_entropy, iterations=300, interval=0,
+            source=entropy_sources.HmacDrbgSource('\x00'))
+        with self.assertRaises(Interrupt):
+            entropy.entropy_test(16, interrupt_after(entropy.get_entropy, 120),
+                                 [].append,
+                                 entropy_sources.HmacDrbgSource('\x00'),
+                                 checkpoint=job, iterations=300)
+        self.assertEqual(job.load()['iteration'], 120)
+        lines = []
+        entropy.entropy_test(16, entropy.get_entropy, lines.append,
+                             entropy_sources.HmacDrbgSource('\x00'),
+                             checkpoint=job, iterations=300)
+        self.assertEqual(lines[0], "Resuming at iteration 120 from " + self.path)
+        self.assertEqual(lines[1:], expected)
+        self.assertFalse(os.path.exists(self.path))
+
+    def test_other_source_refused(self):
+        """A run with another DRBG seed or replay file doesn't resume"""
+        def job(source):
+            return entropy.entropy_test_checkpoint(
+                self.path, 16, entropy.get_entropy, source, iterations=300)
+        job(entropy_sources.HmacDrbgSource('\x00')).save({'iteration': 1})
+        job(entropy_sources.HmacDrbgSource('\x00')).load()
+        with self.assertRaises(checkpoint.CheckpointMismatchError):
+            job(entropy_sources.HmacDrbgSource('\x01')).load()
+
+        replay_paths = [os.path.join(self.tmpdir, name)
+                        for name in ('a.bin', 'b.bin')]
+        for replay_path in replay_paths:
+            with open(replay_path, 'wb') as replay_file:
+                replay_file.write('\x00' * 64)
+        replays = [entropy_sources.ReplaySource(replay_path)
+                   for replay_path in replay_paths]
+        job(replays[0]).save({'iteration': 1})
+        job(replays[0]).load()
+        with self.assertRaises(checkpoint.CheckpointMismatchError):
+            job(replays[1]).load()
+        for replay in replays:
+            replay.close()
+
+    def test_dice_uniformity_resume(self):
+        """The exhaustive dice test resumes inside a roll enumeration"""
+        saved = (check_dice_entropy.TEST2_MAX_BITS,
+                 check_dice_entropy.TEST2_MAX_ROLL_NUM,
+                 entropy.die_rolls_to_bitstring)
+        check_dice_entropy.TEST2_MAX_BITS = 4
+        check_dice_entropy.TEST2_MAX_ROLL_NUM = 3
+        job = checkpoint.Checkpoint(self.path, 'dice_uniformity', {}, 0)
+        try:
+            entropy.die_rolls_to_bitstring = interrupt_after(
+                entropy.die_rolls_to_bitstring, 6 + 36 + 100)
+            with self.assertRaises(Interrupt):
+                check_dice_entropy.test_die_rolls_to_bitstring_entropy_uniformity(job)
+            state = job.load()
+            self.assertEqual((state['case'], state['sequence']), (2, 100))
+            entropy.die_rolls_to_bitstring = saved[2]
+            self.assertEqual(
+                check_dice_entropy.test_die_rolls_to_bitstring_entropy_uniformity(job),
+                [])
+        finally:
+            (check_dice_entropy.TEST2_MAX_BITS,
+             check_dice_entropy.TEST2_MAX_ROLL_NUM,
+             entropy.die_rolls_to_bitstring) = saved
+        self.assertFalse(os.path.exists(self.path))
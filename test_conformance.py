@@ -0,0 +1,63 @@
+"""Unit tests for conformance.py"""
+#Python Standard Library 2.7
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+#bip39_gym modules
+import conformance #conformance.py
+
+class ConformanceTest(unittest.TestCase):
+    """Run the conformance checks over the bundled and altered vectors"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        with open(conformance.DEFAULT_VECTOR_FILES[1], 'r') as vector_file:
+            self.records = json.load(vector_file)['data']
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _write_jsonl(self, records):
+        path = os.path.join(self.tmpdir, 'vectors.jsonl')
+        with open(path, 'w') as jsonl:
+            for record in records:
+                jsonl.write(json.dumps(record) + '\n')
+        return path
+
+    def test_bundled_vectors(self):
+        """Both bundled vector files pass every stage"""
+        report = conformance.run_conformance(conformance.DEFAULT_VECTOR_FILES,
+                                             processes=2, chunk_size=5)
+        self.assertEqual(report['failures'], [])
+        self.assertEqual(report['records'], 28)
+        self.assertGreater(report['stage_seconds']['seed'], 0)
+
+    def test_failures_by_stage(self):
+        """Each altered column fails in its own stage only"""
+        altered = [dict(record) for record in self.records]
+        altered[0]['seed'] = '00' * 64
+        altered[1]['word_indices'] = [0] * altered[1]['n_words']
+        altered[2]['root'] = altered[3]['root']
+        path = self._write_jsonl(altered)
+        report = conformance.run_conformance([path], processes=0)
+        self.assertEqual(report['records'], 4)
+        self.assertEqual(sorted((stage, where) for stage, where, _ in
+                                report['failures']),
+                         [('indices', path + ':2'), ('seed', path + ':1'),
+                          ('xprv', path + ':3')])
+
+    def test_bad_mnemonic(self):
+        """A mnemonic with a bad checksum fails the entropy stage"""
+        record = dict(self.records[0])
+        words = record['mnemonic'].split()
+        record['mnemonic'] = ' '.join(words[:-1] + [words[0]])
+        del record['seed']
+        del record['root']
+        path = self._write_jsonl([record])
+        report = conformance.run_conformance([path], processes=0)
+        stages = set(stage for stage, _, _ in report['failures'])
+        self.assertIn('entropy', stages)
+        self.assertIn('mnemonic', stages)
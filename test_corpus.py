@@ -0,0 +1,90 @@
+"""Unit tests for corpus.py"""
+#Python Standard Library 2.7
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+#bip39_gym modules
+import bip39 #bip39.py
+import corpus #corpus.py
+
+class CorpusTest(unittest.TestCase):
+    """Write and read back both kinds of corpus"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'corpus.b39c')
+        with open('data/vectors.json', 'r') as vector_file:
+            self.vectors = [(str(vector[0]), str(vector[1])) for vector in
+                            json.load(vector_file)['english']]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_pack_indices(self):
+        """24 words pack into 33 bytes, most significant bit first"""
+        self.assertEqual(corpus.record_size(corpus.KIND_INDICES, 24), 33)
+        self.assertEqual(corpus.record_size(corpus.KIND_INDICES, 12), 17)
+        self.assertEqual(corpus.pack_indices([2047, 0]), '\xff\xe0\x00')
+        indices = tuple(range(0, 2048, 89))[0:24]
+        self.assertEqual(corpus.unpack_indices(corpus.pack_indices(indices), 24),
+                         indices)
+
+    def test_mnemonics(self):
+        """Mnemonics of one length round trip through an indices corpus"""
+        mnemonics = [mnemonic for _, mnemonic in self.vectors
+                     if len(mnemonic.split()) == 24]
+        self.assertEqual(corpus.write_mnemonics(self.path, mnemonics),
+                         len(mnemonics))
+        self.assertEqual(os.path.getsize(self.path),
+                         corpus.HEADER_SIZE + 33 * len(mnemonics))
+        self.assertEqual(corpus.read_mnemonics(self.path), mnemonics)
+        with corpus.CorpusReader(self.path) as reader:
+            self.assertEqual(reader[-1].mnemonic, mnemonics[-1])
+            self.assertEqual(str(reader.record(0)),
+                             corpus.pack_indices(reader.indices(0)))
+            with self.assertRaises(IndexError):
+                reader.indices(len(mnemonics))
+
+    def test_mixed_lengths(self):
+        """An indices corpus holds one mnemonic length only"""
+        with self.assertRaises(ValueError):
+            corpus.write_mnemonics(self.path, [self.vectors[0][1],
+                                               self.vectors[-1][1]])
+        self.assertFalse(os.path.exists(self.path))
+        self.assertEqual(os.listdir(self.tmpdir), [])
+
+    def test_entropy(self):
+        """Entropies of mixed lengths round trip through an entropy corpus"""
+        entropy_bins = [bip39.hex2bin(entropy_hex)
+                        for entropy_hex, _ in self.vectors]
+        corpus.write_binstrings(self.path, entropy_bins)
+        self.assertEqual(corpus.read_binstrings(self.path), entropy_bins)
+        self.assertEqual(corpus.read_mnemonics(self.path),
+                         [mnemonic for _, mnemonic in self.vectors])
+        with corpus.CorpusReader(self.path) as reader:
+            self.assertEqual(len(reader), len(self.vectors))
+            for mnemonic, (entropy_hex, sentence) in zip(reader, self.vectors):
+                self.assertEqual(mnemonic.entropy_hex, entropy_hex)
+                self.assertEqual(mnemonic.mnemonic, sentence)
+
+    def test_invalid_checksum(self):
+        """Mnemonics with a bad checksum are stored as they are"""
+        with corpus.CorpusWriter(self.path, corpus.KIND_INDICES, 12) as writer:
+            writer.write_indices([0] * 12)
+        with corpus.CorpusReader(self.path) as reader:
+            self.assertFalse(reader[0].valid)
+            self.assertEqual(reader.indices(0), (0,) * 12)
+
+    def test_corrupt(self):
+        """Truncated or foreign files are rejected"""
+        corpus.write_binstrings(self.path, ['0' * 128] * 3)
+        with open(self.path, 'rb') as corpus_file:
+            data = corpus_file.read()
+        for bad in ('', 'garbage', data[:-1], 'X' + data[1:]):
+            with open(self.path, 'wb') as corpus_file:
+                corpus_file.write(bad)
+            with self.assertRaises(corpus.CorruptCorpusError):
+                corpus.CorpusReader(self.path)
@@ -0,0 +1,228 @@
+"""Unit tests for distributed.py"""
+#Python Standard Library 2.7
+import os
+import time
+import shutil
+import tempfile
+import unittest
+
+#bip39_gym modules
+import bip32 #bip32.py
+import bip39 #bip39.py
+import check_dice_entropy #check_dice_entropy.py
+import checkpoint as checkpoint_mod #checkpoint.py
+import distributed #distributed.py
+
+DICE_PARAMS = {'max_bits': 6, 'max_roll_num': 5}
+
+MNEMONIC = ('legal winner thank year wave sausage worth useful legal winner '
+            'thank yellow')
+
+class FailingJob(object):
+    """A job whose params pass validate() but whose run() raises"""
+    name = 'failing'
+
+    @staticmethod
+    def validate(_params):
+        pass
+
+    @staticmethod
+    def size(_params):
+        return 4
+
+    @staticmethod
+    def stops_early(_params):
+        return False
+
+    @staticmethod
+    def run(_params, _start, _stop):
+        raise ValueError("disk full")
+
+    @staticmethod
+    def summarize(_params, counters, _results):
+        return counters
+
+class DistributedTest(unittest.TestCase):
+    """Coordinator and local worker processes standing in for nodes"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.tmpdir, 'coordinator.sock')
+        self.dice = distributed.get_job('dice_uniformity')
+        self.coordinators = []
+
+    def tearDown(self):
+        for coordinator in self.coordinators:
+            coordinator.close()
+        shutil.rmtree(self.tmpdir)
+
+    def _coordinator(self, job, params, **kwargs):
+        coordinator = distributed.Coordinator(
+            kwargs.pop('address', self.socket_path), job, params, **kwargs)
+        self.coordinators.append(coordinator)
+        coordinator.start()
+        return coordinator
+
+    def _run(self, coordinator, processes=2):
+        workers = distributed.start_workers(coordinator.address, processes,
+                                            connect_timeout=5)
+        result = coordinator.wait(60)
+        for worker in workers:
+            worker.join(10)
+        self.assertIsNotNone(result)
+        return result
+
+    def test_roll_sequence(self):
+        """Units are numbered like check_dice_entropy's enumeration"""
+        self.assertEqual(
+            [distributed._roll_sequence(number, 3) for number in range(6 ** 3)],
+            check_dice_entropy._get_dice_rolls_of_len(3))
+
+    def test_merge_counters(self):
+        """Numbers, lists and dicts"""
+        total = distributed.merge_counters({}, {'n': 1, 'a': [[1, 2], [0, 0]]})
+        distributed.merge_counters(total, {'n': 2, 'a': [[1, 1], [0, 3]],
+                                           'd': {'x': 1}})
+        self.assertEqual(total, {'n': 3, 'a': [[2, 3], [0, 3]], 'd': {'x': 1}})
+
+    def test_dead_and_hung_workers(self):
+        """Leases of a disconnected and a silent worker are reassigned and
+        the merged counters match a run on one process"""
+        coordinator = self._coordinator('dice_uniformity', DICE_PARAMS,
+                                        lease_size=500, lease_timeout=0.5)
+        dead = distributed.CoordinatorClient(coordinator.address)
+        dead.call('hello')
+        self.assertIn('lease', dead.call('lease'))
+        dead.close()
+        hung = distributed.CoordinatorClient(coordinator.address)
+        hung.call('hello')
+        hung_lease = hung.call('lease')['lease']
+        result = self._run(coordinator)
+        self.assertTrue(result['complete'])
+        self.assertGreaterEqual(result['reassigned'], 2)
+        expected = self.dice.run(DICE_PARAMS, 0, self.dice.size(DICE_PARAMS))
+        self.assertEqual(result['counters'], expected['counters'])
+        self.assertEqual(result['summary'], {'failures': []})
+        #the hung worker wakes up: its lease was completed by another
+        self.assertFalse(hung.call('complete', lease=hung_lease['id'],
+                                   counters={'1,1': [[9], [9]]},
+                                   results=[])['accepted'])
+        self.assertEqual(coordinator.result()['counters'], expected['counters'])
+        hung.close()
+
+    def test_stale_renew(self):
+        """A reassigned lease can't be renewed by its former holder"""
+        coordinator = self._coordinator('dice_uniformity', DICE_PARAMS,
+                                        lease_size=500, lease_timeout=0.01)
+        client = distributed.CoordinatorClient(coordinator.address)
+        client.call('hello')
+        lease = client.call('lease')['lease']
+        time.sleep(0.05)
+        self.assertEqual(client.call('lease')['lease']['start'], lease['start'])
+        self.assertFalse(client.call('renew', lease=lease['id'])['active'])
+        client.close()
+
+    def test_token(self):
+        """Non-local listeners need a token, which workers must present"""
+        with self.assertRaises(ValueError):
+            distributed.Coordinator(('0.0.0.0', 0), 'dice_uniformity',
+                                    DICE_PARAMS)
+        coordinator = self._coordinator('dice_uniformity', DICE_PARAMS,
+                                        address=('127.0.0.1', 0), token='s3cret')
+        client = distributed.CoordinatorClient(coordinator.address)
+        with self.assertRaises(distributed.RemoteError):
+            client.call('lease')
+        with self.assertRaises(distributed.RemoteError):
+            client.call('hello', token='guess')
+        self.assertEqual(client.call('hello', token='s3cret')['job'],
+                         'dice_uniformity')
+        client.close()
+        with self.assertRaises(distributed.UnknownJobError):
+            distributed.Coordinator(self.socket_path, 'mine_bitcoin', {})
+
+    def test_bad_params(self):
+        """Params a worker would fail on are refused by the coordinator"""
+        for job, params in [
+                ('word_order', {'mnemonic': 'notaword ' + MNEMONIC, 'shards': 4}),
+                ('word_order', {'mnemonic': MNEMONIC, 'shards': 4,
+                                'target': {'address': 'xyz'}}),
+                ('passphrase', {'mnemonic': MNEMONIC, 'mask': '?d',
+                                'target': None}),
+                ('passphrase', {'mnemonic': MNEMONIC, 'words': [u'caf\xe9'],
+                                'target': {'seed_prefix': '00'}})]:
+            with self.assertRaises((ValueError, KeyError,
+                                    bip32.InvalidBase58Error,
+                                    bip39.InvalidWordError)):
+                distributed.Coordinator(self.socket_path, job, params)
+
+    def test_failed_lease(self):
+        """A worker reports a job that raised, which ends the job"""
+        distributed.JOBS['failing'] = FailingJob()
+        try:
+            coordinator = self._coordinator('failing', {}, lease_size=1)
+            self.assertEqual(distributed.run_worker(coordinator.address,
+                                                    connect_timeout=5), 0)
+            result = coordinator.wait(10)
+        finally:
+            del distributed.JOBS['failing']
+        self.assertIsNotNone(result)
+        self.assertFalse(result['complete'])
+        self.assertEqual(result['error'], 'ValueError: disk full')
+        self.assertEqual(result['leases'], 1)
+
+    def test_checkpoint(self):
+        """A restarted coordinator only hands out the remaining leases"""
+        path = os.path.join(self.tmpdir, 'checkpoint.json')
+        checkpoint = checkpoint_mod.Checkpoint(path, 'distributed_dice_uniformity',
+                                               DICE_PARAMS, interval=0)
+        coordinator = self._coordinator('dice_uniformity', DICE_PARAMS,
+                                        lease_size=5000, checkpoint=checkpoint)
+        client = distributed.CoordinatorClient(coordinator.address)
+        client.call('hello')
+        for _ in range(2):
+            lease = client.call('lease')['lease']
+            outcome = self.dice.run(DICE_PARAMS, lease['start'], lease['stop'])
+            client.call('complete', lease=lease['id'], **outcome)
+        client.close()
+        coordinator.close()
+        self.coordinators.remove(coordinator)
+        checkpoint = checkpoint_mod.Checkpoint(path, 'distributed_dice_uniformity',
+                                               DICE_PARAMS, interval=0)
+        coordinator = self._coordinator('dice_uniformity', DICE_PARAMS,
+                                        lease_size=5000, checkpoint=checkpoint)
+        result = self._run(coordinator, processes=1)
+        self.assertEqual(result['leases'], coordinator.n_leases - 2)
+        expected = self.dice.run(DICE_PARAMS, 0, self.dice.size(DICE_PARAMS))
+        self.assertEqual(result['counters'], expected['counters'])
+        self.assertFalse(os.path.exists(path))
+
+    def test_passphrase(self):
+        """A passphrase job stops at the first match"""
+        mnemonic = ' '.join(['abandon'] * 11 + ['about'])
+        seed_hex = bip39.mnemonic2seed(mnemonic, 'Hunt3r')
+        coordinator = self._coordinator(
+            'passphrase', {'mnemonic': mnemonic, 'mask': 'Hun?l?dr',
+                           'target': {'seed_prefix': seed_hex[:16]}},
+            lease_size=20)
+        self.assertEqual(coordinator.size, 260)
+        result = self._run(coordinator)
+        self.assertEqual(result['summary']['passphrase'], 'Hunt3r')
+        self.assertLess(result['leases'], coordinator.n_leases)
+
+    def test_word_order(self):
+        """A word order job finds the order matching the target"""
+        words = MNEMONIC.split()
+        words[3], words[4] = words[4], words[3]
+        seed_hex = bip39.mnemonic2seed(MNEMONIC)
+        result = self._run(self._coordinator(
+            'word_order', {'mnemonic': ' '.join(words), 'shards': 8,
+                           'target': {'seed_prefix': seed_hex[:16]}},
+            lease_size=2))
+        self.assertEqual(result['summary']['match'], MNEMONIC)
+        result = self._run(self._coordinator(
+            'word_order', {'mnemonic': ' '.join(words), 'shards': 4,
+                           'max_swaps': 1, 'max_subset': 3},
+            address=os.path.join(self.tmpdir, 'all.sock')))
+        codec = bip39.get_default_codec(print_warning=False)
+        self.assertIn(tuple(codec.get_indices(MNEMONIC)),
+                      result['summary']['survivors'])
@@ -4,6 +4,7 @@ import unittest
 
 #bip39_gym modules
 import entropy #entropy.py
+import entropy_sources #entropy_sources.py
 
 ENABLE_DEBUG_PRINT = False
 
@@ -27,6 +28,14 @@ class FunctionTest(unittest.TestCase):
         self.assertEqual(len(entropy.get_entropy(n_bits=128)), 128)
         self.assertEqual(len(entropy.get_entropy(n_bits=256)), 256)
 
+    def test_get_entropy_source(self):
+        """Entropy from a deterministic source is reproducible"""
+        source1 = entropy_sources.HmacDrbgSource('seed')
+        source2 = entropy_sources.HmacDrbgSource('seed')
+        for n_bits in (1, 9, 128, 256):
+            self.assertEqual(entropy.get_entropy(n_bits, source=source1),
+                             entropy.get_entropy(n_bits, source=source2))
+
     def test_get_entropy_invalid(self):
         """Test invalid values for entropy"""
 
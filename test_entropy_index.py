@@ -0,0 +1,104 @@
+"""Unit tests for entropy_index.py"""
+#Python Standard Library 2.7
+import os
+import shutil
+import tempfile
+import unittest
+
+#bip39_gym modules
+import corpus #corpus.py
+import entropy_index #entropy_index.py
+import entropy_sources #entropy_sources.py
+
+class EntropyIndexTest(unittest.TestCase):
+    """Build, query and extend indexes with tiny sort runs"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, 'seen.idx')
+        source = entropy_sources.HmacDrbgSource('\x00' * 32)
+        self.entropies = [source.get_bytes(16 + 4 * (num % 5))
+                          for num in range(500)]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _build(self, entropies, **kwargs):
+        return entropy_index.build_index(self.path, entropies, run_records=64,
+                                         tmpdir=self.tmpdir, **kwargs)
+
+    def test_lookup(self):
+        """Every indexed entropy is found, others are not"""
+        self.assertEqual(self._build(self.entropies[0:400]), 400)
+        self.assertEqual(sorted(os.listdir(self.tmpdir)), ['seen.idx'])
+        with entropy_index.EntropyIndex(self.path) as index:
+            self.assertEqual(len(index), 400)
+            keys = list(index.iter_keys())
+            self.assertEqual(keys, sorted(keys))
+            for entropy_bytes in self.entropies[0:400]:
+                self.assertIn(entropy_bytes, index)
+            for entropy_bytes in self.entropies[400:]:
+                self.assertNotIn(entropy_bytes, index)
+            self.assertEqual(list(index.lookup_many(self.entropies)),
+                             [True] * 400 + [False] * 100)
+            #batches smaller than the input, fed from a generator
+            self.assertEqual(list(index.lookup_many(
+                (entropy_bytes for entropy_bytes in self.entropies[::-1]),
+                run_records=64)), [False] * 100 + [True] * 400)
+
+    def test_no_bloom(self):
+        """An index without a Bloom filter gives the same answers"""
+        self._build(self.entropies[0:100], bloom_bits_per_key=0)
+        with entropy_index.EntropyIndex(self.path) as index:
+            self.assertEqual(index.bloom_bits, 0)
+            self.assertEqual(list(index.lookup_many(self.entropies[90:110])),
+                             [True] * 10 + [False] * 10)
+
+    def test_length_is_part_of_key(self):
+        """A prefix of an indexed entropy is a different entropy"""
+        self._build(['\x00' * 32])
+        with entropy_index.EntropyIndex(self.path) as index:
+            self.assertIn('\x00' * 32, index)
+            self.assertNotIn('\x00' * 16, index)
+
+    def test_duplicates(self):
+        """Repeated entropies are found by position and indexed once"""
+        entropies = self.entropies[0:200] + [self.entropies[5],
+                                             self.entropies[150],
+                                             self.entropies[5]]
+        self.assertEqual(
+            sorted(entropy_index.find_duplicates(entropies, run_records=64,
+                                                 tmpdir=self.tmpdir)),
+            [[5, 200, 202], [150, 201]])
+        self.assertEqual(self._build(entropies), 200)
+        self.assertEqual(entropy_index.find_duplicates(self.entropies), [])
+
+    def test_insert(self):
+        """Bulk insert merges new entropies into the index"""
+        self._build(self.entropies[0:300])
+        self.assertEqual(entropy_index.insert(self.path, self.entropies[250:500],
+                                              run_records=64,
+                                              tmpdir=self.tmpdir), 500)
+        with entropy_index.EntropyIndex(self.path) as index:
+            self.assertEqual(list(index.lookup_many(self.entropies)),
+                             [True] * 500)
+
+    def test_corpus_entropies(self):
+        """Entropies are read from corpus files"""
+        corpus_path = os.path.join(self.tmpdir, 'archive.b39c')
+        with corpus.CorpusWriter(corpus_path, corpus.KIND_ENTROPY) as writer:
+            for entropy_bytes in self.entropies[0:10]:
+                writer.write_entropy(entropy_bytes)
+        self.assertEqual(list(entropy_index.iter_corpus_entropies([corpus_path])),
+                         self.entropies[0:10])
+
+    def test_corrupt(self):
+        """Truncated or foreign files are rejected"""
+        self._build(self.entropies[0:10])
+        with open(self.path, 'rb') as index_file:
+            data = index_file.read()
+        for bad in ('', 'garbage', data[:-1]):
+            with open(self.path, 'wb') as index_file:
+                index_file.write(bad)
+            with self.assertRaises(entropy_index.CorruptIndexError):
+                entropy_index.EntropyIndex(self.path)
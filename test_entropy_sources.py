@@ -0,0 +1,89 @@
+"""Unit tests for entropy_sources.py"""
+#Python Standard Library 2.7
+import os
+import shutil
+import tempfile
+import unittest
+import binascii
+
+#bip39_gym modules
+import entropy_sources #entropy_sources.py
+
+#NIST CAVP HMAC_DRBG.rsp, [SHA-256], no reseed, COUNT = 0
+NIST_ENTROPY = ('ca851911349384bffe89de1cbdc46e6831e44d34a4fb935ee285dd14b71a'
+                '7488')
+NIST_NONCE = '659ba96c601dc69fc902940805ec0ca8'
+NIST_RETURNED_BITS = (
+    'e528e9abf2dece54d47c7e75e5fe302149f817ea9fb4bee6f4199697d04d5b89d54fbb'
+    '978a15b5c443c9ec21036d2460b6f73ebad0dc2aba6e624abf07745bc107694bb7547b'
+    'b0995f70de25d6b29e2d3011bb19d27676c07162c8b5ccde0668961df86803482cb37e'
+    'd6d5c0bb8d50cf1f50d476aa0458bdaba806f48be9dcb8')
+
+class SourceTest(unittest.TestCase):
+    """Test entropy source implementations"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_hmac_drbg_nist_vector(self):
+        """The second generate call matches the NIST test vector"""
+        source = entropy_sources.HmacDrbgSource(
+            binascii.unhexlify(NIST_ENTROPY + NIST_NONCE))
+        source.get_bytes(128)
+        self.assertEqual(binascii.hexlify(source.get_bytes(128)),
+                         NIST_RETURNED_BITS)
+
+    def test_hmac_drbg_deterministic(self):
+        """Same seed, same stream; state can be saved and restored"""
+        source1 = entropy_sources.HmacDrbgSource('seed')
+        source2 = entropy_sources.HmacDrbgSource('seed')
+        self.assertEqual(source1.get_bytes(100), source2.get_bytes(100))
+        other = entropy_sources.HmacDrbgSource('seed', personalization='x')
+        self.assertNotEqual(source1.get_bytes(32), other.get_bytes(32))
+
+        state = source1.getstate()
+        expected = source1.get_bytes(70000)
+        self.assertEqual(len(expected), 70000)
+        source1.setstate(state)
+        self.assertEqual(source1.get_bytes(70000), expected)
+
+    def test_urandom_pool(self):
+        """Pooled urandom serves requests of every size"""
+        source = entropy_sources.UrandomSource(pool_size=64)
+        for n_bytes in (0, 1, 32, 63, 64, 65, 1000):
+            self.assertEqual(len(source.get_bytes(n_bytes)), n_bytes)
+        self.assertNotEqual(source.get_bytes(32), source.get_bytes(32))
+
+    def test_record_and_replay(self):
+        """A recorded run replays byte for byte"""
+        path = os.path.join(self.tmpdir, 'recording.bin')
+        recorder = entropy_sources.RecordingSource(
+            entropy_sources.UrandomSource(), path)
+        recorded = [recorder.get_bytes(n_bytes) for n_bytes in (16, 32, 7)]
+        recorder.close()
+
+        replay = entropy_sources.ReplaySource(path)
+        self.assertEqual([replay.get_bytes(n_bytes) for n_bytes in (16, 32, 7)],
+                         recorded)
+        self.assertEqual(replay.tell(), 55)
+        with self.assertRaises(entropy_sources.ExhaustedSourceError):
+            replay.get_bytes(1)
+        replay.seek(16)
+        self.assertEqual(replay.get_bytes(32), recorded[1])
+        replay.close()
+
+    def test_source_random(self):
+        """random.Random API on top of a deterministic source"""
+        rand1 = entropy_sources.SourceRandom(
+            entropy_sources.HmacDrbgSource('dice'))
+        rand2 = entropy_sources.SourceRandom(
+            entropy_sources.HmacDrbgSource('dice'))
+        rolls = [rand1.randint(1, 6) for _ in range(200)]
+        self.assertEqual(rolls, [rand2.randint(1, 6) for _ in range(200)])
+        self.assertEqual(set(rolls), set([1, 2, 3, 4, 5, 6]))
+        value = rand1.random()
+        self.assertTrue(0.0 <= value < 1.0)
+        self.assertTrue(0 <= rand1.getrandbits(3) < 8)
@@ -0,0 +1,76 @@
+"""Unit tests for fuzz.py"""
+#Python Standard Library 2.7
+import json
+import binascii
+import unittest
+
+#bip39_gym modules
+import bip39 #bip39.py
+import fuzz #fuzz.py
+
+class FuzzTest(unittest.TestCase):
+    """Test the reference codec and a small fuzzing run"""
+
+    def setUp(self):
+        self.reference = fuzz.ReferenceCodec()
+        self.codec = bip39.get_default_codec(print_warning=False)
+
+    def test_reference_vectors(self):
+        """The reference codec agrees with the Trezor vectors"""
+        with open('data/vectors.json', 'r') as vector_file:
+            vectors = json.load(vector_file)['english']
+        for vector in vectors:
+            entropy_bytes = binascii.unhexlify(vector[0])
+            self.assertEqual(self.reference.encode(entropy_bytes), vector[1])
+            self.assertEqual(self.reference.decode(str(vector[1])),
+                             entropy_bytes)
+
+    def test_reference_rejects(self):
+        """Bad words and checksums decode to None"""
+        self.assertIsNone(self.reference.decode('abandon ' * 12 + 'about'))
+        self.assertIsNone(self.reference.decode('abandon ' * 11 + 'zoo'))
+        self.assertIsNone(self.reference.decode('abandon ' * 11 + 'maximalism'))
+
+    def test_adversarial_cases(self):
+        """Every entropy length and the all-zero/all-one cases are generated"""
+        cases = list(fuzz.generate_cases(fuzz.shard_source('\x00', 0), 200))
+        entropies = [case[0] for case in cases]
+        self.assertEqual(set(len(raw) for raw in entropies),
+                         set(fuzz.ENTROPY_LENGTHS))
+        self.assertIn('\x00' * 16, entropies)
+        self.assertIn('\xff' * 20, entropies)
+
+    def test_deterministic_shards(self):
+        """A shard's cases depend only on the seed and shard number"""
+        first = list(fuzz.generate_cases(fuzz.shard_source('\x01', 3), 50))
+        again = list(fuzz.generate_cases(fuzz.shard_source('\x01', 3), 50))
+        other = list(fuzz.generate_cases(fuzz.shard_source('\x01', 4), 50))
+        self.assertEqual(first, again)
+        self.assertNotEqual(first, other)
+
+    def test_run(self):
+        """A small sharded run finds no failures"""
+        report = fuzz.run_fuzz('\x00', n_cases=600, processes=2,
+                               cases_per_shard=250)
+        self.assertEqual(report['cases'], 600)
+        self.assertEqual(report['failures'], [])
+
+    def test_detects_broken_codec(self):
+        """A codec with a wrong wordlist fails the differential checks"""
+        wordlist = list(self.codec.wordlist)
+        wordlist[0], wordlist[1] = wordlist[1], wordlist[0]
+        broken = bip39.Bip39Codec(wordlist=wordlist)
+        _, failures = fuzz.check_case('\x00' * 16, 0, 5, self.reference, broken)
+        checks = set(check for check, _ in failures)
+        self.assertIn('encode', checks)
+        self.assertIn('decode', checks)
+
+    def test_warning_boundaries(self):
+        """Only all-zero and all-one entropies expect a warning"""
+        for entropy_bytes, warnings in (('\x00' * 16, 1), ('\xff' * 32, 1),
+                                        ('\x00' * 15 + '\x01', 0),
+                                        ('\x00' * 8 + '\xff' * 8, 0)):
+            _, failures = fuzz.check_case(entropy_bytes, 0, 0, self.reference,
+                                          self.codec)
+            self.assertEqual(failures, [])
+            self.assertEqual(fuzz.expected_warnings(entropy_bytes), warnings)
@@ -0,0 +1,107 @@
+"""Unit tests for gen_vectors.py"""
+#Python Standard Library 2.7
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+#bip39_gym modules
+import bip39 #bip39.py
+import conformance #conformance.py
+import gen_vectors #gen_vectors.py
+import entropy_sources #entropy_sources.py
+
+class GenVectorsTest(unittest.TestCase):
+    """Generate small corpora and check them with conformance.py"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def _source(self):
+        return entropy_sources.HmacDrbgSource('\x00' * 32)
+
+    def test_entropy_bits(self):
+        """Entropy length follows from the number of words"""
+        self.assertEqual(gen_vectors.entropy_bits(3), 32)
+        self.assertEqual(gen_vectors.entropy_bits(12), 128)
+        self.assertEqual(gen_vectors.entropy_bits(24), 256)
+        with self.assertRaises(ValueError):
+            gen_vectors.entropy_bits(13)
+
+    def test_round_robin_lengths(self):
+        """Word counts alternate across batches"""
+        entropies = (gen_vectors.generate_entropies(3, (3, 24), self._source()) +
+                     gen_vectors.generate_entropies(3, (3, 24), self._source(),
+                                                    first_record=3))
+        self.assertEqual([len(raw) for raw in entropies], [4, 32, 4, 32, 4, 32])
+
+    def test_record_schema(self):
+        """Records match the columns of the bundled random vectors"""
+        record = gen_vectors.make_records(['\x00' * 16], ['ab' * 64])[0]
+        self.assertEqual(record.keys(), ['n_words', 'entropy_hex',
+                                         'entropy_binary', 'word_indices',
+                                         'mnemonic', 'passphrase', 'seed'])
+        self.assertEqual(record['mnemonic'], 'abandon ' * 11 + 'about')
+        self.assertEqual(record['word_indices'], [0] * 11 + [3])
+        self.assertEqual(record['n_words'], 12)
+
+    def test_jsonl_conformance(self):
+        """A generated JSONL corpus passes every conformance stage"""
+        path = os.path.join(self.tmpdir, 'vectors.jsonl')
+        with open(path, 'wb') as out_file:
+            n_records = gen_vectors.generate(
+                gen_vectors.JsonlWriter(out_file), 20,
+                gen_vectors.ALLOWED_WORD_COUNTS, self._source(),
+                passphrase='TREZOR', processes=2, batch_size=3)
+        self.assertEqual(n_records, 20)
+        report = conformance.run_conformance([path], processes=0)
+        self.assertEqual(report['records'], 20)
+        self.assertEqual(report['failures'], [])
+
+    def test_binary_round_trip(self):
+        """A binary corpus reads back as the same records as JSONL"""
+        jsonl_path = os.path.join(self.tmpdir, 'vectors.jsonl')
+        binary_path = os.path.join(self.tmpdir, 'vectors.b39v')
+        with open(jsonl_path, 'wb') as out_file:
+            gen_vectors.generate(gen_vectors.JsonlWriter(out_file), 10,
+                                 source=self._source(), passphrase='pass',
+                                 processes=0, batch_size=4)
+        with open(binary_path, 'wb') as out_file:
+            gen_vectors.generate(
+                gen_vectors.BinaryWriter(out_file, passphrase='pass'), 10,
+                source=self._source(), passphrase='pass', processes=0,
+                batch_size=4)
+        with open(jsonl_path, 'r') as jsonl:
+            expected = [json.loads(line) for line in jsonl]
+        records = list(gen_vectors.iter_binary_vectors(binary_path))
+        self.assertEqual(json.loads(json.dumps(records)), expected)
+        self.assertEqual(os.path.getsize(binary_path),
+                         gen_vectors.BINARY_HEADER_SIZE + len('pass') +
+                         10 * gen_vectors.binary_record_size(True))
+        report = conformance.run_conformance([binary_path], processes=0)
+        self.assertEqual(report['failures'], [])
+
+    def test_binary_without_seeds(self):
+        """Seedless binary records still give entropy and mnemonic"""
+        path = os.path.join(self.tmpdir, 'vectors.b39v')
+        with open(path, 'wb') as out_file:
+            gen_vectors.generate(gen_vectors.BinaryWriter(out_file, False), 5,
+                                 (12,), self._source(), with_seeds=False)
+        records = list(gen_vectors.iter_binary_vectors(path))
+        self.assertEqual(len(records), 5)
+        for record in records:
+            self.assertNotIn('seed', record)
+            self.assertEqual(bip39.mnemonic2binstring(record['mnemonic']),
+                             record['entropy_binary'])
+
+    def test_bad_binary_file(self):
+        """Files without the header are rejected"""
+        path = os.path.join(self.tmpdir, 'vectors.b39v')
+        with open(path, 'wb') as out_file:
+            out_file.write('garbage!' * 4)
+        with self.assertRaises(ValueError):
+            list(gen_vectors.iter_binary_vectors(path))
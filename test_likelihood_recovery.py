@@ -0,0 +1,109 @@
+"""Unit tests for likelihood_recovery.py"""
+#Python Standard Library 2.7
+import math
+import random
+import itertools
+import unittest
+
+#bip39_gym modules
+import bip39 #bip39.py
+import likelihood_recovery as recovery #likelihood_recovery.py
+import passphrase_recovery #passphrase_recovery.py
+import wordlists #wordlists.py
+
+MNEMONIC = ('legal winner thank year wave sausage worth useful legal winner '
+            'thank yellow')
+
+class LikelihoodRecoveryTest(unittest.TestCase):
+    """Scoring, best-first order and the checksum batches"""
+
+    def setUp(self):
+        self.wordlist = wordlists.open_wordlist('english')
+        self.codec = bip39.get_default_codec(print_warning=False)
+
+    def test_reading_cost(self):
+        """Likely misreadings cost less than arbitrary edits"""
+        self.assertEqual(recovery.reading_cost('winner', 'winner'), 0)
+        self.assertEqual(recovery.reading_cost('aban', 'abandon'), 0)
+        #s is next to a on the keyboard, p isn't
+        self.assertLess(recovery.reading_cost('sbandon', 'abandon'),
+                        recovery.reading_cost('pbandon', 'abandon'))
+        self.assertLess(recovery.reading_cost('rnoon', 'moon'),
+                        recovery.reading_cost('rnoon', 'noon'))
+        self.assertLess(recovery.reading_cost('thnak', 'thank'),
+                        recovery.reading_cost('thxyk', 'thank'))
+
+    def test_alternatives(self):
+        """Each kind of token"""
+        winner = self.wordlist.index('winner')
+        self.assertEqual(recovery.position_alternatives('winner', self.wordlist),
+                         [(0.0, winner)])
+        reading = recovery.position_alternatives('winnr', self.wordlist)
+        self.assertEqual(reading[0][1], winner)
+        self.assertEqual(len(reading), recovery.MAX_ALTERNATIVES)
+        self.assertLessEqual(sum(math.exp(log_prob) for log_prob, _ in reading), 1)
+        self.assertEqual(recovery.position_alternatives('winner?', self.wordlist)[0][1],
+                         winner)
+        self.assertEqual(len(recovery.position_alternatives('?', self.wordlist)),
+                         2048)
+        prefix = recovery.position_alternatives('aba*', self.wordlist)
+        self.assertEqual([index for _, index in prefix],
+                         self.wordlist.prefix_matches('aba'))
+        with self.assertRaises(ValueError):
+            recovery.position_alternatives('xq*', self.wordlist)
+
+    def test_best_first(self):
+        """Every combination once, in order of decreasing probability"""
+        rand = random.Random(39)
+        alternatives = []
+        for size in (3, 1, 4, 2):
+            log_probs = sorted([math.log(rand.random()) for _ in range(size)],
+                               reverse=True)
+            alternatives.append(list(zip(log_probs, range(size))))
+        results = list(recovery.best_first(alternatives))
+        self.assertEqual(sorted(indices for _, indices in results),
+                         list(itertools.product(*[range(len(alts))
+                                                  for alts in alternatives])))
+        log_probs = [log_prob for log_prob, _ in results]
+        self.assertEqual(log_probs, sorted(log_probs, reverse=True))
+        stats = {}
+        bounded = list(recovery.best_first(alternatives, max_queue=2, stats=stats))
+        self.assertGreater(stats['dropped'], 0)
+        self.assertEqual(bounded[0], results[0])
+
+    def test_batch_checksum(self):
+        """Batch checksums agree with the codec"""
+        rand = random.Random(39)
+        for n_words in (12, 24):
+            rows = [[rand.randrange(2048) for _ in range(n_words)]
+                    for _ in range(300)]
+            rows.append(self.codec.get_indices(
+                self.codec.binstring2mnemonic('0' * (n_words * 32 // 3))))
+            valid = recovery.batch_checksum_valid(rows)
+            for row, row_valid in zip(rows, valid):
+                try:
+                    self.codec.mnemonic2binstring(self.codec.get_mnemonic(row))
+                    expected = True
+                except bip39.FailedCheckSumError:
+                    expected = False
+                self.assertEqual(bool(row_valid), expected)
+            self.assertTrue(valid[-1])
+
+    def test_recover(self):
+        """A damaged backup is recovered after a small part of the space"""
+        tokens = ('legal winnr thank yeer wave sausage worth usefu? legal '
+                  'winner thank ?').split()
+        alternatives = [recovery.position_alternatives(token, self.wordlist)
+                        for token in tokens]
+        stats = {}
+        survivors = recovery.search(alternatives, batch_size=256, stats=stats)
+        mnemonics = (self.codec.get_mnemonic(indices) for _, indices in survivors)
+        target = passphrase_recovery.SeedPrefixTarget(
+            bip39.mnemonic2seed(MNEMONIC)[:16])
+        self.assertEqual(recovery.find_match(mnemonics, target, processes=0),
+                         MNEMONIC)
+        self.assertLess(stats['candidates'], 10 ** 5)
+        survivors = recovery.search(alternatives, batch_size=256)
+        mnemonics = (self.codec.get_mnemonic(indices) for _, indices in survivors)
+        self.assertEqual(recovery.find_match(mnemonics, target, processes=2,
+                                             batch_size=8), MNEMONIC)
@@ -0,0 +1,103 @@
+"""Unit tests for min_entropy.py"""
+#Python Standard Library 2.7
+import os
+import shutil
+import tempfile
+import unittest
+
+#PyPI modules
+import numpy as np #pip install numpy
+
+#bip39_gym modules
+import entropy_sources #entropy_sources.py
+import min_entropy #min_entropy.py
+
+class MinEntropyTest(unittest.TestCase):
+    """Estimates of uniform, biased and predictable samples"""
+
+    def setUp(self):
+        self.random = np.random.RandomState(39)
+
+    def _estimates(self, alphabet_size, symbols):
+        estimator = min_entropy.MinEntropyEstimator(alphabet_size)
+        estimator.update(symbols)
+        return estimator.estimates()
+
+    def test_collision_expectation(self):
+        """A fair coin collides after 2.5 flips on average"""
+        self.assertAlmostEqual(min_entropy._collision_expectation(0.5, 2), 2.5)
+
+    def test_uniform_dice(self):
+        """Fair dice give close to log2(6) bits per roll"""
+        results = self._estimates(6, self.random.randint(0, 6, 200000))
+        for name in ('mcv', 'markov', 'compression'):
+            self.assertGreater(results[name], 2.2, name)
+            self.assertLessEqual(results[name], 2.5850, name)
+        #the collision estimate is the most conservative on uniform data
+        self.assertGreater(results['collision'], 1.9)
+        self.assertEqual(results['min'], min(results[name] for name in
+                                             ('mcv', 'collision', 'markov',
+                                              'compression')))
+
+    def test_biased_dice(self):
+        """A die showing 6 in 30% of rolls has at most -log2(0.3) bits"""
+        rolls = self.random.choice(6, 200000, p=[0.14] * 5 + [0.3])
+        results = self._estimates(6, rolls)
+        self.assertLess(results['mcv'], 1.74)
+        self.assertLess(results['min'], 1.74)
+        self.assertGreater(results['min'], 1.6)
+
+    def test_predictable(self):
+        """A cycle has uniform counts but no Markov entropy"""
+        results = self._estimates(6, np.arange(60000) % 6)
+        self.assertGreater(results['mcv'], 2.5)
+        self.assertLess(results['markov'], 0.05)
+        self.assertEqual(self._estimates(2, np.zeros(5000, dtype=int))['min'], 0)
+
+    def test_streaming(self):
+        """Chunked updates give the same estimates as one update"""
+        symbols = self.random.randint(0, 6, 50000)
+        chunked = min_entropy.MinEntropyEstimator(6)
+        for chunk in np.array_split(symbols, 13):
+            chunked.update(chunk)
+        whole = self._estimates(6, symbols)
+        chunked = chunked.estimates()
+        self.assertEqual(sorted(chunked), sorted(whole))
+        for name in whole:
+            self.assertAlmostEqual(chunked[name], whole[name], places=9)
+
+    def test_too_few_samples(self):
+        """Estimates without enough samples are left out"""
+        results = self._estimates(6, [0, 1, 2, 3, 4, 5, 0, 1])
+        self.assertNotIn('compression', results)
+        self.assertIn('mcv', results)
+        with self.assertRaises(min_entropy.EstimatorSampleError):
+            min_entropy.MinEntropyEstimator(6).mcv()
+        with self.assertRaises(ValueError):
+            min_entropy.MinEntropyEstimator(6).update([6])
+
+    def test_inputs(self):
+        """Dice logs and get_entropy bytes are read in chunks"""
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'rolls.txt')
+            with open(path, 'w') as log:
+                log.write('1 2 3\n4 5 6\n6\n')
+            chunks = list(min_entropy.iter_dice_log(path, chunk_symbols=4))
+            self.assertEqual([list(chunk) for chunk in chunks],
+                             [[0, 1, 2, 3, 4, 5], [5]])
+            with open(path, 'w') as log:
+                log.write('1 7\n')
+            with self.assertRaises(ValueError):
+                list(min_entropy.iter_dice_log(path))
+            self.assertEqual([list(chunk) for chunk in
+                              min_entropy.iter_dice_log(path, sides=20)],
+                             [[0, 6]])
+        finally:
+            shutil.rmtree(tmpdir)
+        source = entropy_sources.HmacDrbgSource('\x00')
+        chunks = list(min_entropy.iter_entropy_symbols(10, as_bits=True,
+                                                       source=source,
+                                                       chunk_bytes=4))
+        self.assertEqual([len(chunk) for chunk in chunks], [32, 32, 16])
+        self.assertEqual(min_entropy.symbols_needed(256, 2.0), 128)
@@ -0,0 +1,86 @@
+"""Unit tests for mnemonic_entry.py"""
+#Python Standard Library 2.7
+import json
+import random
+import unittest
+
+#bip39_gym modules
+import bip39 #bip39.py
+import mnemonic_entry #mnemonic_entry.py
+
+TEST_VECTOR_FILE = 'data/vectors.json'
+
+class MnemonicEntryTest(unittest.TestCase):
+    """Keystrokes, words, states and completions"""
+
+    def setUp(self):
+        self.codec = bip39.get_default_codec(print_warning=False)
+
+    def test_vectors(self):
+        """Every vector is valid word by word and keystroke by keystroke"""
+        with open(TEST_VECTOR_FILE, 'r') as vector_file:
+            vectors = json.load(vector_file)['english']
+        for vector in vectors:
+            mnemonic = str(vector[1])
+            entry = mnemonic_entry.MnemonicEntry()
+            for word in mnemonic.split()[:-1]:
+                entry.add_word(word)
+                self.assertNotEqual(entry.state, mnemonic_entry.BAD_PREFIX)
+            entry.add_word(mnemonic.split()[-1])
+            self.assertEqual(entry.state, mnemonic_entry.VALID)
+            self.assertEqual(entry.binstring, bip39.hex2bin(vector[0]))
+            entry = mnemonic_entry.MnemonicEntry(
+                n_words=len(mnemonic.split()))
+            self.assertEqual(entry.type(mnemonic + '\n'), mnemonic_entry.VALID)
+            self.assertEqual(entry.mnemonic, mnemonic)
+
+    def test_states(self):
+        """Prefixes, unique prefixes, bad checksums and too many words"""
+        entry = mnemonic_entry.MnemonicEntry(n_words=12)
+        self.assertEqual(entry.type('ab'), mnemonic_entry.ENTERING)
+        self.assertEqual(entry.completions(3), ['abandon', 'ability', 'able'])
+        with self.assertRaises(bip39.InvalidWordError):
+            entry.accept()
+        self.assertEqual(entry.type('an '), mnemonic_entry.ENTERING)
+        self.assertEqual(entry.words, ['abandon'])
+        self.assertEqual(entry.type('xq'), mnemonic_entry.BAD_PREFIX)
+        self.assertEqual(entry.completions(), [])
+        self.assertEqual(entry.type('\b\b'), mnemonic_entry.ENTERING)
+        entry.type('abandon ' * 11)
+        self.assertEqual(entry.state, mnemonic_entry.BAD_CHECKSUM)
+        self.assertFalse(entry.checksum_valid)
+        with self.assertRaises(ValueError):
+            entry.binstring #pylint: disable=pointless-statement
+        with self.assertRaises(mnemonic_entry.TooManyWordsError):
+            entry.add_word('about')
+        entry.type('\b\b')
+        self.assertEqual((len(entry.words), entry.prefix), (11, 'aband'))
+        self.assertEqual(entry.type('\x7f' * 5 + 'about '), mnemonic_entry.VALID)
+        self.assertEqual(entry.suggestions('abandom'), ['abandon'])
+        self.assertEqual(entry.suggestions('zz'), ['zebra', 'zero', 'zone', 'zoo'])
+        with self.assertRaises(ValueError):
+            mnemonic_entry.MnemonicEntry(n_words=13)
+
+    def test_last_word_completions(self):
+        """Completions of the last word agree with the codec"""
+        rand = random.Random(39)
+        for n_words in (12, 15, 18, 21, 24):
+            words = [self.codec.wordlist[rand.randrange(2048)]
+                     for _ in range(n_words - 1)]
+            entry = mnemonic_entry.MnemonicEntry(n_words=n_words)
+            entry.type(' '.join(words) + ' ')
+            self.assertEqual(entry.completions(), sorted(
+                self.codec.get_last_word_candidates(' '.join(words))))
+            for word in entry.completions():
+                entry.add_word(word)
+                self.assertEqual(entry.state, mnemonic_entry.VALID)
+                entry.remove_word()
+
+    def test_normalized_language(self):
+        """Accented keystrokes of a compiled wordlist"""
+        codec = bip39.Bip39Codec(language='spanish')
+        entry = mnemonic_entry.MnemonicEntry(codec)
+        self.assertEqual(entry.type('\xc3\xa1bac'), mnemonic_entry.ENTERING)
+        self.assertEqual(entry.type(' '), mnemonic_entry.ENTERING)
+        self.assertEqual(entry.indices,
+                         [codec.get_index_from_word('\xc3\xa1baco')])
@@ -0,0 +1,137 @@
+"""Unit tests for passphrase_recovery.py"""
+#Python Standard Library 2.7
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+#bip39_gym modules
+import passphrase_recovery as recovery #passphrase_recovery.py
+
+MNEMONIC = ' '.join(['abandon'] * 11 + ['about'])
+
+#address m/44'/0'/0'/0/0 of MNEMONIC with the passphrase 'Hunt3r'
+HUNT3R_ADDRESS = '16EPcfz5kDBYwVeYL4PSkSsNn71nZ8EQwK'
+
+class Interrupt(Exception):
+    """Stands in for a KeyboardInterrupt"""
+    pass
+
+def interrupted(candidates, n_candidates):
+    """Yield n_candidates candidates, then raise Interrupt"""
+    for num, candidate in enumerate(candidates):
+        if num == n_candidates:
+            raise Interrupt()
+        yield candidate
+
+class GeneratorTest(unittest.TestCase):
+    """Candidate generators"""
+
+    def test_mask(self):
+        """Charsets, literals and escaped question marks"""
+        candidates = list(recovery.mask_candidates('?u?d!??'))
+        self.assertEqual(len(candidates), 26 * 10)
+        self.assertEqual(candidates[0], 'A0!?')
+        self.assertEqual(len(list(recovery.mask_candidates('?a'))), 95)
+        with self.assertRaises(ValueError):
+            list(recovery.mask_candidates('?x'))
+
+    def test_variants(self):
+        """Case, leetspeak and edit variants start with the word itself"""
+        self.assertEqual(list(recovery.case_variants('a1b')),
+                         ['a1b', 'a1B', 'A1b', 'A1B'])
+        leet = list(recovery.leet_variants('sea'))
+        self.assertEqual(leet[0], 'sea')
+        self.assertEqual(len(leet), 3 * 2 * 3)
+        self.assertIn('$3@', leet)
+        edits = list(recovery.edit_variants('ab', 1, alphabet='abc'))
+        self.assertEqual(edits[0], 'ab')
+        self.assertEqual(len(edits), len(set(edits)))
+        for variant in ('b', 'ba', 'cb', 'abc', 'cab'):
+            self.assertIn(variant, edits)
+        self.assertNotIn('ca', edits)
+        self.assertIn('ca', list(recovery.edit_variants('ab', 2, alphabet='abc')))
+
+    def test_expand(self):
+        """Variants are chained per word, each once"""
+        candidates = list(recovery.expand(['hunter', 'x'], leet=True, case=True))
+        self.assertIn('Hunt3r', candidates)
+        self.assertIn('X', candidates)
+        self.assertEqual(len(candidates), len(set(candidates)))
+        self.assertEqual(list(recovery.expand(['ab'])), ['ab'])
+
+class RecoveryTest(unittest.TestCase):
+    """Targets and the recovery loop"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.target = recovery.AddressTarget(HUNT3R_ADDRESS)
+        self.candidates = ['hunter', 'Hunter', 'hunter1', 'HUNTER', 'hunt3r',
+                           'Hunt3r', 'hunt3r!']
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_targets(self):
+        """Seed prefix, xprv and address targets of a Trezor vector"""
+        with open('data/vectors.json', 'r') as vector_file:
+            _, mnemonic, seed_hex, xprv = json.load(vector_file)['english'][0]
+        self.assertEqual(mnemonic, MNEMONIC)
+        targets = [recovery.SeedPrefixTarget(seed_hex[:8].upper()),
+                   recovery.ExtendedKeyTarget(xprv)]
+        for target in targets:
+            self.assertTrue(target.matches(seed_hex))
+            self.assertFalse(target.matches('00' + seed_hex[2:]))
+        with self.assertRaises(ValueError):
+            recovery.SeedPrefixTarget('xyz')
+        with self.assertRaises(ValueError):
+            recovery.AddressTarget(xprv)
+
+    def test_recover(self):
+        """The passphrase is found in process and on a pool"""
+        lines = []
+        self.assertEqual(recovery.recover(MNEMONIC, self.target, self.candidates,
+                                          processes=0, report=lines.append),
+                         'Hunt3r')
+        self.assertIn('candidates/s', lines[-1])
+        self.assertEqual(recovery.recover(MNEMONIC, self.target, self.candidates,
+                                          processes=2, chunk_size=2,
+                                          report=lines.append), 'Hunt3r')
+        self.assertIsNone(recovery.recover(MNEMONIC, self.target, ['a', 'b'],
+                                           processes=0, report=lines.append))
+
+    def test_not_utf8_skipped(self):
+        """Latin-1 dictionary lines are skipped, not fatal to the run"""
+        path = os.path.join(self.tmpdir, 'words.txt')
+        with open(path, 'w') as dictionary:
+            dictionary.write('caf\xe9\nhunter\n\xff\nHunt3r\n')
+        lines = []
+        self.assertEqual(recovery.recover(
+            MNEMONIC, self.target, recovery.dictionary_candidates(path),
+            processes=2, chunk_size=1, report=lines.append), 'Hunt3r')
+        self.assertEqual(lines[-1], '2 candidates skipped as not valid UTF-8')
+
+    def test_resume(self):
+        """A resumed run skips the candidates already checked"""
+        path = os.path.join(self.tmpdir, 'recovery.ckpt')
+        job = recovery.recovery_checkpoint(path, MNEMONIC, self.target,
+                                           {'guess': ['hunter']}, interval=0)
+        with self.assertRaises(Interrupt):
+            recovery.recover(MNEMONIC, self.target,
+                             interrupted(self.candidates, 4), processes=0,
+                             chunk_size=2, checkpoint=job, report=[].append)
+        self.assertEqual(job.load(), {'position': 4})
+        with open(path, 'r') as checkpoint_file:
+            saved = checkpoint_file.read()
+        self.assertNotIn('abandon', saved)
+        self.assertNotIn('hunter', saved)
+        with self.assertRaises(recovery.checkpoint_mod.CheckpointMismatchError):
+            recovery.recovery_checkpoint(path, MNEMONIC, self.target,
+                                         {'guess': ['hunter2']}).load()
+        lines = []
+        self.assertEqual(recovery.recover(MNEMONIC, self.target, self.candidates,
+                                          processes=0, checkpoint=job,
+                                          report=lines.append), 'Hunt3r')
+        self.assertEqual(lines[0], 'Resuming after 4 candidates from ' + path)
+        self.assertFalse(os.path.exists(path))
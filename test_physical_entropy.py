@@ -0,0 +1,129 @@
+"""Unit tests for physical_entropy.py"""
+#Python Standard Library 2.7
+import math
+import functools
+import itertools
+import unittest
+
+#bip39_gym modules
+import entropy #entropy.py
+import entropy_sources #entropy_sources.py
+import physical_entropy #physical_entropy.py
+
+class ReaderTest(unittest.TestCase):
+    """Tokens of each kind of input as digits"""
+
+    def test_dice_and_coins(self):
+        """Faces are digits, the highest face (or a d10's 0) is 0"""
+        reader = physical_entropy.Reader('d20')
+        self.assertEqual(reader.digit('1'), (1, 20))
+        self.assertEqual(reader.digit('20'), (0, 20))
+        for token in ('0', '21', '-1', 'x'):
+            with self.assertRaises(ValueError):
+                reader.digit(token)
+        reader = physical_entropy.Reader('d10')
+        self.assertEqual([reader.digit(token)[0] for token in ('0', '10', '9')],
+                         [0, 0, 9])
+        reader = physical_entropy.Reader('coin')
+        self.assertEqual([reader.digit(token) for token in 'HtT'],
+                         [(1, 2), (0, 2), (0, 2)])
+        with self.assertRaises(ValueError):
+            reader.digit('HT')
+        with self.assertRaises(ValueError):
+            physical_entropy.Reader('d7')
+
+    def test_cards(self):
+        """Cards are Lehmer code digits of the deck they are dealt from"""
+        self.assertEqual(physical_entropy.parse_card('10h'), 'TH')
+        self.assertEqual(physical_entropy.lehmer_code(['2C', 'AC', 'KS']),
+                         [(1, 52), (0, 51), (49, 50)])
+        with self.assertRaises(ValueError):
+            physical_entropy.lehmer_code(['AS', 'as'])
+        with self.assertRaises(ValueError):
+            physical_entropy.parse_card('1S')
+        #a new deck starts after 52 cards
+        self.assertEqual(physical_entropy.lehmer_code(
+            physical_entropy.DECK + ['AS'])[-2:], [(0, 1), (39, 52)])
+
+        self.assertEqual(physical_entropy.rank_cards(physical_entropy.DECK), 0)
+        self.assertEqual(physical_entropy.rank_cards(physical_entropy.DECK[::-1]),
+                         math.factorial(52) - 1)
+        ranks = set(physical_entropy.rank_cards(deal) for deal in
+                    itertools.permutations(physical_entropy.DECK, 2))
+        self.assertEqual(ranks, set(range(52 * 51)))
+
+    def test_actions(self):
+        """Fewest actions and bits per action"""
+        self.assertEqual(physical_entropy.min_actions('d20', 256), 60)
+        self.assertEqual(physical_entropy.min_actions('d6', 256), 100)
+        self.assertEqual(physical_entropy.min_actions('coin', 128), 128)
+        self.assertEqual(physical_entropy.min_actions('cards', 256), 58)
+        self.assertAlmostEqual(physical_entropy.bits_per_shuffle(),
+                               math.log(math.factorial(52), 2))
+        self.assertAlmostEqual(physical_entropy.bits_per_action('d8'), 3.0)
+
+class ExtractorTest(unittest.TestCase):
+    """Bits of the digits, unbiased and without waste"""
+
+    def test_tokens_to_bitstring(self):
+        """Rejected digits are kept and combined with the next ones"""
+        self.assertEqual(physical_entropy.tokens_to_bitstring(
+            'd6', ['3'], 2), '11')
+        #5 is rejected as 4 or 5 of 6, leaving 1 of 2; then 1 * 6 + 1 < 8
+        self.assertEqual(physical_entropy.tokens_to_bitstring(
+            'd6', ['5', '1', '6'], 2), '11')
+        self.assertEqual(physical_entropy.tokens_to_bitstring(
+            'coin', 'HTTH', 4), '1001')
+        with self.assertRaises(entropy.InsufficientEntropyError):
+            physical_entropy.tokens_to_bitstring('d20', ['20'] * 59, 256)
+        self.assertEqual(physical_entropy.tokens_to_bitstring(
+            'd20', ['20'] * 60, 256), '0' * 256)
+        with self.assertRaises(ValueError):
+            physical_entropy.Extractor(4).add(6, 6)
+
+        extractor = physical_entropy.Extractor(256)
+        for digit, radix in physical_entropy.lehmer_code(
+                physical_entropy.DECK + physical_entropy.DECK[:6]):
+            extractor.add(digit, radix)
+        self.assertEqual((extractor.digits, extractor.rejections), (58, 0))
+        self.assertEqual(len(extractor.bitstring), 256)
+        self.assertGreater(extractor.efficiency, 0.98)
+
+    def test_exhaustive(self):
+        """Every bit string is equally likely over all sequences of digits"""
+        counts, incomplete = physical_entropy.output_counts([6] * 4, 7)
+        self.assertEqual(len(counts), 128)
+        self.assertEqual(set(counts.values()), set([10]))
+        self.assertEqual(incomplete, 6 ** 4 - 1280)
+        counts, incomplete = physical_entropy.output_counts([20, 20], 8)
+        self.assertEqual(set(counts.values()), set([1]))
+        for kind in physical_entropy.KINDS:
+            for n_bits in (1, 3, 4):
+                self.assertEqual(physical_entropy.uniformity_failures(
+                    kind, n_bits, 3, deck_size=5), [])
+        self.assertEqual(physical_entropy.uniformity_failures(
+            'cards', 6, 5, deck_size=5), [])
+
+    def test_statistical(self):
+        """Simulated actions pass entropy_test"""
+        for kind in ('d12', 'cards'):
+            source = entropy_sources.HmacDrbgSource('\x00')
+            self.assertTrue(entropy.entropy_test(
+                32, functools.partial(physical_entropy.simulate_bits, kind),
+                report=lambda _: None, source=source, iterations=2000,
+                report_interval=1e9))
+
+    def test_collect(self):
+        """Bad tokens are skipped and reported"""
+        lines = iter(['20 x 20', '21 ' + '20 ' * 27 + '1'])
+        messages = []
+        extractor = physical_entropy.collect(
+            'd20', 128, read=lambda _: next(lines), report=messages.append)
+        self.assertEqual(extractor.digits, 30)
+        self.assertEqual(extractor.bitstring, '0' * 127 + '1')
+        self.assertEqual(messages[1:3], ['Skipped: Not a number: x',
+                                         'Skipped: Not a d20 face: 21'])
+        self.assertTrue(messages[0].startswith('128 bits need at least 30 '
+                                               'rolls of a d20 (4.32 bits '))
+        self.assertTrue(messages[-1].startswith('128 bits from 30 rolls: 4.27 '
+                                                'bits per roll'))
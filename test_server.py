@@ -0,0 +1,145 @@
+"""Unit tests for server.py"""
+#Python Standard Library 2.7
+import os
+import json
+import shutil
+import tempfile
+import unittest
+
+#bip39_gym modules
+import server #server.py
+
+TEST_VECTOR_FILE = 'data/vectors.json'
+
+class ServerTest(unittest.TestCase):
+    """Exercise every method over a Unix socket"""
+
+    @classmethod
+    def setUpClass(cls):
+        with open(TEST_VECTOR_FILE, 'r') as vector_file:
+            cls.data = json.load(vector_file)['english']
+        cls.tmpdir = tempfile.mkdtemp()
+        cls.server = server.Bip39Server(os.path.join(cls.tmpdir, 'bip39.sock'),
+                                        seed_processes=1)
+        cls.server.start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.close()
+        shutil.rmtree(cls.tmpdir)
+
+    def setUp(self):
+        self.client = server.Bip39Client(self.server.address, timeout=30)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_encode_decode(self):
+        """Round trip all vectors through encode and decode"""
+        for vector in self.data:
+            result = self.client.call('encode', entropy_hex=vector[0])
+            self.assertEqual(result['mnemonic'], vector[1])
+            result = self.client.call('decode', mnemonic=vector[1])
+            self.assertEqual(result['entropy_hex'], vector[0])
+
+    def test_decode_bad_checksum(self):
+        """A failed checksum is reported as an error"""
+        with self.assertRaises(server.RemoteError):
+            self.client.call('decode', mnemonic='town iron abandon')
+
+    def test_validate(self):
+        """Validate good and bad mnemonics"""
+        result = self.client.call('validate', mnemonic=self.data[0][1])
+        self.assertEqual(result, {'valid': True, 'reason': None})
+        result = self.client.call('validate', mnemonic='mimble wimble')
+        self.assertEqual(result, {'valid': False,
+                                  'reason': 'InvalidWordError'})
+
+    def test_complete(self):
+        """The real last word is among the completions"""
+        words = self.data[0][1].split()
+        result = self.client.call('complete',
+                                  partial_mnemonic=' '.join(words[:-1]))
+        self.assertEqual(len(result['candidates']), 128)
+        self.assertIn(words[-1], result['candidates'])
+
+    def test_seed(self):
+        """Seed derivation through the process pool"""
+        vector = self.data[0]
+        result = self.client.call('seed', mnemonic=vector[1],
+                                  passphrase='TREZOR')
+        self.assertEqual(result['seed_hex'], vector[2])
+
+    def test_unknown_method(self):
+        """Unknown methods are refused"""
+        with self.assertRaises(server.RemoteError):
+            self.client.call('sign')
+
+    def test_non_local_tcp_refused(self):
+        """The server never binds to a public interface"""
+        with self.assertRaises(ValueError):
+            server.Bip39Server(('0.0.0.0', 0), seed_processes=0)
+
+class RequestBatcherTest(unittest.TestCase):
+    """Micro-batches of requests from several clients"""
+
+    def test_bad_params_isolated(self):
+        """A request with bad params fails alone, not its whole batch"""
+        with open(TEST_VECTOR_FILE, 'r') as vector_file:
+            vector = json.load(vector_file)['english'][0]
+        batcher = server.RequestBatcher(server.bip39.Bip39Codec(), None,
+                                        batch_window=1.0)
+        #queued before the thread starts, so they make up a single batch
+        requests = [
+            batcher.submit('encode', {'entropy_hex': vector[0]}),
+            batcher.submit('encode', {'entropy_hex': 'zz'}),
+            batcher.submit('validate', {'mnemonic': vector[1]}),
+            batcher.submit('validate', {}),
+            batcher.submit('decode', {'mnemonic': vector[1]}),
+            batcher.submit('decode', None),
+            batcher.submit('seed', {'mnemonic': vector[1],
+                                    'passphrase': 'TREZOR'}),
+            batcher.submit('seed', {'passphrase': 'TREZOR'})]
+        batcher.start()
+        try:
+            for pending in requests:
+                self.assertTrue(pending.done.wait(30))
+        finally:
+            batcher.stop()
+        good, bad = requests[::2], requests[1::2]
+        self.assertEqual([pending.result for pending in good[:2]],
+                         [{'mnemonic': vector[1]},
+                          {'valid': True, 'reason': None}])
+        self.assertEqual(good[2].result['entropy_hex'], vector[0])
+        self.assertEqual(good[3].result, {'seed_hex': vector[2]})
+        self.assertEqual([pending.error for pending in good], [None] * 4)
+        self.assertEqual([type(pending.error) for pending in bad],
+                         [ValueError, KeyError, TypeError, KeyError])
+
+    def test_bad_types_isolated(self):
+        """A mnemonic that isn't a string fails alone, not its whole batch"""
+        with open(TEST_VECTOR_FILE, 'r') as vector_file:
+            vector = json.load(vector_file)['english'][0]
+        batcher = server.RequestBatcher(server.bip39.Bip39Codec(), None,
+                                        batch_window=1.0)
+        requests = [batcher.submit(method, {'mnemonic': mnemonic})
+                    for method in ('validate', 'decode', 'seed')
+                    for mnemonic in (vector[1], 5, ['abandon'])]
+        invalid = batcher.submit('validate', {'mnemonic': 'abandon ' * 12})
+        batcher.start()
+        try:
+            for pending in requests + [invalid]:
+                self.assertTrue(pending.done.wait(30))
+        finally:
+            batcher.stop()
+        good = requests[::3]
+        self.assertEqual([pending.error for pending in good], [None] * 3)
+        self.assertEqual(good[0].result, {'valid': True, 'reason': None})
+        self.assertEqual(good[1].result['entropy_hex'], vector[0])
+        self.assertEqual(good[2].result, {'seed_hex': server.bip39.mnemonic2seed(
+            vector[1])})
+        for pending in requests:
+            if pending not in good:
+                self.assertIsInstance(pending.error, ValueError)
+        self.assertEqual(invalid.result, {'valid': False,
+                                          'reason': 'FailedCheckSumError'})
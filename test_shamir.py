@@ -0,0 +1,87 @@
+"""Unit tests for shamir.py"""
+#Python Standard Library 2.7
+import random
+import itertools
+import unittest
+
+#PyPI modules
+import numpy as np #pip install numpy
+
+#bip39_gym modules
+import bip39 #bip39.py
+import entropy_sources #entropy_sources.py
+import shamir #shamir.py
+
+MNEMONIC = ('legal winner thank year wave sausage worth useful legal winner '
+            'thank yellow')
+
+class ShamirTest(unittest.TestCase):
+    """Field arithmetic, scalar and batch splits, share mnemonics"""
+
+    def test_field(self):
+        """Tables agree with each other and with the AES field"""
+        self.assertEqual(shamir.gf_mul(0x53, 0xca), 1)
+        self.assertEqual(shamir.gf_mul(0x57, 0x83), 0xc1) #FIPS-197 4.2
+        self.assertEqual(sorted(shamir.EXP[:255]), range(1, 256))
+        for value in range(1, 256):
+            self.assertEqual(shamir.EXP[shamir.LOG[value]], value)
+            self.assertEqual(shamir.gf_mul(shamir.gf_div(1, value), value), 1)
+        rand = random.Random(39)
+        for _ in range(1000):
+            left, right = rand.randrange(256), rand.randrange(256)
+            self.assertEqual(shamir.MUL_TABLE[left][right],
+                             shamir.gf_mul(left, right))
+        with self.assertRaises(ZeroDivisionError):
+            shamir.gf_div(1, 0)
+
+    def test_split_combine(self):
+        """Every threshold-sized subset recovers the secret"""
+        source = entropy_sources.HmacDrbgSource('shamir')
+        secret = source.get_bytes(32)
+        shares = shamir.split(secret, 3, 5, source)
+        self.assertEqual([index for index, _ in shares], [1, 2, 3, 4, 5])
+        for subset in itertools.combinations(shares, 3):
+            self.assertEqual(shamir.combine(list(subset)), secret)
+        self.assertNotEqual(shamir.combine(shares[:2]), secret)
+        self.assertEqual(shamir.split(secret, 1, 2), [(1, secret), (2, secret)])
+        with self.assertRaises(ValueError):
+            shamir.split(secret, 3, 2)
+        with self.assertRaises(shamir.InvalidShareError):
+            shamir.combine([shares[0], shares[0]])
+        with self.assertRaises(shamir.InvalidShareError):
+            shamir.combine([shares[0], (2, shares[1][1][:16])])
+
+    def test_batch(self):
+        """Batch splits match scalar splits and recover every row"""
+        secret = entropy_sources.HmacDrbgSource('secret').get_bytes(16)
+        scalar = shamir.split(secret, 3, 4,
+                              entropy_sources.HmacDrbgSource('coefficients'))
+        batch = shamir.split_batch(
+            np.frombuffer(secret, dtype=np.uint8).reshape(1, 16), 3, 4,
+            entropy_sources.HmacDrbgSource('coefficients'))
+        self.assertEqual([values for _, values in scalar],
+                         [layer[0].tobytes() for layer in batch])
+        source = entropy_sources.HmacDrbgSource('batch')
+        secrets = np.frombuffer(source.get_bytes(1000 * 32),
+                                dtype=np.uint8).reshape(1000, 32)
+        shares = shamir.split_batch(secrets, 3, 5, source)
+        for indices in itertools.combinations(range(5), 3):
+            recovered = shamir.combine_batch([index + 1 for index in indices],
+                                             shares[list(indices)])
+            self.assertTrue((recovered == secrets).all())
+
+    def test_mnemonics(self):
+        """Shares of a mnemonic are words and recombine to the mnemonic"""
+        codec = bip39.get_default_codec(print_warning=False)
+        for mnemonic in (MNEMONIC, codec.binstring2mnemonic('1' * 256)):
+            shares = shamir.split_mnemonic(mnemonic, 2, 3)
+            for share in shares:
+                self.assertEqual(len(share.split()), len(mnemonic.split()) + 1)
+            for subset in itertools.combinations(shares, 2):
+                self.assertEqual(shamir.combine_mnemonics(subset), mnemonic)
+        with self.assertRaises(shamir.InvalidShareError):
+            shamir.combine_mnemonics([shares[0], shares[0]])
+        with self.assertRaises(bip39.InvalidWordError):
+            shamir.combine_mnemonics(['mimble ' + MNEMONIC, shares[1]])
+        with self.assertRaises(bip39.FailedCheckSumError):
+            shamir.split_mnemonic('town iron abandon', 2, 3)
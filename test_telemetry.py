@@ -0,0 +1,127 @@
+"""Unit tests for telemetry.py"""
+#Python Standard Library 2.7
+import os
+import json
+import time
+import shutil
+import tempfile
+import unittest
+
+#bip39_gym modules
+import passphrase_recovery #passphrase_recovery.py
+import telemetry #telemetry.py
+
+class Clock(object):
+    """Stands in for time.time, counting calls"""
+
+    def __init__(self):
+        self.now = 1000.0
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        return self.now
+
+class ProgressTest(unittest.TestCase):
+    """Throttling, report lines and metrics snapshots"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.clock = Clock()
+        self.time = telemetry.time.time
+        telemetry.time.time = self.clock
+
+    def tearDown(self):
+        telemetry.time.time = self.time
+        shutil.rmtree(self.tmpdir)
+
+    def test_throttled(self):
+        """The clock is read every few updates, tuned to the rate"""
+        lines = []
+        progress = telemetry.Progress(100000, unit='rolls', interval=1.0,
+                                      report=lines.append)
+        for done in range(1, 100001):
+            self.clock.now += 1e-5 #100000 items/s
+            progress.update(done)
+        #about CHECKS_PER_INTERVAL looks per interval
+        self.assertLess(self.clock.calls, 3 * telemetry.CHECKS_PER_INTERVAL)
+        self.assertLessEqual(len(lines), 1)
+        progress.finish()
+        self.assertEqual(lines[-1], '100000/100000 rolls, 100000.0 rolls/s')
+
+        lines = []
+        progress = telemetry.Progress(10, interval=1.0, every=2,
+                                      report=lines.append, start=5)
+        progress.update(6)
+        self.clock.now += 1.0
+        progress.update(7)
+        self.assertEqual(lines, ['7/10 items, 2.0 items/s, ETA 0:00:01'])
+        progress.update(8)
+        self.assertEqual(len(lines), 1)
+        self.assertAlmostEqual(progress.eta(), 2 / 3.0)
+
+    def test_throttled_batches(self):
+        """Updates of many items each still report every interval"""
+        lines = []
+        progress = telemetry.Progress(interval=1.0, report=lines.append)
+        for _ in range(240):
+            self.clock.now += 0.05 #20 updates/s of 256 items
+            progress.add(256)
+        self.assertGreaterEqual(len(lines), 10)
+        self.assertTrue(lines[-1].endswith(' items, 5120.0 items/s'))
+
+        #a coarse clock that only ticks every 1000 updates
+        lines = []
+        progress = telemetry.Progress(interval=1.0, report=lines.append)
+        for done in range(1, 100001):
+            if done % 1000 == 0:
+                self.clock.now += 0.1
+            progress.update(done)
+        self.assertGreaterEqual(len(lines), 8)
+
+    def test_metrics(self):
+        """Snapshots are written at reports and on finishing"""
+        path = os.path.join(self.tmpdir, 'metrics.json')
+        with telemetry.Progress(job='job', interval=1.0, report=False,
+                                metrics=path, workers=2) as progress:
+            progress.add(50)
+            progress.worker_busy(1.0)
+            self.clock.now += 1.0
+            progress.add(50)
+            with open(path) as metrics_file:
+                snapshot = json.load(metrics_file)
+            self.assertEqual(snapshot['items'], 100)
+            self.assertEqual(snapshot['items_per_sec'], 100.0)
+            self.assertEqual(snapshot['utilization'], 0.5)
+            self.assertFalse(snapshot['finished'])
+            self.assertIsNone(snapshot['eta'])
+            self.assertGreater(snapshot['max_rss_kb'], 0)
+        with open(path) as metrics_file:
+            self.assertTrue(json.load(metrics_file)['finished'])
+        self.assertEqual(os.listdir(self.tmpdir), ['metrics.json'])
+
+    def test_recover_metrics(self):
+        """A parallel job reports its workers' utilization"""
+        telemetry.time.time = self.time
+        path = os.path.join(self.tmpdir, 'metrics.json')
+        mnemonic = ' '.join(['abandon'] * 11 + ['about'])
+        target = passphrase_recovery.SeedPrefixTarget('00')
+        lines = []
+        self.assertIsNone(passphrase_recovery.recover(
+            mnemonic, target, ['a', 'b', 'c', 'd'], processes=2, chunk_size=1,
+            report=lines.append, metrics=path))
+        self.assertEqual(len(lines), 1)
+        with open(path) as metrics_file:
+            snapshot = json.load(metrics_file)
+        self.assertEqual((snapshot['job'], snapshot['items'],
+                          snapshot['workers']),
+                         ('passphrase_recovery', 4, 2))
+        self.assertGreater(snapshot['utilization'], 0)
+
+    def test_timed_call(self):
+        """Workers return their result and busy time"""
+        result, busy = telemetry.timed_call((len, 'abc'))
+        self.assertEqual((result, busy), (3, 0.0))
+        telemetry.time.time = self.time
+        self.assertGreaterEqual(telemetry.timed_call((time.sleep, 0.01))[1],
+                                0.005)
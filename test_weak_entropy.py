@@ -0,0 +1,116 @@
+"""Unit tests for weak_entropy.py"""
+#Python Standard Library 2.7
+import os
+import shutil
+import binascii
+import tempfile
+import unittest
+
+#PyPI modules
+import numpy as np #pip install numpy
+
+#bip39_gym modules
+import app #app.py
+import bip39 #bip39.py
+import corpus #corpus.py
+import entropy_sources #entropy_sources.py
+import weak_entropy #weak_entropy.py
+
+class WeakEntropyTest(unittest.TestCase):
+    """Flag weak patterns, and never random entropy"""
+
+    def setUp(self):
+        self.source = entropy_sources.HmacDrbgSource('\x00' * 32)
+
+    def _flags(self, entropy_hex):
+        return weak_entropy.detect_entropies([binascii.unhexlify(entropy_hex)])[0]
+
+    def test_random_not_flagged(self):
+        """Random entropy of every length passes"""
+        for n_bytes in (16, 20, 24, 28, 32):
+            matrix = weak_entropy.entropy_matrix(
+                [self.source.get_bytes(n_bytes) for _ in range(2000)])
+            self.assertEqual(weak_entropy.detect(matrix).sum(), 0)
+
+    def test_random_every_layout(self):
+        """Random entropy of every mnemonic length passes, 3 and 6 words too"""
+        random = np.random.RandomState(39)
+        layouts = [bip39.LAYOUTS[n_words] for n_words in sorted(bip39.LAYOUTS)]
+        for layout in layouts + [bip39.get_layout(bip39.MAX_WORDS)]:
+            #short entropies are the ones at risk: test many more of them
+            n_rows = 20000 if layout.n_bytes <= 8 else 2000
+            matrix = random.randint(0, 256, (n_rows, layout.n_bytes)).astype(
+                np.uint8)
+            flags = weak_entropy.detect(matrix, test_vectors=frozenset())
+            self.assertEqual(np.count_nonzero(flags), 0, layout)
+        limits = weak_entropy.thresholds(4)
+        self.assertEqual((limits.periods, limits.monotonic_step), ([1], 2))
+        self.assertTrue(self._flags('01020406') & weak_entropy.MONOTONIC)
+        self.assertFalse(self._flags('01020410') & weak_entropy.MONOTONIC)
+        self.assertTrue(self._flags('10131619') & weak_entropy.ARITHMETIC)
+        self.assertFalse(self._flags('10304050') & weak_entropy.ARITHMETIC)
+
+    def test_patterns(self):
+        """Each weak pattern raises its flag"""
+        self.assertTrue(self._flags('00' * 16) & weak_entropy.ZERO)
+        self.assertTrue(self._flags('ff' * 32) & weak_entropy.ONES)
+        self.assertTrue(self._flags('01' * 16) & weak_entropy.HAMMING)
+        self.assertTrue(self._flags('deadbeef' * 4) & weak_entropy.PERIODIC)
+        self.assertTrue(self._flags(''.join('{0:02x}'.format(byte * 3)
+                                            for byte in range(20))) &
+                        weak_entropy.ARITHMETIC)
+        self.assertTrue(self._flags('01020305080d1522375990e9ebecf0f2') &
+                        weak_entropy.MONOTONIC)
+        self.assertEqual(self._flags('9e885d952ad362caeb4efe34a8e91bd2'),
+                         weak_entropy.TEST_VECTOR)
+        self.assertEqual(self._flags(
+            '55' * 16 + binascii.hexlify(self.source.get_bytes(16))),
+                         weak_entropy.COMPRESSIBLE)
+
+    def test_warning_counts(self):
+        """All-zero and all-one count as one warning, as in app.py"""
+        entropies = ['00' * 16, 'ff' * 32, 'deadbeef' * 4,
+                     binascii.hexlify(self.source.get_bytes(16))]
+        flags = weak_entropy.detect_entropies(
+            [binascii.unhexlify(entropy_hex) for entropy_hex in entropies])
+        counts = weak_entropy.warning_counts(flags)
+        self.assertEqual(list(counts[0:2]), [
+            app.num_entropy_warnings(bip39.hex2bin(entropy_hex),
+                                     print_warning=False)
+            for entropy_hex in entropies[0:2]])
+        self.assertEqual(list(counts), [1, 1, 2, 0])
+        self.assertEqual(weak_entropy.describe(flags[0]),
+                         ["Entropy is equal to zero!"])
+
+    def test_mixed_lengths(self):
+        """Flags come back in input order whatever the lengths"""
+        entropies = [self.source.get_bytes(32), '\x00' * 16,
+                     self.source.get_bytes(16), '\xff' * 24]
+        flags = weak_entropy.detect_entropies(entropies)
+        self.assertEqual([bool(mask) for mask in flags],
+                         [False, True, False, True])
+        with self.assertRaises(ValueError):
+            weak_entropy.entropy_matrix(entropies)
+
+    def test_audit_corpus(self):
+        """Both corpus kinds are audited record by record"""
+        tmpdir = tempfile.mkdtemp()
+        try:
+            entropy_path = os.path.join(tmpdir, 'entropy.b39c')
+            indices_path = os.path.join(tmpdir, 'indices.b39c')
+            entropies = [self.source.get_bytes(16 + 16 * (num % 2))
+                         for num in range(50)]
+            entropies[7] = '\x00' * 32
+            entropies[30] = '\xab' * 16
+            with corpus.CorpusWriter(entropy_path, corpus.KIND_ENTROPY) as writer:
+                for entropy_bytes in entropies:
+                    writer.write_entropy(entropy_bytes)
+            corpus.write_mnemonics(indices_path, [
+                bip39.binstring2mnemonic(bip39.encode_binary_string(entropy_bytes))
+                for entropy_bytes in entropies if len(entropy_bytes) == 16])
+            self.assertEqual([num for num, _ in weak_entropy.audit_corpus(
+                entropy_path, chunk_records=16)], [7, 30])
+            self.assertEqual([num for num, _ in weak_entropy.audit_corpus(
+                indices_path, chunk_records=16)], [15])
+        finally:
+            shutil.rmtree(tmpdir)
@@ -0,0 +1,102 @@
+"""Unit tests for word_distribution.py"""
+#Python Standard Library 2.7
+import os
+import shutil
+import tempfile
+import unittest
+
+#PyPI modules
+import numpy as np #pip install numpy
+
+#bip39_gym modules
+import bip39 #bip39.py
+import corpus #corpus.py
+import word_distribution #word_distribution.py
+
+class WordDistributionTest(unittest.TestCase):
+    """Vectorized indices, counts and the chi-square report"""
+
+    def setUp(self):
+        self.codec = bip39.get_default_codec(print_warning=False)
+        self.random = np.random.RandomState(39)
+
+    def test_indices_matrix(self):
+        """Vectorized indices agree with the codec, checksum included"""
+        for n_bytes in (16, 20, 24, 28, 32):
+            matrix = self.random.randint(0, 256, (50, n_bytes)).astype(np.uint8)
+            indices = word_distribution.indices_matrix(matrix)
+            for row, row_indices in zip(matrix, indices):
+                mnemonic = bip39.Mnemonic.from_bytes(row.tostring(), self.codec)
+                self.assertEqual(tuple(row_indices), tuple(mnemonic.indices))
+
+    def test_counts(self):
+        """Counts per position and the last word without checksum bits"""
+        indices = np.array([[0, 2047, 16], [0, 5, 31]])
+        counts = word_distribution.count_indices(indices)
+        self.assertEqual(counts.shape, (3, 2048))
+        self.assertEqual(counts[0, 0], 2)
+        self.assertEqual(counts[1, 2047], 1)
+        self.assertEqual(counts.sum(), 6)
+        #3 words have 1 checksum bit: indices 16 and 31 are entropy 8 and 15
+        entropy_counts = word_distribution.last_word_entropy_counts(counts)
+        self.assertEqual(len(entropy_counts), 1024)
+        self.assertEqual(entropy_counts[8], 1)
+        self.assertEqual(entropy_counts[15], 1)
+
+    def test_chi_square(self):
+        """Uniform counts pass and skewed counts fail"""
+        uniform = self.random.multinomial(2048 * 50, [1 / 2048.0] * 2048)
+        skewed = uniform.copy()
+        skewed[0] += 1000
+        (_, p_uniform), (_, p_skewed) = word_distribution.chi_square(
+            [uniform, skewed])
+        self.assertGreater(p_uniform, 1e-4)
+        self.assertLess(p_skewed, 1e-9)
+
+    def test_generated(self):
+        """Reproducible across process counts, and a uniform report passes"""
+        jobs = word_distribution.generated_jobs('urandom', 20000, 12, '\x00',
+                                                chunk_size=7000)
+        self.assertEqual([job[3] for job in jobs], [7000, 7000, 6000])
+        counts = word_distribution.run_jobs(word_distribution.count_generated,
+                                            jobs, processes=0)
+        self.assertEqual(counts.keys(), [12])
+        self.assertEqual(counts[12].sum(), 20000 * 12)
+        pooled = word_distribution.run_jobs(word_distribution.count_generated,
+                                            jobs, processes=2)
+        self.assertTrue((pooled[12] == counts[12]).all())
+        lines = []
+        self.assertTrue(word_distribution.print_report(counts, lines.append))
+        self.assertEqual(len([line for line in lines if 'ok' in line]), 13)
+        biased = {12: counts[12].copy()}
+        biased[12][3, :1024] += 10
+        self.assertFalse(word_distribution.print_report(biased, lines.append))
+
+    def test_corpora(self):
+        """Both corpus kinds are counted, mixed entropy lengths apart"""
+        tmpdir = tempfile.mkdtemp()
+        try:
+            entropies = [self.random.bytes(16) for _ in range(30)] + \
+                [self.random.bytes(32) for _ in range(20)]
+            mnemonics = [bip39.Mnemonic.from_bytes(entropy_bytes, self.codec)
+                         for entropy_bytes in entropies]
+            entropy_path = os.path.join(tmpdir, 'entropy.b39c')
+            with corpus.CorpusWriter(entropy_path, corpus.KIND_ENTROPY) as writer:
+                for entropy_bytes in entropies:
+                    writer.write_entropy(entropy_bytes)
+            indices_path = os.path.join(tmpdir, 'indices.b39c')
+            with corpus.CorpusWriter(indices_path, corpus.KIND_INDICES,
+                                     24) as writer:
+                for mnemonic in mnemonics[30:]:
+                    writer.write(mnemonic)
+            counts = word_distribution.run_jobs(
+                word_distribution.count_corpus,
+                word_distribution.corpus_jobs([entropy_path, indices_path], 16),
+                processes=0)
+            self.assertEqual(sorted(counts), [12, 24])
+            expected = word_distribution.count_indices(
+                np.array([mnemonic.indices for mnemonic in mnemonics[30:]]))
+            self.assertTrue((counts[24] == 2 * expected).all())
+            self.assertEqual(counts[12].sum(), 30 * 12)
+        finally:
+            shutil.rmtree(tmpdir)
@@ -0,0 +1,141 @@
+"""Unit tests for word_order_recovery.py"""
+#Python Standard Library 2.7
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+#bip39_gym modules
+import bip39 #bip39.py
+import checkpoint #checkpoint.py
+import passphrase_recovery #passphrase_recovery.py
+import word_order_recovery as recovery #word_order_recovery.py
+
+MNEMONIC = ('legal winner thank year wave sausage worth useful legal winner '
+            'thank yellow')
+
+class WordOrderRecoveryTest(unittest.TestCase):
+    """Checksum pruning, enumeration and recovery"""
+
+    def setUp(self):
+        self.codec = bip39.get_default_codec(print_warning=False)
+        self.indices = self.codec.get_indices(MNEMONIC)
+
+    def _codec_valid(self, indices):
+        try:
+            self.codec.mnemonic2binstring(self.codec.get_mnemonic(indices))
+            return True
+        except bip39.FailedCheckSumError:
+            return False
+
+    def test_checker(self):
+        """The buffer checksum agrees with mnemonic2binstring"""
+        rand = random.Random(39)
+        for n_words in (12, 15, 18, 21, 24):
+            indices = [rand.randrange(2048) for _ in range(n_words)]
+            checker = recovery.PermutationChecker(indices)
+            for _ in range(200):
+                pos1, pos2 = rand.sample(range(n_words), 2)
+                checker.swap(pos1, pos2)
+                self.assertEqual(checker.valid(), self._codec_valid(checker.current()))
+            undo = checker.place([(0, 1), (1, 0)])
+            checker.place(undo)
+            self.assertEqual(recovery.PermutationChecker(
+                checker.current()).buffer, checker.buffer)
+        with self.assertRaises(ValueError):
+            recovery.PermutationChecker(self.indices[:9])
+
+    def test_heap_permutations(self):
+        """Every order of the chosen positions once, the rest untouched"""
+        checker = recovery.PermutationChecker(self.indices)
+        orders = [tuple(checker.order) for _ in
+                  recovery._heap_permutations(checker, [2, 5, 7, 11])]
+        self.assertEqual(len(orders), 24)
+        self.assertEqual(len(set(orders)), 24)
+        for order in orders:
+            self.assertEqual(sorted(order[num] for num in (2, 5, 7, 11)),
+                             [2, 5, 7, 11])
+            self.assertEqual(order[0:2], (0, 1))
+
+    def test_search(self):
+        """Shards partition the candidates and survivors pass the checksum"""
+        stages = ['identity', 'adjacent', 'transpositions', 'subsets']
+        stats = {}
+        survivors = list(recovery.search(self.indices, stages, max_swaps=2,
+                                         max_subset=4, stats=stats))
+        n_pairs = 12 * 11 // 2
+        n_two_swaps = n_pairs * (12 * 11 // 2 - 2 * 11 + 1) // 2
+        n_subsets = 220 * 2 + 495 * 9
+        n_candidates = 1 + n_pairs + n_two_swaps + n_subsets
+        self.assertEqual(stats['candidates'], n_candidates)
+        self.assertIn(tuple(self.indices), survivors)
+        for survivor in survivors[:50]:
+            self.assertTrue(self._codec_valid(survivor))
+        sharded = []
+        sharded_candidates = 0
+        for shard in range(3):
+            stats = {}
+            sharded.extend(recovery.search(self.indices, stages, shard, 3,
+                                           stats=stats))
+            sharded_candidates += stats['candidates']
+        self.assertEqual(sharded_candidates, n_candidates)
+        self.assertEqual(sorted(sharded), sorted(survivors))
+
+    def test_recover(self):
+        """Swapped words are recovered and matched against a target"""
+        swapped = list(self.indices)
+        swapped[2], swapped[9] = swapped[9], swapped[2]
+        swapped[4], swapped[5] = swapped[5], swapped[4]
+        result = recovery.recover(swapped, ['identity', 'adjacent',
+                                            'transpositions'],
+                                  processes=0, n_shards=4, report=[].append)
+        self.assertIn(tuple(self.indices), result['survivors'])
+        target = passphrase_recovery.SeedPrefixTarget(
+            bip39.mnemonic2seed(MNEMONIC, 'TREZOR')[:16])
+        result = recovery.recover(swapped, ['adjacent', 'transpositions'],
+                                  target, 'TREZOR', processes=2, n_shards=4,
+                                  report=[].append)
+        self.assertEqual(result['match'], MNEMONIC)
+
+    def test_target_keeps_counters_only(self):
+        """With a target, survivors are counted but neither kept nor saved"""
+        swapped = list(self.indices)
+        swapped[4], swapped[5] = swapped[5], swapped[4]
+        saved = []
+
+        class Recording(object):
+            """Checkpoint that is always due and records every save"""
+            path = 'recording'
+            load = staticmethod(lambda: None)
+            due = staticmethod(lambda: True)
+            save = staticmethod(saved.append)
+            remove = staticmethod(lambda: None)
+
+        target = passphrase_recovery.SeedPrefixTarget('00' * 8)
+        result = recovery.recover(swapped, ['adjacent', 'transpositions'],
+                                  target, processes=0, n_shards=3,
+                                  checkpoint=Recording(), report=[].append)
+        self.assertIsNone(result['match'])
+        self.assertEqual(result['survivors'], [])
+        self.assertGreater(result['valid'], 0)
+        self.assertEqual(len(saved), 3)
+        self.assertEqual(sorted(saved[-1]), ['candidates', 'done', 'valid'])
+
+    def test_checkpoint_passphrase(self):
+        """A checkpoint made with another passphrase is refused"""
+        tmpdir = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmpdir, 'order.ckpt')
+            target = passphrase_recovery.SeedPrefixTarget('00')
+            def job(passphrase):
+                return recovery.recovery_checkpoint(
+                    path, MNEMONIC, ['all'], 4, 2, 4, target, passphrase)
+            job('TREZOR').save({'done': [0], 'candidates': 1, 'valid': 0})
+            self.assertEqual(job('TREZOR').load()['done'], [0])
+            with self.assertRaises(checkpoint.CheckpointMismatchError):
+                job('trezor').load()
+            with open(path) as checkpoint_file:
+                self.assertNotIn('TREZOR', checkpoint_file.read())
+        finally:
+            shutil.rmtree(tmpdir)
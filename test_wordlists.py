@@ -0,0 +1,145 @@
+# -*- coding: utf-8 -*-
+"""Unit tests for wordlists.py"""
+#Python Standard Library 2.7
+import os
+import shutil
+import tempfile
+import unittest
+
+#bip39_gym modules
+import bip39 #bip39.py
+import wordlists #wordlists.py
+
+JAPANESE_ZERO_MNEMONIC = u'　'.join([u'あいこくしん'] * 11 +
+                                        [u'あおぞら'])
+
+class WordlistTest(unittest.TestCase):
+    """Test compiled wordlists against the text files"""
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        shutil.copy(wordlists.text_path('english'), self.tmpdir)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_all_languages(self):
+        """Every compiled wordlist matches its text file word for word"""
+        for language in wordlists.LANGUAGES:
+            wordlist = wordlists.open_wordlist(language)
+            words = [wordlists.normalize(word) for word in
+                     bip39.read_wordlist(wordlists.text_path(language))]
+            self.assertEqual(list(wordlist), words)
+            for index, word in enumerate(words):
+                self.assertEqual(wordlist.find(word), index)
+
+    def test_find_missing(self):
+        """Words not in the list are not found"""
+        wordlist = wordlists.open_wordlist('english')
+        self.assertEqual(wordlist.find('maximalism'), -1)
+        self.assertNotIn('maximalism', wordlist)
+        with self.assertRaises(ValueError):
+            wordlist.index('maximalism')
+
+    def test_prefix_matches(self):
+        """Prefix searches use the sorted string table"""
+        wordlist = wordlists.open_wordlist('english')
+        self.assertEqual([wordlist[index] for index in
+                          wordlist.prefix_matches('aba')], ['abandon'])
+        self.assertEqual(len(wordlist.prefix_matches('')), 2048)
+        self.assertEqual(wordlist.prefix_matches('zzz'), [])
+        self.assertEqual(set(wordlist[index] for index in
+                             wordlist.prefix_matches('ab')),
+                         set(word for word in wordlist if word.startswith('ab')))
+
+    def test_recompile_on_change(self):
+        """A stale or corrupt index is replaced"""
+        wordlist = wordlists.Wordlist('english', self.tmpdir)
+        self.assertEqual(wordlist[0], 'abandon')
+        with open(wordlists.index_path('english', self.tmpdir), 'wb') as index:
+            index.write('garbage')
+        self.assertEqual(wordlists.Wordlist('english', self.tmpdir)[2047], 'zoo')
+
+        #a corrupt body fails its checksum even with an intact header
+        path = wordlists.index_path('english', self.tmpdir)
+        with open(path, 'r+b') as index:
+            index.seek(-len('zoo'), os.SEEK_END)
+            index.write('zap')
+        self.assertEqual(wordlists.Wordlist('english', self.tmpdir)[2047], 'zoo')
+        umask = os.umask(0022)
+        try:
+            os.unlink(path)
+            wordlists.Wordlist('english', self.tmpdir)
+        finally:
+            os.umask(umask)
+        self.assertEqual(os.stat(path).st_mode & 0777, 0644)
+
+        #changing the source invalidates the checksum
+        text_path = wordlists.text_path('english', self.tmpdir)
+        words = bip39.read_wordlist(text_path)
+        with open(text_path, 'w') as text:
+            text.write('\n'.join(reversed(words)) + '\n')
+        self.assertEqual(wordlists.Wordlist('english', self.tmpdir)[0], 'zoo')
+
+    def test_nfkd(self):
+        """Composed and decomposed accents find the same word"""
+        wordlist = wordlists.open_wordlist('spanish')
+        composed = u'\xe1baco'
+        decomposed = u'a\u0301baco'
+        self.assertEqual(wordlist.find(composed), 0)
+        self.assertEqual(wordlist.find(decomposed), 0)
+        self.assertEqual(wordlist.find(composed.encode('utf-8')), 0)
+
+    def test_detect_language(self):
+        """Detect language from the words of a mnemonic"""
+        self.assertEqual(wordlists.detect_language('abandon ' * 11 + 'about'),
+                         'english')
+        self.assertEqual(wordlists.detect_language(JAPANESE_ZERO_MNEMONIC),
+                         'japanese')
+        with self.assertRaises(ValueError):
+            wordlists.detect_language('mimble wimble')
+        #'abandon' is both english and french
+        with self.assertRaises(wordlists.AmbiguousLanguageError):
+            wordlists.detect_language('abandon')
+
+class LanguageCodecTest(unittest.TestCase):
+    """Test bip39 codecs over compiled wordlists"""
+
+    def test_japanese(self):
+        """Japanese mnemonics use an ideographic space, words are in NFKD"""
+        codec = bip39.get_language_codec('japanese')
+        mnemonic = codec.binstring2mnemonic('0' * 128)
+        self.assertIn(u'\u3000'.encode('utf-8'), mnemonic)
+        self.assertEqual(wordlists.normalize(mnemonic),
+                         wordlists.normalize(JAPANESE_ZERO_MNEMONIC))
+        self.assertEqual(codec.mnemonic2binstring(JAPANESE_ZERO_MNEMONIC),
+                         '0' * 128)
+
+    def test_round_trip_all_languages(self):
+        """Encode and detect a mnemonic in every language"""
+        entropy_bin = bip39.hex2bin('7f7f7f7f7f7f7f7f7f7f7f7f7f7f7f7f')
+        for language in wordlists.LANGUAGES:
+            codec = bip39.get_language_codec(language)
+            mnemonic = codec.binstring2mnemonic(entropy_bin)
+            self.assertEqual(codec.mnemonic2binstring(mnemonic), entropy_bin)
+            self.assertEqual(bip39.detect_language(mnemonic), language)
+
+    def test_english_matches_default(self):
+        """The compiled english wordlist agrees with the default codec"""
+        codec = bip39.Bip39Codec(language='english')
+        for entropy_hex in ('00' * 16, 'ff' * 32, '0c1e24e5917779d297e14d45f14e1a1a'):
+            entropy_bin = bip39.hex2bin(entropy_hex)
+            self.assertEqual(codec.binstring2mnemonic(entropy_bin),
+                             bip39.binstring2mnemonic(entropy_bin))
+
+    def test_unknown_language(self):
+        """Only official wordlists are available"""
+        with self.assertRaises(ValueError):
+            bip39.Bip39Codec(language='klingon')
+
+    def test_files_untouched(self):
+        """Compiling never leaves temporary files behind"""
+        wordlists.open_wordlist('english')
+        leftovers = [name for name in os.listdir(wordlists.WORDLIST_DIR)
+                     if name.startswith('tmp')]
+        self.assertEqual(leftovers, [])
@@ -0,0 +1,293 @@
+"""Screen batches of entropies for patterns that betray a weak source
+
+app.num_entropy_warnings only catches entropy that is all zeros or all ones.
+The detector here also flags:
+
+HAMMING: number of one bits more than HAMMING_SIGMAS standard deviations
+    from half the bits
+PERIODIC: bytes repeat with a period of at most half the length
+ARITHMETIC: bytes step by a constant (mod 256), e.g. 00 01 02 ... or a
+    repeated byte
+MONOTONIC: bytes strictly increase or strictly decrease, by steps of at
+    most a limit for short entropies
+TEST_VECTOR: entropy of a published test vector, e.g. the "abandon ...
+    about" family in data/vectors.json
+COMPRESSIBLE: zlib compresses the entropy to fewer bytes than it has; random
+    input never compresses below its own length
+
+Each check costs a few NumPy operations over the whole batch (a matrix of one
+row per entropy), except COMPRESSIBLE, which runs zlib on each row not
+already flagged. Random entropy of any length is flagged by each check with
+a probability below 1 / FALSE_POSITIVE_ONE_IN: the structural checks scale with
+the length (Thresholds), so that the 4 and 8 byte entropies of 3 and 6 word
+mnemonics are only flagged for periods and steps that chance rarely gives,
+e.g. 4 bytes are MONOTONIC by steps of at most 2 only.
+
+Flags per entropy are a bit mask. warning_counts() turns masks into the
+number of warnings per entropy, counting all-zero and all-one entropy as one
+warning as app.num_entropy_warnings does, whatever else they match.
+
+$ python weak_entropy.py archive.b39c
+"""
+#Python Standard Library 2.7
+import sys
+import json
+import time
+import math
+import zlib
+import argparse
+import binascii
+
+#PyPI modules
+import numpy as np #pip install numpy
+
+#bip39_gym modules
+import corpus #corpus.py
+
+ZERO = 1 << 0
+ONES = 1 << 1
+HAMMING = 1 << 2
+PERIODIC = 1 << 3
+ARITHMETIC = 1 << 4
+MONOTONIC = 1 << 5
+TEST_VECTOR = 1 << 6
+COMPRESSIBLE = 1 << 7
+
+FLAG_MESSAGES = (
+    (ZERO, "Entropy is equal to zero!"),
+    (ONES, "Entropy is all ones in binary!"),
+    (HAMMING, "Entropy has too few or too many one bits"),
+    (PERIODIC, "Entropy bytes repeat periodically"),
+    (ARITHMETIC, "Entropy bytes form an arithmetic sequence"),
+    (MONOTONIC, "Entropy bytes are monotonic"),
+    (TEST_VECTOR, "Entropy is a published test vector"),
+    (COMPRESSIBLE, "Entropy is compressible"))
+
+HAMMING_SIGMAS = 5.0
+
+#a check flags random entropy less than once in this many entropies
+FALSE_POSITIVE_ONE_IN = 10 ** 6
+
+TEST_VECTOR_FILES = ('data/vectors.json', 'data/random_vectors.json')
+
+CHUNK_RECORDS = 65536
+
+_POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint16)
+
+def load_test_vectors(paths=TEST_VECTOR_FILES):
+    """Get the raw entropies of the published vectors in paths"""
+    entropies = set()
+    for path in paths:
+        with open(path, 'r') as vector_file:
+            data = json.load(vector_file)
+        if 'data' in data:
+            vectors = [vector['entropy_hex'] for vector in data['data']]
+        else:
+            vectors = [vector[0] for language in data for vector in data[language]]
+        entropies.update(binascii.unhexlify(entropy_hex) for entropy_hex in vectors)
+    return frozenset(entropies)
+
+_TEST_VECTORS = None
+
+def _test_vectors():
+    global _TEST_VECTORS #pylint: disable=global-statement
+    if _TEST_VECTORS is None:
+        _TEST_VECTORS = load_test_vectors()
+    return _TEST_VECTORS
+
+class Thresholds(object):
+    """Limits of the structural checks for entropies of n_bytes bytes
+
+    Each limit is the loosest whose chance of matching random bytes stays
+    below 1 / FALSE_POSITIVE_ONE_IN, by a union bound over the patterns
+    allowed. Integer arithmetic, as 256 ** n_bytes overflows a float.
+
+    Attributes:
+        periods: Periods checked for PERIODIC
+        arithmetic_step: Largest step (either sign, mod 256) for ARITHMETIC,
+            -1 to skip the check
+        monotonic_step: Largest step for MONOTONIC, 0 to skip the check
+    """
+    __slots__ = ('n_bytes', 'periods', 'arithmetic_step', 'monotonic_step')
+
+    def __init__(self, n_bytes):
+        self.n_bytes = n_bytes
+        #a period p leaves n_bytes - p bytes to match by chance
+        self.periods = [period for period in range(1, n_bytes // 2 + 1)
+                        if (n_bytes // 2) * FALSE_POSITIVE_ONE_IN <
+                        256 ** (n_bytes - period)]
+        self.arithmetic_step = -1
+        self.monotonic_step = 0
+        if n_bytes < 2:
+            return
+        #each allowed step matches with chance 256 ** (1 - n_bytes)
+        n_steps = 256 ** (n_bytes - 1) // FALSE_POSITIVE_ONE_IN
+        self.arithmetic_step = 128 if n_steps >= 256 else (n_steps - 1) // 2
+        #strictly monotonic with any steps: 2 / n_bytes! of random rows
+        if math.factorial(n_bytes) > 2 * FALSE_POSITIVE_ONE_IN:
+            self.monotonic_step = 255
+        else:
+            #steps of 1 to k in one direction: at most 2 (k / 256) ** (n - 1)
+            self.monotonic_step = int(256 * (0.5 / FALSE_POSITIVE_ONE_IN) **
+                                      (1.0 / (n_bytes - 1)))
+
+_THRESHOLDS = {}
+
+def thresholds(n_bytes):
+    """Thresholds of n_bytes, computed once per length"""
+    limits = _THRESHOLDS.get(n_bytes)
+    if limits is None:
+        limits = _THRESHOLDS[n_bytes] = Thresholds(n_bytes)
+    return limits
+
+def entropy_matrix(entropies):
+    """Stack raw entropies of equal length into an (n, n_bytes) uint8 matrix
+
+    Raises: ValueError if the lengths differ
+    """
+    lengths = set(len(entropy_bytes) for entropy_bytes in entropies)
+    if len(lengths) > 1:
+        raise ValueError("Entropies differ in length: {0}".format(sorted(lengths)))
+    n_bytes = lengths.pop() if lengths else 0
+    return np.frombuffer(''.join(entropies), dtype=np.uint8).reshape(
+        len(entropies), n_bytes)
+
+def detect(matrix, test_vectors=None):
+    """Get the flags of each row of an entropy matrix
+
+    Args:
+        matrix (numpy.ndarray): (n, n_bytes) uint8 matrix, one entropy per row
+        test_vectors (Set[str]): Raw entropies to flag as TEST_VECTOR.
+            Default: those of TEST_VECTOR_FILES
+
+    Returns: numpy.ndarray of n flag masks
+    """
+    if test_vectors is None:
+        test_vectors = _test_vectors()
+    n_rows, n_bytes = matrix.shape
+    flags = np.zeros(n_rows, dtype=np.uint32)
+    if n_rows == 0 or n_bytes == 0:
+        return flags
+
+    flags[(matrix == 0).all(axis=1)] |= ZERO
+    flags[(matrix == 0xFF).all(axis=1)] |= ONES
+
+    n_bits = n_bytes * 8
+    weight = _POPCOUNT[matrix].sum(axis=1)
+    limit = HAMMING_SIGMAS * np.sqrt(n_bits) / 2
+    flags[np.abs(weight - n_bits / 2.0) > limit] |= HAMMING
+
+    limits = thresholds(n_bytes)
+    periodic = np.zeros(n_rows, dtype=bool)
+    for period in limits.periods:
+        periodic |= (matrix[:, period:] == matrix[:, :-period]).all(axis=1)
+    flags[periodic] |= PERIODIC
+
+    if n_bytes > 1:
+        steps = np.diff(matrix.astype(np.int16), axis=1)
+        if limits.arithmetic_step >= 0:
+            #signed step in [-128, 127]
+            wrapped = (steps + 128) % 256 - 128
+            flags[(wrapped == wrapped[:, 0:1]).all(axis=1) &
+                  (np.abs(wrapped[:, 0]) <= limits.arithmetic_step)] |= ARITHMETIC
+        if limits.monotonic_step > 0:
+            small = (np.abs(steps) <= limits.monotonic_step).all(axis=1)
+            flags[small & ((steps > 0).all(axis=1) |
+                           (steps < 0).all(axis=1))] |= MONOTONIC
+
+    for num in xrange(n_rows):
+        if flags[num]:
+            continue
+        entropy_bytes = matrix[num].tostring()
+        if entropy_bytes in test_vectors:
+            flags[num] |= TEST_VECTOR
+        #zlib adds a 2 byte header and a 4 byte checksum
+        elif len(zlib.compress(entropy_bytes, 9)) - 6 < n_bytes:
+            flags[num] |= COMPRESSIBLE
+    #rows flagged above may be test vectors too, e.g. all zeros
+    for num in np.flatnonzero(flags):
+        if matrix[num].tostring() in test_vectors:
+            flags[num] |= TEST_VECTOR
+    return flags
+
+def warning_counts(flags):
+    """Number of warnings per flag mask
+
+    All-zero and all-one entropy count as one warning, as in
+    app.num_entropy_warnings; otherwise every flag is one warning.
+    """
+    flags = np.asarray(flags, dtype=np.uint32)
+    counts = np.zeros(flags.shape, dtype=np.uint8)
+    for flag, _ in FLAG_MESSAGES:
+        counts += (flags & flag) != 0
+    counts[(flags & (ZERO | ONES)) != 0] = 1
+    return counts
+
+def describe(flags):
+    """Messages for the flags set in one mask"""
+    if flags & (ZERO | ONES):
+        flags &= ZERO | ONES
+    return [message for flag, message in FLAG_MESSAGES if flags & flag]
+
+def detect_entropies(entropies, test_vectors=None):
+    """Get the flags of raw entropies of any lengths, in their order"""
+    by_length = {}
+    for num, entropy_bytes in enumerate(entropies):
+        by_length.setdefault(len(entropy_bytes), []).append(num)
+    flags = [0] * len(entropies)
+    for nums in by_length.itervalues():
+        matrix = entropy_matrix([entropies[num] for num in nums])
+        for num, mask in zip(nums, detect(matrix, test_vectors)):
+            flags[num] = int(mask)
+    return flags
+
+def audit_corpus(path, chunk_records=CHUNK_RECORDS, test_vectors=None):
+    """Yield (record number, flags) of every flagged record of a corpus file
+
+    Entropy corpora are read as one matrix per chunk straight from the file.
+    """
+    with corpus.CorpusReader(path) as reader:
+        records = None
+        if reader.kind == corpus.KIND_ENTROPY and len(reader) > 0:
+            records = np.memmap(path, dtype=np.uint8, mode='r',
+                                offset=corpus.HEADER_SIZE,
+                                shape=(len(reader), reader.record_size))
+        for start in xrange(0, len(reader), chunk_records):
+            stop = min(start + chunk_records, len(reader))
+            if records is not None:
+                chunk = records[start:stop]
+                flags = np.zeros(stop - start, dtype=np.uint32)
+                for length in np.unique(chunk[:, 0]):
+                    rows = chunk[:, 0] == length
+                    flags[rows] = detect(chunk[rows, 1:1 + int(length)],
+                                         test_vectors)
+            else:
+                flags = np.array(detect_entropies(
+                    [reader.entropy_bytes(num) for num in xrange(start, stop)],
+                    test_vectors), dtype=np.uint32)
+            for num in np.flatnonzero(flags):
+                yield start + int(num), int(flags[num])
+
+def _main():
+    parser = argparse.ArgumentParser(
+        description='Screen corpus.py files for weak entropy')
+    parser.add_argument('corpora', nargs='+')
+    parser.add_argument('--chunk-records', type=int, default=CHUNK_RECORDS)
+    args = parser.parse_args()
+
+    began = time.time()
+    n_records = 0
+    n_flagged = 0
+    for path in args.corpora:
+        for num, flags in audit_corpus(path, args.chunk_records):
+            n_flagged += 1
+            print "{0}[{1}]: {2}".format(path, num, ' '.join(describe(flags)))
+        with corpus.CorpusReader(path) as reader:
+            n_records += len(reader)
+    elapsed = time.time() - began
+    print "Flagged {0} of {1} records in {2:.2f}s ({3:.0f} records/s)".format(
+        n_flagged, n_records, elapsed, n_records / max(elapsed, 1e-9))
+    sys.exit(1 if n_flagged else 0)
+
+if __name__ == '__main__':
+    _main()
@@ -0,0 +1,308 @@
+"""Word index distribution of generated or stored mnemonics
+
+entropy.entropy_test checks the bits that get_entropy returns; this checks
+what users actually write down, the word at each position. The counts form a
+matrix of n_words rows by 2048 word indices, and each row gets a chi-square
+test against the uniform distribution (2047 degrees of freedom).
+
+The last word carries the CS checksum bits (SHA-256 of the entropy) in its
+low bits. Its index is only as uniform as SHA-256 output is, and biased
+entropy shows up there differently than at the other positions, so the last
+word is also tested on its entropy bits alone (index >> CS, 2**(11 - CS)
+bins).
+
+Mnemonics are generated or read in chunks on a process pool. Each chunk is
+counted into its own matrix and the matrices are summed. With --drbg-seed,
+chunk i draws from HMAC_DRBG(seed, 'chunk i'), so a run gives the same
+counts whatever the number of processes.
+
+urandom: binstring2mnemonic(get_entropy(...)) in vectorized form
+dice: simulated rolls through entropy.die_rolls_to_bitstring (slow)
+corpus: corpus.py files of either kind
+
+$ python word_distribution.py urandom -n 10000000 --words 24
+$ python word_distribution.py dice -n 100000 --words 12
+$ python word_distribution.py corpus archive.b39c
+"""
+#Python Standard Library 2.7
+import sys
+import math
+import time
+import hashlib
+import argparse
+import binascii
+import multiprocessing
+
+#PyPI modules
+import numpy as np #pip install numpy
+
+#bip39_gym modules
+import bip39 #bip39.py
+import corpus #corpus.py
+import entropy_sources #entropy_sources.py
+import check_dice_entropy #check_dice_entropy.py
+
+N_INDICES = 2 ** bip39.WORDLIST_PIECE_BITS
+
+CHUNK_MNEMONICS = 65536
+
+#per position, before the Bonferroni correction over positions
+SIGNIFICANCE = 0.001
+
+#smallest expected count per bin for the chi-square test to be meaningful
+MIN_EXPECTED = 5
+
+_INDEX_WEIGHTS = 2 ** np.arange(bip39.WORDLIST_PIECE_BITS - 1, -1, -1)
+
+def words_for_bytes(n_bytes):
+    """Number of words of a mnemonic of n_bytes of entropy"""
+    return n_bytes * 8 * (bip39.ENT_MOD + 1) // bip39.ENT_MOD // \
+        bip39.WORDLIST_PIECE_BITS
+
+def checksum_bits(n_words):
+    """Number of checksum bits in the last word"""
+    return bip39.get_layout(n_words).cs
+
+def indices_matrix(matrix):
+    """Word indices of each row of an (n, n_bytes) uint8 entropy matrix
+
+    Returns: (n, n_words) numpy.ndarray, checksum included
+    """
+    n_rows, n_bytes = matrix.shape
+    n_words = words_for_bytes(n_bytes)
+    data = matrix.tostring()
+    #at most 8 checksum bits, all in the first byte of the hash
+    first_bytes = ''.join([hashlib.sha256(data[i:i + n_bytes]).digest()[0]
+                           for i in xrange(0, len(data), n_bytes)])
+    checksums = np.frombuffer(first_bytes, dtype=np.uint8).reshape(n_rows, 1)
+    bits = np.hstack([np.unpackbits(matrix, axis=1),
+                      np.unpackbits(checksums, axis=1)[:, :checksum_bits(n_words)]])
+    return bits.reshape(n_rows, n_words, bip39.WORDLIST_PIECE_BITS).dot(
+        _INDEX_WEIGHTS)
+
+def packed_indices_matrix(records, n_words):
+    """Word indices of an (n, record_size) matrix of packed corpus records"""
+    n_bits = n_words * bip39.WORDLIST_PIECE_BITS
+    bits = np.unpackbits(records, axis=1)[:, :n_bits]
+    return bits.reshape(len(records), n_words, bip39.WORDLIST_PIECE_BITS).dot(
+        _INDEX_WEIGHTS)
+
+def count_indices(indices):
+    """(n_words, 2048) matrix of how often each index is at each position"""
+    n_words = indices.shape[1]
+    offsets = np.arange(n_words) * N_INDICES
+    return np.bincount((indices + offsets).ravel(),
+                       minlength=n_words * N_INDICES).reshape(n_words, N_INDICES)
+
+def _chi_square_sf(statistic, dof):
+    """P(X >= statistic) for X ~ chi-square(dof), Wilson-Hilferty approximation"""
+    scale = 2.0 / (9 * dof)
+    z_score = ((statistic / dof) ** (1.0 / 3) - (1 - scale)) / math.sqrt(scale)
+    return 0.5 * math.erfc(z_score / math.sqrt(2))
+
+def chi_square(counts):
+    """Chi-square statistic and p-value of each row against uniform
+
+    Returns: List[Tuple[float, float]]
+    """
+    counts = np.asarray(counts, dtype=np.float64)
+    expected = counts.sum(axis=1, keepdims=True) / counts.shape[1]
+    statistics = ((counts - expected) ** 2 / expected).sum(axis=1)
+    return [(float(statistic), _chi_square_sf(statistic, counts.shape[1] - 1))
+            for statistic in statistics]
+
+def last_word_entropy_counts(counts):
+    """Counts of the last word with its checksum bits dropped"""
+    n_bins = N_INDICES >> checksum_bits(len(counts))
+    return counts[-1].reshape(n_bins, -1).sum(axis=1)
+
+def _merge(totals, counts_by_words):
+    for n_words, counts in counts_by_words.iteritems():
+        if n_words in totals:
+            totals[n_words] += counts
+        else:
+            totals[n_words] = counts
+    return totals
+
+def chunk_source(seed, chunk):
+    """Source of a chunk: HMAC_DRBG(seed, 'chunk N'), or os.urandom"""
+    if seed is None:
+        return entropy_sources.get_default_source()
+    return entropy_sources.HmacDrbgSource(
+        seed, personalization='chunk {0}'.format(chunk))
+
+def count_generated(job):
+    """Count one chunk of generated mnemonics
+
+    Args:
+        job (tuple): (method, seed, chunk, n_mnemonics, n_words), method
+            being 'urandom' or 'dice'
+
+    Returns: {n_words: counts}
+    """
+    method, seed, chunk, n_mnemonics, n_words = job
+    source = chunk_source(seed, chunk)
+    n_bytes = bip39.get_layout(n_words).n_bytes
+    if method == 'urandom':
+        data = source.get_bytes(n_mnemonics * n_bytes)
+    else:
+        dice_source = source if seed is not None else None
+        data = ''.join([bip39.decode_binary_string(
+            check_dice_entropy.rand_wrapper(n_bytes * 8, dice_source))
+                        for _ in xrange(n_mnemonics)])
+    matrix = np.frombuffer(data, dtype=np.uint8).reshape(n_mnemonics, n_bytes)
+    return {n_words: count_indices(indices_matrix(matrix))}
+
+def count_corpus(job):
+    """Count records start to stop of a corpus file
+
+    Entropy corpora may mix lengths, so counts are kept per word count.
+
+    Args:
+        job (tuple): (path, start, stop)
+
+    Returns: {n_words: counts}
+    """
+    path, start, stop = job
+    with corpus.CorpusReader(path) as reader:
+        kind, n_words, size = reader.kind, reader.n_words, reader.record_size
+    records = np.memmap(path, dtype=np.uint8, mode='r', offset=corpus.HEADER_SIZE,
+                        shape=(stop, size))[start:stop]
+    if kind == corpus.KIND_INDICES:
+        return {n_words: count_indices(packed_indices_matrix(records, n_words))}
+    counts_by_words = {}
+    for length in np.unique(records[:, 0]):
+        rows = np.ascontiguousarray(records[records[:, 0] == length,
+                                            1:1 + int(length)])
+        _merge(counts_by_words,
+               {words_for_bytes(int(length)): count_indices(indices_matrix(rows))})
+    return counts_by_words
+
+def run_jobs(worker, jobs, processes=None):
+    """Run count jobs and sum their counts
+
+    Args:
+        processes (int): Worker processes. 0 runs jobs on the calling
+            process. Default: number of CPUs
+
+    Returns: {n_words: counts}
+    """
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    totals = {}
+    if processes == 0:
+        for job in jobs:
+            _merge(totals, worker(job))
+        return totals
+    pool = multiprocessing.Pool(processes)
+    try:
+        for counts_by_words in pool.imap_unordered(worker, jobs):
+            _merge(totals, counts_by_words)
+    finally:
+        pool.terminate()
+        pool.join()
+    return totals
+
+def generated_jobs(method, n_mnemonics, n_words, seed=None,
+                   chunk_size=CHUNK_MNEMONICS):
+    """Jobs for count_generated covering n_mnemonics"""
+    return [(method, seed, chunk, min(chunk_size, n_mnemonics - start), n_words)
+            for chunk, start in enumerate(xrange(0, n_mnemonics, chunk_size))]
+
+def corpus_jobs(paths, chunk_size=CHUNK_MNEMONICS):
+    """Jobs for count_corpus covering every record of the corpus files"""
+    jobs = []
+    for path in paths:
+        with corpus.CorpusReader(path) as reader:
+            n_records = len(reader)
+        jobs.extend((path, start, min(start + chunk_size, n_records))
+                    for start in xrange(0, n_records, chunk_size))
+    return jobs
+
+def _check_row(label, counts, alpha, report):
+    statistic, p_value = chi_square([counts])[0]
+    status = 'FAILURE' if p_value < alpha else 'ok'
+    report("{0:<22}chi2 {1:>12.1f}  p {2:.4g}  min {3}  max {4}  {5}".format(
+        label, statistic, p_value, int(counts.min()), int(counts.max()), status))
+    return p_value >= alpha
+
+def print_report(counts_by_words, report=None):
+    """Report chi-square uniformity per word position
+
+    Args:
+        counts_by_words (dict): {n_words: counts} as from run_jobs
+        report (function): Called with each result line. Default: print
+
+    Returns: True if no position failed
+    """
+    if report is None:
+        report = _print
+    passed = True
+    for n_words in sorted(counts_by_words):
+        counts = counts_by_words[n_words]
+        n_mnemonics = int(counts[0].sum())
+        cs_bits = checksum_bits(n_words)
+        report("{0} mnemonics of {1} words".format(n_mnemonics, n_words))
+        if n_mnemonics < MIN_EXPECTED * N_INDICES:
+            report("Too few mnemonics for a chi-square test, need {0}".format(
+                MIN_EXPECTED * N_INDICES))
+            continue
+        #every position plus the entropy bits of the last word
+        alpha = SIGNIFICANCE / (n_words + 1)
+        for position in range(n_words):
+            label = "word {0}".format(position + 1)
+            if position == n_words - 1:
+                label += " ({0} cs bits)".format(cs_bits)
+            passed &= _check_row(label, counts[position], alpha, report)
+        passed &= _check_row("word {0} entropy bits".format(n_words),
+                             last_word_entropy_counts(counts), alpha, report)
+        report("The last word ends in {0} checksum bits (SHA-256 of the "
+               "entropy); it is uniform only as far as the hash is".format(
+                   cs_bits))
+    return passed
+
+def _print(_str):
+    print _str
+
+def _main():
+    parser = argparse.ArgumentParser(
+        description='Chi-square uniformity of word indices per position')
+    subparsers = parser.add_subparsers(dest='command')
+    for method, help_text in (('urandom', 'mnemonics from get_entropy'),
+                              ('dice', 'mnemonics from simulated dice rolls')):
+        generator = subparsers.add_parser(method, help=help_text)
+        generator.add_argument('-n', type=int, default=1000000,
+                               help='number of mnemonics')
+        generator.add_argument('--words', type=int, default=24,
+                               choices=range(12, 25, 3))
+        generator.add_argument('--drbg-seed', metavar='HEX',
+                               help='deterministic HMAC_DRBG seed (testing only)')
+    corpora = subparsers.add_parser('corpus', help='corpus.py files')
+    corpora.add_argument('corpora', nargs='+')
+    for subparser in subparsers.choices.itervalues():
+        subparser.add_argument('--processes', type=int, default=None,
+                               help='worker processes (default: #CPUs)')
+        subparser.add_argument('--chunk', type=int, default=CHUNK_MNEMONICS,
+                               help='mnemonics per job')
+    args = parser.parse_args()
+
+    began = time.time()
+    if args.command == 'corpus':
+        counts_by_words = run_jobs(count_corpus,
+                                   corpus_jobs(args.corpora, args.chunk),
+                                   args.processes)
+    else:
+        seed = binascii.unhexlify(args.drbg_seed) if args.drbg_seed else None
+        counts_by_words = run_jobs(count_generated,
+                                   generated_jobs(args.command, args.n, args.words,
+                                                  seed, args.chunk),
+                                   args.processes)
+    passed = print_report(counts_by_words)
+    elapsed = time.time() - began
+    n_mnemonics = sum(int(counts[0].sum()) for counts in counts_by_words.values())
+    print "Counted {0} mnemonics in {1:.2f}s ({2:.0f} mnemonics/s)".format(
+        n_mnemonics, elapsed, n_mnemonics / max(elapsed, 1e-9))
+    sys.exit(0 if passed else 1)
+
+if __name__ == '__main__':
+    _main()
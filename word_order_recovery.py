@@ -0,0 +1,421 @@
+"""Recover the word order of a mnemonic from a scrambled or misordered backup
+
+Starting from the words in the order they were written down, permutations
+are tried in stages, most likely first:
+
+identity: the sentence as written
+adjacent: one pair of neighbouring words swapped
+transpositions: any 1 to --max-swaps pairs of words swapped
+subsets: every derangement of every 3 to --max-subset words (each word of
+    the subset moves; the others stay)
+all: every order of all words, for a word set whose order is lost
+    (--unordered). 12 words are 479 million orders; 24 words are out of reach.
+
+The stages overlap (two swaps are also a derangement of 4 words), so a few
+orders are checked twice; reported survivors are deduplicated.
+
+Only 1 in 2**CS orders has a valid checksum (1/16 for 12 words, 1/256 for 24),
+so the checksum is checked first without building any sentence or bit
+string: PermutationChecker keeps the packed bits of the current order in one
+bytearray and moves words in and out of it with XOR masks, so a candidate
+costs a few byte operations and one SHA-256. Survivors can then be matched
+against a seed prefix, xprv/xpub or address (passphrase_recovery targets).
+
+Stages are split into shards (round-robin over their outer loop) that run
+on a process pool; each shard returns its survivors, or stops at the first
+survivor that matches the target.
+
+$ python word_order_recovery.py --mnemonic "..." --max-swaps 2 --max-subset 4
+$ python word_order_recovery.py --mnemonic "..." --unordered \
+    --address 1LqBGSKuX5yYUonjxT5qGfpUsXKYYWeabA
+"""
+#Python Standard Library 2.7
+import sys
+import time
+import getpass
+import hashlib
+import argparse
+import itertools
+import multiprocessing
+
+#bip39_gym modules
+import bip32 #bip32.py
+import bip39 #bip39.py
+import checkpoint as checkpoint_mod #checkpoint.py
+import passphrase_recovery #passphrase_recovery.py
+import wordlists #wordlists.py
+
+STAGES = ('identity', 'adjacent', 'transpositions', 'subsets', 'all')
+
+DEFAULT_MAX_SWAPS = 2
+DEFAULT_MAX_SUBSET = 4
+
+SHARDS_PER_PROCESS = 8
+
+def _derangements(size):
+    return [perm for perm in itertools.permutations(range(size))
+            if all(perm[num] != num for num in range(size))]
+
+class PermutationChecker(object):
+    """Checksum test of orders of a fixed list of word indices
+
+    The packed bits of the current order live in one bytearray. Slot j is
+    the j-th word as given; order[position] is the slot at that position.
+
+    Args:
+        indices (List[int]): Word indices as written down
+
+    Raises: ValueError if the number of words isn't a valid mnemonic length
+    """
+
+    def __init__(self, indices):
+        n_words = len(indices)
+        layout = bip39.get_layout(n_words)
+        if layout is None or not bip39.ENT_MIN <= layout.ent <= bip39.ENT_MAX:
+            raise ValueError("Not a valid number of words: {0}".format(n_words))
+        self.indices = tuple(indices)
+        self.n_words = n_words
+        self.cs_bits = layout.cs
+        self.ent_bytes = layout.n_bytes
+        self.buffer = bytearray((layout.n_bits + 7) // 8)
+        self._entropy = memoryview(self.buffer)[0:self.ent_bytes]
+        #_masks[position][slot]: (byte offset, bits) pairs of that word there
+        self._masks = [[self._word_masks(position, index) for index in indices]
+                       for position in range(n_words)]
+        self.order = range(n_words)
+        for position in range(n_words):
+            self._toggle(position, position)
+
+    def _word_masks(self, position, index):
+        shift = len(self.buffer) * 8 - (position + 1) * bip39.WORDLIST_PIECE_BITS
+        value = index << shift
+        masks = []
+        for offset in range(len(self.buffer)):
+            byte = (value >> ((len(self.buffer) - 1 - offset) * 8)) & 0xFF
+            if byte:
+                masks.append((offset, byte))
+        return tuple(masks)
+
+    def _toggle(self, position, slot):
+        buf = self.buffer
+        for offset, bits in self._masks[position][slot]:
+            buf[offset] ^= bits
+
+    def swap(self, pos1, pos2):
+        """Swap the words at two positions"""
+        order = self.order
+        slot1, slot2 = order[pos1], order[pos2]
+        self._toggle(pos1, slot1)
+        self._toggle(pos2, slot2)
+        self._toggle(pos1, slot2)
+        self._toggle(pos2, slot1)
+        order[pos1], order[pos2] = slot2, slot1
+
+    def place(self, assignments):
+        """Put slot s at position p for every (p, s); returns the undo list"""
+        undo = [(position, self.order[position]) for position, _ in assignments]
+        for position, slot in undo:
+            self._toggle(position, slot)
+        for position, slot in assignments:
+            self._toggle(position, slot)
+            self.order[position] = slot
+        return undo
+
+    def valid(self):
+        """Whether the current order has a valid checksum"""
+        digest = hashlib.sha256(self._entropy).digest()
+        return (self.buffer[self.ent_bytes] ^ ord(digest[0])) >> \
+            (8 - self.cs_bits) == 0
+
+    def current(self):
+        """Word indices of the current order"""
+        return tuple(self.indices[slot] for slot in self.order)
+
+def _heap_permutations(checker, positions):
+    """Visit every order of the words at positions, one swap per step"""
+    size = len(positions)
+    counters = [0] * size
+    yield
+    level = 1
+    while level < size:
+        if counters[level] < level:
+            other = 0 if level % 2 == 0 else counters[level]
+            checker.swap(positions[other], positions[level])
+            yield
+            counters[level] += 1
+            level = 1
+        else:
+            counters[level] = 0
+            level += 1
+
+def _units(stage, n_words, max_swaps, max_subset):
+    """Outer loop of a stage; shards take every n_shards-th unit"""
+    if stage == 'identity':
+        return [()]
+    if stage == 'adjacent':
+        return [((pos, pos + 1),) for pos in range(n_words - 1)]
+    if stage == 'transpositions':
+        pairs = [pair for pair in itertools.combinations(range(n_words), 2)
+                 if pair[1] != pair[0] + 1]
+        first = [(pair,) for pair in pairs]
+        more = (swaps for n_swaps in range(2, max_swaps + 1)
+                for swaps in itertools.combinations(
+                    itertools.combinations(range(n_words), 2), n_swaps)
+                if len(set(itertools.chain(*swaps))) == 2 * n_swaps)
+        return itertools.chain(first, more)
+    if stage == 'subsets':
+        return (subset for size in range(3, max_subset + 1)
+                for subset in itertools.combinations(range(n_words), size))
+    if stage == 'all':
+        #first two words fixed per unit, the rest permuted
+        return itertools.permutations(range(n_words), min(2, n_words))
+    raise ValueError("Unknown stage: {0}".format(stage))
+
+def _unit_candidates(checker, stage, unit, derangements):
+    """Visit the candidates of one unit, restoring the order afterwards"""
+    if stage in ('identity', 'adjacent', 'transpositions'):
+        for pos1, pos2 in unit:
+            checker.swap(pos1, pos2)
+        yield
+        for pos1, pos2 in reversed(unit):
+            checker.swap(pos1, pos2)
+    elif stage == 'subsets':
+        for perm in derangements[len(unit)]:
+            undo = checker.place([(unit[num], unit[perm[num]])
+                                  for num in range(len(unit))])
+            yield
+            checker.place(undo)
+    else:
+        rest = [slot for slot in range(checker.n_words) if slot not in unit]
+        undo = checker.place(zip(range(checker.n_words), list(unit) + rest))
+        for _ in _heap_permutations(checker, range(len(unit), checker.n_words)):
+            yield
+        checker.place(undo)
+
+def search(indices, stages, shard=0, n_shards=1, max_swaps=DEFAULT_MAX_SWAPS,
+           max_subset=DEFAULT_MAX_SUBSET, stats=None):
+    """Yield word indices of every order with a valid checksum, in one shard
+
+    Args:
+        indices (List[int]): Word indices as written down
+        stages (List[str]): Stages of STAGES to run, in order
+        stats (dict): If given, 'candidates' counts the orders checked
+    """
+    checker = PermutationChecker(indices)
+    derangements = dict((size, _derangements(size))
+                        for size in range(3, max_subset + 1))
+    if stats is None:
+        stats = {}
+    stats['candidates'] = 0
+    for stage in stages:
+        units = _units(stage, len(indices), max_swaps, max_subset)
+        for unit in itertools.islice(units, shard, None, n_shards):
+            for _ in _unit_candidates(checker, stage, unit, derangements):
+                stats['candidates'] += 1
+                if checker.valid():
+                    yield checker.current()
+
+def search_shard(job):
+    """Run one shard; stop at the first survivor matching the target
+
+    Survivors are only kept without a target: with one, they are checked
+    as they stream out of the search and only counted.
+
+    Args:
+        job (tuple): (indices, stages, shard, n_shards, max_swaps,
+            max_subset, target, passphrase), target None to keep survivors
+
+    Returns: (shard, candidates checked, number of survivors, survivors,
+        match)
+    """
+    indices, stages, shard, n_shards, max_swaps, max_subset, target, \
+        passphrase = job
+    codec = bip39.get_default_codec(print_warning=False)
+    stats = {}
+    n_survivors = 0
+    survivors = []
+    match = None
+    for survivor in search(indices, stages, shard, n_shards, max_swaps,
+                           max_subset, stats):
+        n_survivors += 1
+        if target is None:
+            survivors.append(survivor)
+            continue
+        mnemonic = codec.get_mnemonic(survivor)
+        if target.matches(bip39.mnemonic2seed(mnemonic, passphrase)):
+            match = mnemonic
+            break
+    return shard, stats['candidates'], n_survivors, survivors, match
+
+def recover(indices, stages, target=None, passphrase='', processes=None,
+            n_shards=None, max_swaps=DEFAULT_MAX_SWAPS,
+            max_subset=DEFAULT_MAX_SUBSET, checkpoint=None, report=None):
+    """Search every shard, on a process pool
+
+    Args:
+        target: passphrase_recovery target the right order must match, or
+            None to return every order with a valid checksum
+        processes (int): Worker processes. 0 searches on the calling
+            process. Default: number of CPUs
+        checkpoint (checkpoint.Checkpoint): If given, finished shards are
+            saved to it and skipped by a resumed run
+
+    Returns: dict with candidates, valid (orders with a valid checksum, as
+        checked by every stage), survivors (sorted word index tuples,
+        deduplicated; empty with a target), match (the mnemonic or None)
+        and elapsed
+    """
+    if report is None:
+        report = _print
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    if n_shards is None:
+        n_shards = max(processes, 1) * SHARDS_PER_PROCESS
+    result = {'candidates': 0, 'valid': 0, 'survivors': set(), 'match': None}
+    done = []
+    state = checkpoint.load() if checkpoint is not None else None
+    if state is not None:
+        done = state['done']
+        result['candidates'] = state['candidates']
+        result['valid'] = state['valid']
+        result['survivors'] = set(tuple(survivor) for survivor in
+                                  state.get('survivors', ()))
+        report("Resuming with {0} of {1} shards done from {2}".format(
+            len(done), n_shards, checkpoint.path))
+    jobs = [(tuple(indices), tuple(stages), shard, n_shards, max_swaps,
+             max_subset, target, passphrase)
+            for shard in range(n_shards) if shard not in done]
+    began = time.time()
+
+    def collect(shard_result):
+        shard, n_candidates, n_survivors, survivors, match = shard_result
+        done.append(shard)
+        result['candidates'] += n_candidates
+        result['valid'] += n_survivors
+        result['survivors'].update(survivors)
+        result['match'] = match
+        if checkpoint is not None and checkpoint.due():
+            state = {'done': done, 'candidates': result['candidates'],
+                     'valid': result['valid']}
+            if target is None:
+                #the survivors are the result; with a target only counters
+                state['survivors'] = sorted(result['survivors'])
+            checkpoint.save(state)
+        report("Shard {0}/{1}: {2} orders checked, {3} with a valid checksum, "
+               "{4:.0f} orders/s".format(
+                   len(done), n_shards, result['candidates'], result['valid'],
+                   result['candidates'] / max(time.time() - began, 1e-9)))
+        return match
+
+    if processes == 0:
+        for job in jobs:
+            if collect(search_shard(job)) is not None:
+                break
+    else:
+        pool = multiprocessing.Pool(processes)
+        try:
+            for shard_result in pool.imap_unordered(search_shard, jobs):
+                if collect(shard_result) is not None:
+                    break
+        finally:
+            pool.terminate()
+            pool.join()
+    result['survivors'] = sorted(result['survivors'])
+    result['elapsed'] = time.time() - began
+    if checkpoint is not None:
+        checkpoint.remove()
+    return result
+
+def recovery_checkpoint(path, mnemonic, stages, n_shards, max_swaps,
+                        max_subset, target=None, passphrase='',
+                        interval=checkpoint_mod.CHECKPOINT_INTERVAL):
+    """Checkpoint of a recovery run, None if path is None
+
+    Neither the mnemonic nor the passphrase is written to it, only their
+    SHA-256, so that a run with another passphrase doesn't skip the shards
+    searched with this one.
+    """
+    if path is None:
+        return None
+    codec = bip39.get_default_codec(print_warning=False)
+    return checkpoint_mod.Checkpoint(
+        path, 'word_order_recovery',
+        {'mnemonic_sha256': hashlib.sha256(' '.join(
+            codec.split_words(mnemonic))).hexdigest(),
+         'stages': stages, 'shards': n_shards,
+         'max_swaps': max_swaps, 'max_subset': max_subset,
+         'target': target.description if target else None,
+         'passphrase_sha256': hashlib.sha256(
+             wordlists.normalize(passphrase)).hexdigest()}, interval)
+
+def _print(_str):
+    print _str
+
+def _main():
+    parser = argparse.ArgumentParser(
+        description='Recover the word order of a mnemonic')
+    parser.add_argument('--mnemonic',
+                        help='words as written down (default: prompt without echo)')
+    parser.add_argument('--unordered', action='store_true',
+                        help='the order is lost: try every order')
+    parser.add_argument('--max-swaps', type=int, default=DEFAULT_MAX_SWAPS)
+    parser.add_argument('--max-subset', type=int, default=DEFAULT_MAX_SUBSET)
+    targets = parser.add_mutually_exclusive_group()
+    targets.add_argument('--seed-prefix', metavar='HEX')
+    targets.add_argument('--xprv')
+    targets.add_argument('--xpub')
+    targets.add_argument('--address', help='P2PKH address')
+    parser.add_argument('--path', help="derivation path, e.g. m/44'/0'/0'/0/0")
+    parser.add_argument('--passphrase', default='')
+    parser.add_argument('--processes', type=int, default=None,
+                        help='worker processes (default: #CPUs)')
+    parser.add_argument('--shards', type=int, default=None)
+    checkpoint_mod.add_checkpoint_args(parser)
+    args = parser.parse_args()
+
+    mnemonic = args.mnemonic or getpass.getpass('Mnemonic: ')
+    codec = bip39.get_default_codec(print_warning=False)
+    try:
+        indices = codec.get_indices(mnemonic)
+        PermutationChecker(indices)
+    except (ValueError, bip39.InvalidWordError) as err:
+        parser.error('invalid mnemonic: {0}'.format(err))
+
+    target = None
+    try:
+        if args.seed_prefix:
+            target = passphrase_recovery.SeedPrefixTarget(args.seed_prefix)
+        elif args.address:
+            target = passphrase_recovery.AddressTarget(
+                args.address, args.path or passphrase_recovery.DEFAULT_ADDRESS_PATH)
+        elif args.xprv or args.xpub:
+            target = passphrase_recovery.ExtendedKeyTarget(
+                args.xprv or args.xpub, args.path or 'm')
+    except (ValueError, bip32.InvalidBase58Error) as err:
+        parser.error('invalid target: {0}'.format(err))
+
+    stages = ['all'] if args.unordered else \
+        ['identity', 'adjacent', 'transpositions', 'subsets']
+    processes = args.processes
+    if processes is None:
+        processes = multiprocessing.cpu_count()
+    n_shards = args.shards or max(processes, 1) * SHARDS_PER_PROCESS
+    checkpoint = recovery_checkpoint(
+        args.checkpoint, mnemonic, stages, n_shards, args.max_swaps,
+        args.max_subset, target, args.passphrase, args.checkpoint_interval)
+
+    result = recover(indices, stages, target, args.passphrase, processes,
+                     n_shards, args.max_swaps, args.max_subset, checkpoint)
+    print "{0} orders checked in {1:.1f}s, {2} with a valid checksum".format(
+        result['candidates'], result['elapsed'], result['valid'])
+    if target is None:
+        for survivor in result['survivors']:
+            print codec.get_mnemonic(survivor)
+    elif result['match'] is None:
+        print "No order matched the target"
+        sys.exit(1)
+    else:
+        print "Found: {0}".format(result['match'])
+
+if __name__ == '__main__':
+    _main()
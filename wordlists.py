@@ -0,0 +1,353 @@
+"""Official BIP39 wordlists compiled to memory-mapped binary indexes
+
+Each data/<language>.txt is compiled once into data/<language>.idx, which is
+opened with mmap. Loading every language then costs two small checksums per
+file (of the text and of the index), and the pages are shared by all processes on the host that
+open the same index.
+
+################
+# Index format #
+################
+
+All integers are little-endian.
+
+| Offset | Size             | Contents                                        |
++--------+------------------+-------------------------------------------------+
+|      0 | 80               | Header (see HEADER_FORMAT)                      |
+|     80 | 4 * (n_words+1)  | Offset of each word in the string blob, in      |
+|        |                  | wordlist order, plus the end of the last word   |
+|        | 2 * n_words      | Word indices sorted by word (sorted string      |
+|        |                  | table, used for prefix searches)                |
+|        | 2 * n_slots      | Open-addressing hash table of word indices,     |
+|        |                  | EMPTY_SLOT if unused, linear probing on crc32   |
+|        | blob_len         | Words as UTF-8 in NFKD form, concatenated       |
+
+The header stores the SHA256 of the source text file and the SHA256 of the
+rest of the index. An index whose checksums, version or size don't match is
+recompiled and atomically replaced, readable by every user (as the umask
+allows) so that their processes share it too.
+
+BIP39 requires mnemonics and words to be compared in NFKD form, so every word
+passed in is normalized first. Japanese mnemonics are joined with an
+ideographic space, which NFKD turns into an ordinary space.
+"""
+#Python Standard Library 2.7
+import os
+import mmap
+import struct
+import bisect
+import zlib
+import hashlib
+import tempfile
+import threading
+import unicodedata
+
+LANGUAGES = ('english', 'japanese', 'korean', 'spanish', 'chinese_simplified',
+             'chinese_traditional', 'french', 'italian', 'czech', 'portuguese')
+
+WORDLIST_DIR = 'data'
+TEXT_SUFFIX = '.txt'
+INDEX_SUFFIX = '.idx'
+INDEX_MODE = 0644 #before the umask
+
+SEPARATORS = {'japanese': u'\u3000'.encode('utf-8')} #ideographic space
+DEFAULT_SEPARATOR = ' '
+
+MAGIC = 'B39W'
+VERSION = 2
+#magic, version, n_words, n_slots, blob_len, sha256 of source text, sha256 of
+#everything after the header
+HEADER_FORMAT = '<4sHHII32s32s'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+N_WORDS = 2048
+N_SLOTS = 4096 #power of 2, at most half full
+EMPTY_SLOT = 0xFFFF
+
+class CorruptIndexError(Exception):
+    """A wordlist index doesn't match its source or its own header"""
+    pass
+
+class AmbiguousLanguageError(ValueError):
+    """The words of a mnemonic belong to more than one wordlist"""
+    pass
+
+def normalize(text):
+    """Return UTF-8 encoded NFKD form of a str or unicode string
+
+    ASCII str input is returned as is, since it is already in NFKD form.
+    """
+    if isinstance(text, str):
+        try:
+            text.decode('ascii')
+            return text
+        except UnicodeDecodeError:
+            text = text.decode('utf-8')
+    return unicodedata.normalize('NFKD', text).encode('utf-8')
+
+def split_words(mnemonic):
+    """Normalize a mnemonic and split it into words"""
+    return normalize(mnemonic).split()
+
+def text_path(language, directory=WORDLIST_DIR):
+    """Path of the source text file of a language"""
+    return os.path.join(directory, language + TEXT_SUFFIX)
+
+def index_path(language, directory=WORDLIST_DIR):
+    """Path of the compiled index of a language"""
+    return os.path.join(directory, language + INDEX_SUFFIX)
+
+def _slot(word):
+    return zlib.crc32(word) & (N_SLOTS - 1)
+
+def _umask():
+    #os.umask can only be read by setting it
+    umask = os.umask(0)
+    os.umask(umask)
+    return umask
+
+def compile_index(source_path, destination_path):
+    """Compile a wordlist text file to the binary index format
+
+    Raises: ValueError if the wordlist doesn't have 2048 distinct words
+    """
+    with open(source_path, 'rb') as source:
+        text = source.read()
+    words = [normalize(line.strip()) for line in text.splitlines()
+             if line.strip()]
+    if len(words) != N_WORDS or len(set(words)) != N_WORDS:
+        raise ValueError("{0} is not a wordlist of {1} distinct words".format(
+            source_path, N_WORDS))
+
+    offsets = [0]
+    for word in words:
+        offsets.append(offsets[-1] + len(word))
+    blob = ''.join(words)
+    sorted_indices = sorted(range(N_WORDS), key=lambda index: words[index])
+    slots = [EMPTY_SLOT] * N_SLOTS
+    for index, word in enumerate(words):
+        slot = _slot(word)
+        while slots[slot] != EMPTY_SLOT:
+            slot = (slot + 1) & (N_SLOTS - 1)
+        slots[slot] = index
+
+    body = ''.join([
+        struct.pack('<{0}I'.format(N_WORDS + 1), *offsets),
+        struct.pack('<{0}H'.format(N_WORDS), *sorted_indices),
+        struct.pack('<{0}H'.format(N_SLOTS), *slots),
+        blob])
+    data = struct.pack(HEADER_FORMAT, MAGIC, VERSION, N_WORDS, N_SLOTS,
+                       len(blob), hashlib.sha256(text).digest(),
+                       hashlib.sha256(body).digest()) + body
+
+    #write atomically so concurrent readers never see a partial index
+    handle, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(destination_path) or '.', suffix=INDEX_SUFFIX)
+    try:
+        with os.fdopen(handle, 'wb') as tmp:
+            tmp.write(data)
+        #mkstemp creates the file 0600: other users couldn't share it
+        os.chmod(tmp_path, INDEX_MODE & ~_umask())
+        os.rename(tmp_path, destination_path)
+    except:
+        os.unlink(tmp_path)
+        raise
+
+class _WordIndexMap(object):
+    """Read-only word -> index mapping backed by the index hash table"""
+    __slots__ = ('_wordlist',)
+
+    def __init__(self, wordlist):
+        self._wordlist = wordlist
+
+    def __reduce__(self):
+        return (_WordIndexMap, (self._wordlist,))
+
+    def __getitem__(self, word):
+        index = self._wordlist.find(word)
+        if index < 0:
+            raise KeyError(word)
+        return index
+
+    def __contains__(self, word):
+        return self._wordlist.find(word) >= 0
+
+    def __len__(self):
+        return len(self._wordlist)
+
+class Wordlist(object):
+    """A compiled, memory-mapped wordlist
+
+    Behaves as a read-only sequence of UTF-8 NFKD words. Use open_wordlist()
+    to share one instance per language within a process.
+
+    Raises: IOError if the source text file is missing
+    """
+
+    def __init__(self, language, directory=WORDLIST_DIR):
+        self.language = language
+        self.directory = directory
+        self.separator = SEPARATORS.get(language, DEFAULT_SEPARATOR)
+        with open(text_path(language, directory), 'rb') as source:
+            source_digest = hashlib.sha256(source.read()).digest()
+        try:
+            self._map = self._open(source_digest)
+        except (IOError, OSError, CorruptIndexError):
+            compile_index(text_path(language, directory),
+                          index_path(language, directory))
+            self._map = self._open(source_digest)
+        self.index_map = _WordIndexMap(self)
+
+    def _open(self, source_digest):
+        with open(index_path(self.language, self.directory), 'rb') as index:
+            try:
+                mapped = mmap.mmap(index.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError: #empty file
+                raise CorruptIndexError()
+        if len(mapped) < HEADER_SIZE:
+            raise CorruptIndexError()
+        (magic, version, n_words, n_slots, blob_len, digest,
+         body_digest) = struct.unpack_from(HEADER_FORMAT, mapped)
+        self._offsets_at = HEADER_SIZE
+        self._sorted_at = self._offsets_at + 4 * (n_words + 1)
+        self._slots_at = self._sorted_at + 2 * n_words
+        self._blob_at = self._slots_at + 2 * n_slots
+        if (magic != MAGIC or version != VERSION or n_words != N_WORDS or
+                n_slots != N_SLOTS or digest != source_digest or
+                len(mapped) != self._blob_at + blob_len or
+                hashlib.sha256(mapped[HEADER_SIZE:]).digest() != body_digest):
+            mapped.close()
+            raise CorruptIndexError()
+        return mapped
+
+    def __reduce__(self):
+        #reopen (and share pages) rather than pickle the mapping
+        return (open_wordlist, (self.language, self.directory))
+
+    def __len__(self):
+        return N_WORDS
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += N_WORDS
+        if index < 0 or index >= N_WORDS:
+            raise IndexError(index)
+        start, end = struct.unpack_from('<II', self._map,
+                                        self._offsets_at + 4 * index)
+        return self._map[self._blob_at + start:self._blob_at + end]
+
+    def __iter__(self):
+        for index in xrange(N_WORDS):
+            yield self[index]
+
+    def __contains__(self, word):
+        return self.find(word) >= 0
+
+    def find(self, word):
+        """Get the 0-based index of a word, or -1 if it isn't in the list"""
+        word = normalize(word)
+        slot = _slot(word)
+        while True:
+            index, = struct.unpack_from('<H', self._map,
+                                        self._slots_at + 2 * slot)
+            if index == EMPTY_SLOT:
+                return -1
+            if self[index] == word:
+                return index
+            slot = (slot + 1) & (N_SLOTS - 1)
+
+    def index(self, word):
+        """Get the 0-based index of a word
+
+        Raises: ValueError if the word isn't in the list
+        """
+        index = self.find(word)
+        if index < 0:
+            raise ValueError(word)
+        return index
+
+    def sorted_index(self, position):
+        """Word index at a position of the sorted string table"""
+        index, = struct.unpack_from('<H', self._map,
+                                    self._sorted_at + 2 * position)
+        return index
+
+    def prefix_matches(self, prefix):
+        """Get indices of all words starting with prefix, in sorted word order"""
+        prefix = normalize(prefix)
+        sorted_words = _SortedWords(self)
+        start = bisect.bisect_left(sorted_words, prefix)
+        matches = []
+        for position in xrange(start, N_WORDS):
+            index = self.sorted_index(position)
+            if not self[index].startswith(prefix):
+                break
+            matches.append(index)
+        return matches
+
+    def join(self, words):
+        """Join words into a mnemonic with this language's separator"""
+        return self.separator.join(words)
+
+class _SortedWords(object):
+    """Sequence view of the sorted string table, for bisect"""
+    __slots__ = ('_wordlist',)
+
+    def __init__(self, wordlist):
+        self._wordlist = wordlist
+
+    def __len__(self):
+        return N_WORDS
+
+    def __getitem__(self, position):
+        return self._wordlist[self._wordlist.sorted_index(position)]
+
+_OPEN_WORDLISTS = {}
+_OPEN_LOCK = threading.Lock()
+
+def open_wordlist(language, directory=WORDLIST_DIR):
+    """Get the shared Wordlist of a language, compiling its index if needed
+
+    Raises: ValueError for an unknown language
+    """
+    if language not in LANGUAGES:
+        raise ValueError("Unknown language: {0}".format(language))
+    key = (language, directory)
+    wordlist = _OPEN_WORDLISTS.get(key)
+    if wordlist is None:
+        with _OPEN_LOCK:
+            wordlist = _OPEN_WORDLISTS.get(key)
+            if wordlist is None:
+                wordlist = Wordlist(language, directory)
+                _OPEN_WORDLISTS[key] = wordlist
+    return wordlist
+
+def detect_languages(mnemonic, languages=LANGUAGES, directory=WORDLIST_DIR):
+    """Get the languages whose wordlist contains every word of the mnemonic
+
+    Several languages share words (e.g. english and french, or the two
+    chinese lists), so more than one may be returned, in LANGUAGES order.
+    """
+    words = split_words(mnemonic)
+    if len(words) == 0:
+        return []
+    candidates = []
+    for language in languages:
+        wordlist = open_wordlist(language, directory)
+        if all(wordlist.find(word) >= 0 for word in words):
+            candidates.append(language)
+    return candidates
+
+def detect_language(mnemonic, languages=LANGUAGES, directory=WORDLIST_DIR):
+    """Get the only language whose wordlist contains every word of the mnemonic
+
+    Raises:
+        ValueError: If no wordlist contains all words
+        AmbiguousLanguageError: If several do
+    """
+    candidates = detect_languages(mnemonic, languages, directory)
+    if len(candidates) == 0:
+        raise ValueError("No wordlist contains every word")
+    if len(candidates) > 1:
+        raise AmbiguousLanguageError(candidates)
+    return candidates[0]